@@ -0,0 +1 @@
+"""성능 벤치마크 모음 (저장소 루트에서 python -m benchmarks.<모듈> 로 실행)"""
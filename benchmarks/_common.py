@@ -0,0 +1,89 @@
+"""
+벤치마크 공통 유틸리티
+경로 설정, 반복 측정, 결과 출력/저장
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_ROOT = os.path.join(REPO_ROOT, "src", "functions")
+
+# Function App 코드는 배포 시와 같이 src/functions를 루트로 import
+for path in (REPO_ROOT, FUNCTIONS_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> float:
+    """함수 1회 실행의 최소 소요 시간(초) 측정
+
+    min_time 이상 걸리도록 반복 횟수를 늘린 뒤 repeat번 측정하여 최솟값을 반환합니다.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def measure_memory(func: Callable[[], Any]) -> Tuple[float, float]:
+    """함수 1회 실행의 메모리 사용량 측정 (tracemalloc)
+
+    Returns:
+        (실행 후 남은 할당 KB, 실행 중 최대 추가 할당 KB)
+    """
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return (current - baseline) / 1024, (peak - baseline) / 1024
+
+
+def print_table(rows: List[Dict[str, Any]], columns: List[str]) -> None:
+    """결과를 고정폭 표로 출력"""
+    widths = {c: max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  ".join(_fmt(row.get(c)).ljust(widths[c]) for c in columns))
+
+
+def save_results(path: str, name: str, rows: List[Dict[str, Any]]) -> None:
+    """결과를 JSON으로 저장 (커밋 간 비교용)"""
+    payload = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "results": rows,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\nResults saved to {path}")
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return "" if value is None else str(value)
@@ -0,0 +1,119 @@
+"""
+알림 전송 벤치마크 - 알림별 전송 vs 병합 후 전송
+
+장애 상황처럼 소수의 디바이스가 같은 종류의 critical 알림을 폭주시키는 스트림을 만들고
+로컬 HTTP 수신 서버(LocalHttpSink)로
+- per_alert: 알림마다 요청 1건 (기존 TODO 자리에서 바로 호출하는 방식)
+- coalesced: AlertCoalescer로 (level, 메시지 지문, deviceId)별 윈도우 병합 후 그룹당 1건
+을 보내 외부 호출 수와 소요 시간을 비교합니다.
+스트림 시각은 가상 시각(storm_seconds 동안 균등 분포)이라 윈도우 마감도 가상 시각 기준입니다.
+
+실행:
+    python -m benchmarks.bench_alert_dispatch [--sizes 1000 10000] [--devices 20] [--window 30]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+
+from ._common import print_table, save_results
+
+from shared_code.alert_dispatch import AlertCoalescer, AlertDispatcher, AlertGroup
+from src.emulator import LocalHttpSink
+
+TEMPLATES = (
+    "Temperature {value:.1f} exceeds threshold 40 on sensor {sensor}",
+    "Pressure drop detected: {value:.2f} kPa (sensor {sensor})",
+    "Heartbeat missed for {value:.0f} seconds",
+)
+
+
+def storm(size: int, devices: int, storm_seconds: float, seed: int = 0) -> List[Dict[str, Any]]:
+    """(가상 시각, 알림) 스트림"""
+    rng = random.Random(seed)
+    alerts = []
+    for i in range(size):
+        template = TEMPLATES[rng.randrange(len(TEMPLATES))]
+        alerts.append({
+            "at": storm_seconds * i / size,
+            "level": "critical",
+            "deviceId": f"device-{rng.randrange(devices):04d}",
+            "message": template.format(value=rng.uniform(0, 100), sensor=rng.randrange(4)),
+        })
+    return alerts
+
+
+async def _per_alert(dispatcher: AlertDispatcher, alerts: List[Dict[str, Any]]) -> None:
+    groups = [
+        AlertGroup(alert["level"], "", alert["deviceId"], alert["message"], alert["at"], alert["at"], alert["at"], 1)
+        for alert in alerts
+    ]
+    await dispatcher.send(groups)
+
+
+async def _coalesced(dispatcher: AlertDispatcher, alerts: List[Dict[str, Any]], window: float) -> None:
+    coalescer = AlertCoalescer(window)
+    chunk = 500
+    for start in range(0, len(alerts), chunk):
+        batch = alerts[start:start + chunk]
+        now = batch[0]["at"]
+        coalescer.add_many(batch, now)
+        await dispatcher.send(coalescer.pop_due(now))
+    await dispatcher.send(coalescer.pop_all())
+
+
+def run(sizes: List[int], devices: int, window: float, storm_seconds: float, max_connections: int) -> List[Dict[str, Any]]:
+    rows = []
+    for size in sizes:
+        alerts = storm(size, devices, storm_seconds, seed=size)
+        for mode in ("per_alert", "coalesced"):
+            with LocalHttpSink() as sink:
+                async def send():
+                    dispatcher = AlertDispatcher(
+                        sink.url, rate_per_second=0, max_connections=max_connections, window_seconds=window
+                    )
+                    try:
+                        if mode == "per_alert":
+                            await _per_alert(dispatcher, alerts)
+                        else:
+                            await _coalesced(dispatcher, alerts, window)
+                    finally:
+                        await dispatcher.close()
+                    return dispatcher.stats
+
+                start = time.perf_counter()
+                stats = asyncio.run(send())
+                elapsed = time.perf_counter() - start
+                delivered = sum(payload["count"] for payload in sink.payloads())
+                if stats.failed or delivered != size:
+                    raise AssertionError(f"{mode}: delivered {delivered} of {size} alerts")
+                rows.append({
+                    "mode": mode,
+                    "alerts": size,
+                    "requests": sink.stats["accepted"],
+                    "reduction": size / max(sink.stats["accepted"], 1),
+                    "elapsed_ms": elapsed * 1000.0,
+                    "max_in_flight": sink.stats["max_in_flight"],
+                })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert dispatch benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--devices", type=int, default=20, help="알림을 보내는 디바이스 수")
+    parser.add_argument("--window", type=float, default=30.0, help="병합 윈도우 (초)")
+    parser.add_argument("--storm-seconds", type=float, default=60.0, help="가상 폭주 지속 시간 (초)")
+    parser.add_argument("--max-connections", type=int, default=4)
+    parser.add_argument("--output", help="JSON 결과 파일 경로")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.devices, args.window, args.storm_seconds, args.max_connections)
+    print_table(rows, ["mode", "alerts", "requests", "reduction", "elapsed_ms", "max_in_flight"])
+    if args.output:
+        save_results(args.output, "alert_dispatch", rows)
+
+
+if __name__ == "__main__":
+    main()
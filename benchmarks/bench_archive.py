@@ -0,0 +1,103 @@
+"""
+아카이브 벤치마크 - Parquet 기록 처리량과 파티션 프루닝 조회
+
+합성 텔레메트리를 ArchiveWriter로 기록한 뒤
+- full: 전체 스캔 후 조건 필터
+- pruned: ArchiveReader.scan(start_date, end_date, facilities, device_ids)로 파티션/row group 프루닝
+의 조회 시간과 읽은 파일 수를 비교합니다.
+
+실행:
+    python -m benchmarks.bench_archive [--events 200000] [--devices 500] [--days 7]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pyarrow.dataset as ds
+
+from ._common import print_table, save_results
+
+from shared_code.archive import ArchiveReader, ArchiveWriter
+from src.producer.synthetic import SyntheticTelemetryGenerator
+
+
+def run(events: int, devices: int, days: int, compression: str) -> List[Dict[str, Any]]:
+    # days일에 걸쳐 events건이 고르게 분포하도록 이벤트 간격 설정
+    interval_ms = max(1, int(days * 86_400_000 * devices / events))
+    documents = SyntheticTelemetryGenerator(
+        devices=devices, seed=events, interval_ms=interval_ms, start_time=datetime(2024, 1, 1)
+    ).events(events)
+
+    root = tempfile.mkdtemp(prefix="bench-archive-")
+    rows = []
+    try:
+        writer = ArchiveWriter(root, compression=compression)
+        start = time.perf_counter()
+        for offset in range(0, len(documents), 5000):
+            writer.add(documents[offset:offset + 5000])
+        writer.close()
+        elapsed = time.perf_counter() - start
+        rows.append({
+            "case": f"write ({compression})",
+            "rows": events,
+            "files": writer.stats.files_closed,
+            "ms": elapsed * 1000.0,
+            "rows_per_s": events / elapsed,
+            "mb": writer.stats.bytes_closed / (1024 * 1024),
+        })
+
+        reader = ArchiveReader(root)
+        day = (datetime(2024, 1, 1) + timedelta(days=days // 2)).strftime("%Y-%m-%d")
+        facility = documents[0]["location"]["facility"]
+        device_id = documents[0]["deviceId"]
+        expression = (
+            (ds.field("date") == day) & (ds.field("facility") == facility) & (ds.field("deviceId") == device_id)
+        )
+        cases = {
+            "full": (lambda: reader.dataset().to_table().filter(expression), len(reader.files())),
+            "pruned": (
+                lambda: reader.scan(start_date=day, end_date=day, facilities=[facility], device_ids=[device_id]),
+                len(reader.files(day, day, [facility])),
+            ),
+        }
+        expected = None
+        for name, (scan, files) in cases.items():
+            start = time.perf_counter()
+            table = scan()
+            elapsed = time.perf_counter() - start
+            if expected is not None and table.num_rows != expected:
+                raise AssertionError(f"{name}: {table.num_rows} rows (expected {expected})")
+            expected = table.num_rows
+            rows.append({
+                "case": f"scan {name}",
+                "rows": table.num_rows,
+                "files": files,
+                "ms": elapsed * 1000.0,
+                "rows_per_s": "",
+                "mb": "",
+            })
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive benchmark")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--compression", default="zstd")
+    parser.add_argument("--output", help="JSON 결과 파일 경로")
+    args = parser.parse_args()
+
+    rows = run(args.events, args.devices, args.days, args.compression)
+    print_table(rows, ["case", "rows", "files", "ms", "rows_per_s", "mb"])
+    if args.output:
+        save_results(args.output, "archive", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+코덱 벤치마크 - 인코딩/디코딩 처리량과 페이로드 크기 비교
+
+실행:
+    python -m benchmarks.bench_codecs [--events 10000] [--output codecs.json]
+"""
+import argparse
+
+from ._common import measure, print_table, save_results
+
+from shared_code.codecs import JsonCodec, available_codecs, get_codec
+from src.producer.event_producer import EventProducer
+
+
+def build_events(count: int):
+    producer = EventProducer(producer_client=None)
+    return [producer.create_sample_event(f"device-{i % 100:03d}") for i in range(count)]
+
+
+def run(count: int):
+    events = build_events(count)
+    codecs = [("json (stdlib)", JsonCodec(use_orjson=False))]
+    codecs += [(content_type, get_codec(content_type)) for content_type in available_codecs()]
+
+    rows = []
+    for name, codec in codecs:
+        payloads = [codec.encode(event) for event in events]
+        encode_s = measure(lambda: [codec.encode(event) for event in events], repeat=3)
+        decode_s = measure(lambda: [codec.decode(payload) for payload in payloads], repeat=3)
+        total_bytes = sum(len(payload) for payload in payloads)
+        rows.append({
+            "codec": name,
+            "encode_events_per_s": count / encode_s,
+            "decode_events_per_s": count / decode_s,
+            "avg_payload_bytes": total_bytes / count,
+            "total_bytes": total_bytes,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event codec benchmark")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--output", help="JSON 결과 파일 경로")
+    args = parser.parse_args()
+
+    rows = run(args.events)
+    print_table(rows, ["codec", "encode_events_per_s", "decode_events_per_s", "avg_payload_bytes"])
+    if args.output:
+        save_results(args.output, "codecs", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+압축 벤치마크 - 배치당 이벤트 수와 전송 바이트 비교
+
+실제 EventDataBatch(기본 1MB 한도)에 이벤트를 채워 AMQP 인코딩 크기 기준으로 측정합니다.
+네트워크 전송은 하지 않습니다.
+
+실행:
+    python -m benchmarks.bench_compression [--events 20000] [--events-per-message 256]
+"""
+import argparse
+import time
+
+from azure.eventhub import EventDataBatch
+
+from ._common import print_table, save_results
+
+from shared_code.codecs import available_codecs, get_codec
+from shared_code.compression import available_encodings, decode_events
+from src.producer.event_producer import EventProducer, to_event_data, to_packed_event_data
+
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+
+
+def fill_batches(messages):
+    """(EventData, 이벤트 수) 목록을 1MB 배치에 채워 배치 수/바이트 수 계산"""
+    batches = 0
+    total_bytes = 0
+    batch = EventDataBatch(max_size_in_bytes=DEFAULT_MAX_BATCH_BYTES)
+    per_batch = []
+    events_in_batch = 0
+    for event_data, count in messages:
+        try:
+            batch.add(event_data)
+        except ValueError:
+            batches += 1
+            total_bytes += batch.size_in_bytes
+            per_batch.append(events_in_batch)
+            batch = EventDataBatch(max_size_in_bytes=DEFAULT_MAX_BATCH_BYTES)
+            batch.add(event_data)
+            events_in_batch = 0
+        events_in_batch += count
+    if len(batch):
+        batches += 1
+        total_bytes += batch.size_in_bytes
+        per_batch.append(events_in_batch)
+    return batches, total_bytes, max(per_batch)
+
+
+def run(count: int, events_per_message: int):
+    producer = EventProducer(producer_client=None)
+    events = [producer.create_sample_event(f"device-{i % 100:03d}") for i in range(count)]
+
+    rows = []
+    for content_type in available_codecs():
+        codec = get_codec(content_type)
+        for encoding in [None] + available_encodings():
+            start = time.perf_counter()
+            if encoding is None:
+                messages = [(to_event_data(event, codec), 1) for event in events]
+            else:
+                messages = [
+                    (to_packed_event_data(events[i:i + events_per_message], codec, encoding),
+                     len(events[i:i + events_per_message]))
+                    for i in range(0, count, events_per_message)
+                ]
+            encode_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for event_data, _ in messages:
+                decode_events(b"".join(event_data.body), _str_properties(event_data.properties))
+            decode_s = time.perf_counter() - start
+
+            batches, total_bytes, max_per_batch = fill_batches(messages)
+            rows.append({
+                "codec": content_type,
+                "encoding": encoding or "none",
+                "events_per_batch": max_per_batch,
+                "batches": batches,
+                "wire_bytes": total_bytes,
+                "bytes_per_event": total_bytes / count,
+                "encode_events_per_s": count / encode_s,
+                "decode_events_per_s": count / decode_s,
+            })
+
+    baseline = next(r for r in rows if r["codec"] == "application/json" and r["encoding"] == "none")
+    for row in rows:
+        row["wire_bytes_vs_json"] = row["wire_bytes"] / baseline["wire_bytes"]
+    return rows
+
+
+def _str_properties(properties):
+    return {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in properties.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event compression benchmark")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--events-per-message", type=int, default=256)
+    parser.add_argument("--output", help="JSON 결과 파일 경로")
+    args = parser.parse_args()
+
+    rows = run(args.events, args.events_per_message)
+    print_table(rows, [
+        "codec", "encoding", "events_per_batch", "batches", "bytes_per_event",
+        "wire_bytes_vs_json", "encode_events_per_s", "decode_events_per_s",
+    ])
+    if args.output:
+        save_results(args.output, "compression", rows)
+
+
+if __name__ == "__main__":
+    main()
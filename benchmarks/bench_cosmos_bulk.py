@@ -0,0 +1,95 @@
+"""
+Cosmos 벌크 쓰기 벤치마크 - 출력 바인딩 방식 vs CosmosBulkWriter
+
+로컬 Cosmos 에뮬레이터에 요청당 지연(latency_ms)과 초당 RU 예산을 걸고
+- binding: 출력 바인딩과 같이 문서를 하나씩 순서대로 upsert (429면 retry-after 대기)
+- single: CosmosBulkWriter 문서별 upsert (적응형 동시성)
+- batch: CosmosBulkWriter 파티션 키별 트랜잭션 배치
+를 비교합니다.
+
+실행:
+    python -m benchmarks.bench_cosmos_bulk [--sizes 1000 10000] [--latency-ms 5] [--ru 10000 50000]
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from ._common import print_table, save_results
+
+from shared_code.cosmos_bulk import CosmosBulkWriter
+from src.emulator import LocalAsyncCosmosContainer, LocalCosmosContainer
+from src.producer.synthetic import SyntheticTelemetryGenerator
+
+
+async def _binding_write(container: LocalAsyncCosmosContainer, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    throttled = 0
+    for document in documents:
+        while True:
+            try:
+                await container.upsert_item(document)
+                break
+            except Exception as e:
+                if getattr(e, "status_code", None) != 429:
+                    raise
+                throttled += 1
+                await asyncio.sleep(float(e.headers["x-ms-retry-after-ms"]) / 1000.0)
+    return {"throttled": throttled, "concurrency": 1, "failed": 0}
+
+
+async def _bulk_write(
+    container: LocalAsyncCosmosContainer,
+    documents: List[Dict[str, Any]],
+    transactional: bool,
+    max_concurrency: int
+) -> Dict[str, Any]:
+    writer = CosmosBulkWriter(container, max_concurrency=max_concurrency, transactional=transactional)
+    result = await writer.write(documents)
+    return {"throttled": result.throttled, "concurrency": writer.limiter.peak, "failed": len(result.failed)}
+
+
+def run(sizes: List[int], latency_ms: float, ru_limits: List[Optional[float]], max_concurrency: int) -> List[Dict[str, Any]]:
+    rows = []
+    for size in sizes:
+        documents = SyntheticTelemetryGenerator(devices=100, seed=size).events(size)
+        for ru in ru_limits:
+            for mode in ("binding", "single", "batch"):
+                store = LocalCosmosContainer(ru_per_second=ru)
+                container = LocalAsyncCosmosContainer(store, latency_ms=latency_ms)
+                start = time.perf_counter()
+                if mode == "binding":
+                    stats = asyncio.run(_binding_write(container, documents))
+                else:
+                    stats = asyncio.run(_bulk_write(container, documents, mode == "batch", max_concurrency))
+                elapsed = time.perf_counter() - start
+                if store.item_count() != size or stats["failed"]:
+                    raise AssertionError(f"{mode}: wrote {store.item_count()} of {size} documents")
+                rows.append({
+                    "mode": mode,
+                    "documents": size,
+                    "ru_per_second": ru or "unlimited",
+                    "requests": container.stats["requests"],
+                    "docs_per_s": size / elapsed,
+                    "throttled": stats["throttled"],
+                    "peak_concurrency": stats["concurrency"],
+                })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cosmos bulk writer benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="요청당 네트워크 지연")
+    parser.add_argument("--ru", type=float, nargs="+", default=[0, 50000], help="초당 RU 예산 (0이면 제한 없음)")
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--output", help="JSON 결과 파일 경로")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.latency_ms, [ru or None for ru in args.ru], args.max_concurrency)
+    print_table(rows, ["mode", "documents", "ru_per_second", "requests", "docs_per_s", "throttled", "peak_concurrency"])
+    if args.output:
+        save_results(args.output, "cosmos_bulk", rows)
+
+
+if __name__ == "__main__":
+    main()
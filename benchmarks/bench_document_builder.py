@@ -0,0 +1,138 @@
+"""
+문서 빌더 벤치마크 - 기존 이벤트별 딕셔너리 구성 vs 컴파일된 DocumentBuilder
+
+기존 방식은 function_app.py에 있던 .get() 체인과 이벤트마다 datetime.utcnow().isoformat()을
+호출하던 코드를 그대로 옮긴 것입니다. 두 방식의 결과가 (processedAt 제외) 같은지도 확인합니다.
+
+실행:
+    python -m benchmarks.bench_document_builder [--sizes 100 10000 100000] [--output results.json]
+"""
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from ._common import measure, print_table, save_results
+
+from shared_code.document_builder import (
+    EVENTHUB_DOCUMENT_BUILDER,
+    HTTP_DOCUMENT_BUILDER,
+    eventhub_metadata,
+    processing_timestamp,
+)
+from src.producer.synthetic import SyntheticTelemetryGenerator
+
+
+class _Event:
+    """EventHubEvent 메타데이터 속성만 흉내낸 객체"""
+
+    def __init__(self, sequence_number: int):
+        self.partition_key = None
+        self.sequence_number = sequence_number
+        self.enqueued_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.offset = str(sequence_number * 512)
+
+
+def legacy_eventhub_documents(events: List[_Event], payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    documents = []
+    for event, event_data in zip(events, payloads):
+        partition_key = event.partition_key
+        sequence_number = event.sequence_number
+        enqueued_time = event.enqueued_time
+        documents.append({
+            "id": event_data.get("id", f"evt-{sequence_number}"),
+            "deviceId": event_data.get("deviceId", "unknown"),
+            "eventType": event_data.get("eventType", "telemetry"),
+            "timestamp": event_data.get("timestamp"),
+            "data": event_data.get("data", {}),
+            "location": event_data.get("location", {}),
+            "eventHub": {
+                "partitionKey": partition_key,
+                "sequenceNumber": sequence_number,
+                "enqueuedTime": enqueued_time.isoformat() if enqueued_time else None,
+                "offset": event.offset
+            },
+            "processedAt": datetime.utcnow().isoformat(),
+            "source": "eventhub-trigger",
+            "status": "processed"
+        })
+    return documents
+
+
+def builder_eventhub_documents(events: List[_Event], payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # 핸들러와 같이 이벤트별 메타데이터 추출 비용까지 포함
+    time_cache = {}
+    metas = [eventhub_metadata(event, time_cache) for event in events]
+    return EVENTHUB_DOCUMENT_BUILDER.build_batch(payloads, metas, {"processedAt": processing_timestamp()})
+
+
+def legacy_http_documents(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": req_body["id"],
+            "deviceId": req_body["deviceId"],
+            "eventType": req_body.get("eventType", "unknown"),
+            "timestamp": req_body.get("timestamp", datetime.utcnow().isoformat()),
+            "data": req_body.get("data", {}),
+            "location": req_body.get("location", {}),
+            "processedAt": datetime.utcnow().isoformat(),
+            "source": "http-trigger",
+            "status": "processed"
+        }
+        for req_body in payloads
+    ]
+
+
+def builder_http_documents(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return HTTP_DOCUMENT_BUILDER.build_batch(payloads)
+
+
+def _without_processed_at(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{k: v for k, v in doc.items() if k != "processedAt"} for doc in documents]
+
+
+def run(sizes: List[int]) -> List[Dict[str, Any]]:
+    rows = []
+    for size in sizes:
+        payloads = SyntheticTelemetryGenerator(devices=100, seed=size).events(size)
+        events = [_Event(i) for i in range(size)]
+
+        cases = {
+            "eventhub": (
+                lambda: legacy_eventhub_documents(events, payloads),
+                lambda: builder_eventhub_documents(events, payloads),
+            ),
+            "http": (
+                lambda: legacy_http_documents(payloads),
+                lambda: builder_http_documents(payloads),
+            ),
+        }
+        for path, (legacy, builder) in cases.items():
+            if _without_processed_at(legacy()) != _without_processed_at(builder()):
+                raise AssertionError(f"{path}: builder output differs from legacy documents")
+
+            legacy_s = measure(legacy, repeat=3)
+            builder_s = measure(builder, repeat=3)
+            rows.append({
+                "path": path,
+                "events": size,
+                "legacy_events_per_s": size / legacy_s,
+                "builder_events_per_s": size / builder_s,
+                "speedup": legacy_s / builder_s,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Document builder benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--output", help="JSON 결과 파일 경로")
+    args = parser.parse_args()
+
+    rows = run(args.sizes)
+    print_table(rows, ["path", "events", "legacy_events_per_s", "builder_events_per_s", "speedup"])
+    if args.output:
+        save_results(args.output, "document_builder", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Function 핸들러 벤치마크 - 단일 워커 기준 처리량과 단계별 비용
+
+function_app.py의 핸들러를 Functions 호스트 없이 직접 호출합니다.
+- eventhub_trigger_processor: 로컬 Event Hub 에뮬레이터에서 읽은 EventHubEvent 배치
+- http_trigger_process_event: 이벤트마다 HttpRequest 1건
+- cosmosdb_changefeed_processor: DocumentList 1건
+
+단계(stage)는 다음과 같이 나눠 측정합니다.
+    decode     본문 디코딩만 따로 실행 (eventhub)
+    bind       func.Document 변환 + Out.set()만 따로 실행
+    handler    로그를 끈 상태의 핸들러 전체
+    log        (로그를 켠 핸들러) - handler
+    transform  handler - decode - bind (핸들러 내부 문서 구성 비용)
+
+transform/log는 차이로 계산하므로 wall time과 할당량만 있고 peak 메모리는 비워 둡니다.
+
+실행:
+    python -m benchmarks.bench_functions [--sizes 1 10 100 1000 10000 100000] [--output results.json]
+"""
+import argparse
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List
+
+import azure.functions as func
+
+from ._common import measure, measure_memory, print_table, save_results
+
+import function_app
+from shared_code.aggregation import create_aggregator
+from shared_code.anomaly import AnomalyDetector
+from shared_code.codecs import get_event_properties
+from shared_code.compression import decode_events
+from shared_code.rules import create_rule_engine
+from src.emulator import CapturingOut, LocalEventHub, LocalProducerClient, to_function_events, with_context
+from src.producer.event_producer import EventProducer
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000, 100000]
+
+HANDLERS = ["eventhub", "http", "changefeed"]
+
+
+def _user_function(builder) -> Callable[..., Any]:
+    return builder.build().get_user_function()
+
+
+def make_eventhub_events(count: int, compression: str = None) -> List[func.EventHubEvent]:
+    """에뮬레이터에 이벤트를 보내고 다시 읽어 트리거가 받는 EventHubEvent 배치 생성"""
+    hub = LocalEventHub(partition_count=1)
+    producer = EventProducer(LocalProducerClient(hub), compression=compression)
+    producer.send_events_sync(producer.create_sample_events(count, seed=count))
+    return to_function_events(hub.partitions["0"].read(0, len(hub.partitions["0"])))
+
+
+def make_http_requests(count: int) -> List[func.HttpRequest]:
+    events = EventProducer(producer_client=None).create_sample_events(count, seed=count)
+    return [
+        func.HttpRequest(
+            method="POST",
+            url="/api/process-event",
+            body=json.dumps(event).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        for event in events
+    ]
+
+
+def make_document_list(count: int) -> func.DocumentList:
+    documents = _run_eventhub_handler(make_eventhub_events(count)).documents()
+    return func.DocumentList(func.Document.from_dict(doc) for doc in documents)
+
+
+def _reset_dedup():
+    """같은 배치를 반복 실행하므로 매번 중복 캐시를 비워 전체 경로를 측정"""
+    if function_app.dedup_cache is not None:
+        function_app.dedup_cache.clear()
+
+
+def _run_eventhub_handler(events: List[func.EventHubEvent]) -> CapturingOut:
+    _reset_dedup()
+    out = CapturingOut()
+    handler = _user_function(function_app.eventhub_trigger_processor)
+    handler(**with_context(handler, {"events": events, "outputDocuments": out}))
+    return out
+
+
+def _logging(enabled: bool):
+    """함수 로거 설정: 켜면 INFO를 devnull 스트림으로 포맷팅까지 수행"""
+    logger = logging.getLogger(function_app.__name__)
+    logger.handlers.clear()
+    logger.propagate = False
+    if enabled:
+        handler = logging.StreamHandler(open(os.devnull, "w"))
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.disabled = False
+    else:
+        logger.disabled = True
+
+
+def _stages(handler: str, size: int) -> Dict[str, Callable[[], Any]]:
+    """핸들러별 단계 실행 함수 (decode/bind는 없으면 생략)"""
+    if handler == "eventhub":
+        events = make_eventhub_events(size)
+        documents = _run_eventhub_handler(events).documents()
+
+        def decode():
+            return [
+                decode_events(event.get_body(), properties)
+                for event, properties in zip(events, get_event_properties(events))
+            ]
+
+        def bind():
+            out = CapturingOut()
+            out.set([func.Document.from_dict(doc) for doc in documents])
+            return out
+
+        return {"decode": decode, "bind": bind, "handler": lambda: _run_eventhub_handler(events)}
+
+    if handler == "http":
+        requests = make_http_requests(size)
+        run = _user_function(function_app.http_trigger_process_event)
+        documents = [json.loads(req.get_body()) for req in requests]
+
+        def bind():
+            outs = []
+            for doc in documents:
+                out = CapturingOut()
+                out.set(func.Document.from_dict(doc))
+                outs.append(out)
+            return outs
+
+        def handle():
+            _reset_dedup()
+            return [run(req=req, outputDocument=CapturingOut()) for req in requests]
+
+        return {"bind": bind, "handler": handle}
+
+    documents = make_document_list(size)
+    run = _user_function(function_app.cosmosdb_changefeed_processor)
+
+    def handle_changes():
+        # 같은 문서를 반복 처리하므로 매번 새 집계기/규칙/탐지기 상태로 시작
+        # (이전 실행의 윈도우에 대한 late 처리, 이미 활성인 규칙의 알림 생략 방지)
+        if function_app.aggregator is not None:
+            function_app.aggregator = create_aggregator()
+        function_app.rule_engine = create_rule_engine()
+        if function_app.anomaly_detector is not None:
+            function_app.anomaly_detector = AnomalyDetector()
+        return run(documents=documents, aggregateDocuments=CapturingOut())
+
+    return {"handler": handle_changes}
+
+
+def bench(handler: str, size: int, repeat: int) -> List[Dict[str, Any]]:
+    stages = _stages(handler, size)
+    timings: Dict[str, float] = {}
+    memory: Dict[str, tuple] = {}
+
+    _logging(False)
+    for name, stage in stages.items():
+        timings[name] = measure(stage, repeat=repeat)
+        memory[name] = measure_memory(stage)
+
+    _logging(True)
+    with_log = measure(stages["handler"], repeat=repeat)
+    with_log_memory = measure_memory(stages["handler"])
+    _logging(False)
+
+    timings["log"] = max(with_log - timings["handler"], 0.0)
+    memory["log"] = (with_log_memory[0] - memory["handler"][0], None)
+    timings["transform"] = max(
+        timings["handler"] - timings.get("decode", 0.0) - timings.get("bind", 0.0), 0.0
+    )
+    memory["transform"] = (
+        memory["handler"][0] - memory.get("decode", (0.0,))[0] - memory.get("bind", (0.0,))[0],
+        None,
+    )
+
+    rows = []
+    for stage in ("decode", "transform", "log", "bind", "handler"):
+        if stage not in timings:
+            continue
+        alloc_kb, peak_kb = memory[stage]
+        rows.append({
+            "handler": handler,
+            "batch_size": size,
+            "stage": stage,
+            "wall_ms": timings[stage] * 1000,
+            "events_per_s": size / timings[stage] if timings[stage] > 0 else None,
+            "alloc_kb": alloc_kb,
+            "peak_kb": peak_kb,
+        })
+    rows.append({
+        "handler": handler,
+        "batch_size": size,
+        "stage": "total",
+        "wall_ms": with_log * 1000,
+        "events_per_s": size / with_log,
+        "alloc_kb": with_log_memory[0],
+        "peak_kb": with_log_memory[1],
+    })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Function handler benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="배치 크기 목록")
+    parser.add_argument("--handlers", nargs="+", choices=HANDLERS, default=HANDLERS)
+    parser.add_argument("--repeat", type=int, default=3, help="단계별 반복 측정 횟수")
+    parser.add_argument("--output", help="JSON 결과 파일 경로")
+    args = parser.parse_args()
+
+    rows = []
+    for handler in args.handlers:
+        for size in args.sizes:
+            rows.extend(bench(handler, size, args.repeat))
+
+    print_table(rows, ["handler", "batch_size", "stage", "wall_ms", "events_per_s", "alloc_kb", "peak_kb"])
+    if args.output:
+        save_results(args.output, "functions", rows)
+
+
+if __name__ == "__main__":
+    main()
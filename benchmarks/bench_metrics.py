@@ -0,0 +1,103 @@
+"""
+메트릭 수집 벤치마크 - 기록 비용, 스레드 확장, 백분위수 정확도
+
+- record_latency: 이벤트마다 호출 (단일 스레드)
+- record_latencies: 배치(기본 500건)당 한 번 호출
+- threads: N개 스레드가 동시에 기록 (스레드별 샤드라 락 경합 없음)
+- snapshot: 샤드 병합 비용
+정확도는 로그 정규 분포 지연에 대해 NumPy 정확값과 p50/p90/p99/p99.9 상대 오차를 비교합니다.
+
+실행:
+    python -m benchmarks.bench_metrics [--events 200000] [--threads 4] [--batch 500]
+"""
+import argparse
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from ._common import measure, print_table, save_results
+
+from shared_code.metrics import DEFAULT_PERCENTILES, LatencyHistogram, MetricsCollector
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(events: int, threads: int, batch: int) -> List[Dict[str, Any]]:
+    rng = random.Random(events)
+    latencies = [rng.lognormvariate(2.0, 1.2) for _ in range(events)]
+    rows = []
+
+    def per_event():
+        collector = MetricsCollector()
+        for latency in latencies:
+            collector.record_latency(latency, function="eventhub", partition="0")
+
+    def per_batch():
+        collector = MetricsCollector()
+        for start in range(0, events, batch):
+            collector.record_latencies(latencies[start:start + batch], function="eventhub", partition="0")
+            collector.increment("events_processed", batch, function="eventhub", partition="0")
+
+    shared = MetricsCollector()
+
+    def threaded():
+        chunk = events // threads
+        workers = [
+            threading.Thread(
+                target=lambda part: [
+                    shared.record_latency(latency, function="eventhub", partition=part)
+                    for latency in latencies[part * chunk:(part + 1) * chunk]
+                ],
+                args=(i,),
+            )
+            for i in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    for name, func in (("record_latency", per_event), ("record_latencies", per_batch), (f"threads={threads}", threaded)):
+        elapsed = _timed(func)
+        rows.append({"case": name, "events": events, "ms": elapsed * 1000.0, "ns_per_event": elapsed / events * 1e9})
+
+    snapshot_seconds = measure(shared.snapshot, repeat=3, min_time=0.1)
+    rows.append({"case": "snapshot", "events": shared.snapshot().histogram().count, "ms": snapshot_seconds * 1000.0})
+
+    histogram = LatencyHistogram()
+    histogram.record_many(latencies)
+    estimated = histogram.percentiles()
+    for q in DEFAULT_PERCENTILES:
+        exact = float(np.percentile(latencies, q, method="inverted_cdf"))
+        rows.append({
+            "case": f"p{q:g}",
+            "exact_ms": exact,
+            "hist_ms": estimated[q],
+            "error_pct": abs(estimated[q] - exact) / exact * 100.0,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics collector benchmark")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--output", help="JSON 결과 파일 경로")
+    args = parser.parse_args()
+
+    rows = run(args.events, args.threads, args.batch)
+    print_table(rows, ["case", "events", "ms", "ns_per_event", "exact_ms", "hist_ms", "error_pct"])
+    if args.output:
+        save_results(args.output, "metrics", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,19 @@
-"""Event Hub에서 메시지 읽기"""
-from azure.eventhub import EventHubConsumerClient
-from azure.identity import DefaultAzureCredential
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-eventhub_namespace = os.getenv("EVENTHUB_NAMESPACE")
-eventhub_name = os.getenv("EVENTHUB_NAME")
+"""Event Hub에서 메시지 읽기
 
-print(f"Reading messages from Event Hub: {eventhub_name}")
-print(f"Namespace: {eventhub_namespace}")
-print("-" * 60)
+파티션별 병렬 receive_batch, 로컬 파일 체크포인트(./checkpoints), NDJSON/Parquet 일괄 출력,
+파티션별 지연(lag)과 처리량 리포트를 제공하는 대량 컨슈머(src.consumer.bulk_consumer)를 실행합니다.
+.env의 EVENTHUB_NAMESPACE, EVENTHUB_NAME을 기본값으로 사용합니다.
 
-credential = DefaultAzureCredential()
-
-# Consumer 생성
-consumer = EventHubConsumerClient(
-    fully_qualified_namespace=eventhub_namespace,
-    eventhub_name=eventhub_name,
-    consumer_group='$Default',
-    credential=credential
-)
-
-message_count = 0
-max_messages = 10
+실행 예:
+    python read_eventhub.py --from earliest --until-caught-up --format parquet --output-dir ./backfill
+    python read_eventhub.py --from latest --format none --duration 60
+    python read_eventhub.py --help
+"""
+from dotenv import load_dotenv
 
-def on_event(partition_context, event):
-    global message_count
-    if event:
-        message_count += 1
-        print(f"\n📨 Message {message_count}:")
-        print(f"   Partition: {partition_context.partition_id}")
-        print(f"   Sequence Number: {event.sequence_number}")
-        print(f"   Offset: {event.offset}")
-        print(f"   Enqueued Time: {event.enqueued_time}")
-        print(f"   Body: {event.body_as_str()}")
-        
-        if message_count >= max_messages:
-            print(f"\n✅ Read {message_count} messages. Stopping...")
-            raise KeyboardInterrupt
+load_dotenv()
 
-def on_error(partition_context, error):
-    print(f"❌ Error: {error}")
+from src.consumer.bulk_consumer import main  # noqa: E402 - .env를 먼저 읽어야 인자 기본값에 반영됨
 
-try:
-    print("Starting to receive messages (press Ctrl+C to stop)...\n")
-    with consumer:
-        consumer.receive(
-            on_event=on_event,
-            on_error=on_error,
-            starting_position="-1"  # 가장 오래된 메시지부터 읽기
-        )
-except KeyboardInterrupt:
-    print(f"\n\n✅ Total messages read: {message_count}")
-except Exception as e:
-    print(f"\n❌ Error: {e}")
+if __name__ == "__main__":
+    main()
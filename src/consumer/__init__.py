@@ -0,0 +1,17 @@
+"""Event Hub 컨슈머 모듈 (백필, 운영 트래픽 확인용 대량 수신 도구)"""
+from .bulk_consumer import BulkConsumer, PartitionStats, format_report
+from .checkpoint_store import FileCheckpointStore
+from .outputs import ArchiveOutput, NdjsonOutput, NullOutput, ParquetOutput, create_output, event_records
+
+__all__ = [
+    "BulkConsumer",
+    "PartitionStats",
+    "format_report",
+    "FileCheckpointStore",
+    "ArchiveOutput",
+    "NdjsonOutput",
+    "NullOutput",
+    "ParquetOutput",
+    "create_output",
+    "event_records",
+]
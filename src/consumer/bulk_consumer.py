@@ -0,0 +1,444 @@
+"""
+Event Hub 대량 컨슈머 - 파티션 병렬 receive_batch, 파일 체크포인트, NDJSON/Parquet/아카이브 출력
+
+파티션마다 스레드 하나가 receive_batch(partition_id=...)로 max_batch_size 단위 배치를 받고,
+flush_records건 또는 flush_interval초마다 레코드를 파일로 기록한 뒤 체크포인트를 갱신합니다
+(파일 기록 후 체크포인트 - 중단 후 재시작하면 마지막 flush 이후부터 다시 읽음).
+report_interval초마다 파티션별 수신량, 처리량, 지연(lag = 마지막 적재 sequence - 마지막 수신 sequence)을 출력합니다.
+
+실행 예:
+    # 처음부터 끝까지 백필 후 종료 (체크포인트는 ./checkpoints)
+    python -m src.consumer.bulk_consumer --from earliest --until-caught-up --format parquet --output-dir ./backfill
+    # 운영 트래픽 확인 (기록 없이 처리량/지연만 출력)
+    python -m src.consumer.bulk_consumer --from latest --format none --duration 60
+    # Event Hub 없이 로컬 에뮬레이터에 합성 이벤트를 넣고 읽기
+    python -m src.consumer.bulk_consumer --target emulator --emulator-events 200000 --from earliest --until-caught-up
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .checkpoint_store import FileCheckpointStore
+from .outputs import OUTPUT_FORMATS, EventOutput, NullOutput, create_output, event_records
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 500
+DEFAULT_PREFETCH = 1000
+DEFAULT_FLUSH_RECORDS = 50_000
+DEFAULT_FLUSH_INTERVAL = 10.0
+DEFAULT_MAX_WAIT_TIME = 1.0
+
+
+@dataclass
+class PartitionStats:
+    """파티션별 수신 통계"""
+    partition_id: str
+    events: int = 0
+    records: int = 0
+    bytes: int = 0
+    batches: int = 0
+    errors: int = 0
+    files: int = 0
+    last_sequence: Optional[int] = None
+    last_enqueued_sequence: Optional[int] = None
+    last_enqueued_time: Optional[datetime] = None
+    checkpointed_sequence: Optional[int] = None
+    caught_up: bool = False
+
+    @property
+    def lag(self) -> Optional[int]:
+        """아직 읽지 않은 이벤트 수 (이벤트를 받기 전이면 시작 위치를 모르므로 None)"""
+        if self.last_enqueued_sequence is None or self.last_sequence is None:
+            return None
+        return max(0, self.last_enqueued_sequence - self.last_sequence)
+
+
+class _PartitionState:
+    """파티션 스레드가 단독으로 사용하는 버퍼와 체크포인트 대상"""
+
+    def __init__(self, partition_id: str):
+        self.stats = PartitionStats(partition_id)
+        self.records: List[Dict[str, Any]] = []
+        self.context = None
+        self.last_event = None
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class BulkConsumer:
+    """파티션 병렬 대량 컨슈머
+
+    client는 EventHubConsumerClient 또는 LocalConsumerClient이며,
+    체크포인트 저장소는 client 쪽(EventHubConsumerClient의 checkpoint_store 인자,
+    LocalEventHub의 checkpoint_store)에 설정되어 있어야 합니다.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        output: Optional[EventOutput] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        prefetch: int = DEFAULT_PREFETCH,
+        max_wait_time: float = DEFAULT_MAX_WAIT_TIME,
+        flush_records: int = DEFAULT_FLUSH_RECORDS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        starting_position: Union[str, datetime, None] = "-1",
+        decode: bool = True
+    ):
+        """
+        Args:
+            client: 컨슈머 클라이언트 (receive_batch, get_partition_ids, close 제공)
+            output: 출력 (None이면 기록하지 않음)
+            max_batch_size: receive_batch 한 번에 받을 최대 이벤트 수
+            prefetch: 파티션별 미리 받아 둘 이벤트 수
+            max_wait_time: 이벤트가 없을 때 빈 배치 콜백 간격 (caught-up 판정, 시간 기반 flush에 사용)
+            flush_records: 버퍼 레코드가 이 수를 넘으면 파일 기록 + 체크포인트
+            flush_interval: 마지막 flush 후 이 시간(초)이 지나면 파일 기록 + 체크포인트
+            starting_position: 체크포인트가 없을 때 시작 위치 ("-1" 처음, "@latest" 끝, datetime)
+            decode: 본문을 contentType/contentEncoding에 맞게 디코딩
+        """
+        self.client = client
+        self.output = output or NullOutput()
+        self.max_batch_size = max_batch_size
+        self.prefetch = prefetch
+        self.max_wait_time = max_wait_time
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.starting_position = starting_position
+        self.decode = decode
+        self.partitions: Dict[str, _PartitionState] = {}
+        self._stopped = threading.Event()
+
+    def _on_event_batch(self, context: Any, events: List[Any]) -> None:
+        state = self.partitions[context.partition_id]
+        stats = state.stats
+        state.context = context
+
+        properties = context.last_enqueued_event_properties
+        if properties:
+            stats.last_enqueued_sequence = properties.get("sequence_number")
+            stats.last_enqueued_time = properties.get("enqueued_time")
+
+        with state.lock:
+            if events:
+                records = event_records(context.partition_id, events, self.decode)
+                state.records.extend(records)
+                state.last_event = events[-1]
+                stats.events += len(events)
+                stats.records += len(records)
+                stats.batches += 1
+                stats.bytes += sum(_body_size(event) for event in events)
+                stats.last_sequence = events[-1].sequence_number
+                stats.caught_up = False
+            else:
+                # max_wait_time 동안 받을 이벤트가 없었음 = 파티션 끝까지 읽음
+                stats.caught_up = True
+
+            if len(state.records) >= self.flush_records or (
+                state.records and time.monotonic() - state.last_flush >= self.flush_interval
+            ):
+                self._flush(state)
+
+    def _on_error(self, context: Any, error: Exception) -> None:
+        partition_id = getattr(context, "partition_id", None)
+        if partition_id in self.partitions:
+            self.partitions[partition_id].stats.errors += 1
+        logger.error(f"Receive error on partition {partition_id}: {error}")
+
+    def _flush(self, state: _PartitionState) -> None:
+        """버퍼를 파일로 기록한 뒤 체크포인트 갱신 (state.lock 보유 상태에서 호출)"""
+        if state.records:
+            if self.output.write(state.stats.partition_id, state.records):
+                state.stats.files += 1
+            state.records = []
+        if state.last_event is not None and state.context is not None:
+            state.context.update_checkpoint(state.last_event)
+            state.stats.checkpointed_sequence = state.last_event.sequence_number
+            state.last_event = None
+        state.last_flush = time.monotonic()
+
+    def _receive(self, partition_id: str) -> None:
+        try:
+            self.client.receive_batch(
+                on_event_batch=self._on_event_batch,
+                on_error=self._on_error,
+                partition_id=partition_id,
+                max_batch_size=self.max_batch_size,
+                max_wait_time=self.max_wait_time,
+                prefetch=self.prefetch,
+                starting_position=self.starting_position,
+                track_last_enqueued_event_properties=True,
+            )
+        except Exception as e:
+            self.partitions[partition_id].stats.errors += 1
+            logger.error(f"Partition {partition_id} receiver stopped: {e}", exc_info=True)
+
+    def run(
+        self,
+        partition_ids: Optional[List[str]] = None,
+        duration: Optional[float] = None,
+        max_events: Optional[int] = None,
+        until_caught_up: bool = False,
+        report_interval: float = 5.0,
+        on_report: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """파티션마다 수신 스레드를 띄우고 종료 조건까지 대기
+
+        Args:
+            partition_ids: 읽을 파티션 (None이면 전체)
+            duration: 최대 실행 시간 (초)
+            max_events: 전체 수신 이벤트 수가 이 값을 넘으면 종료
+            until_caught_up: 모든 파티션이 끝까지 읽고 max_wait_time 동안 새 이벤트가 없으면 종료
+            report_interval: 리포트 주기 (초, 0이면 종료 시에만)
+            on_report: 리포트 행 목록을 받는 콜백
+
+        Returns:
+            종료 시점의 파티션별 리포트 행
+        """
+        partition_ids = list(partition_ids or self.client.get_partition_ids())
+        self.partitions = {pid: _PartitionState(pid) for pid in partition_ids}
+        self._stopped.clear()
+        threads = [
+            threading.Thread(target=self._receive, args=(pid,), name=f"eventhub-receive-{pid}", daemon=True)
+            for pid in partition_ids
+        ]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+
+        reporter = _Reporter(self, start)
+        next_report = start + report_interval if report_interval > 0 else None
+        try:
+            while not self._stopped.is_set():
+                self._stopped.wait(0.1)
+                now = time.monotonic()
+                stats = [state.stats for state in self.partitions.values()]
+                if duration is not None and now - start >= duration:
+                    break
+                if max_events is not None and sum(s.events for s in stats) >= max_events:
+                    break
+                if until_caught_up and all(s.caught_up for s in stats):
+                    break
+                if not any(thread.is_alive() for thread in threads):
+                    break
+                if next_report is not None and now >= next_report:
+                    next_report = now + report_interval
+                    if on_report:
+                        on_report(reporter.rows(now))
+        except KeyboardInterrupt:
+            logger.info("Interrupted, flushing buffers")
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+            for state in self.partitions.values():
+                with state.lock:
+                    self._flush(state)
+
+        rows = reporter.rows(time.monotonic(), total=True)
+        if on_report:
+            on_report(rows)
+        return rows
+
+    def stop(self) -> None:
+        """수신 중지 (run()은 버퍼를 기록하고 반환)"""
+        self._stopped.set()
+        self.client.close()
+
+
+class _Reporter:
+    """직전 리포트 이후 구간 처리량과 전체 평균 계산"""
+
+    def __init__(self, consumer: BulkConsumer, start: float):
+        self.consumer = consumer
+        self.start = start
+        self._last_time = start
+        self._last_events: Dict[str, int] = {}
+        self._last_bytes: Dict[str, int] = {}
+
+    def rows(self, now: float, total: bool = False) -> List[Dict[str, Any]]:
+        rows = []
+        interval = max(now - (self.start if total else self._last_time), 1e-9)
+        for pid, state in self.consumer.partitions.items():
+            stats = state.stats
+            previous = 0 if total else self._last_events.get(pid, 0)
+            previous_bytes = 0 if total else self._last_bytes.get(pid, 0)
+            rows.append({
+                "partition": pid,
+                "events": stats.events,
+                "events_per_s": (stats.events - previous) / interval,
+                "mb_per_s": (stats.bytes - previous_bytes) / interval / (1024 * 1024),
+                "lag": stats.lag if stats.lag is not None else "-",
+                "last_sequence": stats.last_sequence if stats.last_sequence is not None else "-",
+                "checkpoint": stats.checkpointed_sequence if stats.checkpointed_sequence is not None else "-",
+                "files": stats.files,
+                "errors": stats.errors,
+            })
+            self._last_events[pid] = stats.events
+            self._last_bytes[pid] = stats.bytes
+        self._last_time = now
+        return rows
+
+
+def _body_size(event: Any) -> int:
+    body = event.body
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    # 실제 SDK의 EventData.body는 데이터 섹션 조각을 내는 제너레이터
+    return sum(len(part) for part in body)
+
+
+REPORT_COLUMNS = ["partition", "events", "events_per_s", "mb_per_s", "lag", "last_sequence", "checkpoint", "files", "errors"]
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """리포트 행을 표 문자열로 변환 (마지막 줄은 합계)"""
+    total = {
+        "partition": "total",
+        "events": sum(row["events"] for row in rows),
+        "events_per_s": sum(row["events_per_s"] for row in rows),
+        "mb_per_s": sum(row["mb_per_s"] for row in rows),
+        "lag": sum(row["lag"] for row in rows if isinstance(row["lag"], int)),
+        "last_sequence": "",
+        "checkpoint": "",
+        "files": sum(row["files"] for row in rows),
+        "errors": sum(row["errors"] for row in rows),
+    }
+
+    def cell(value: Any) -> str:
+        if isinstance(value, float):
+            return f"{value:,.2f}"
+        if isinstance(value, int):
+            return f"{value:,}"
+        return str(value)
+
+    table = [[cell(row[column]) for column in REPORT_COLUMNS] for row in rows + [total]]
+    widths = [max(len(column), *(len(line[i]) for line in table)) for i, column in enumerate(REPORT_COLUMNS)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(REPORT_COLUMNS, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(value.ljust(width) for value, width in zip(line, widths)) for line in table)
+    return "\n".join(lines)
+
+
+def parse_starting_position(value: str) -> Union[str, datetime]:
+    """--from 값 해석: earliest | latest | ISO 8601 시각"""
+    if value == "earliest":
+        return "-1"
+    if value == "latest":
+        return "@latest"
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def create_eventhub_client(namespace: str, eventhub_name: str, consumer_group: str, checkpoint_store: Any) -> Any:
+    """Managed Identity(DefaultAzureCredential) 또는 EVENTHUB_CONNECTION_STRING으로 컨슈머 생성"""
+    from azure.eventhub import EventHubConsumerClient
+
+    connection_string = os.getenv("EVENTHUB_CONNECTION_STRING")
+    if connection_string:
+        return EventHubConsumerClient.from_connection_string(
+            connection_string, consumer_group=consumer_group, eventhub_name=eventhub_name,
+            checkpoint_store=checkpoint_store,
+        )
+
+    from azure.identity import DefaultAzureCredential
+
+    return EventHubConsumerClient(
+        fully_qualified_namespace=namespace,
+        eventhub_name=eventhub_name,
+        consumer_group=consumer_group,
+        credential=DefaultAzureCredential(),
+        checkpoint_store=checkpoint_store,
+    )
+
+
+def create_emulator_client(
+    eventhub_name: str, consumer_group: str, checkpoint_store: Any, partitions: int, events: int
+) -> Any:
+    """로컬 Event Hub 에뮬레이터에 합성 텔레메트리를 채운 컨슈머 생성"""
+    from ..emulator import LocalConsumerClient, LocalEventHub, LocalProducerClient
+    from ..producer.event_producer import EventProducer
+    from ..producer.synthetic import SyntheticTelemetryGenerator
+
+    hub = LocalEventHub(eventhub_name, partition_count=partitions, checkpoint_store=checkpoint_store)
+    if events:
+        producer = EventProducer(LocalProducerClient(hub))
+        producer.send_events_sync(SyntheticTelemetryGenerator(seed=0).events(events), key_extractor="deviceId")
+    return LocalConsumerClient(hub, consumer_group)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event Hub bulk consumer")
+    parser.add_argument("--target", choices=["eventhub", "emulator"], default="eventhub")
+    parser.add_argument("--namespace", default=os.getenv("EVENTHUB_NAMESPACE"), help="정규화된 네임스페이스")
+    parser.add_argument("--eventhub", default=os.getenv("EVENTHUB_NAME", "telemetry_events"))
+    parser.add_argument("--consumer-group", default="$Default")
+    parser.add_argument("--partitions", nargs="+", help="읽을 파티션 ID (기본값 전체)")
+    parser.add_argument("--from", dest="starting_position", default="earliest",
+                        help="체크포인트가 없을 때 시작 위치: earliest | latest | ISO 8601 시각")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--prefetch", type=int, default=DEFAULT_PREFETCH)
+    parser.add_argument("--max-wait-time", type=float, default=DEFAULT_MAX_WAIT_TIME)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="ndjson")
+    parser.add_argument("--output-dir", default="./eventhub-export")
+    parser.add_argument("--no-decode", action="store_true", help="본문을 디코딩하지 않고 원문으로 기록")
+    parser.add_argument("--flush-records", type=int, default=DEFAULT_FLUSH_RECORDS)
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL)
+    parser.add_argument("--checkpoint-dir", default="./checkpoints")
+    parser.add_argument("--duration", type=float, help="최대 실행 시간 (초)")
+    parser.add_argument("--max-events", type=int, help="이 수만큼 읽으면 종료")
+    parser.add_argument("--until-caught-up", action="store_true", help="모든 파티션을 끝까지 읽으면 종료")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--emulator-partitions", type=int, default=4)
+    parser.add_argument("--emulator-events", type=int, default=100_000, help="에뮬레이터에 미리 채울 이벤트 수")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    checkpoint_store = FileCheckpointStore(args.checkpoint_dir)
+    if args.target == "emulator":
+        client = create_emulator_client(
+            args.eventhub, args.consumer_group, checkpoint_store, args.emulator_partitions, args.emulator_events
+        )
+    else:
+        if not args.namespace and not os.getenv("EVENTHUB_CONNECTION_STRING"):
+            parser.error("--namespace (EVENTHUB_NAMESPACE) or EVENTHUB_CONNECTION_STRING is required")
+        client = create_eventhub_client(args.namespace, args.eventhub, args.consumer_group, checkpoint_store)
+
+    consumer = BulkConsumer(
+        client,
+        output=create_output(args.format, args.output_dir),
+        max_batch_size=args.max_batch_size,
+        prefetch=args.prefetch,
+        max_wait_time=args.max_wait_time,
+        flush_records=args.flush_records,
+        flush_interval=args.flush_interval,
+        starting_position=parse_starting_position(args.starting_position),
+        decode=not args.no_decode,
+    )
+
+    print(f"Reading from Event Hub: {args.eventhub} ({args.target})")
+    print("-" * 60)
+
+    def report(rows):
+        print(format_report(rows))
+        print()
+
+    consumer.run(
+        partition_ids=args.partitions,
+        duration=args.duration,
+        max_events=args.max_events,
+        until_caught_up=args.until_caught_up,
+        report_interval=args.report_interval,
+        on_report=report,
+    )
+    print(f"Output: {consumer.output.files} files, {consumer.output.bytes_written / (1024 * 1024):,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+로컬 파일 기반 CheckpointStore
+
+Blob Storage 없이 EventHubConsumerClient(checkpoint_store=...)와 로컬 에뮬레이터에서
+체크포인트를 유지합니다. 파티션마다 JSON 파일 하나를 임시 파일 + rename으로 원자적으로 갱신합니다.
+
+    <directory>/<namespace>/<eventhub>/<consumer group>/checkpoint/<partition>.json
+    <directory>/<namespace>/<eventhub>/<consumer group>/ownership/<partition>.json
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List
+
+from azure.eventhub import CheckpointStore
+
+
+def _safe(name: str) -> str:
+    """경로 구성 요소로 쓸 수 있게 구분자 치환 ($Default 등은 그대로)"""
+    return name.replace("/", "_").replace("\\", "_")
+
+
+class FileCheckpointStore(CheckpointStore):
+    """파일 기반 CheckpointStore (단일 호스트 기준)
+
+    소유권은 etag가 일치하거나 새로 만드는 경우에만 부여합니다.
+    여러 프로세스가 같은 디렉터리를 공유하는 부하 분산 용도로는 원자성이 보장되지 않으므로
+    파티션을 명시적으로 나누어 읽는 도구(src.consumer.bulk_consumer)와 로컬 테스트용으로 사용합니다.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: 체크포인트 루트 디렉터리 (없으면 생성)
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, kind: str, namespace: str, eventhub_name: str, consumer_group: str, partition_id: str = "") -> str:
+        directory = os.path.join(self.directory, _safe(namespace), _safe(eventhub_name), _safe(consumer_group), kind)
+        return os.path.join(directory, f"{_safe(partition_id)}.json") if partition_id else directory
+
+    def _write(self, path: str, record: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, default=str)
+        os.replace(temp_path, path)
+
+    def _read_all(self, directory: str) -> List[Dict[str, Any]]:
+        if not os.path.isdir(directory):
+            return []
+        records = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8") as f:
+                    records.append(json.load(f))
+            except (OSError, ValueError):
+                # 쓰는 중이던 파일은 rename 전이므로 여기까지 오지 않지만, 손상된 파일은 건너뜀
+                continue
+        return records
+
+    def list_ownership(self, fully_qualified_namespace, eventhub_name, consumer_group, **kwargs):
+        return self._read_all(self._path("ownership", fully_qualified_namespace, eventhub_name, consumer_group))
+
+    def claim_ownership(self, ownership_list: Iterable[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        claimed = []
+        with self._lock:
+            for ownership in ownership_list:
+                path = self._path(
+                    "ownership", ownership["fully_qualified_namespace"], ownership["eventhub_name"],
+                    ownership["consumer_group"], ownership["partition_id"],
+                )
+                current = None
+                if os.path.exists(path):
+                    try:
+                        with open(path, encoding="utf-8") as f:
+                            current = json.load(f)
+                    except (OSError, ValueError):
+                        current = None
+                if current is not None and ownership.get("etag") not in (None, current.get("etag")):
+                    continue
+                record = dict(ownership, last_modified_time=time.time(), etag=uuid.uuid4().hex)
+                self._write(path, record)
+                claimed.append(record)
+        return claimed
+
+    def update_checkpoint(self, checkpoint: Dict[str, Any], **kwargs) -> None:
+        path = self._path(
+            "checkpoint", checkpoint["fully_qualified_namespace"], checkpoint["eventhub_name"],
+            checkpoint["consumer_group"], checkpoint["partition_id"],
+        )
+        self._write(path, dict(checkpoint))
+
+    def list_checkpoints(self, fully_qualified_namespace, eventhub_name, consumer_group, **kwargs):
+        return self._read_all(self._path("checkpoint", fully_qualified_namespace, eventhub_name, consumer_group))
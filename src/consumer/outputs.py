@@ -0,0 +1,222 @@
+"""
+컨슈머 출력 - 수신한 이벤트를 파일 단위로 일괄 기록
+
+레코드는 이벤트 메타데이터와 디코딩된 본문으로 구성되며, 압축 패킹된 EventData는
+이벤트 수만큼 레코드로 펼칩니다 (eventIndex로 구분).
+파일은 flush마다 파티션별로 하나씩 만들고, 이름에 sequence number 범위를 넣습니다.
+
+    <directory>/partition=<id>/<first seq>-<last seq>.ndjson
+    <directory>/partition=<id>/<first seq>-<last seq>.parquet
+
+archive 형식은 파티션 대신 이벤트 본문의 날짜/시설로 나눈 분석용 아카이브(shared_code.archive)에 기록합니다.
+"""
+import base64
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from ..functions.shared_code.codecs import JSON_CODEC, CodecError
+from ..functions.shared_code.compression import decode_events
+
+# 레코드 메타데이터 필드
+RECORD_FIELDS = ("partitionId", "sequenceNumber", "offset", "enqueuedTime", "partitionKey", "eventIndex")
+
+
+def _text(value: Any) -> Any:
+    """AMQP 속성의 bytes 키/값을 문자열로 변환"""
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def event_records(partition_id: str, events: List[Any], decode: bool = True) -> List[Dict[str, Any]]:
+    """EventData 목록을 출력 레코드로 변환
+
+    Args:
+        partition_id: 파티션 ID
+        events: 수신한 EventData 목록
+        decode: contentType/contentEncoding에 맞게 본문 디코딩 (False면 원문 문자열)
+
+    Returns:
+        레코드 목록 (디코딩 실패 시 body는 base64, bodyEncoding="base64")
+    """
+    records = []
+    for event in events:
+        base = {
+            "partitionId": partition_id,
+            "sequenceNumber": event.sequence_number,
+            "offset": str(event.offset),
+            "enqueuedTime": event.enqueued_time,
+            "partitionKey": _text(event.partition_key),
+        }
+        body = event.body
+        if not isinstance(body, (bytes, bytearray, memoryview)):
+            # 실제 SDK의 EventData.body는 데이터 섹션 조각을 내는 제너레이터
+            body = b"".join(body)
+        body = bytes(body)
+
+        if decode:
+            properties = {_text(k): _text(v) for k, v in (event.properties or {}).items()}
+            try:
+                payloads = decode_events(body, properties)
+            except (CodecError, ValueError, OSError, EOFError, ImportError):
+                payloads = None
+        else:
+            payloads = None
+
+        if payloads is None:
+            try:
+                records.append(dict(base, eventIndex=0, body=body.decode("utf-8")))
+            except UnicodeDecodeError:
+                records.append(dict(
+                    base, eventIndex=0, body=base64.b64encode(body).decode("ascii"), bodyEncoding="base64"
+                ))
+            continue
+        for index, payload in enumerate(payloads):
+            records.append(dict(base, eventIndex=index, body=payload))
+    return records
+
+
+class EventOutput:
+    """파티션별 레코드 묶음을 파일로 기록하는 출력 기본 클래스"""
+
+    extension = ""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.files = 0
+        self.bytes_written = 0
+
+    def _file_path(self, partition_id: str, first_sequence: int, last_sequence: int) -> str:
+        directory = os.path.join(self.directory, f"partition={partition_id}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{first_sequence:020d}-{last_sequence:020d}{self.extension}")
+
+    def write(self, partition_id: str, records: List[Dict[str, Any]]) -> Optional[str]:
+        """레코드를 새 파일 하나로 기록 (임시 파일 + rename)
+
+        Returns:
+            기록한 파일 경로 (레코드가 없으면 None)
+        """
+        if not records:
+            return None
+        path = self._file_path(partition_id, records[0]["sequenceNumber"], records[-1]["sequenceNumber"])
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        self._write_file(temp_path, records)
+        os.replace(temp_path, path)
+        self.files += 1
+        self.bytes_written += os.path.getsize(path)
+        return path
+
+    def _write_file(self, path: str, records: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+
+class NullOutput(EventOutput):
+    """기록하지 않음 (트래픽 확인, 처리량 측정용)"""
+
+    def __init__(self):
+        super().__init__("")
+
+    def write(self, partition_id: str, records: List[Dict[str, Any]]) -> Optional[str]:
+        return None
+
+
+class NdjsonOutput(EventOutput):
+    """줄마다 JSON 레코드 하나"""
+
+    extension = ".ndjson"
+
+    def _write_file(self, path: str, records: List[Dict[str, Any]]) -> None:
+        encode = JSON_CODEC.encode
+        with open(path, "wb") as f:
+            f.write(b"\n".join(encode(record) for record in records))
+            f.write(b"\n")
+
+
+class ParquetOutput(EventOutput):
+    """Parquet 파일 (본문은 JSON 문자열 컬럼)
+
+    본문 스키마는 이벤트마다 다를 수 있으므로 body는 JSON 문자열로 저장합니다.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, directory: str, compression: str = "zstd"):
+        super().__init__(directory)
+        import pyarrow  # noqa: F401 - 시작 시점에 의존성 확인
+
+        self.compression = compression
+
+    def _write_file(self, path: str, records: List[Dict[str, Any]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = {name: [record.get(name) for record in records] for name in RECORD_FIELDS}
+        columns["body"] = [
+            record["body"] if record.get("bodyEncoding") else JSON_CODEC.dumps(record["body"])
+            for record in records
+        ]
+        columns["bodyEncoding"] = [record.get("bodyEncoding", "json") for record in records]
+        schema = pa.schema([
+            ("partitionId", pa.string()),
+            ("sequenceNumber", pa.int64()),
+            ("offset", pa.string()),
+            ("enqueuedTime", pa.timestamp("us", tz="UTC")),
+            ("partitionKey", pa.string()),
+            ("eventIndex", pa.int32()),
+            ("body", pa.string()),
+            ("bodyEncoding", pa.string()),
+        ])
+        table = pa.Table.from_pydict(columns, schema=schema)
+        pq.write_table(table, path, compression=self.compression)
+
+
+class ArchiveOutput(EventOutput):
+    """날짜/시설 파티션 Parquet 아카이브 (Change Feed 아카이브와 같은 형식)
+
+    컨슈머는 write() 후 체크포인트를 갱신하므로, 호출마다 버퍼를 기록하고 파일을 닫습니다.
+    """
+
+    def __init__(self, directory: str, **writer_options: Any):
+        super().__init__(directory)
+        from ..functions.shared_code.archive import ArchiveWriter
+
+        self.writer = ArchiveWriter(directory, **writer_options)
+        self._lock = threading.Lock()
+
+    def write(self, partition_id: str, records: List[Dict[str, Any]]) -> Optional[str]:
+        documents = [record["body"] for record in records if isinstance(record.get("body"), dict)]
+        if not documents:
+            return None
+        # 파티션 스레드들이 같은 작성기를 공유
+        with self._lock:
+            stats = self.writer.stats
+            closed_bytes = stats.bytes_closed
+            self.writer.add(documents)
+            paths = self.writer.roll()
+            self.files += len(paths)
+            self.bytes_written += stats.bytes_closed - closed_bytes
+        return paths[-1] if paths else None
+
+
+OUTPUT_FORMATS = ("ndjson", "parquet", "archive", "none")
+
+
+def create_output(output_format: str, directory: Optional[str] = None) -> EventOutput:
+    """출력 형식 이름으로 EventOutput 생성
+
+    Args:
+        output_format: ndjson | parquet | archive | none
+        directory: 출력 디렉터리 (none이 아니면 필수)
+    """
+    if output_format == "none":
+        return NullOutput()
+    if not directory:
+        raise ValueError(f"Output directory is required for format '{output_format}'")
+    if output_format == "ndjson":
+        return NdjsonOutput(directory)
+    if output_format == "parquet":
+        return ParquetOutput(directory)
+    if output_format == "archive":
+        return ArchiveOutput(directory)
+    raise ValueError(f"Unknown output format '{output_format}' (expected one of {', '.join(OUTPUT_FORMATS)})")
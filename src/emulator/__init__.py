@@ -0,0 +1,38 @@
+"""로컬 에뮬레이터 모듈 (오프라인 처리량 측정 및 핸들러 구동용)"""
+from .bindings import CapturingOut, LocalContext, with_context
+from .cosmos import (
+    ChangeFeedTriggerDriver,
+    CosmosOutputBinding,
+    CosmosThrottledError,
+    LocalAsyncCosmosContainer,
+    LocalCosmosContainer,
+    LocalLeaseContainer,
+)
+from .eventhub import (
+    EventHubTriggerDriver,
+    InMemoryCheckpointStore,
+    LocalConsumerClient,
+    LocalEventHub,
+    LocalProducerClient,
+    to_function_events,
+)
+from .http_sink import LocalHttpSink
+
+__all__ = [
+    "CapturingOut",
+    "ChangeFeedTriggerDriver",
+    "CosmosOutputBinding",
+    "CosmosThrottledError",
+    "LocalAsyncCosmosContainer",
+    "LocalContext",
+    "LocalHttpSink",
+    "LocalCosmosContainer",
+    "LocalLeaseContainer",
+    "EventHubTriggerDriver",
+    "InMemoryCheckpointStore",
+    "LocalConsumerClient",
+    "LocalEventHub",
+    "LocalProducerClient",
+    "to_function_events",
+    "with_context",
+]
@@ -0,0 +1,80 @@
+"""
+Functions 바인딩 대체 객체 - 핸들러를 직접 호출할 때 출력 바인딩 값을 캡처
+"""
+import inspect
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import azure.functions as func
+
+
+class CapturingOut(func.Out):
+    """func.Out 구현 - set()으로 전달된 값을 모두 보관"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+
+    def set(self, val: Any) -> None:
+        self.values.append(val)
+
+    def get(self) -> Optional[Any]:
+        return self.values[-1] if self.values else None
+
+    def documents(self) -> List[dict]:
+        """Document / DocumentList로 설정된 값을 dict 목록으로 펼침"""
+        documents = []
+        for value in self.values:
+            items = value if isinstance(value, (list, tuple)) else [value]
+            documents.extend(dict(item) for item in items)
+        return documents
+
+
+class LocalRetryContext:
+    """context.retry_context 대체 (retry_count, max_retry_count, exception)"""
+
+    def __init__(self, retry_count: int = 0, max_retry_count: int = 0, exception: Any = None):
+        self.retry_count = retry_count
+        self.max_retry_count = max_retry_count
+        self.exception = exception
+
+
+class LocalContext(func.Context):
+    """func.Context 구현 - 핸들러를 직접 호출할 때 전달"""
+
+    def __init__(self, function_name: str = "", retry_count: int = 0, max_retry_count: int = 3):
+        self._invocation_id = str(uuid.uuid4())
+        self._function_name = function_name
+        self._retry_context = LocalRetryContext(retry_count, max_retry_count)
+        self._thread_local_storage = threading.local()
+
+    @property
+    def invocation_id(self) -> str:
+        return self._invocation_id
+
+    @property
+    def thread_local_storage(self):
+        return self._thread_local_storage
+
+    @property
+    def function_name(self) -> str:
+        return self._function_name
+
+    @property
+    def function_directory(self) -> str:
+        return ""
+
+    @property
+    def trace_context(self):
+        return None
+
+    @property
+    def retry_context(self) -> LocalRetryContext:
+        return self._retry_context
+
+
+def with_context(handler: Callable[..., Any], kwargs: Dict[str, Any], retry_count: int = 0) -> Dict[str, Any]:
+    """핸들러가 context 인자를 받으면 LocalContext를 추가한 인자 반환"""
+    if "context" in inspect.signature(handler).parameters and "context" not in kwargs:
+        kwargs = dict(kwargs, context=LocalContext(getattr(handler, "__name__", ""), retry_count))
+    return kwargs
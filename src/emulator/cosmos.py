@@ -0,0 +1,475 @@
+"""
+로컬 Cosmos DB 에뮬레이터 - 출력 바인딩 캡처 및 Change Feed 구동
+
+- 파티션 키별 문서 저장 (upsert, Functions Cosmos 출력 바인딩과 동일한 의미)
+- 쓰기당 RU 과금과 초당 RU 예산 초과 시 429 (retry-after 포함)
+- 순서가 보장되는 Change Feed (LSN)와 리스 컨테이너
+- func.Out[func.Document] / func.Out[func.DocumentList] 출력 바인딩 대체
+- azure.cosmos.aio 컨테이너 쓰기 API 대체 (LocalAsyncCosmosContainer, 벌크 writer 검증용)
+- cosmosdb_changefeed_processor를 배치 단위로 호출하는 ChangeFeedTriggerDriver
+"""
+import asyncio
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import azure.functions as func
+from azure.cosmos.exceptions import CosmosBatchOperationError, CosmosHttpResponseError
+import logging
+
+from ..functions.shared_code.codecs import JSON_CODEC
+from .bindings import with_context
+
+logger = logging.getLogger(__name__)
+
+# 쓰기 1회 기본 RU (1KB 이하 문서 upsert, 기본 인덱싱 기준 근사값)
+DEFAULT_WRITE_RU = 5.5
+# 1KB 초과분 KB당 추가 RU
+DEFAULT_RU_PER_KB = 1.0
+
+
+class CosmosThrottledError(Exception):
+    """요청 속도 초과 (HTTP 429)"""
+
+    status_code = 429
+
+    def __init__(self, retry_after_ms: float, request_charge: float):
+        super().__init__(f"Request rate is large (retry after {retry_after_ms:.0f}ms)")
+        self.retry_after_ms = retry_after_ms
+        self.request_charge = request_charge
+
+
+class LocalCosmosContainer:
+    """파티션된 로컬 Cosmos 컨테이너
+
+    ru_per_second를 지정하면 1초 단위 RU 예산을 넘는 쓰기는 CosmosThrottledError(429)로 거부됩니다.
+    모든 쓰기는 LSN을 증가시키며 Change Feed 로그에 기록됩니다.
+    """
+
+    def __init__(
+        self,
+        name: str = "events",
+        partition_key_path: str = "/deviceId",
+        ru_per_second: Optional[float] = None,
+        write_ru: float = DEFAULT_WRITE_RU,
+        ru_per_kb: float = DEFAULT_RU_PER_KB,
+        feed_ranges: int = 1
+    ):
+        """
+        Args:
+            name: 컨테이너 이름
+            partition_key_path: 파티션 키 경로 (예: /deviceId)
+            ru_per_second: 초당 RU 예산 (None이면 제한 없음)
+            write_ru: 1KB 이하 문서 쓰기 RU
+            ru_per_kb: 1KB 초과분 KB당 추가 RU
+            feed_ranges: Change Feed 범위(물리 파티션) 수 - 리스 단위
+        """
+        self.name = name
+        self.partition_key_path = partition_key_path
+        self.ru_per_second = ru_per_second
+        self.write_ru = write_ru
+        self.ru_per_kb = ru_per_kb
+        self.feed_ranges = feed_ranges
+
+        self._items: Dict[Any, Dict[str, Dict[str, Any]]] = {}
+        # Change Feed 로그: 범위별 (lsn, 파티션 키, 문서 ID, 기록 시각(monotonic))
+        self._feed: List[List[Tuple[int, Any, str, float]]] = [[] for _ in range(feed_ranges)]
+        self._lsn = 0
+        self._window_start = time.monotonic()
+        self._window_ru = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"writes": 0, "throttled": 0, "request_charge": 0.0}
+
+    def partition_key_of(self, document: Dict[str, Any]) -> Any:
+        """partition_key_path에 해당하는 값 추출 (중첩 경로 지원)"""
+        value: Any = document
+        for part in self.partition_key_path.strip("/").split("/"):
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+        return value
+
+    def feed_range_of(self, partition_key: Any) -> int:
+        return zlib.crc32(str(partition_key).encode("utf-8")) % self.feed_ranges
+
+    def request_charge(self, size_bytes: int) -> float:
+        """문서 크기에 따른 쓰기 RU"""
+        extra_kb = max(0.0, size_bytes / 1024.0 - 1.0)
+        return round(self.write_ru + extra_kb * self.ru_per_kb, 2)
+
+    def _charge(self, ru: float):
+        """초당 RU 예산 차감 (잠금 보유 상태에서 호출)"""
+        if self.ru_per_second is None:
+            return
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self._window_start = now
+            self._window_ru = 0.0
+            elapsed = 0.0
+        if self._window_ru + ru > self.ru_per_second:
+            self.stats["throttled"] += 1
+            raise CosmosThrottledError((1.0 - elapsed) * 1000.0, 0.0)
+        self._window_ru += ru
+
+    def upsert_item(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """문서 upsert
+
+        Returns:
+            시스템 속성(_lsn, _ts, _etag)이 추가된 저장 문서
+
+        Raises:
+            CosmosThrottledError: 초당 RU 예산 초과
+            ValueError: id 누락
+        """
+        return self.upsert_with_charge(body)[0]
+
+    def upsert_with_charge(self, body: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """upsert_item()과 같고 과금된 RU를 함께 반환"""
+        stored, charges = self.upsert_batch_with_charge([body])
+        return stored[0], charges[0]
+
+    def upsert_batch_with_charge(self, bodies: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[float]]:
+        """여러 문서를 원자적으로 upsert (트랜잭션 배치와 같이 전부 성공하거나 전부 실패)
+
+        Returns:
+            (저장 문서 목록, 문서별 RU 목록)
+
+        Raises:
+            CosmosThrottledError: 배치 전체 RU가 초당 예산 초과
+            ValueError: id 누락 (args[1]에 문서 인덱스)
+        """
+        for index, body in enumerate(bodies):
+            if "id" not in body:
+                raise ValueError("Document is missing required property 'id'", index)
+        encoded = [JSON_CODEC.encode(body) for body in bodies]
+        charges = [self.request_charge(len(data)) for data in encoded]
+
+        stored_documents = []
+        with self._lock:
+            self._charge(sum(charges))
+            for body, data, ru in zip(bodies, encoded, charges):
+                partition_key = self.partition_key_of(body)
+                self._lsn += 1
+                stored = JSON_CODEC.decode(data)
+                stored["_lsn"] = self._lsn
+                stored["_ts"] = int(time.time())
+                stored["_etag"] = f'"{self._lsn:016x}"'
+                self._items.setdefault(partition_key, {})[str(body["id"])] = stored
+                self._feed[self.feed_range_of(partition_key)].append(
+                    (self._lsn, partition_key, str(body["id"]), time.monotonic())
+                )
+                self.stats["writes"] += 1
+                self.stats["request_charge"] += ru
+                stored_documents.append(stored)
+        return stored_documents, charges
+
+    def read_item(self, item: str, partition_key: Any) -> Dict[str, Any]:
+        """문서 조회 (없으면 KeyError)"""
+        with self._lock:
+            return dict(self._items[partition_key][item])
+
+    def query_items(self, partition_key: Any = None) -> List[Dict[str, Any]]:
+        """파티션(또는 전체) 문서 목록"""
+        with self._lock:
+            if partition_key is not None:
+                return [dict(doc) for doc in self._items.get(partition_key, {}).values()]
+            return [dict(doc) for docs in self._items.values() for doc in docs.values()]
+
+    def item_count(self) -> int:
+        with self._lock:
+            return sum(len(docs) for docs in self._items.values())
+
+    def read_change_feed(
+        self,
+        feed_range: int,
+        continuation: int = 0,
+        max_item_count: int = 100
+    ) -> Tuple[List[Tuple[Dict[str, Any], float]], int]:
+        """continuation(LSN) 이후 변경 문서를 LSN 순서로 조회
+
+        최신 버전 모드와 같이 이후에 다시 쓰인 문서는 최신 버전만 한 번 반환합니다.
+
+        Returns:
+            ((문서, 기록 시각(monotonic)) 목록, 다음 continuation)
+        """
+        results = []
+        with self._lock:
+            log = self._feed[feed_range]
+            index = self._first_after(log, continuation)
+            next_continuation = continuation
+            while index < len(log) and len(results) < max_item_count:
+                lsn, partition_key, item_id, written_at = log[index]
+                next_continuation = lsn
+                current = self._items.get(partition_key, {}).get(item_id)
+                if current is not None and current["_lsn"] == lsn:
+                    results.append((dict(current), written_at))
+                index += 1
+        return results, next_continuation
+
+    @staticmethod
+    def _first_after(log: List[Tuple[int, Any, str, float]], lsn: int) -> int:
+        low, high = 0, len(log)
+        while low < high:
+            mid = (low + high) // 2
+            if log[mid][0] <= lsn:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def latest_lsn(self) -> int:
+        return self._lsn
+
+
+class LocalLeaseContainer:
+    """Change Feed 리스 컨테이너 (feed range별 continuation과 소유자)"""
+
+    def __init__(self, name: str = "leases"):
+        self.name = name
+        self._leases: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, lease_prefix: str, container: LocalCosmosContainer, owner: str) -> List[Dict[str, Any]]:
+        """컨테이너의 모든 feed range 리스를 owner로 획득 (없으면 생성)"""
+        leases = []
+        with self._lock:
+            for feed_range in range(container.feed_ranges):
+                lease_id = f"{lease_prefix}{container.name}..{feed_range}"
+                lease = self._leases.setdefault(lease_id, {
+                    "id": lease_id,
+                    "feedRange": feed_range,
+                    "continuationToken": 0,
+                    "owner": None,
+                })
+                lease["owner"] = owner
+                lease["timestamp"] = datetime.now(timezone.utc).isoformat()
+                leases.append(dict(lease))
+        return leases
+
+    def checkpoint(self, lease_id: str, continuation: int):
+        with self._lock:
+            lease = self._leases[lease_id]
+            lease["continuationToken"] = continuation
+            lease["timestamp"] = datetime.now(timezone.utc).isoformat()
+
+    def release(self, lease_id: str):
+        with self._lock:
+            self._leases[lease_id]["owner"] = None
+
+    def list_leases(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(lease) for lease in self._leases.values()]
+
+
+class LocalAsyncCosmosContainer:
+    """azure.cosmos.aio.ContainerProxy 쓰기 API 대체 (CosmosBulkWriter용)
+
+    upsert_item()과 execute_item_batch()를 제공하고, 요청마다 latency_ms만큼 대기합니다.
+    429는 x-ms-retry-after-ms 헤더가 있는 CosmosHttpResponseError로, 배치 안의 잘못된 문서는
+    error_index가 있는 CosmosBatchOperationError로 실제 SDK와 같이 보고합니다.
+    """
+
+    def __init__(self, container: LocalCosmosContainer, latency_ms: float = 0.0):
+        """
+        Args:
+            container: 실제 저장소 역할의 로컬 컨테이너
+            latency_ms: 요청당 네트워크 지연 (동시성 효과 확인용)
+        """
+        self.container = container
+        self.latency_ms = latency_ms
+        self.stats = {"requests": 0, "batches": 0}
+
+    async def upsert_item(self, body: Dict[str, Any], response_hook: Any = None, **kwargs: Any) -> Dict[str, Any]:
+        await self._round_trip()
+        try:
+            stored, ru = self.container.upsert_with_charge(body)
+        except CosmosThrottledError as e:
+            raise _throttled_error(e)
+        except ValueError as e:
+            raise CosmosHttpResponseError(status_code=400, message=str(e.args[0]))
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": str(ru)}, stored)
+        return stored
+
+    async def execute_item_batch(
+        self,
+        batch_operations: List[Tuple[str, Tuple[Any, ...]]],
+        partition_key: Any,
+        response_hook: Any = None,
+        **kwargs: Any
+    ) -> List[Dict[str, Any]]:
+        await self._round_trip()
+        self.stats["batches"] += 1
+        if len(batch_operations) > 100:
+            raise CosmosHttpResponseError(status_code=400, message="Batch request has more operations than what is supported")
+
+        bodies = []
+        for index, (operation, args, *_) in enumerate(batch_operations):
+            body = args[0]
+            if operation != "upsert":
+                raise CosmosHttpResponseError(status_code=400, message=f"Unsupported batch operation: {operation}")
+            if self.container.partition_key_of(body) != partition_key:
+                raise _batch_error(index, len(batch_operations), 400, "Partition key in the document does not match the batch")
+            bodies.append(body)
+
+        try:
+            stored, charges = self.container.upsert_batch_with_charge(bodies)
+        except CosmosThrottledError as e:
+            raise _throttled_error(e)
+        except ValueError as e:
+            raise _batch_error(e.args[1], len(bodies), 400, e.args[0])
+
+        results = [
+            {"statusCode": 200, "requestCharge": ru, "resourceBody": document}
+            for document, ru in zip(stored, charges)
+        ]
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": str(round(sum(charges), 2))}, results)
+        return results
+
+    async def _round_trip(self):
+        self.stats["requests"] += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+
+
+def _throttled_error(error: CosmosThrottledError) -> CosmosHttpResponseError:
+    exception = CosmosHttpResponseError(status_code=429, message=str(error))
+    exception.headers = {"x-ms-retry-after-ms": str(round(error.retry_after_ms)), "x-ms-request-charge": "0"}
+    return exception
+
+
+def _batch_error(index: int, count: int, status_code: int, message: str) -> CosmosBatchOperationError:
+    # 원인 작업 외의 작업은 424 (Failed Dependency)
+    responses = [{"statusCode": status_code if i == index else 424} for i in range(count)]
+    return CosmosBatchOperationError(
+        error_index=index,
+        headers={},
+        status_code=status_code,
+        message=message,
+        operation_responses=responses,
+    )
+
+
+class CosmosOutputBinding(func.Out):
+    """Cosmos DB 출력 바인딩 대체 (func.Out[func.Document] / func.Out[func.DocumentList])
+
+    set()으로 받은 문서를 컨테이너에 upsert합니다. Functions Cosmos 확장과 같이
+    429는 retry-after만큼 기다린 뒤 max_retries회까지 재시도합니다.
+    """
+
+    def __init__(self, container: LocalCosmosContainer, max_retries: int = 9):
+        self.container = container
+        self.max_retries = max_retries
+        self._value: Any = None
+        self.stats = {
+            "documents": 0,
+            "request_charge": 0.0,
+            "throttled": 0,
+            "throttle_wait_ms": 0.0,
+            "write_ms": 0.0,
+        }
+
+    def set(self, val: Any) -> None:
+        self._value = val
+        documents = val if isinstance(val, (list, tuple)) else [val]
+        start = time.perf_counter()
+        for document in documents:
+            self._write(document.to_dict() if isinstance(document, func.Document) else dict(document))
+        self.stats["write_ms"] += (time.perf_counter() - start) * 1000
+
+    def get(self) -> Any:
+        return self._value
+
+    def _write(self, document: Dict[str, Any]):
+        attempt = 0
+        while True:
+            try:
+                _, ru = self.container.upsert_with_charge(document)
+                self.stats["documents"] += 1
+                self.stats["request_charge"] += ru
+                return
+            except CosmosThrottledError as e:
+                attempt += 1
+                self.stats["throttled"] += 1
+                if attempt > self.max_retries:
+                    raise
+                self.stats["throttle_wait_ms"] += e.retry_after_ms
+                time.sleep(e.retry_after_ms / 1000.0)
+
+
+class ChangeFeedTriggerDriver:
+    """로컬 컨테이너의 Change Feed로 Cosmos DB 트리거 함수를 구동
+
+    리스별 continuation 이후 변경 문서를 max_items_per_invocation 단위로 읽어
+    func.DocumentList로 핸들러를 호출하고, 성공하면 리스를 갱신합니다.
+    stats["latencies_ms"]에는 문서 기록부터 핸들러 완료까지의 시간이 쌓입니다.
+    """
+
+    def __init__(
+        self,
+        container: LocalCosmosContainer,
+        leases: Optional[LocalLeaseContainer] = None,
+        max_items_per_invocation: int = 100,
+        lease_prefix: str = "",
+        owner: str = "local-host",
+        arg_name: str = "documents"
+    ):
+        self.container = container
+        self.leases = leases or LocalLeaseContainer()
+        self.max_items_per_invocation = max_items_per_invocation
+        self.lease_prefix = lease_prefix
+        self.owner = owner
+        self.arg_name = arg_name
+        self.stats: Dict[str, Any] = {"invocations": 0, "documents": 0, "failures": 0, "latencies_ms": []}
+
+    def batches(self) -> Iterator[Tuple[Dict[str, Any], func.DocumentList, List[float], int]]:
+        """리스별 남은 변경을 (리스, 문서 배치, 기록 시각, continuation)으로 반환"""
+        for lease in self.leases.acquire(self.lease_prefix, self.container, self.owner):
+            continuation = lease["continuationToken"]
+            while True:
+                changes, next_continuation = self.container.read_change_feed(
+                    lease["feedRange"], continuation, self.max_items_per_invocation
+                )
+                if next_continuation == continuation:
+                    break
+                continuation = next_continuation
+                if not changes:
+                    # 덮어쓰기로 건너뛴 구간은 리스만 진행
+                    self.leases.checkpoint(lease["id"], continuation)
+                    continue
+                documents = func.DocumentList(func.Document.from_dict(doc) for doc, _ in changes)
+                yield lease, documents, [written_at for _, written_at in changes], continuation
+
+    def run(self, handler: Any, bindings: Optional[Callable[[], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """남은 변경을 모두 처리할 때까지 핸들러 호출
+
+        Args:
+            handler: 트리거 함수 (FunctionBuilder면 사용자 함수를 꺼내서 호출)
+            bindings: 호출마다 추가 인자(출력 바인딩 등)를 만드는 함수
+
+        Returns:
+            호출/문서/실패 횟수와 문서별 지연 시간 목록
+        """
+        if hasattr(handler, "build"):
+            handler = handler.build().get_user_function()
+
+        for lease, documents, written_at, continuation in self.batches():
+            try:
+                kwargs = dict(bindings()) if bindings else {}
+                kwargs[self.arg_name] = documents
+                handler(**with_context(handler, kwargs))
+            except Exception as e:
+                # 실패한 배치는 리스를 갱신하지 않으므로 다음 run()에서 다시 전달됨
+                self.stats["failures"] += 1
+                logger.error(f"Change feed invocation failed on lease {lease['id']}: {e}")
+                break
+            completed = time.monotonic()
+            self.leases.checkpoint(lease["id"], continuation)
+            self.stats["invocations"] += 1
+            self.stats["documents"] += len(documents)
+            self.stats["latencies_ms"].extend((completed - t) * 1000 for t in written_at)
+        return self.stats
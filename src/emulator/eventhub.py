@@ -0,0 +1,716 @@
+"""
+로컬 Event Hub 에뮬레이터 - 오프라인 처리량 측정용
+
+EventProducer, read_eventhub.py, eventhub_trigger_processor가 사용하는
+EventHubProducerClient / EventHubConsumerClient API의 부분집합을 제공합니다.
+
+- 파티션별 append-only 로그 (offset = 바이트 위치, sequence number, enqueued time)
+- 메모리 또는 메모리 맵 파일(storage_dir 지정 시) 저장
+- CheckpointStore 기반 체크포인트
+- Functions EventHubEvent 배치 생성 및 트리거 구동 (EventHubTriggerDriver)
+"""
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import azure.functions as func
+from azure.eventhub import CheckpointStore, EventDataBatch, PartitionContext
+from azure.functions import meta
+import logging
+
+from .bindings import with_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAMESPACE = "localhost.servicebus.emulator"
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+
+
+def _text(value: Any) -> Any:
+    """AMQP 속성의 bytes 키/값을 문자열로 변환"""
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class LocalEventData:
+    """수신 측 EventData 대체 객체 (읽기 API만 제공)"""
+
+    __slots__ = (
+        "_body", "properties", "sequence_number", "offset", "enqueued_time",
+        "partition_key", "content_type", "_partition_log",
+    )
+
+    def __init__(
+        self,
+        body: bytes,
+        properties: Dict[str, Any],
+        sequence_number: int,
+        offset: str,
+        enqueued_time: datetime,
+        partition_key: Optional[str],
+        content_type: Optional[str],
+        partition_log: "PartitionLog" = None
+    ):
+        self._body = body
+        self.properties = properties
+        self.sequence_number = sequence_number
+        self.offset = offset
+        self.enqueued_time = enqueued_time
+        self.partition_key = partition_key
+        self.content_type = content_type
+        self._partition_log = partition_log
+
+    @property
+    def body(self) -> bytes:
+        return self._body
+
+    @property
+    def system_properties(self) -> Dict[str, Any]:
+        return {
+            "x-opt-sequence-number": self.sequence_number,
+            "x-opt-offset": self.offset,
+            "x-opt-enqueued-time": self.enqueued_time,
+            "x-opt-partition-key": self.partition_key,
+        }
+
+    def body_as_str(self, encoding: str = "UTF-8") -> str:
+        return self._body.decode(encoding)
+
+    def body_as_json(self, encoding: str = "UTF-8") -> Dict[str, Any]:
+        return json.loads(self.body_as_str(encoding))
+
+    def __repr__(self) -> str:
+        return f"LocalEventData(sequence_number={self.sequence_number}, offset={self.offset})"
+
+
+class PartitionLog:
+    """파티션 하나의 append-only 로그
+
+    본문은 연속된 바이트 영역(bytearray 또는 파일)에 이어 붙이고,
+    offset은 해당 이벤트 본문의 시작 바이트 위치입니다.
+    메타데이터(sequence number, 속성 등)는 메모리 인덱스로 유지합니다.
+    """
+
+    def __init__(self, partition_id: str, path: Optional[str] = None):
+        self.partition_id = partition_id
+        self.path = path
+        self._lock = threading.Condition()
+        self._index: List[Tuple[int, int, datetime, Optional[str], Dict[str, Any], Optional[str]]] = []
+        self._size = 0
+
+        if path:
+            self._file = open(path, "a+b")
+            self._file.seek(0, os.SEEK_END)
+            self._size = self._file.tell()
+            self._buffer = None
+            self._mmap: Optional[mmap.mmap] = None
+            self._mmap_size = 0
+        else:
+            self._file = None
+            self._buffer = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def append(self, records: Iterable[Tuple[bytes, Dict[str, Any], Optional[str], Optional[str]]]) -> int:
+        """이벤트 추가 (같은 배치는 같은 enqueued time을 가짐)
+
+        Args:
+            records: (본문, 속성, 파티션 키, content type) 목록
+
+        Returns:
+            추가된 이벤트 수
+        """
+        enqueued_time = datetime.now(timezone.utc)
+        with self._lock:
+            count = 0
+            for body, properties, partition_key, content_type in records:
+                offset = self._size
+                if self._file is not None:
+                    self._file.write(body)
+                else:
+                    self._buffer += body
+                self._size += len(body)
+                self._index.append((offset, len(body), enqueued_time, partition_key, properties, content_type))
+                count += 1
+            if self._file is not None:
+                self._file.flush()
+            self._lock.notify_all()
+        return count
+
+    def read(self, start_sequence: int, max_count: int) -> List[LocalEventData]:
+        """start_sequence부터 최대 max_count개 이벤트 조회"""
+        with self._lock:
+            entries = self._index[start_sequence:start_sequence + max_count]
+            view = self._view()
+            return [
+                LocalEventData(
+                    body=bytes(view[offset:offset + length]),
+                    properties=properties,
+                    sequence_number=start_sequence + i,
+                    offset=str(offset),
+                    enqueued_time=enqueued_time,
+                    partition_key=partition_key,
+                    content_type=content_type,
+                    partition_log=self,
+                )
+                for i, (offset, length, enqueued_time, partition_key, properties, content_type)
+                in enumerate(entries)
+            ]
+
+    def wait_for(self, sequence_number: int, timeout: Optional[float]) -> bool:
+        """sequence_number 위치에 이벤트가 들어올 때까지 대기"""
+        with self._lock:
+            return self._lock.wait_for(lambda: len(self._index) > sequence_number, timeout)
+
+    def sequence_for_offset(self, offset: int) -> int:
+        """offset(바이트 위치)에 해당하는 sequence number (이분 탐색)"""
+        low, high = 0, len(self._index)
+        while low < high:
+            mid = (low + high) // 2
+            if self._index[mid][0] < offset:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def sequence_for_time(self, enqueued_time: datetime) -> int:
+        """enqueued_time 이후 첫 이벤트의 sequence number"""
+        for sequence, entry in enumerate(self._index):
+            if entry[2] >= enqueued_time:
+                return sequence
+        return len(self._index)
+
+    def properties(self) -> Dict[str, Any]:
+        """get_partition_properties()와 같은 형태의 파티션 정보"""
+        with self._lock:
+            last = self._index[-1] if self._index else None
+            return {
+                "eventhub_name": None,
+                "id": self.partition_id,
+                "beginning_sequence_number": 0,
+                "last_enqueued_sequence_number": len(self._index) - 1,
+                "last_enqueued_offset": str(last[0]) if last else "-1",
+                "last_enqueued_time_utc": last[2] if last else None,
+                "is_empty": not self._index,
+            }
+
+    def _view(self):
+        if self._file is None:
+            return memoryview(self._buffer)
+        if self._size == 0:
+            return b""
+        if self._mmap is None or self._mmap_size != self._size:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmap_size = self._size
+        return self._mmap
+
+    def close(self):
+        if self._file is not None:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._file.close()
+
+
+class InMemoryCheckpointStore(CheckpointStore):
+    """메모리 기반 CheckpointStore (소유권은 단일 프로세스 기준으로 항상 허용)"""
+
+    def __init__(self):
+        self._checkpoints: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        self._ownership: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def list_ownership(self, fully_qualified_namespace, eventhub_name, consumer_group, **kwargs):
+        with self._lock:
+            return [
+                dict(o) for k, o in self._ownership.items()
+                if k[:3] == (fully_qualified_namespace, eventhub_name, consumer_group)
+            ]
+
+    def claim_ownership(self, ownership_list, **kwargs):
+        claimed = []
+        with self._lock:
+            for ownership in ownership_list:
+                key = (
+                    ownership["fully_qualified_namespace"], ownership["eventhub_name"],
+                    ownership["consumer_group"], ownership["partition_id"],
+                )
+                record = dict(ownership, last_modified_time=time.time(), etag=str(time.monotonic_ns()))
+                self._ownership[key] = record
+                claimed.append(record)
+        return claimed
+
+    def update_checkpoint(self, checkpoint, **kwargs):
+        key = (
+            checkpoint["fully_qualified_namespace"], checkpoint["eventhub_name"],
+            checkpoint["consumer_group"], checkpoint["partition_id"],
+        )
+        with self._lock:
+            self._checkpoints[key] = dict(checkpoint)
+
+    def list_checkpoints(self, fully_qualified_namespace, eventhub_name, consumer_group, **kwargs):
+        with self._lock:
+            return [
+                dict(c) for k, c in self._checkpoints.items()
+                if k[:3] == (fully_qualified_namespace, eventhub_name, consumer_group)
+            ]
+
+
+class LocalEventHub:
+    """파티션된 로컬 Event Hub
+
+    storage_dir를 지정하면 파티션 본문을 파일에 기록하고 mmap으로 읽습니다.
+    (인덱스는 메모리에만 있으므로 프로세스 간 공유/재시작 복구는 지원하지 않음)
+    """
+
+    def __init__(
+        self,
+        name: str = "telemetry_events",
+        partition_count: int = 4,
+        storage_dir: Optional[str] = None,
+        fully_qualified_namespace: str = DEFAULT_NAMESPACE,
+        checkpoint_store: Optional[CheckpointStore] = None
+    ):
+        self.name = name
+        self.fully_qualified_namespace = fully_qualified_namespace
+        self.created_at = datetime.now(timezone.utc)
+        self.checkpoint_store = checkpoint_store or InMemoryCheckpointStore()
+
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+        self.partitions: Dict[str, PartitionLog] = {
+            str(i): PartitionLog(
+                str(i),
+                os.path.join(storage_dir, f"{name}-{i}.log") if storage_dir else None
+            )
+            for i in range(partition_count)
+        }
+        self._round_robin = 0
+        self._lock = threading.Lock()
+
+    @property
+    def partition_ids(self) -> List[str]:
+        return list(self.partitions)
+
+    def route(self, partition_id: Optional[str] = None, partition_key: Optional[str] = None) -> str:
+        """전송 대상 파티션 결정 (ID > 키 해시 > 라운드로빈)"""
+        if partition_id is not None:
+            if partition_id not in self.partitions:
+                raise ValueError(f"Invalid partition id: {partition_id}")
+            return partition_id
+        if partition_key is not None:
+            key = partition_key if isinstance(partition_key, bytes) else str(partition_key).encode("utf-8")
+            return self.partition_ids[zlib.crc32(key) % len(self.partitions)]
+        with self._lock:
+            partition_id = self.partition_ids[self._round_robin % len(self.partitions)]
+            self._round_robin += 1
+        return partition_id
+
+    def append(self, partition_id: str, event_datas: Iterable[Any], partition_key: Optional[str] = None) -> int:
+        """azure.eventhub.EventData 목록을 파티션 로그에 추가"""
+        records = []
+        for event_data in event_datas:
+            properties = {_text(k): _text(v) for k, v in (event_data.properties or {}).items()}
+            records.append((
+                b"".join(event_data.body),
+                properties,
+                _text(partition_key or event_data.partition_key),
+                event_data.content_type,
+            ))
+        return self.partitions[partition_id].append(records)
+
+    def total_events(self) -> int:
+        return sum(len(p) for p in self.partitions.values())
+
+    def checkpoints(self, consumer_group: str) -> Dict[str, Dict[str, Any]]:
+        """파티션 ID → 체크포인트"""
+        return {
+            c["partition_id"]: c
+            for c in self.checkpoint_store.list_checkpoints(
+                self.fully_qualified_namespace, self.name, consumer_group
+            )
+        }
+
+    def close(self):
+        for partition in self.partitions.values():
+            partition.close()
+
+
+class LocalProducerClient:
+    """EventHubProducerClient 대체 (create_batch / send_batch)"""
+
+    def __init__(self, hub: LocalEventHub, max_size_in_bytes: int = DEFAULT_MAX_BATCH_BYTES):
+        self.hub = hub
+        self.eventhub_name = hub.name
+        self.max_size_in_bytes = max_size_in_bytes
+
+    def create_batch(
+        self,
+        *,
+        partition_id: Optional[str] = None,
+        partition_key: Optional[str] = None,
+        max_size_in_bytes: Optional[int] = None
+    ) -> EventDataBatch:
+        return EventDataBatch(
+            max_size_in_bytes=max_size_in_bytes or self.max_size_in_bytes,
+            partition_id=partition_id,
+            partition_key=partition_key
+        )
+
+    def send_batch(
+        self,
+        event_data_batch: Union[EventDataBatch, List[Any]],
+        *,
+        partition_id: Optional[str] = None,
+        partition_key: Optional[str] = None,
+        **kwargs: Any
+    ) -> None:
+        if isinstance(event_data_batch, EventDataBatch):
+            partition_id = event_data_batch._partition_id
+            partition_key = event_data_batch._partition_key
+            event_datas = event_data_batch._internal_events
+        else:
+            event_datas = event_data_batch
+        target = self.hub.route(partition_id, _text(partition_key))
+        self.hub.append(target, event_datas, _text(partition_key))
+
+    def get_partition_ids(self) -> List[str]:
+        return self.hub.partition_ids
+
+    def get_eventhub_properties(self) -> Dict[str, Any]:
+        return {
+            "eventhub_name": self.hub.name,
+            "created_at": self.hub.created_at,
+            "partition_ids": self.hub.partition_ids,
+        }
+
+    def get_partition_properties(self, partition_id: str) -> Dict[str, Any]:
+        return dict(self.hub.partitions[partition_id].properties(), eventhub_name=self.hub.name)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class LocalPartitionContext(PartitionContext):
+    """PartitionContext + 로컬 로그 기반 last_enqueued_event_properties"""
+
+    def __init__(self, hub: LocalEventHub, consumer_group: str, partition_id: str, track_last_enqueued: bool):
+        super().__init__(
+            hub.fully_qualified_namespace, hub.name, consumer_group, partition_id, hub.checkpoint_store
+        )
+        self._hub = hub
+        self._track_last_enqueued = track_last_enqueued
+
+    @property
+    def last_enqueued_event_properties(self) -> Optional[Dict[str, Any]]:
+        if not self._track_last_enqueued:
+            return None
+        properties = self._hub.partitions[self.partition_id].properties()
+        return {
+            "sequence_number": properties["last_enqueued_sequence_number"],
+            "offset": properties["last_enqueued_offset"],
+            "enqueued_time": properties["last_enqueued_time_utc"],
+            "retrieval_time": datetime.now(timezone.utc),
+        }
+
+    def _set_last_received(self, event: LocalEventData):
+        self._last_received_event = event
+
+
+class LocalConsumerClient:
+    """EventHubConsumerClient 대체 (receive, receive_batch)
+
+    receive()는 호출 스레드에서 모든 대상 파티션을 돌아가며 읽습니다.
+    콜백에서 발생한 예외(KeyboardInterrupt 포함)는 receive() 호출자에게 그대로 전달됩니다.
+    close()가 호출되거나, stop_at_end=True일 때 모든 파티션을 끝까지 읽으면 반환합니다.
+    """
+
+    def __init__(self, hub: LocalEventHub, consumer_group: str = "$Default", poll_interval: float = 0.05):
+        self.hub = hub
+        self.eventhub_name = hub.name
+        self.consumer_group = consumer_group
+        self.poll_interval = poll_interval
+        self._closed = threading.Event()
+
+    def receive(
+        self,
+        on_event: Callable[[PartitionContext, Optional[LocalEventData]], None],
+        *,
+        max_wait_time: Optional[float] = None,
+        partition_id: Optional[str] = None,
+        prefetch: int = 300,
+        track_last_enqueued_event_properties: bool = False,
+        starting_position: Union[str, int, datetime, Dict[str, Any], None] = None,
+        starting_position_inclusive: Union[bool, Dict[str, bool]] = False,
+        on_error: Optional[Callable[[PartitionContext, Exception], None]] = None,
+        on_partition_initialize: Optional[Callable[[PartitionContext], None]] = None,
+        on_partition_close: Optional[Callable[[PartitionContext, Any], None]] = None,
+        stop_at_end: bool = False,
+        **kwargs: Any
+    ) -> None:
+        """이벤트를 하나씩 on_event로 전달
+
+        Args:
+            stop_at_end: 에뮬레이터 전용. 모든 파티션을 끝까지 읽으면 반환
+            (나머지 인자는 EventHubConsumerClient.receive와 동일)
+        """
+        def deliver(context, events):
+            if not events:
+                on_event(context, None)
+            for event in events:
+                context._set_last_received(event)
+                on_event(context, event)
+
+        self._run(
+            deliver, prefetch, max_wait_time, partition_id, track_last_enqueued_event_properties,
+            starting_position, starting_position_inclusive, on_error, on_partition_initialize,
+            on_partition_close, stop_at_end
+        )
+
+    def receive_batch(
+        self,
+        on_event_batch: Callable[[PartitionContext, List[LocalEventData]], None],
+        *,
+        max_batch_size: int = 300,
+        max_wait_time: Optional[float] = None,
+        partition_id: Optional[str] = None,
+        prefetch: int = 300,
+        track_last_enqueued_event_properties: bool = False,
+        starting_position: Union[str, int, datetime, Dict[str, Any], None] = None,
+        starting_position_inclusive: Union[bool, Dict[str, bool]] = False,
+        on_error: Optional[Callable[[PartitionContext, Exception], None]] = None,
+        on_partition_initialize: Optional[Callable[[PartitionContext], None]] = None,
+        on_partition_close: Optional[Callable[[PartitionContext, Any], None]] = None,
+        stop_at_end: bool = False,
+        **kwargs: Any
+    ) -> None:
+        """이벤트를 최대 max_batch_size개씩 on_event_batch로 전달
+
+        max_wait_time 동안 새 이벤트가 없으면 빈 리스트로 호출합니다.
+        파티션별로 다른 스레드에서 partition_id를 지정해 동시에 호출할 수 있습니다.
+
+        Args:
+            stop_at_end: 에뮬레이터 전용. 모든 파티션을 끝까지 읽으면 반환
+            (나머지 인자는 EventHubConsumerClient.receive_batch와 동일, prefetch는 무시)
+        """
+        def deliver(context, events):
+            if events:
+                context._set_last_received(events[-1])
+            on_event_batch(context, events)
+
+        self._run(
+            deliver, max_batch_size, max_wait_time, partition_id, track_last_enqueued_event_properties,
+            starting_position, starting_position_inclusive, on_error, on_partition_initialize,
+            on_partition_close, stop_at_end
+        )
+
+    def _run(
+        self, deliver, max_batch_size, max_wait_time, partition_id, track_last_enqueued,
+        starting_position, starting_position_inclusive, on_error, on_partition_initialize,
+        on_partition_close, stop_at_end
+    ):
+        partition_ids = [partition_id] if partition_id is not None else self.hub.partition_ids
+        contexts = {
+            pid: LocalPartitionContext(self.hub, self.consumer_group, pid, track_last_enqueued)
+            for pid in partition_ids
+        }
+        positions = self._initial_positions(partition_ids, starting_position, starting_position_inclusive)
+        last_delivery = {pid: time.monotonic() for pid in partition_ids}
+
+        for context in contexts.values():
+            if on_partition_initialize:
+                on_partition_initialize(context)
+
+        try:
+            while not self._closed.is_set():
+                delivered = False
+                for pid in partition_ids:
+                    context = contexts[pid]
+                    try:
+                        events = self.hub.partitions[pid].read(positions[pid], max_batch_size)
+                    except Exception as e:
+                        if on_error:
+                            on_error(context, e)
+                            continue
+                        raise
+
+                    now = time.monotonic()
+                    if events:
+                        positions[pid] += len(events)
+                        last_delivery[pid] = now
+                        delivered = True
+                        deliver(context, events)
+                    elif max_wait_time is not None and now - last_delivery[pid] >= max_wait_time:
+                        last_delivery[pid] = now
+                        deliver(context, [])
+
+                if stop_at_end and all(
+                    positions[pid] >= len(self.hub.partitions[pid]) for pid in partition_ids
+                ):
+                    return
+                if not delivered:
+                    self._closed.wait(self.poll_interval)
+        finally:
+            for context in contexts.values():
+                if on_partition_close:
+                    on_partition_close(context, "Shutdown")
+
+    def _initial_positions(self, partition_ids, starting_position, inclusive) -> Dict[str, int]:
+        """체크포인트 → starting_position 순으로 시작 sequence number 결정"""
+        checkpoints = self.hub.checkpoints(self.consumer_group)
+        positions = {}
+        for pid in partition_ids:
+            log = self.hub.partitions[pid]
+            if pid in checkpoints:
+                positions[pid] = int(checkpoints[pid]["sequence_number"]) + 1
+                continue
+
+            position = starting_position.get(pid) if isinstance(starting_position, dict) else starting_position
+            is_inclusive = inclusive.get(pid, False) if isinstance(inclusive, dict) else inclusive
+            if position is None or position == "@latest":
+                positions[pid] = len(log)
+            elif position == "-1":
+                positions[pid] = 0
+            elif isinstance(position, datetime):
+                positions[pid] = log.sequence_for_time(position)
+            elif isinstance(position, str):
+                # 문자열은 offset(바이트 위치)으로 해석
+                sequence = log.sequence_for_offset(int(position))
+                positions[pid] = sequence if is_inclusive else sequence + 1
+            else:
+                positions[pid] = int(position) if is_inclusive else int(position) + 1
+        return positions
+
+    def get_partition_ids(self) -> List[str]:
+        return self.hub.partition_ids
+
+    def get_eventhub_properties(self) -> Dict[str, Any]:
+        return {
+            "eventhub_name": self.hub.name,
+            "created_at": self.hub.created_at,
+            "partition_ids": self.hub.partition_ids,
+        }
+
+    def get_partition_properties(self, partition_id: str) -> Dict[str, Any]:
+        return dict(self.hub.partitions[partition_id].properties(), eventhub_name=self.hub.name)
+
+    def close(self) -> None:
+        self._closed.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def to_function_events(events: List[LocalEventData], partition_id: str = "0") -> List[func.EventHubEvent]:
+    """로컬 이벤트를 cardinality="many" 트리거가 받는 EventHubEvent 목록으로 변환
+
+    Functions 호스트와 같이 모든 이벤트가 PropertiesArray/SystemPropertiesArray를 담은
+    공통 트리거 메타데이터를 공유합니다.
+    """
+    system_properties = [
+        {
+            "SequenceNumber": event.sequence_number,
+            "Offset": event.offset,
+            "PartitionKey": event.partition_key,
+            "EnqueuedTimeUtc": event.enqueued_time.isoformat(),
+        }
+        for event in events
+    ]
+    trigger_metadata = {
+        "PropertiesArray": meta.Datum(json.dumps([event.properties for event in events]), "json"),
+        "SystemPropertiesArray": meta.Datum(json.dumps(system_properties), "json"),
+        "PartitionContext": meta.Datum(json.dumps({"PartitionId": partition_id}), "json"),
+    }
+    return [
+        func.EventHubEvent(
+            body=event.body,
+            trigger_metadata=trigger_metadata,
+            enqueued_time=event.enqueued_time,
+            partition_key=event.partition_key,
+            sequence_number=event.sequence_number,
+            offset=event.offset,
+        )
+        for event in events
+    ]
+
+
+class EventHubTriggerDriver:
+    """로컬 Event Hub로 Event Hub 트리거 함수를 구동
+
+    파티션별로 체크포인트 이후 이벤트를 max_batch_size 단위로 읽어
+    EventHubEvent 배치로 변환한 뒤 핸들러를 호출하고, 성공하면 체크포인트를 갱신합니다.
+    """
+
+    def __init__(
+        self,
+        hub: LocalEventHub,
+        consumer_group: str = "$Default",
+        max_batch_size: int = 100,
+        arg_name: str = "events"
+    ):
+        self.hub = hub
+        self.consumer_group = consumer_group
+        self.max_batch_size = max_batch_size
+        self.arg_name = arg_name
+        self.stats = {"invocations": 0, "events": 0, "failures": 0}
+
+    def batches(self) -> Iterator[Tuple[PartitionContext, List[LocalEventData]]]:
+        """체크포인트 이후 남은 이벤트를 파티션별 배치로 반환 (체크포인트는 갱신하지 않음)"""
+        checkpoints = self.hub.checkpoints(self.consumer_group)
+        for pid, log in self.hub.partitions.items():
+            position = int(checkpoints[pid]["sequence_number"]) + 1 if pid in checkpoints else 0
+            while position < len(log):
+                events = log.read(position, self.max_batch_size)
+                position += len(events)
+                yield LocalPartitionContext(self.hub, self.consumer_group, pid, False), events
+
+    def run(
+        self,
+        handler: Any,
+        bindings: Optional[Callable[[], Dict[str, Any]]] = None,
+        on_invoked: Optional[Callable[[List[LocalEventData], Dict[str, Any]], None]] = None
+    ) -> Dict[str, int]:
+        """남은 이벤트를 모두 처리할 때까지 핸들러 호출
+
+        Args:
+            handler: 트리거 함수 (FunctionBuilder면 사용자 함수를 꺼내서 호출)
+            bindings: 호출마다 추가 인자(출력 바인딩 등)를 만드는 함수
+            on_invoked: 호출 후 (이벤트, 바인딩 인자)를 받는 콜백
+
+        Returns:
+            호출/이벤트/실패 횟수
+        """
+        if hasattr(handler, "build"):
+            handler = handler.build().get_user_function()
+
+        for context, events in self.batches():
+            kwargs = bindings() if bindings else {}
+            kwargs[self.arg_name] = to_function_events(events, context.partition_id)
+            try:
+                handler(**with_context(handler, kwargs))
+            except Exception as e:
+                # Functions 호스트와 같이 실패해도 체크포인트는 진행 (재시도 정책은 별도)
+                self.stats["failures"] += 1
+                logger.error(f"Trigger invocation failed on partition {context.partition_id}: {e}")
+            self.stats["invocations"] += 1
+            self.stats["events"] += len(events)
+            context.update_checkpoint(events[-1])
+            if on_invoked:
+                kwargs.pop(self.arg_name)
+                on_invoked(events, kwargs)
+        return dict(self.stats)
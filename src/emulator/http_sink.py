@@ -0,0 +1,130 @@
+"""
+로컬 HTTP 수신 서버 - 알림 웹훅(Teams, PagerDuty 등) 대체
+
+127.0.0.1의 임의 포트에서 aiohttp 서버를 전용 스레드로 실행하고, 받은 요청을 기록합니다.
+요청당 지연, 초당 허용 요청 수(초과 시 429 + Retry-After), 실패 응답 주입을 지원합니다.
+"""
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+
+class LocalHttpSink:
+    """요청을 기록하는 로컬 웹훅 수신 서버
+
+    사용 예:
+        with LocalHttpSink() as sink:
+            dispatcher = BackgroundAlertDispatcher(sink.url)
+            ...
+            assert len(sink.requests) == 1
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        max_requests_per_second: Optional[float] = None,
+        fail_first: int = 0,
+        fail_status: int = 503
+    ):
+        """
+        Args:
+            latency_ms: 응답 전 지연
+            max_requests_per_second: 초당 허용 요청 수 (초과하면 429, None이면 제한 없음)
+            fail_first: 처음 N개 요청은 fail_status로 응답
+            fail_status: 실패 응답 상태 코드
+        """
+        self.latency_ms = latency_ms
+        self.max_requests_per_second = max_requests_per_second
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests: List[Dict[str, Any]] = []
+        self.stats = {"received": 0, "accepted": 0, "throttled": 0, "failed": 0, "max_in_flight": 0}
+        self._in_flight = 0
+        self._window_start = 0.0
+        self._window_count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/alerts"
+
+    def payloads(self) -> List[Any]:
+        """수락된 요청의 JSON 본문 목록"""
+        return [request["json"] for request in self.requests]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.stats["received"] += 1
+        self._in_flight += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+        try:
+            if self.latency_ms:
+                await asyncio.sleep(self.latency_ms / 1000.0)
+            body = await request.read()
+
+            if self.stats["received"] <= self.fail_first:
+                self.stats["failed"] += 1
+                return web.Response(status=self.fail_status)
+
+            if self.max_requests_per_second:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start, self._window_count = now, 0
+                if self._window_count >= self.max_requests_per_second:
+                    self.stats["throttled"] += 1
+                    retry_after = max(0.0, 1.0 - (now - self._window_start))
+                    return web.Response(status=429, headers={"Retry-After": f"{retry_after:.3f}"})
+                self._window_count += 1
+
+            try:
+                payload = json.loads(body) if body else None
+            except ValueError:
+                payload = None
+            self.requests.append({
+                "path": request.path,
+                "headers": dict(request.headers),
+                "json": payload,
+                "received_at": time.time(),
+            })
+            self.stats["accepted"] += 1
+            return web.json_response({"status": "accepted"})
+        finally:
+            self._in_flight -= 1
+
+    async def _start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self) -> "LocalHttpSink":
+        """서버 스레드 시작 (포트가 열릴 때까지 대기)"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="local-http-sink", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self) -> "LocalHttpSink":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
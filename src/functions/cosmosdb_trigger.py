@@ -5,14 +5,22 @@ AWS DynamoDB Streams → Lambda 마이그레이션 패턴
 """
 import azure.functions as func
 import logging
-import json
 from datetime import datetime
 from typing import List
 
+from shared_code.anomaly import anomaly_enabled, create_anomaly_detector
+from shared_code.rules import create_rule_engine
+
 app = func.FunctionApp()
 
 logger = logging.getLogger(__name__)
 
+# 임계값 알림 규칙 (ALERT_RULES 설정, 한 번 컴파일 후 배치 단위 평가)
+rule_engine = create_rule_engine()
+
+# 디바이스별 이상 탐지 (ANOMALY_* 설정, ANOMALY_STATE_PATH가 있으면 재시작 후 스냅샷에서 복원)
+anomaly_detector, anomaly_snapshot = create_anomaly_detector() if anomaly_enabled() else (None, None)
+
 
 @app.cosmos_db_trigger(
     arg_name="documents",
@@ -35,10 +43,11 @@ def cosmosdb_changefeed_processor(documents: func.DocumentList) -> None:
     if documents:
         logger.info(f'Cosmos DB Change Feed triggered with {len(documents)} document(s)')
         
+        telemetry = []
         for doc in documents:
             try:
-                # 문서 데이터 추출
-                doc_dict = json.loads(doc.to_json())
+                # 문서 데이터 추출 (Document는 dict 기반이므로 JSON 왕복 불필요)
+                doc_dict = doc.to_dict()
                 
                 event_id = doc_dict.get("id", "unknown")
                 device_id = doc_dict.get("deviceId", "unknown")
@@ -56,6 +65,7 @@ def cosmosdb_changefeed_processor(documents: func.DocumentList) -> None:
                 # 비즈니스 로직 예제: 특정 이벤트 타입 처리
                 if event_type == "telemetry":
                     process_telemetry_change(doc_dict)
+                    telemetry.append(doc_dict)
                 elif event_type == "alert":
                     process_alert_change(doc_dict)
                 else:
@@ -66,6 +76,9 @@ def cosmosdb_changefeed_processor(documents: func.DocumentList) -> None:
                 
             except Exception as e:
                 logger.error(f"Error processing document change: {e}", exc_info=True)
+        
+        check_telemetry_rules(telemetry)
+        detect_anomalies(telemetry)
     else:
         logger.warning("Change Feed trigger called with no documents")
 
@@ -74,23 +87,44 @@ def process_telemetry_change(document: dict) -> None:
     """텔레메트리 이벤트 변경 처리
     
     예제:
-    - 온도 임계값 초과시 알림
     - 데이터 집계 및 통계 생성
     - 외부 시스템 연동
+    (임계값 알림은 check_telemetry_rules()에서 배치 단위로 처리)
     """
     data = document.get("data", {})
     temperature = data.get("temperature", 0)
     
-    # 임계값 체크
-    TEMP_THRESHOLD = 40
-    if temperature > TEMP_THRESHOLD:
+    logger.info(f"Telemetry processed: Temperature={temperature}°C")
+
+
+def check_telemetry_rules(documents: List[dict]) -> None:
+    """텔레메트리 배치에 임계값 규칙 적용
+    
+    모든 규칙을 배치 전체에 한 번에 평가하고, 규칙이 새로 활성화된 경우만 알림
+    """
+    evaluation = rule_engine.evaluate(documents)
+    for alert in evaluation.alerts:
         logger.warning(
-            f"Temperature threshold exceeded: {temperature}°C "
-            f"(threshold: {TEMP_THRESHOLD}°C) - Device: {document.get('deviceId')}"
+            f"Threshold exceeded [{alert['rule']}]: {alert['metric']}={alert['value']} "
+            f"(threshold: {alert['operator']} {alert['threshold']}) - Device: {alert['deviceId']}"
         )
         # TODO: Send alert to Event Grid or Queue
+
+
+def detect_anomalies(documents: List[dict]) -> None:
+    """텔레메트리 배치에서 디바이스별 이상값 탐지
     
-    logger.info(f"Telemetry processed: Temperature={temperature}°C")
+    디바이스마다 측정값의 온라인 평균/분산을 유지하고 z-score/CUSUM으로 판정
+    """
+    if anomaly_detector is None:
+        return
+    for anomaly in anomaly_detector.observe(documents):
+        logger.warning(
+            f"Anomaly detected [{anomaly['detector']}]: {anomaly['metric']}={anomaly['value']} "
+            f"(mean: {anomaly['mean']}, std: {anomaly['std']}, z: {anomaly['zScore']}) - Device: {anomaly['deviceId']}"
+        )
+    if anomaly_snapshot is not None:
+        anomaly_snapshot.maybe_save()
 
 
 def process_alert_change(document: dict) -> None:
@@ -130,7 +164,7 @@ def cosmosdb_ai_enrichment_trigger(documents: func.DocumentList) -> None:
         
         for doc in documents:
             try:
-                doc_dict = json.loads(doc.to_json())
+                doc_dict = doc.to_dict()
                 event_id = doc_dict.get("id")
                 
                 logger.info(f"AI Enrichment processing: {event_id}")
@@ -3,16 +3,24 @@ Azure Functions - Event Hub Trigger
 Event Hub → Function → Cosmos DB 플로우
 AWS Lambda + Kinesis 마이그레이션 패턴
 """
+import atexit
 import azure.functions as func
 import logging
 import json
-from datetime import datetime
 from typing import List
 
+from shared_code.alert_dispatch import create_alert_dispatcher
+from shared_code.document_builder import EVENTHUB_DOCUMENT_BUILDER, eventhub_metadata, processing_timestamp
+
 app = func.FunctionApp()
 
 logger = logging.getLogger(__name__)
 
+# 알림 병합 + 속도 제한 전송 (ALERT_WEBHOOK_URL이 없으면 None)
+alert_dispatcher = create_alert_dispatcher()
+if alert_dispatcher is not None:
+    atexit.register(alert_dispatcher.close, 10.0)
+
 
 @app.event_hub_message_trigger(
     arg_name="events",
@@ -35,7 +43,9 @@ def eventhub_trigger_processor(
     """
     logger.info(f'EventHub trigger function processing {len(events)} events')
     
-    processed_documents = []
+    payloads = []
+    metas = []
+    time_cache = {}
     
     for event in events:
         try:
@@ -44,36 +54,8 @@ def eventhub_trigger_processor(
             event_data = json.loads(event_body)
             
             # 메타데이터 추출
-            partition_key = event.partition_key
-            sequence_number = event.sequence_number
-            enqueued_time = event.enqueued_time
-            
-            # 문서 생성
-            document = {
-                "id": event_data.get("id", f"evt-{sequence_number}"),
-                "deviceId": event_data.get("deviceId", "unknown"),
-                "eventType": event_data.get("eventType", "telemetry"),
-                "timestamp": event_data.get("timestamp"),
-                "data": event_data.get("data", {}),
-                "location": event_data.get("location", {}),
-                # Event Hub 메타데이터
-                "eventHub": {
-                    "partitionKey": partition_key,
-                    "sequenceNumber": sequence_number,
-                    "enqueuedTime": enqueued_time.isoformat() if enqueued_time else None,
-                    "offset": event.offset
-                },
-                "processedAt": datetime.utcnow().isoformat(),
-                "source": "eventhub-trigger",
-                "status": "processed"
-            }
-            
-            processed_documents.append(document)
-            
-            logger.info(
-                f"Processed event {document['id']} from partition {partition_key}, "
-                f"sequence {sequence_number}"
-            )
+            payloads.append(event_data)
+            metas.append(eventhub_metadata(event, time_cache))
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse event JSON: {e}")
@@ -82,6 +64,11 @@ def eventhub_trigger_processor(
             logger.error(f"Error processing event: {e}", exc_info=True)
             continue
     
+    # 문서 생성 (공유 스키마, 처리 시각은 배치당 한 번)
+    processed_documents = EVENTHUB_DOCUMENT_BUILDER.build_batch(
+        payloads, metas, {"processedAt": processing_timestamp()}
+    )
+    
     # Cosmos DB에 일괄 저장 (Output Binding)
     if processed_documents:
         output_docs = [func.Document.from_dict(doc) for doc in processed_documents]
@@ -102,9 +89,11 @@ def eventhub_alert_processor(events: List[func.EventHubEvent]) -> None:
     알림 이벤트 처리 (로깅, 외부 API 호출 등)
     
     Cosmos DB 저장 없이 실시간 알림만 처리하는 예제
+    외부 알림은 (level, 메시지 지문, deviceId)별로 윈도우 동안 병합해 그룹당 1건만 전송
     """
     logger.info(f'Alert processor received {len(events)} alerts')
     
+    alerts = []
     for event in events:
         try:
             event_body = event.get_body().decode('utf-8')
@@ -116,11 +105,19 @@ def eventhub_alert_processor(events: List[func.EventHubEvent]) -> None:
             
             if alert_level == "critical":
                 logger.critical(f"CRITICAL ALERT: {message}")
-                # TODO: 외부 알림 시스템 호출 (PagerDuty, Teams 등)
             elif alert_level == "warning":
                 logger.warning(f"WARNING: {message}")
             else:
                 logger.info(f"INFO: {message}")
+            alerts.append(alert_data)
                 
         except Exception as e:
             logger.error(f"Error processing alert: {e}")
+    
+    # 외부 알림 시스템 전송은 백그라운드 스레드가 윈도우가 닫힐 때 수행
+    if alert_dispatcher is not None and alerts:
+        queued = alert_dispatcher.submit(alerts)
+        logger.info(
+            f"Queued {queued} alerts for dispatch "
+            f"({alert_dispatcher.coalescer.pending} open groups)"
+        )
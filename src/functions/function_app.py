@@ -8,11 +8,96 @@ import json
 from datetime import datetime
 from typing import List
 
+from shared_code.aggregation import aggregation_enabled, create_aggregator, flush_on_exit
+from shared_code.anomaly import anomaly_enabled, create_anomaly_detector
+from shared_code.archive import archive_enabled, create_archive_writer
+from shared_code.batch_logging import BatchLogger
+from shared_code.codecs import get_event_properties
+from shared_code.cosmos_bulk import BackgroundBulkWriter, cosmos_write_mode
+from shared_code.dedup import (
+    create_dedup_cache,
+    dedup_enabled,
+    dedup_key_mode,
+    document_key,
+    is_retry,
+    sequence_key,
+)
+from shared_code.document_builder import HTTP_DOCUMENT_BUILDER, eventhub_metadata, processing_timestamp
+from shared_code.metrics import MetricsCollector
+from shared_code.metrics_export import (
+    PROMETHEUS_CONTENT_TYPE,
+    create_metrics_flusher,
+    instance_name,
+    metrics_enabled,
+    prometheus_text,
+)
+from shared_code.parallel import BatchProcessor
+from shared_code.rules import create_rule_engine
+from shared_code.tracing import (
+    CHANGEFEED_STAGES,
+    PROCESS_STAGES,
+    TRACE_FIELD,
+    TRACE_ID_PROPERTY,
+    apply_traces,
+    record_stage_latencies,
+    start_trace,
+    trace_timestamp,
+)
+
 # Function App 인스턴스 생성 (단 하나만!)
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
 logger = logging.getLogger(__name__)
 
+# 대용량 배치 디코딩/변환기 (EVENT_PARALLEL_* 설정, 풀은 워커 프로세스 수명 동안 재사용)
+batch_processor = BatchProcessor()
+
+# 중복 이벤트 캐시 (DEDUP_* 설정, 워커 프로세스 내 최근 처리 키)
+dedup_cache = create_dedup_cache() if dedup_enabled() else None
+DEDUP_KEY_MODE = dedup_key_mode()
+
+# 디바이스/시설별 윈도우 집계 (AGGREGATION_* 설정, 열린 윈도우는 워커 프로세스 메모리에 유지)
+aggregator = create_aggregator() if aggregation_enabled() else None
+
+
+def _write_final_aggregates(documents: List[dict]) -> None:
+    """종료 시 닫은 윈도우를 aggregates 컨테이너에 직접 저장 (출력 바인딩은 호출 밖에서 쓸 수 없음)"""
+    writer = BackgroundBulkWriter.from_settings(container_name="aggregates", partition_key_path="/partitionKey")
+    try:
+        result = writer.write(documents, timeout=30)
+    finally:
+        writer.close()
+    if result.failed:
+        raise RuntimeError(f"{len(result.failed)} of {result.documents} aggregate documents failed to write")
+
+
+if aggregator is not None:
+    flush_on_exit(aggregator, _write_final_aggregates)
+
+# 임계값 알림 규칙 (ALERT_RULES 설정, 한 번 컴파일 후 배치 단위 평가)
+rule_engine = create_rule_engine()
+
+# 디바이스별 이상 탐지 (ANOMALY_* 설정, ANOMALY_STATE_PATH가 있으면 재시작 후 스냅샷에서 복원)
+anomaly_detector, anomaly_snapshot = create_anomaly_detector() if anomaly_enabled() else (None, None)
+
+# 날짜/시설 파티션 Parquet 아카이브 (ARCHIVE_PATH가 있을 때만, 파일은 크기/시간 기준으로 롤링)
+archive_writer = create_archive_writer() if archive_enabled() else None
+
+
+def _metric_gauges():
+    """/metrics와 Application Insights에 함께 내보낼 현재 상태 게이지"""
+    if dedup_cache is None:
+        return {}
+    return {f"dedup_{name}": value for name, value in dedup_cache.gauges().items()}
+
+
+# 배치 단위 집계 메트릭 (METRICS_* 설정, /metrics로 노출하고 Application Insights에 주기적으로 전송)
+metrics = MetricsCollector() if metrics_enabled() else None
+metrics_flusher = create_metrics_flusher(metrics, gauges=_metric_gauges) if metrics is not None else None
+
+# Cosmos 직접 벌크 쓰기 (COSMOS_WRITE_MODE=bulk일 때만, 클라이언트는 워커 프로세스 수명 동안 재사용)
+cosmos_writer = BackgroundBulkWriter.from_settings() if cosmos_write_mode() == "bulk" else None
+
 # ============================================================
 # HTTP Triggers
 # ============================================================
@@ -69,7 +154,7 @@ def http_trigger_process_event(
     
     Endpoint: POST /api/process-event
     """
-    logger.info('HTTP trigger function processing request')
+    logger.debug('HTTP trigger function processing request')
     
     try:
         # 요청 본문 파싱
@@ -90,23 +175,17 @@ def http_trigger_process_event(
                 mimetype="application/json"
             )
         
-        # Cosmos DB 문서 준비
-        document = {
-            "id": req_body["id"],
-            "deviceId": req_body["deviceId"],
-            "eventType": req_body.get("eventType", "unknown"),
-            "timestamp": req_body.get("timestamp", datetime.utcnow().isoformat()),
-            "data": req_body.get("data", {}),
-            "location": req_body.get("location", {}),
-            "processedAt": datetime.utcnow().isoformat(),
-            "source": "http-trigger",
-            "status": "processed"
-        }
+        # 클라이언트 재전송은 프로세스 내 중복 캐시로 거르지 않음
+        # 출력 바인딩 실패는 함수 반환 후에 일어나므로, 키를 먼저 기록하면 재시도가 "중복"으로 처리되어 이벤트가 유실됨
+        # 같은 id는 출력 바인딩 upsert로 덮어쓰므로 멱등
+        
+        # Cosmos DB 문서 준비 (공유 스키마, timestamp 기본값은 처리 시각)
+        document = HTTP_DOCUMENT_BUILDER.build(req_body)
         
         # Cosmos DB에 출력 (Output Binding)
         outputDocument.set(func.Document.from_dict(document))
         
-        logger.info(f"Successfully processed event {document['id']} from device {document['deviceId']}")
+        logger.info("Processed event %s from device %s", document["id"], document["deviceId"])
         
         # 성공 응답
         response_data = {
@@ -123,14 +202,14 @@ def http_trigger_process_event(
         )
         
     except ValueError as e:
-        logger.error(f"Invalid JSON in request body: {e}")
+        logger.error("Invalid JSON in request body: %s", e)
         return func.HttpResponse(
             json.dumps({"error": "Invalid JSON format"}),
             status_code=400,
             mimetype="application/json"
         )
     except Exception as e:
-        logger.error(f"Error processing event: {e}", exc_info=True)
+        logger.error("Error processing event: %s", e, exc_info=True)
         return func.HttpResponse(
             json.dumps({"error": "Internal server error"}),
             status_code=500,
@@ -161,6 +240,24 @@ def health_check(req: func.HttpRequest) -> func.HttpResponse:
     )
 
 
+@app.route(route="metrics", methods=["GET"])
+def metrics_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Prometheus Metrics Endpoint
+    이 워커 프로세스의 배치 카운터와 지연 히스토그램 (instance 레이블로 인스턴스 구분)
+    
+    Endpoint: GET /metrics (함수 키는 code 쿼리 또는 x-functions-key 헤더)
+    """
+    if metrics is None:
+        return func.HttpResponse("Metrics are disabled (METRICS_ENABLED=false)", status_code=404)
+    
+    return func.HttpResponse(
+        prometheus_text(metrics.snapshot(), labels={"instance": instance_name()}, gauges=_metric_gauges()),
+        status_code=200,
+        headers={"Content-Type": PROMETHEUS_CONTENT_TYPE}
+    )
+
+
 # ============================================================
 # Event Hub Triggers
 # ============================================================
@@ -179,7 +276,8 @@ def health_check(req: func.HttpRequest) -> func.HttpResponse:
 )
 def eventhub_trigger_processor(
     events: List[func.EventHubEvent],
-    outputDocuments: func.Out[func.DocumentList]
+    outputDocuments: func.Out[func.DocumentList],
+    context: func.Context
 ) -> None:
     """
     Event Hub Trigger Function
@@ -187,62 +285,107 @@ def eventhub_trigger_processor(
     """
     # events를 리스트로 변환 (단일 이벤트일 수도 있음)
     event_list = events if isinstance(events, list) else [events]
-    logger.info(f'EventHub trigger function processing {len(event_list)} events')
+    batch = BatchLogger(logger, "eventhub_trigger_processor", metrics=metrics)
+    batch.count("received", len(event_list))
+    partition_id = _partition_id(event_list)
     
-    processed_documents = []
+    time_cache = {}
+    records = []
+    traces = {}
+    for event, properties in zip(event_list, get_event_properties(event_list)):
+        meta = eventhub_metadata(event, time_cache)
+        records.append((event.get_body(), properties, meta))
+        batch.record_event(partition_id, event.sequence_number)
+        # Producer가 샘플링한 메시지만 trace ID를 가짐 (TRACE_SAMPLE_RATE)
+        if TRACE_ID_PROPERTY in properties:
+            traces[meta["sequenceNumber"]] = start_trace(properties, meta["enqueuedTime"])
     
-    for event in event_list:
-        try:
-            # 이벤트 데이터 파싱
-            event_body = event.get_body().decode('utf-8')
-            event_data = json.loads(event_body)
-            
-            # 메타데이터 추출
-            partition_key = event.partition_key
-            sequence_number = event.sequence_number
-            enqueued_time = event.enqueued_time
-            
-            # 문서 생성
-            document = {
-                "id": event_data.get("id", f"evt-{sequence_number}"),
-                "deviceId": event_data.get("deviceId", "unknown"),
-                "eventType": event_data.get("eventType", "telemetry"),
-                "timestamp": event_data.get("timestamp"),
-                "data": event_data.get("data", {}),
-                "location": event_data.get("location", {}),
-                # Event Hub 메타데이터
-                "eventHub": {
-                    "partitionKey": partition_key,
-                    "sequenceNumber": sequence_number,
-                    "enqueuedTime": enqueued_time.isoformat() if enqueued_time else None,
-                    "offset": event.offset
-                },
-                "processedAt": datetime.utcnow().isoformat(),
-                "source": "eventhub-trigger",
-                "status": "processed"
-            }
-            
-            processed_documents.append(document)
-            
-            logger.info(
-                f"Processed event {document['id']} from partition {partition_key}, "
-                f"sequence {sequence_number}"
-            )
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse event JSON: {e}")
-            continue
-        except Exception as e:
-            logger.error(f"Error processing event: {e}", exc_info=True)
-            continue
+    # 중복 제거 (DEDUP_KEY=sequence는 디코딩 전에 제거)
+    # 재시도 호출은 이전 시도가 저장되지 않았을 수 있으므로 걸러내지 않고 키만 기록
+    retry = is_retry(context)
+    if dedup_cache is not None and DEDUP_KEY_MODE == "sequence":
+        def record_key(record):
+            return sequence_key(partition_id, record[2]["sequenceNumber"])
+        
+        if retry:
+            dedup_cache.add_many(record_key(record) for record in records)
+        else:
+            records, duplicates = dedup_cache.filter(records, record_key)
+            batch.count("duplicates", duplicates)
     
-    # Cosmos DB에 일괄 저장 (Output Binding)
-    if processed_documents:
-        output_docs = [func.Document.from_dict(doc) for doc in processed_documents]
-        outputDocuments.set(output_docs)
-        logger.info(f"Successfully saved {len(processed_documents)} documents to Cosmos DB")
-    else:
+    # 디코딩(contentType 코덱, contentEncoding 압축 해제) + 문서 생성
+    # 큰 배치는 EVENT_PARALLEL_MODE에 따라 디바이스 그룹별로 병렬 처리 (처리 시각은 배치당 한 번)
+    processed_at = processing_timestamp()
+    with batch.stage("transform"):
+        result = batch_processor.process(records, {"processedAt": processed_at})
+    processed_documents = result.documents
+    batch.extra["mode"] = result.mode
+    
+    for sequence_number, kind, message in result.errors:
+        batch.count(kind)
+        logger.error("Failed to process event (sequence %s): %s", sequence_number, message)
+    
+    if dedup_cache is not None and DEDUP_KEY_MODE == "id":
+        if retry:
+            dedup_cache.add_many(document_key(doc) for doc in processed_documents)
+        else:
+            processed_documents, duplicates = dedup_cache.filter(processed_documents, document_key)
+            batch.count("duplicates", duplicates)
+    
+    # 캐시 조회/중복/제거/Bloom 오탐 누적 증가분 (dedup_* 카운터, 캐시는 파티션 공용이므로 function 레이블만)
+    if dedup_cache is not None and metrics is not None:
+        metrics.update(
+            {f"dedup_{name}": value for name, value in dedup_cache.counter_deltas().items()},
+            function="eventhub_trigger_processor"
+        )
+    
+    # 추적 대상 문서에 처리 시각 기록, produce→enqueue→process 지연은 배치당 한 번 히스토그램에 반영
+    if traces:
+        traced = apply_traces(processed_documents, traces, processed_at + "Z")
+        record_stage_latencies(metrics, traced, PROCESS_STAGES, "eventhub_trigger_processor", partition_id)
+        batch.count("traced", len(traced))
+    
+    # 이벤트별 상세 로그는 샘플링 (EVENT_LOG_SAMPLE_RATE)
+    for document in processed_documents:
+        batch.detail(
+            "Processed event %s from partition %s, sequence %s",
+            document["id"], document["eventHub"]["partitionKey"], document["eventHub"]["sequenceNumber"]
+        )
+    
+    batch.count("documents", len(processed_documents))
+    
+    if not processed_documents:
         logger.warning("No documents to save")
+    elif cosmos_writer is not None:
+        # Cosmos DB에 직접 벌크 저장 (동시성/429 재시도를 writer가 조절)
+        with batch.stage("write"):
+            write = cosmos_writer.write(processed_documents)
+        batch.count("written", write.written)
+        batch.count("throttled", write.throttled)
+        batch.extra["request_charge"] = round(write.request_charge, 2)
+        batch.extra["concurrency"] = write.concurrency
+        if write.failed:
+            batch.count("write_failed", len(write.failed))
+            for document_id, status, message in write.failed[:10]:
+                logger.error("Failed to write document %s (status %s): %s", document_id, status, message)
+            batch.emit()
+            # 호출을 실패시켜 host.json 재시도 정책으로 다시 처리 (upsert이므로 성공한 문서는 덮어씀)
+            raise RuntimeError(f"{len(write.failed)} of {write.documents} documents failed to write to Cosmos DB")
+    else:
+        # Cosmos DB에 일괄 저장 (Output Binding)
+        with batch.stage("bind"):
+            output_docs = [func.Document.from_dict(doc) for doc in processed_documents]
+            outputDocuments.set(output_docs)
+    
+    batch.emit()
+
+
+def _partition_id(event_list: List[func.EventHubEvent]):
+    """트리거 메타데이터의 PartitionContext에서 파티션 ID 조회 (없으면 None)"""
+    if not event_list:
+        return None
+    context = (event_list[0].metadata or {}).get("PartitionContext")
+    return context.get("PartitionId") if isinstance(context, dict) else None
 
 
 # ============================================================
@@ -257,42 +400,111 @@ def eventhub_trigger_processor(
     lease_container_name="leases",
     create_lease_container_if_not_exists=False
 )
-def cosmosdb_changefeed_processor(documents: func.DocumentList) -> None:
+@app.cosmos_db_output(
+    arg_name="aggregateDocuments",
+    database_name="serverless_db",
+    container_name="aggregates",
+    connection="CosmosDBConnection"
+)
+def cosmosdb_changefeed_processor(
+    documents: func.DocumentList,
+    aggregateDocuments: func.Out[func.DocumentList]
+) -> None:
     """
     Cosmos DB Change Feed Trigger Function
     Cosmos DB 변경사항을 실시간으로 감지하고 처리
+    디바이스/시설별 윈도우 집계를 누적하고 닫힌 윈도우를 aggregates 컨테이너에 저장
+    변경 문서는 분석용 Parquet 아카이브에도 기록
     """
-    if documents:
-        logger.info(f'Cosmos DB Change Feed triggered with {len(documents)} document(s)')
-        
-        for doc in documents:
-            try:
-                # 문서 데이터 추출
-                doc_dict = json.loads(doc.to_json())
-                
-                event_id = doc_dict.get("id", "unknown")
-                device_id = doc_dict.get("deviceId", "unknown")
-                event_type = doc_dict.get("eventType", "unknown")
-                
-                logger.info(
-                    f"Change detected - ID: {event_id}, "
-                    f"Device: {device_id}, Type: {event_type}"
-                )
-                
-                # 비즈니스 로직: 특정 이벤트 타입 처리
-                if event_type == "telemetry":
-                    data = doc_dict.get("data", {})
-                    temperature = data.get("temperature", 0)
-                    
-                    # 임계값 체크
-                    TEMP_THRESHOLD = 40
-                    if temperature > TEMP_THRESHOLD:
-                        logger.warning(
-                            f"Temperature threshold exceeded: {temperature}°C "
-                            f"(threshold: {TEMP_THRESHOLD}°C) - Device: {device_id}"
-                        )
-                
-            except Exception as e:
-                logger.error(f"Error processing document change: {e}", exc_info=True)
-    else:
+    if not documents:
         logger.warning("Change Feed trigger called with no documents")
+        return
+    
+    batch = BatchLogger(logger, "cosmosdb_changefeed_processor", metrics=metrics)
+    batch.count("received", len(documents))
+    received_at = trace_timestamp()
+    
+    telemetry = []
+    changed = []
+    traced = []
+    for doc in documents:
+        try:
+            # 문서 데이터 추출 (Document는 dict 기반이므로 JSON 왕복 불필요)
+            doc_dict = doc.to_dict()
+            changed.append(doc_dict)
+            
+            # 추적 대상 문서는 Change Feed 수신 시각 기록 (컨테이너에 다시 쓰지 않음, 아카이브 사본에는 포함)
+            trace = doc_dict.get(TRACE_FIELD)
+            if trace:
+                trace["changeFeedAt"] = received_at
+                traced.append(trace)
+            
+            event_id = doc_dict.get("id", "unknown")
+            device_id = doc_dict.get("deviceId", "unknown")
+            event_type = doc_dict.get("eventType", "unknown")
+            
+            batch.detail("Change detected - ID: %s, Device: %s, Type: %s", event_id, device_id, event_type)
+            
+            # 비즈니스 로직: 텔레메트리는 배치 단위 규칙 평가 대상
+            if event_type == "telemetry":
+                telemetry.append(doc_dict)
+            
+        except Exception as e:
+            batch.count("failed")
+            logger.error("Error processing document change: %s", e, exc_info=True)
+    
+    # 윈도우 집계는 배치 전체를 한 번에 누적 (집계기 락은 호출당 한 번)
+    if aggregator is not None:
+        try:
+            batch.count("not_aggregated", len(changed) - aggregator.add_many(changed))
+        except Exception as e:
+            batch.count("aggregate_failed", len(changed))
+            logger.error("Window aggregation failed: %s", e, exc_info=True)
+    
+    if traced:
+        record_stage_latencies(metrics, traced, CHANGEFEED_STAGES, "cosmosdb_changefeed_processor")
+        batch.count("traced", len(traced))
+    
+    # 임계값 규칙을 배치 전체에 한 번에 적용 (알림은 규칙이 새로 활성화된 경우만)
+    with batch.stage("rules"):
+        evaluation = rule_engine.evaluate(telemetry)
+    batch.count("threshold_exceeded", sum(evaluation.exceeded.values()))
+    batch.count("alerts", len(evaluation.alerts))
+    for alert in evaluation.alerts:
+        logger.warning(
+            "Threshold exceeded [%s]: %s=%s (threshold: %s %s) - Device: %s",
+            alert["rule"], alert["metric"], alert["value"], alert["operator"], alert["threshold"], alert["deviceId"]
+        )
+    
+    # 디바이스 자체 기준(평균/분산)에서 벗어난 값 탐지
+    if anomaly_detector is not None:
+        with batch.stage("anomaly"):
+            anomalies = anomaly_detector.observe(telemetry)
+        batch.count("anomalies", len(anomalies))
+        for anomaly in anomalies:
+            logger.warning(
+                "Anomaly detected [%s]: %s=%s (mean: %s, std: %s, z: %s) - Device: %s",
+                anomaly["detector"], anomaly["metric"], anomaly["value"], anomaly["mean"],
+                anomaly["std"], anomaly["zScore"], anomaly["deviceId"]
+            )
+        if anomaly_snapshot is not None:
+            anomaly_snapshot.maybe_save()
+    
+    # 워터마크를 넘긴 윈도우를 집계 문서로 한꺼번에 저장
+    if aggregator is not None:
+        with batch.stage("aggregate"):
+            aggregates = aggregator.advance()
+        batch.count("aggregates", len(aggregates))
+        if aggregates:
+            aggregateDocuments.set(func.DocumentList(func.Document.from_dict(doc) for doc in aggregates))
+    
+    # 분석용 사본이므로 아카이브 실패는 배치 재시도 대상이 아님
+    if archive_writer is not None:
+        try:
+            with batch.stage("archive"):
+                batch.count("archived", archive_writer.add(changed))
+        except Exception as e:
+            batch.count("archive_failed", len(changed))
+            logger.error("Archive write failed: %s", e, exc_info=True)
+    
+    batch.emit()
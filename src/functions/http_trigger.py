@@ -8,6 +8,8 @@ import json
 from datetime import datetime
 from typing import Dict, Any
 
+from shared_code.document_builder import HTTP_DOCUMENT_BUILDER
+
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
 logger = logging.getLogger(__name__)
@@ -51,18 +53,8 @@ def http_trigger_process_event(
                 mimetype="application/json"
             )
         
-        # Cosmos DB 문서 준비
-        document = {
-            "id": req_body["id"],
-            "deviceId": req_body["deviceId"],
-            "eventType": req_body.get("eventType", "unknown"),
-            "timestamp": req_body.get("timestamp", datetime.utcnow().isoformat()),
-            "data": req_body.get("data", {}),
-            "location": req_body.get("location", {}),
-            "processedAt": datetime.utcnow().isoformat(),
-            "source": "http-trigger",
-            "status": "processed"
-        }
+        # Cosmos DB 문서 준비 (공유 스키마, timestamp 기본값은 처리 시각)
+        document = HTTP_DOCUMENT_BUILDER.build(req_body)
         
         # Cosmos DB에 출력 (Output Binding)
         outputDocument.set(func.Document.from_dict(document))
@@ -0,0 +1,5 @@
+"""Function App 공유 코드 (배포 패키지에 함께 포함됨)
+
+Function App은 src/functions 디렉터리만 배포되므로, 함수와 로컬 도구(Producer, 유틸리티)가
+함께 쓰는 코드는 이 패키지에 둡니다. 모듈 간 참조는 상대 import를 사용합니다.
+"""
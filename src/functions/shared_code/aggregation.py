@@ -0,0 +1,461 @@
+"""
+디바이스/시설별 윈도우 집계 - Change Feed 스트리밍 집계 단계
+
+이벤트를 deviceId와 location.facility 기준으로 tumbling / sliding 윈도우에 누적하고,
+닫힌 윈도우를 집계 문서(count, min, max, mean, last)로 한꺼번에 내보냅니다.
+대시보드는 원시 이벤트를 스캔하는 대신 윈도우당 집계 문서 하나를 읽습니다.
+
+구현:
+    모든 윈도우는 hop 크기의 pane(조각)으로 나눠 누적합니다 (tumbling은 hop == size).
+    이벤트당 갱신은 pane 하나의 RunningStats 갱신(O(1))이고, 윈도우가 닫힐 때
+    size / hop개의 pane을 병합합니다. 윈도우 종료 시각은 힙으로 관리해 배치마다
+    닫힐 윈도우만 확인합니다.
+
+이벤트 시간과 워터마크:
+    이벤트 시각은 timestamp(ISO 8601, 시간대 없으면 UTC) 또는 _ts(epoch 초)를 사용합니다.
+    워터마크 = 지금까지 본 최대 이벤트 시각 - 허용 지연이며, 종료 시각이 워터마크 이하인
+    윈도우가 닫힙니다. 이벤트를 포함하는 첫 윈도우가 이미 닫혔으면(종료 시각이 워터마크 이하이거나
+    이미 내보낸 윈도우) late로 세고 버립니다. 그 전이면 시리즈의 첫 이벤트보다 이른 이벤트도 누적합니다.
+
+함수 호출(리스별 동시 실행)이 모듈 수준 집계기 하나를 공유하므로 모든 공개 메서드는 락으로 보호합니다.
+호출은 배치 전체를 add_many()로 한 번에 넘겨 락을 배치당 한 번만 잡습니다.
+
+메모리:
+    열린 윈도우가 없는 시리즈는 마지막으로 닫은 윈도우가 허용 지연보다 오래되면 제거합니다
+    (그 뒤의 이벤트는 워터마크 기준으로 late이므로 시리즈 상태가 필요 없음). 보내지 않게 된
+    디바이스의 상태가 계속 쌓이지 않습니다. 워커 종료 시에는 flush_on_exit()로 열린 윈도우를 닫아 저장합니다.
+
+상태는 워커 프로세스 메모리에만 있으므로 스케일 아웃 시 같은 윈도우의 부분 집계가
+인스턴스마다 따로 기록됩니다 (문서 ID에 인스턴스 포함, 대시보드에서 count 가중 병합).
+
+앱 설정:
+    AGGREGATION_ENABLED                   true(기본값) | false
+    AGGREGATION_WINDOWS                   기본값 "tumbling:60,sliding:300/60" (초)
+    AGGREGATION_ALLOWED_LATENESS_SECONDS  기본값 30
+"""
+import os
+import atexit
+import heapq
+import socket
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .settings import bool_setting, float_setting
+
+logger = logging.getLogger(__name__)
+
+AGGREGATION_ENABLED_SETTING = "AGGREGATION_ENABLED"
+AGGREGATION_WINDOWS_SETTING = "AGGREGATION_WINDOWS"
+AGGREGATION_LATENESS_SETTING = "AGGREGATION_ALLOWED_LATENESS_SECONDS"
+
+DEFAULT_WINDOWS = "tumbling:60,sliding:300/60"
+DEFAULT_ALLOWED_LATENESS = 30.0
+DEFAULT_METRICS = ("temperature", "humidity", "pressure")
+
+# 집계 차원: (이름, 문서에서 키를 꺼내는 경로)
+DIMENSIONS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("device", ("deviceId",)),
+    ("facility", ("location", "facility")),
+)
+
+
+class RunningStats:
+    """O(1) 갱신/병합 통계 (count, min, max, 합계, 마지막 값)"""
+
+    __slots__ = ("count", "min", "max", "total", "last", "last_time")
+
+    def __init__(self):
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.total = 0.0
+        self.last = None
+        self.last_time = float("-inf")
+
+    def add(self, value: float, event_time: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if event_time >= self.last_time:
+            self.last = value
+            self.last_time = event_time
+
+    def merge(self, other: "RunningStats") -> None:
+        self.count += other.count
+        self.total += other.total
+        if other.min < self.min:
+            self.min = other.min
+        if other.max > self.max:
+            self.max = other.max
+        if other.last_time >= self.last_time:
+            self.last = other.last
+            self.last_time = other.last_time
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": round(self.total / self.count, 4),
+            "last": self.last,
+        }
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """윈도우 정의 (초 단위, tumbling은 hop == size)"""
+    size: int
+    hop: int
+
+    def __post_init__(self):
+        if self.size <= 0 or self.hop <= 0 or self.size % self.hop:
+            raise ValueError(f"Window size must be a positive multiple of hop: size={self.size}, hop={self.hop}")
+
+    @property
+    def kind(self) -> str:
+        return "tumbling" if self.size == self.hop else "sliding"
+
+    @property
+    def name(self) -> str:
+        if self.kind == "tumbling":
+            return f"tumbling-{self.size}s"
+        return f"sliding-{self.size}s-{self.hop}s"
+
+
+def parse_windows(value: str) -> List[WindowSpec]:
+    """"tumbling:60,sliding:300/60" 형식의 윈도우 목록 파싱"""
+    specs = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kind, _, arg = item.partition(":")
+        kind = kind.strip().lower()
+        if kind == "tumbling":
+            size = int(arg)
+            specs.append(WindowSpec(size, size))
+        elif kind == "sliding":
+            size, _, hop = arg.partition("/")
+            specs.append(WindowSpec(int(size), int(hop)))
+        else:
+            raise ValueError(f"Unknown window kind: {kind}")
+    return specs
+
+
+class _Series:
+    """(윈도우, 차원, 키) 하나의 pane 상태 (pane이 있을 때만 종료 시각 힙에 등록)"""
+
+    __slots__ = ("spec_index", "dimension", "key", "panes", "next_end", "closed_end")
+
+    def __init__(self, spec_index: int, dimension: str, key: Any, next_end: int):
+        self.spec_index = spec_index
+        self.dimension = dimension
+        self.key = key
+        # pane 시작 시각 → 측정값 이름 → RunningStats
+        self.panes: Dict[int, Dict[str, RunningStats]] = {}
+        # 다음에 닫을 윈도우의 종료 시각
+        self.next_end = next_end
+        # 마지막으로 닫은 윈도우의 종료 시각 (flush 후 같은 윈도우를 다시 내보내지 않도록)
+        self.closed_end = float("-inf")
+
+
+class WindowedAggregator:
+    """디바이스/시설별 윈도우 집계기 (스레드 안전)"""
+
+    def __init__(
+        self,
+        windows: Sequence[WindowSpec],
+        metrics: Sequence[str] = DEFAULT_METRICS,
+        allowed_lateness: float = DEFAULT_ALLOWED_LATENESS,
+        dimensions: Sequence[Tuple[str, Tuple[str, ...]]] = DIMENSIONS,
+        instance_id: Optional[str] = None
+    ):
+        """
+        Args:
+            windows: 윈도우 정의 목록
+            metrics: data 아래에서 집계할 숫자 필드
+            allowed_lateness: 워터마크 지연 (초)
+            dimensions: (차원 이름, 키 경로) 목록
+            instance_id: 집계 문서 ID에 넣을 인스턴스 식별자 (None이면 WEBSITE_INSTANCE_ID 또는 호스트 이름)
+        """
+        self.windows = list(windows)
+        self.metrics = tuple(metrics)
+        self.allowed_lateness = allowed_lateness
+        self.dimensions = tuple(dimensions)
+        self.instance_id = (instance_id or os.getenv("WEBSITE_INSTANCE_ID") or socket.gethostname())[:16]
+        self.watermark = float("-inf")
+        self._max_event_time = float("-inf")
+        self._series: Dict[Tuple[int, str, Any], _Series] = {}
+        # (다음 윈도우 종료 시각, 시리즈 키) - 시리즈마다 항목 하나
+        self._deadlines: List[Tuple[int, Tuple[int, str, Any]]] = []
+        # (마지막으로 닫은 윈도우 종료 시각, 시리즈 키) - 열린 윈도우 없이 남은 시리즈 제거 후보
+        self._idle: List[Tuple[int, Tuple[int, str, Any]]] = []
+        self._time_cache: Dict[str, float] = {}
+        self.stats = {"events": 0, "late": 0, "skipped": 0, "windows_emitted": 0, "series_evicted": 0}
+        self._lock = threading.Lock()
+
+    def add(self, document: Dict[str, Any]) -> bool:
+        """문서 하나를 모든 윈도우/차원에 누적
+
+        Returns:
+            누적 여부 (시각이나 측정값이 없거나 늦게 도착한 이벤트는 False)
+        """
+        with self._lock:
+            return self._add(document)
+
+    def add_many(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """문서 여러 개 누적 (누적된 문서 수 반환, 락은 한 번만 획득)"""
+        with self._lock:
+            return sum(1 for document in documents if self._add(document))
+
+    def advance(self, emitted_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        """워터마크를 최대 이벤트 시각 - 허용 지연으로 올리고 닫힌 윈도우를 집계 문서로 반환
+
+        열린 윈도우 없이 허용 지연보다 오래 남은 시리즈도 함께 제거합니다.
+        """
+        with self._lock:
+            self.watermark = max(self.watermark, self._max_event_time - self.allowed_lateness)
+            documents = self._close_until(self.watermark, emitted_at)
+            self._evict_idle(self.watermark - self.allowed_lateness)
+            return documents
+
+    def flush(self, emitted_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        """열린 윈도우를 모두 닫아 반환 (종료 시 사용)"""
+        with self._lock:
+            return self._close_until(float("inf"), emitted_at)
+
+    def open_windows(self) -> int:
+        """누적 중인 pane 수"""
+        with self._lock:
+            return sum(len(series.panes) for series in self._series.values())
+
+    def series_count(self) -> int:
+        """메모리에 남아 있는 시리즈 수 (열린 윈도우가 없는 시리즈 포함)"""
+        with self._lock:
+            return len(self._series)
+
+    def _add(self, document: Dict[str, Any]) -> bool:
+        event_time = self._event_time(document)
+        data = document.get("data")
+        if event_time is None or not isinstance(data, dict):
+            self.stats["skipped"] += 1
+            return False
+        values = [
+            (name, value) for name, value in ((name, data.get(name)) for name in self.metrics)
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+        if not values:
+            self.stats["skipped"] += 1
+            return False
+
+        accepted = False
+        late = False
+        watermark = self.watermark
+        series_map = self._series
+        for dimension, path in self.dimensions:
+            key = _lookup(document, path)
+            if key is None or isinstance(key, (dict, list)):
+                continue
+            for spec_index, spec in enumerate(self.windows):
+                hop = spec.hop
+                pane_start = int(event_time // hop) * hop
+                first_end = pane_start + hop
+                if first_end <= watermark:
+                    # 이 이벤트를 포함하는 첫 윈도우가 이미 닫힘
+                    late = True
+                    continue
+                series_key = (spec_index, dimension, key)
+                series = series_map.get(series_key)
+                if series is None:
+                    series = _Series(spec_index, dimension, key, first_end)
+                    series_map[series_key] = series
+                elif first_end <= series.closed_end:
+                    late = True
+                    continue
+                if not series.panes or first_end < series.next_end:
+                    # 빈 시리즈이거나 더 이른 pane: 이 이벤트의 첫 윈도우부터 닫도록 힙에 등록
+                    # (이전 항목은 종료 시각이 맞지 않아 _close_until에서 건너뜀)
+                    series.next_end = first_end
+                    heapq.heappush(self._deadlines, (first_end, series_key))
+
+                pane = series.panes.get(pane_start)
+                if pane is None:
+                    pane = series.panes[pane_start] = {}
+                for name, value in values:
+                    stats = pane.get(name)
+                    if stats is None:
+                        stats = pane[name] = RunningStats()
+                    stats.add(value, event_time)
+                accepted = True
+
+        if late and not accepted:
+            self.stats["late"] += 1
+            return False
+        self.stats["events"] += 1
+        if event_time > self._max_event_time:
+            self._max_event_time = event_time
+        return accepted
+
+    def _close_until(self, watermark: float, emitted_at: Optional[str]) -> List[Dict[str, Any]]:
+        emitted_at = emitted_at or datetime.now(timezone.utc).isoformat()
+        documents: List[Dict[str, Any]] = []
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= watermark:
+            deadline, series_key = heapq.heappop(deadlines)
+            series = self._series[series_key]
+            if deadline != series.next_end or not series.panes:
+                # 더 이른 pane이 들어와 다시 등록된 시리즈의 이전 항목
+                continue
+            spec = self.windows[series.spec_index]
+
+            while series.panes and series.next_end <= watermark:
+                end = series.next_end
+                document = self._window_document(series, spec, end, emitted_at)
+                if document is not None:
+                    documents.append(document)
+                series.closed_end = end
+                series.next_end = end + spec.hop
+                # 다음 윈도우에 포함되지 않는 pane 제거
+                for pane_start in [start for start in series.panes if start < series.next_end - spec.size]:
+                    del series.panes[pane_start]
+                if series.panes:
+                    # 빈 윈도우 건너뛰기: 남은 가장 이른 pane을 포함하는 첫 윈도우로 이동
+                    series.next_end = max(series.next_end, min(series.panes) + spec.hop)
+
+            # 빈 시리즈는 힙에서 빠지고 (다음 이벤트가 다시 등록) 제거 후보가 됨
+            if series.panes:
+                heapq.heappush(deadlines, (series.next_end, series_key))
+            else:
+                heapq.heappush(self._idle, (series.closed_end, series_key))
+        self.stats["windows_emitted"] += len(documents)
+        return documents
+
+    def _evict_idle(self, before: float) -> None:
+        idle = self._idle
+        while idle and idle[0][0] <= before:
+            closed_end, series_key = heapq.heappop(idle)
+            series = self._series.get(series_key)
+            # 그 사이 새 이벤트가 들어와 다시 열린 시리즈는 유지
+            if series is not None and not series.panes and series.closed_end == closed_end:
+                del self._series[series_key]
+                self.stats["series_evicted"] += 1
+
+    def _window_document(
+        self,
+        series: _Series,
+        spec: WindowSpec,
+        end: int,
+        emitted_at: str
+    ) -> Optional[Dict[str, Any]]:
+        merged: Dict[str, RunningStats] = {}
+        for pane_start in range(end - spec.size, end, spec.hop):
+            pane = series.panes.get(pane_start)
+            if not pane:
+                continue
+            for name, stats in pane.items():
+                target = merged.get(name)
+                if target is None:
+                    target = merged[name] = RunningStats()
+                target.merge(stats)
+        if not merged:
+            return None
+
+        start_iso = _iso(end - spec.size)
+        partition_key = f"{series.dimension}:{series.key}"
+        return {
+            "id": f"{partition_key}|{spec.name}|{start_iso}|{self.instance_id}",
+            "partitionKey": partition_key,
+            "type": "aggregate",
+            "dimension": series.dimension,
+            "key": series.key,
+            "window": spec.name,
+            "windowStart": start_iso,
+            "windowEnd": _iso(end),
+            "count": max(stats.count for stats in merged.values()),
+            "metrics": {name: stats.to_dict() for name, stats in merged.items()},
+            "instance": self.instance_id,
+            "emittedAt": emitted_at,
+        }
+
+    def _event_time(self, document: Dict[str, Any]) -> Optional[float]:
+        timestamp = document.get("timestamp")
+        if isinstance(timestamp, str):
+            cache = self._time_cache
+            value = cache.get(timestamp)
+            if value is None:
+                try:
+                    parsed = datetime.fromisoformat(timestamp)
+                except ValueError:
+                    parsed = None
+                if parsed is not None:
+                    if parsed.tzinfo is None:
+                        parsed = parsed.replace(tzinfo=timezone.utc)
+                    value = parsed.timestamp()
+                    if len(cache) >= 4096:
+                        cache.clear()
+                    cache[timestamp] = value
+            if value is not None:
+                return value
+        ts = document.get("_ts")
+        return float(ts) if isinstance(ts, (int, float)) else None
+
+
+def _lookup(document: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = document
+    for part in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _iso(epoch_seconds: float) -> str:
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).isoformat()
+
+
+def aggregation_enabled() -> bool:
+    return bool_setting(AGGREGATION_ENABLED_SETTING)
+
+
+def flush_on_exit(
+    aggregator: WindowedAggregator,
+    write: Callable[[List[Dict[str, Any]]], Any]
+) -> None:
+    """워커 프로세스 종료 시 열린 윈도우를 모두 닫아 write로 저장하도록 등록
+
+    출력 바인딩은 호출 안에서만 쓸 수 있으므로 write는 Cosmos에 직접 쓰는 함수여야 합니다.
+    저장 실패는 로그만 남깁니다 (종료를 막지 않음).
+    """
+    def flush() -> None:
+        documents = aggregator.flush()
+        if not documents:
+            return
+        try:
+            write(documents)
+            logger.info(f"Flushed {len(documents)} open aggregate windows at shutdown")
+        except Exception as e:
+            logger.error(f"Failed to flush {len(documents)} open aggregate windows at shutdown: {e}")
+
+    atexit.register(flush)
+
+
+def create_aggregator() -> WindowedAggregator:
+    """앱 설정(AGGREGATION_WINDOWS, AGGREGATION_ALLOWED_LATENESS_SECONDS)으로 집계기 생성"""
+    try:
+        windows = parse_windows(os.getenv(AGGREGATION_WINDOWS_SETTING, DEFAULT_WINDOWS))
+    except ValueError as e:
+        logger.warning(f"Invalid {AGGREGATION_WINDOWS_SETTING}: {e}, using {DEFAULT_WINDOWS}")
+        windows = parse_windows(DEFAULT_WINDOWS)
+    return WindowedAggregator(
+        windows, allowed_lateness=float_setting(AGGREGATION_LATENESS_SETTING, DEFAULT_ALLOWED_LATENESS)
+    )
@@ -0,0 +1,452 @@
+"""
+알림 폭주 병합(coalescing)과 속도 제한 전송
+
+장애 중에는 같은 내용의 critical 알림이 분당 수천 건씩 들어오므로, 알림을 하나씩 외부
+시스템(Teams, PagerDuty 웹훅 등)에 보내지 않고
+
+- (level, 메시지 지문, deviceId)가 같은 알림을 시간 윈도우 동안 한 그룹으로 묶고
+- 윈도우가 닫히면 그룹당 요약 알림 1건(건수, 최초/최근 시각, 샘플 메시지)을 만들어
+- 토큰 버킷(shared_code.rate_limit)으로 초당 전송 수를 제한하는 aiohttp 연결 풀로 전송합니다.
+
+메시지 지문은 숫자, UUID, 16진수 ID를 자리표시자로 바꾼 뒤 해시하므로
+"temperature 41.2 > 40"과 "temperature 43.9 > 40"은 같은 그룹이 됩니다.
+
+앱 설정:
+    ALERT_WEBHOOK_URL               알림 전송 URL (없으면 전송 비활성화)
+    ALERT_DISPATCH_MIN_LEVEL        전송할 최소 수준 info | warning | critical (기본값 critical)
+    ALERT_COALESCE_WINDOW_SECONDS   병합 윈도우 (기본값 30)
+    ALERT_DISPATCH_RATE_PER_SECOND  초당 최대 전송 수 (기본값 5)
+    ALERT_DISPATCH_MAX_CONNECTIONS  연결 풀 크기 (기본값 4)
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .rate_limit import TokenBucket
+from .settings import float_setting
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_URL_SETTING = "ALERT_WEBHOOK_URL"
+MIN_LEVEL_SETTING = "ALERT_DISPATCH_MIN_LEVEL"
+WINDOW_SETTING = "ALERT_COALESCE_WINDOW_SECONDS"
+RATE_SETTING = "ALERT_DISPATCH_RATE_PER_SECOND"
+MAX_CONNECTIONS_SETTING = "ALERT_DISPATCH_MAX_CONNECTIONS"
+
+DEFAULT_WINDOW_SECONDS = 30.0
+DEFAULT_RATE_PER_SECOND = 5.0
+DEFAULT_MAX_CONNECTIONS = 4
+# 요약 알림에 포함할 원본 메시지 수
+DEFAULT_MAX_SAMPLES = 5
+
+LEVELS = {"info": 0, "warning": 1, "critical": 2}
+
+# 같은 요청을 다시 보내면 성공할 수 있는 상태 코드
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+
+# (level, 메시지 지문, deviceId)
+AlertKey = Tuple[str, str, str]
+
+_VOLATILE_PATTERNS = (
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.IGNORECASE), "<n>"),
+    (re.compile(r"\b[0-9a-f]*\d[0-9a-f]*\b", re.IGNORECASE), "<n>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+@lru_cache(maxsize=4096)
+def message_fingerprint(message: str) -> str:
+    """숫자와 ID를 제거한 메시지 템플릿의 해시
+
+    Args:
+        message: 알림 메시지
+
+    Returns:
+        16자리 16진수 지문
+    """
+    template = message.strip().lower()
+    for pattern, replacement in _VOLATILE_PATTERNS:
+        template = pattern.sub(replacement, template)
+    return hashlib.blake2b(template.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def alert_level(alert: Dict[str, Any]) -> str:
+    """알림 수준 (알 수 없는 값은 info)"""
+    level = str(alert.get("level", "info")).lower()
+    return level if level in LEVELS else "info"
+
+
+def alert_key(alert: Dict[str, Any]) -> AlertKey:
+    """병합 키 (level, 메시지 지문, deviceId)"""
+    device_id = alert.get("deviceId") or alert.get("device_id") or ""
+    return alert_level(alert), message_fingerprint(str(alert.get("message", ""))), str(device_id)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+@dataclass
+class AlertGroup:
+    """윈도우 동안 병합된 알림 그룹"""
+    level: str
+    fingerprint: str
+    device_id: str
+    message: str
+    first_seen: float
+    last_seen: float
+    deadline: float
+    count: int = 0
+    samples: List[str] = field(default_factory=list)
+
+    def to_notification(self, window_seconds: float) -> Dict[str, Any]:
+        """요약 알림 본문
+
+        text 필드만으로도 읽을 수 있으므로 Teams 수신 웹훅에 그대로 보낼 수 있습니다.
+        """
+        device = f" {self.device_id}" if self.device_id else ""
+        repeated = f" (x{self.count} in {window_seconds:g}s)" if self.count > 1 else ""
+        return {
+            "text": f"[{self.level.upper()}]{device}: {self.message}{repeated}",
+            "level": self.level,
+            "deviceId": self.device_id or None,
+            "fingerprint": self.fingerprint,
+            "message": self.message,
+            "count": self.count,
+            "firstSeen": _iso(self.first_seen),
+            "lastSeen": _iso(self.last_seen),
+            "windowSeconds": window_seconds,
+            "samples": self.samples,
+        }
+
+
+class AlertCoalescer:
+    """같은 키의 알림을 윈도우 동안 모으는 병합기 (스레드 안전)
+
+    그룹의 윈도우는 첫 알림 시각부터 window_seconds 동안 열려 있고,
+    닫힌 뒤 들어온 같은 키의 알림은 새 그룹을 엽니다.
+    """
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS, max_samples: int = DEFAULT_MAX_SAMPLES):
+        """
+        Args:
+            window_seconds: 병합 윈도우 (초)
+            max_samples: 그룹당 보관할 서로 다른 원본 메시지 수
+        """
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        # 그룹은 생성 순서 = 마감 순서이므로 dict 앞에서부터 마감된 그룹을 꺼냄
+        self._groups: Dict[AlertKey, AlertGroup] = {}
+        self._lock = threading.Lock()
+        self.received = 0
+
+    def add(self, alert: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """알림 추가
+
+        Returns:
+            새 그룹이 열렸으면 True
+        """
+        return self.add_many([alert], now) == 1
+
+    def add_many(self, alerts: Iterable[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """알림 여러 건 추가
+
+        Returns:
+            새로 열린 그룹 수
+        """
+        now = time.time() if now is None else now
+        opened = 0
+        with self._lock:
+            for alert in alerts:
+                key = alert_key(alert)
+                message = str(alert.get("message", ""))
+                group = self._groups.get(key)
+                if group is None:
+                    group = AlertGroup(
+                        level=key[0], fingerprint=key[1], device_id=key[2], message=message,
+                        first_seen=now, last_seen=now, deadline=now + self.window_seconds,
+                    )
+                    self._groups[key] = group
+                    opened += 1
+                group.count += 1
+                group.last_seen = now
+                if len(group.samples) < self.max_samples and message not in group.samples:
+                    group.samples.append(message)
+                self.received += 1
+        return opened
+
+    def pop_due(self, now: Optional[float] = None) -> List[AlertGroup]:
+        """윈도우가 닫힌 그룹을 꺼냄"""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            for group in self._groups.values():
+                if group.deadline > now:
+                    break
+                due.append(group)
+            for group in due:
+                del self._groups[(group.level, group.fingerprint, group.device_id)]
+        return due
+
+    def pop_all(self) -> List[AlertGroup]:
+        """열린 그룹을 모두 꺼냄 (종료 시 전송용)"""
+        with self._lock:
+            groups = list(self._groups.values())
+            self._groups.clear()
+        return groups
+
+    @property
+    def pending(self) -> int:
+        return len(self._groups)
+
+
+@dataclass
+class DispatchStats:
+    """전송 누적 통계"""
+    alerts: int = 0
+    groups: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    rate_limited_ms: float = 0.0
+
+
+class AlertDispatcher:
+    """요약 알림을 토큰 버킷과 연결 풀로 전송하는 비동기 클라이언트"""
+
+    def __init__(
+        self,
+        url: str,
+        rate_per_second: float = DEFAULT_RATE_PER_SECOND,
+        burst: Optional[float] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout_seconds: float = 10.0,
+        max_retries: int = 3,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            url: 알림 전송 URL (JSON POST)
+            rate_per_second: 초당 최대 전송 수 (0 이하이면 제한 없음)
+            burst: 순간 최대 전송 수 (None이면 1초 분량)
+            max_connections: 연결 풀 크기 (동시 요청 수 상한)
+            timeout_seconds: 요청당 제한 시간
+            max_retries: 408/429/5xx 응답과 연결 오류의 최대 재시도 횟수
+            window_seconds: 요약 본문에 표시할 병합 윈도우
+            headers: 추가 요청 헤더
+        """
+        self.url = url
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.max_connections = max_connections
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.window_seconds = window_seconds
+        self.headers = headers or {}
+        self.stats = DispatchStats()
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+                headers=self.headers,
+            )
+        return self._session
+
+    async def send(self, groups: List[AlertGroup]) -> int:
+        """그룹마다 요약 알림 1건 전송
+
+        Returns:
+            전송에 성공한 알림 수
+        """
+        if not groups:
+            return 0
+        results = await asyncio.gather(*(self._send_one(group) for group in groups))
+        return sum(results)
+
+    async def _send_one(self, group: AlertGroup) -> bool:
+        import aiohttp
+
+        session = self._get_session()
+        payload = group.to_notification(self.window_seconds)
+        error = None
+        for attempt in range(max(self.max_retries, 0) + 1):
+            self.stats.rate_limited_ms += (await self.bucket.acquire_async()) * 1000.0
+            retry_after = None
+            try:
+                async with session.post(self.url, json=payload) as response:
+                    if response.status < 300:
+                        self.stats.sent += 1
+                        return True
+                    error = f"HTTP {response.status}"
+                    if response.status not in RETRYABLE_STATUS:
+                        break
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+            if attempt < self.max_retries:
+                self.stats.retries += 1
+                await asyncio.sleep(_retry_delay(retry_after, attempt))
+
+        self.stats.failed += 1
+        logger.error(
+            "Alert notification failed (%s, level=%s, device=%s, count=%d)",
+            error, group.level, group.device_id, group.count
+        )
+        return False
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def _retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    """Retry-After(초) 헤더가 있으면 그 값, 없으면 지수 백오프"""
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return min(0.1 * (2 ** attempt), 5.0)
+
+
+class BackgroundAlertDispatcher:
+    """동기 Function 핸들러에서 쓰는 알림 병합 + 전송기
+
+    submit()은 병합기에 넣고 바로 반환하며, 전용 스레드의 이벤트 루프가
+    윈도우가 닫힌 그룹을 전송합니다. 전송이 속도 제한에 걸려 밀리는 동안
+    들어온 같은 키의 알림은 계속 병합됩니다.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        min_level: str = "critical",
+        max_samples: int = DEFAULT_MAX_SAMPLES,
+        tick_seconds: float = 0.5,
+        **dispatcher_options: Any
+    ):
+        """
+        Args:
+            url: 알림 전송 URL
+            window_seconds: 병합 윈도우 (초)
+            min_level: 전송할 최소 알림 수준
+            max_samples: 그룹당 보관할 원본 메시지 수
+            tick_seconds: 마감된 그룹 확인 주기
+            dispatcher_options: AlertDispatcher 인자
+        """
+        self.coalescer = AlertCoalescer(window_seconds, max_samples)
+        self.min_level = LEVELS.get(min_level, LEVELS["critical"])
+        self.tick_seconds = min(tick_seconds, window_seconds) if window_seconds > 0 else tick_seconds
+        self._dispatcher_options = dict(dispatcher_options, url=url, window_seconds=window_seconds)
+        self.dispatcher: Optional[AlertDispatcher] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pump: Optional[Any] = None
+        self._closing = False
+        self._lock = threading.Lock()
+
+    def submit(self, alerts: Iterable[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """전송 대상 수준 이상의 알림을 병합기에 추가
+
+        Returns:
+            추가된 알림 수
+        """
+        accepted = [alert for alert in alerts if LEVELS[alert_level(alert)] >= self.min_level]
+        if accepted:
+            self._ensure_loop()
+            opened = self.coalescer.add_many(accepted, now)
+            # 여러 함수 호출 스레드가 동시에 제출하므로 카운터 갱신은 락 안에서
+            with self._lock:
+                self.dispatcher.stats.groups += opened
+                self.dispatcher.stats.alerts += len(accepted)
+        return len(accepted)
+
+    def flush(self, timeout: Optional[float] = None) -> int:
+        """열린 그룹을 윈도우와 관계없이 모두 전송하고 완료될 때까지 대기
+
+        Returns:
+            전송에 성공한 알림 수
+        """
+        if self._loop is None:
+            return 0
+        groups = self.coalescer.pop_all()
+        return asyncio.run_coroutine_threadsafe(self.dispatcher.send(groups), self._loop).result(timeout)
+
+    @property
+    def stats(self) -> DispatchStats:
+        return self.dispatcher.stats if self.dispatcher is not None else DispatchStats()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            groups = self.coalescer.pop_due()
+            if groups:
+                try:
+                    await self.dispatcher.send(groups)
+                except Exception as e:
+                    logger.error(f"Alert dispatch failed: {e}", exc_info=True)
+                continue
+            await asyncio.sleep(self.tick_seconds)
+
+    def _ensure_loop(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                return
+            self.dispatcher = AlertDispatcher(**self._dispatcher_options)
+            self._closing = False
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+            self._pump = asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """남은 그룹을 전송하고 연결 풀과 이벤트 루프 종료"""
+        with self._lock:
+            loop = self._loop
+        if loop is None:
+            return
+        # 진행 중인 전송이 끝날 때까지 기다린 뒤 남은 그룹을 전송
+        self._closing = True
+        self._pump.result(timeout)
+        self.flush(timeout)
+        asyncio.run_coroutine_threadsafe(self.dispatcher.close(), loop).result(timeout)
+        with self._lock:
+            self._loop = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+
+def alert_dispatch_enabled() -> bool:
+    """ALERT_WEBHOOK_URL이 설정되어 있으면 True"""
+    return bool(os.getenv(WEBHOOK_URL_SETTING, "").strip())
+
+
+def create_alert_dispatcher() -> Optional[BackgroundAlertDispatcher]:
+    """앱 설정으로 알림 전송기 생성 (URL이 없으면 None)"""
+    if not alert_dispatch_enabled():
+        return None
+    return BackgroundAlertDispatcher(
+        os.getenv(WEBHOOK_URL_SETTING).strip(),
+        window_seconds=float_setting(WINDOW_SETTING, DEFAULT_WINDOW_SECONDS),
+        min_level=os.getenv(MIN_LEVEL_SETTING, "critical").strip().lower(),
+        rate_per_second=float_setting(RATE_SETTING, DEFAULT_RATE_PER_SECOND),
+        max_connections=int(float_setting(MAX_CONNECTIONS_SETTING, DEFAULT_MAX_CONNECTIONS)),
+    )
+
@@ -0,0 +1,424 @@
+"""
+디바이스별 스트리밍 이상 탐지 - 고정 크기 상태의 온라인 통계
+
+정적 임계값은 원래 뜨거운 디바이스에서는 알림이 넘치고 차가운 디바이스의 드리프트는 놓칩니다.
+디바이스/측정값마다 평균과 분산을 온라인으로 추적하고, 그 디바이스 기준으로 벗어난 값을 찾습니다.
+
+통계:
+    welford  전체 이력의 평균/분산 (Welford 알고리즘)
+    ewma     지수 가중 이동 평균/분산 (alpha, 최근 값에 가중 - 느린 드리프트 추종)
+
+탐지:
+    z-score  |x - 평균| / 표준편차 > z_threshold (이상값은 평균 ± z_threshold·표준편차로 잘라서 통계에 반영)
+    CUSUM    표준화 잔차의 양/음 누적합이 h를 넘으면 탐지 후 0으로 재설정 (작고 지속적인 이동)
+    두 탐지 모두 min_samples 이상 관측된 뒤에만 동작합니다.
+
+상태 저장:
+    디바이스마다 측정값별 (count, 평균, 분산 누적값, CUSUM+, CUSUM-)을 NumPy 배열 한 행에 둡니다.
+    디바이스 ID → 행 번호 딕셔너리 외에는 디바이스별 객체가 없으므로 10만 디바이스도 수십 MB입니다.
+    배치는 "디바이스별 k번째 관측" 단위 라운드로 나눠, 라운드마다 배열 연산 한 번으로 갱신합니다
+    (같은 디바이스의 관측은 순서대로 반영).
+    함수 호출이 모듈 수준 탐지기 하나를 공유하므로 관측/스냅샷/복원은 락 하나로 직렬화합니다.
+    snapshot()/restore()로 상태를 바이트로 저장/복원해 호스트 재시작 후에도 이어서 탐지합니다.
+    /home은 모든 인스턴스가 공유하므로 경로에 {instance}를 넣어 인스턴스(WEBSITE_INSTANCE_ID)마다 따로 저장합니다.
+    고정 경로를 쓰면 인스턴스들이 서로의 스냅샷을 덮어쓰고, 재시작 시 모두 한 인스턴스의 부분 상태에서 출발합니다.
+
+앱 설정:
+    ANOMALY_ENABLED                   true(기본값) | false
+    ANOMALY_METHOD                    welford(기본값) | ewma
+    ANOMALY_Z_THRESHOLD               기본값 4.0
+    ANOMALY_STATE_PATH                상태 스냅샷 파일 경로 (없으면 저장하지 않음, 예: /home/data/anomaly-state-{instance}.npz)
+    ANOMALY_SNAPSHOT_INTERVAL_SECONDS 기본값 300
+"""
+import io
+import os
+import json
+import atexit
+import time
+import socket
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .rules import TelemetryColumns
+from .settings import bool_setting, float_setting
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_ENABLED_SETTING = "ANOMALY_ENABLED"
+ANOMALY_METHOD_SETTING = "ANOMALY_METHOD"
+ANOMALY_Z_THRESHOLD_SETTING = "ANOMALY_Z_THRESHOLD"
+ANOMALY_STATE_PATH_SETTING = "ANOMALY_STATE_PATH"
+ANOMALY_SNAPSHOT_INTERVAL_SETTING = "ANOMALY_SNAPSHOT_INTERVAL_SECONDS"
+
+DEFAULT_METRICS = ("temperature", "humidity", "pressure")
+METHODS = ("welford", "ewma")
+SNAPSHOT_VERSION = 1
+
+# 상태 배열 (행: 디바이스, 열: 측정값)
+_STATE_FIELDS = ("count", "mean", "spread", "cusum_pos", "cusum_neg")
+
+
+class AnomalyDetector:
+    """디바이스별 온라인 z-score/CUSUM 이상 탐지기 (스레드 안전)"""
+
+    def __init__(
+        self,
+        metrics: Sequence[str] = DEFAULT_METRICS,
+        method: str = "welford",
+        alpha: float = 0.05,
+        z_threshold: float = 4.0,
+        cusum_k: float = 0.5,
+        cusum_h: float = 8.0,
+        min_samples: int = 30,
+        min_std: float = 1e-3,
+        initial_capacity: int = 1024
+    ):
+        """
+        Args:
+            metrics: data 아래에서 추적할 숫자 필드
+            method: welford 또는 ewma
+            alpha: ewma 가중치 (0 < alpha <= 1)
+            z_threshold: z-score 탐지 임계값
+            cusum_k: CUSUM 허용 이동량 (표준편차 단위)
+            cusum_h: CUSUM 탐지 임계값 (표준편차 단위)
+            min_samples: 탐지를 시작하는 디바이스/측정값별 최소 관측 수
+            min_std: 표준편차 하한 (상수 신호에서 0 나누기 방지)
+            initial_capacity: 처음 할당할 디바이스 행 수 (부족하면 두 배씩 증가)
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown anomaly method: {method} (use one of {METHODS})")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.metrics = tuple(metrics)
+        self.method = method
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.min_samples = min_samples
+        self.min_std = min_std
+        self._slots: Dict[Any, int] = {}
+        self._devices: List[Any] = []
+        self._allocate(max(initial_capacity, 1))
+        self.stats = {"observations": 0, "zscore": 0, "cusum": 0}
+        # 배열 교체(_grow, restore)와 갱신이 겹치지 않도록 보호
+        self._lock = threading.Lock()
+
+    def _allocate(self, capacity: int) -> None:
+        width = len(self.metrics)
+        self.count = np.zeros((capacity, width), dtype=np.int64)
+        self.mean = np.zeros((capacity, width), dtype=np.float64)
+        # welford: 편차 제곱합(M2), ewma: 분산
+        self.spread = np.zeros((capacity, width), dtype=np.float64)
+        self.cusum_pos = np.zeros((capacity, width), dtype=np.float64)
+        self.cusum_neg = np.zeros((capacity, width), dtype=np.float64)
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.count)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in _STATE_FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((capacity, old.shape[1]), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _slot_indices(self, devices: Sequence[Any]) -> np.ndarray:
+        slots = self._slots
+        indices = []
+        for device in devices:
+            slot = slots.get(device)
+            if slot is None:
+                slot = slots[device] = len(self._devices)
+                self._devices.append(device)
+            indices.append(slot)
+        self._grow(len(self._devices))
+        return np.array(indices, dtype=np.intp)
+
+    @property
+    def device_count(self) -> int:
+        return len(self._devices)
+
+    def observe(self, documents: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """문서 배치를 관측하고 이상으로 판정된 (문서, 측정값) 목록 반환 (문서 순서)"""
+        if not documents:
+            return []
+        columns = TelemetryColumns.from_documents(documents, self.metrics)
+        values = np.column_stack([columns.values[metric] for metric in self.metrics])
+        with self._lock:
+            slots = self._slot_indices(columns.devices)[columns.device_codes]
+            zscores, zscore_flags, cusum_flags, means, stds = self._observe_arrays(slots, values)
+
+        anomalies = []
+        rows, cols = np.nonzero(zscore_flags | cusum_flags)
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            document = documents[row]
+            anomalies.append({
+                "id": document.get("id"),
+                "deviceId": document.get("deviceId"),
+                "metric": self.metrics[col],
+                "value": float(values[row, col]),
+                "mean": round(float(means[row, col]), 4),
+                "std": round(float(stds[row, col]), 4),
+                "zScore": round(float(zscores[row, col]), 3),
+                "detector": "zscore" if zscore_flags[row, col] else "cusum",
+                "timestamp": document.get("timestamp"),
+            })
+        return anomalies
+
+    def observe_arrays(
+        self,
+        slots: np.ndarray,
+        values: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """상태 행 번호와 (관측 수 x 측정값 수) 값 배열로 관측 (NaN은 해당 측정값 건너뜀)
+
+        각 관측은 그 디바이스의 직전 상태로 평가한 뒤 상태에 반영합니다.
+
+        Returns:
+            (z-score, z-score 탐지, CUSUM 탐지, 평가 시점 평균, 평가 시점 표준편차) - 모두 values와 같은 모양
+        """
+        with self._lock:
+            return self._observe_arrays(slots, values)
+
+    def _observe_arrays(
+        self,
+        slots: np.ndarray,
+        values: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        size = len(slots)
+        zscores = np.zeros(values.shape)
+        zscore_flags = np.zeros(values.shape, dtype=bool)
+        cusum_flags = np.zeros(values.shape, dtype=bool)
+        means = np.zeros(values.shape)
+        stds = np.zeros(values.shape)
+        if not size:
+            return zscores, zscore_flags, cusum_flags, means, stds
+
+        # 디바이스별 관측 순번 (0, 1, 2, ...) - 같은 순번끼리는 디바이스가 겹치지 않음
+        order = np.argsort(slots, kind="stable")
+        sorted_slots = slots[order]
+        positions = np.arange(size)
+        starts = np.ones(size, dtype=bool)
+        starts[1:] = sorted_slots[1:] != sorted_slots[:-1]
+        rank = np.empty(size, dtype=np.intp)
+        rank[order] = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+
+        for r in range(int(rank.max()) + 1):
+            index = np.flatnonzero(rank == r)
+            z, zf, cf, mean, std = self._step(slots[index], values[index])
+            zscores[index] = z
+            zscore_flags[index] = zf
+            cusum_flags[index] = cf
+            means[index] = mean
+            stds[index] = std
+
+        self.stats["observations"] += int(np.count_nonzero(~np.isnan(values)))
+        self.stats["zscore"] += int(zscore_flags.sum())
+        self.stats["cusum"] += int(cusum_flags.sum())
+        return zscores, zscore_flags, cusum_flags, means, stds
+
+    def _step(self, slots: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """서로 다른 디바이스들의 관측 한 건씩 평가 후 상태 갱신"""
+        count = self.count[slots]
+        mean = self.mean[slots]
+        spread = self.spread[slots]
+        present = ~np.isnan(x)
+
+        if self.method == "welford":
+            variance = np.where(count > 1, spread / np.maximum(count - 1, 1), 0.0)
+        else:
+            variance = spread
+        std = np.maximum(np.sqrt(variance), self.min_std)
+        warm = present & (count >= self.min_samples)
+
+        with np.errstate(invalid="ignore"):
+            z = np.where(warm, (x - mean) / std, 0.0)
+        zscore_flags = warm & (np.abs(z) > self.z_threshold)
+
+        # CUSUM (표준화 잔차 누적, 탐지 후 재설정)
+        pos = np.where(warm, np.maximum(0.0, self.cusum_pos[slots] + z - self.cusum_k), self.cusum_pos[slots])
+        neg = np.where(warm, np.maximum(0.0, self.cusum_neg[slots] - z - self.cusum_k), self.cusum_neg[slots])
+        cusum_flags = warm & ~zscore_flags & ((pos > self.cusum_h) | (neg > self.cusum_h))
+        alarmed = zscore_flags | cusum_flags
+        self.cusum_pos[slots] = np.where(alarmed, 0.0, pos)
+        self.cusum_neg[slots] = np.where(alarmed, 0.0, neg)
+
+        # z-score 이상값은 평균 ± z_threshold·표준편차로 잘라서 반영 (한 건이 기준을 크게 흔들지 않으면서
+        # 수준 이동이 지속되면 기준이 따라가 탐지가 끝없이 이어지지 않음)
+        update = present
+        bound = self.z_threshold * std
+        clipped = np.where(warm, np.clip(np.where(present, x, mean), mean - bound, mean + bound), np.where(present, x, 0.0))
+        delta = np.where(update, clipped - mean, 0.0)
+        first = update & (count == 0)
+        if self.method == "welford":
+            new_count = count + update
+            new_mean = mean + np.where(update, delta / np.maximum(new_count, 1), 0.0)
+            new_spread = spread + np.where(update, delta * (clipped - new_mean), 0.0)
+        else:
+            new_count = count + update
+            new_mean = np.where(first, clipped, mean + self.alpha * delta)
+            new_spread = np.where(first, 0.0, np.where(update, (1 - self.alpha) * (spread + self.alpha * delta * delta), spread))
+        self.count[slots] = new_count
+        self.mean[slots] = new_mean
+        self.spread[slots] = new_spread
+        return z, zscore_flags, cusum_flags, mean, std
+
+    def device_stats(self, device: Any) -> Optional[Dict[str, Dict[str, float]]]:
+        """디바이스의 측정값별 현재 통계 (없으면 None)"""
+        with self._lock:
+            slot = self._slots.get(device)
+            if slot is None:
+                return None
+            counts = self.count[slot].tolist()
+            means = self.mean[slot].tolist()
+            spreads = self.spread[slot].tolist()
+        result = {}
+        for col, metric in enumerate(self.metrics):
+            count = int(counts[col])
+            spread = float(spreads[col])
+            if self.method == "welford":
+                variance = spread / (count - 1) if count > 1 else 0.0
+            else:
+                variance = spread
+            result[metric] = {"count": count, "mean": float(means[col]), "std": variance ** 0.5}
+        return result
+
+    @property
+    def memory_bytes(self) -> int:
+        """상태 배열 크기 (디바이스 ID 딕셔너리 제외)"""
+        return sum(getattr(self, name).nbytes for name in _STATE_FIELDS)
+
+    def snapshot(self) -> bytes:
+        """설정과 상태를 npz 바이트로 직렬화 (락 안에서는 복사만 하고 압축은 락 밖에서 수행)"""
+        with self._lock:
+            used = len(self._devices)
+            devices = list(self._devices)
+            arrays = {name: getattr(self, name)[:used].copy() for name in _STATE_FIELDS}
+        config = {
+            "version": SNAPSHOT_VERSION,
+            "metrics": list(self.metrics),
+            "method": self.method,
+            "alpha": self.alpha,
+            "devices": devices,
+        }
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            config=np.frombuffer(json.dumps(config).encode("utf-8"), dtype=np.uint8),
+            **arrays
+        )
+        return buffer.getvalue()
+
+    def restore(self, data: bytes) -> None:
+        """snapshot() 결과로 상태 복원 (측정값/방식이 현재 설정과 다르면 ValueError)"""
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            config = json.loads(archive["config"].tobytes().decode("utf-8"))
+            if config.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version: {config.get('version')}")
+            if tuple(config["metrics"]) != self.metrics or config["method"] != self.method:
+                raise ValueError(
+                    f"Snapshot was taken with metrics={config['metrics']} method={config['method']}, "
+                    f"detector uses metrics={list(self.metrics)} method={self.method}"
+                )
+            devices = config["devices"]
+            arrays = {name: archive[name] for name in _STATE_FIELDS}
+        with self._lock:
+            self._devices = list(devices)
+            self._slots = {device: slot for slot, device in enumerate(self._devices)}
+            self._allocate(max(len(devices), 1024))
+            for name in _STATE_FIELDS:
+                getattr(self, name)[:len(devices)] = arrays[name]
+
+    def save(self, path: str) -> None:
+        """스냅샷을 파일로 저장 (임시 파일에 쓴 뒤 교체하므로 중단되어도 이전 스냅샷 유지)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp-{os.getpid()}"
+        with open(temporary, "wb") as f:
+            f.write(self.snapshot())
+        os.replace(temporary, path)
+
+    def load(self, path: str) -> bool:
+        """파일에서 스냅샷 복원 (파일이 없으면 False)"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return False
+        self.restore(data)
+        return True
+
+
+class PeriodicSnapshot:
+    """일정 간격으로 탐지기 상태를 파일에 저장 (동시 호출 중 한 곳만 저장)"""
+
+    def __init__(self, detector: AnomalyDetector, path: str, interval_seconds: float = 300.0):
+        self.detector = detector
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def maybe_save(self, force: bool = False) -> bool:
+        """간격이 지났으면 저장 (저장 실패는 로그만 남기고 탐지는 계속)"""
+        # 다른 호출이 저장 중이면 건너뜀 (같은 임시 파일에 동시에 쓰지 않도록)
+        if not self._lock.acquire(blocking=force):
+            return False
+        try:
+            now = time.monotonic()
+            if not force and now - self._last < self.interval_seconds:
+                return False
+            self._last = now
+            self.detector.save(self.path)
+            return True
+        except OSError as e:
+            logger.error(f"Failed to save anomaly detector snapshot to {self.path}: {e}")
+            return False
+        finally:
+            self._lock.release()
+
+
+def anomaly_enabled() -> bool:
+    return bool_setting(ANOMALY_ENABLED_SETTING)
+
+
+def state_path() -> Optional[str]:
+    """ANOMALY_STATE_PATH의 {instance}를 인스턴스 식별자로 바꾼 스냅샷 경로 (설정이 없으면 None)"""
+    path = os.getenv(ANOMALY_STATE_PATH_SETTING, "").strip()
+    if not path:
+        return None
+    instance = (os.getenv("WEBSITE_INSTANCE_ID") or socket.gethostname())[:16]
+    return path.replace("{instance}", instance)
+
+
+def create_anomaly_detector() -> Tuple[AnomalyDetector, Optional[PeriodicSnapshot]]:
+    """앱 설정으로 탐지기 생성, ANOMALY_STATE_PATH가 있으면 이전 스냅샷 복원
+
+    Returns:
+        (탐지기, 주기 저장기 - 저장 경로가 없으면 None)
+    """
+    method = os.getenv(ANOMALY_METHOD_SETTING, "welford").strip().lower()
+    if method not in METHODS:
+        logger.warning(f"Unknown {ANOMALY_METHOD_SETTING}={method}, falling back to welford")
+        method = "welford"
+    detector = AnomalyDetector(method=method, z_threshold=float_setting(ANOMALY_Z_THRESHOLD_SETTING, 4.0))
+
+    path = state_path()
+    if not path:
+        return detector, None
+    try:
+        if detector.load(path):
+            logger.info(f"Restored anomaly detector state for {detector.device_count} devices from {path}")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Ignoring unreadable anomaly detector snapshot {path}: {e}")
+    snapshot = PeriodicSnapshot(detector, path, float_setting(ANOMALY_SNAPSHOT_INTERVAL_SETTING, 300.0))
+    # 워커 정상 종료 시 마지막 상태 저장
+    atexit.register(snapshot.maybe_save, True)
+    return detector, snapshot
@@ -0,0 +1,518 @@
+"""
+이벤트 컬럼형 아카이브 - 날짜/시설별로 파티션된 압축 Parquet 파일
+
+분석 질의가 Cosmos 교차 파티션 쿼리(RU 비용)로 가지 않도록, Change Feed 또는 컨슈머 경로에서
+받은 문서를 모아 Arrow RecordBatch로 변환한 뒤 Parquet 파일로 기록합니다.
+
+    <root>/date=2024-01-01/facility=facility-0/part-<writer>-<순번>.parquet
+
+- 문서를 batch_rows건까지 버퍼링한 뒤 한 번에 열 변환, (date, facility, deviceId, timestamp) 순으로 정렬
+  (같은 디바이스 행이 모여 있어 deviceId 조건은 row group 통계로도 걸러짐)
+- 파티션마다 열린 파일 하나에 row group을 이어 쓰고, max_file_bytes를 넘거나
+  열린 지 max_file_age초가 지나면 닫고 새 파일로 교체 (크기/시간 기준 롤링)
+- 시간 기준 롤링은 add()와 별도로 백그라운드 스레드(start())가 주기적으로 확인하므로
+  Change Feed가 조용해져도 열린 파일이 max_file_age 전후로 닫혀 리더에 보임
+- 쓰는 중인 파일은 '.'으로 시작하는 이름이라 리더가 무시하며, 닫을 때 최종 이름으로 변경
+- ArchiveReader는 date/facility 조건으로 디렉터리 단위 파티션 프루닝 후 필요한 열만 읽음
+
+워커가 비정상 종료되면 아직 닫히지 않은 파일(최대 max_file_age초 분량)은 유실되므로,
+원본은 Cosmos DB에 남아 있다는 전제의 분석용 사본입니다.
+
+앱 설정:
+    ARCHIVE_PATH               아카이브 루트 (로컬 경로 또는 pyarrow 파일시스템 URI, 없으면 비활성화 - 기본값)
+    ARCHIVE_MAX_FILE_MB        파일 롤링 크기 (기본값 64)
+    ARCHIVE_ROLL_SECONDS       파일 롤링 시간 (기본값 300)
+    ARCHIVE_COMPRESSION        Parquet 압축 (기본값 zstd)
+"""
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from .codecs import JSON_CODEC
+from .settings import float_setting
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PATH_SETTING = "ARCHIVE_PATH"
+ARCHIVE_MAX_FILE_MB_SETTING = "ARCHIVE_MAX_FILE_MB"
+ARCHIVE_ROLL_SECONDS_SETTING = "ARCHIVE_ROLL_SECONDS"
+ARCHIVE_COMPRESSION_SETTING = "ARCHIVE_COMPRESSION"
+
+DEFAULT_METRICS = ("temperature", "humidity", "pressure")
+DEFAULT_MAX_FILE_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_FILE_AGE = 300.0
+DEFAULT_BATCH_ROWS = 50_000
+UNKNOWN_PARTITION = "unknown"
+
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string()), ("facility", pa.string())]), flavor="hive")
+
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+_UTC_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+
+def archive_schema(metrics: Sequence[str] = DEFAULT_METRICS) -> pa.Schema:
+    """파일에 기록하는 열 스키마 (파티션 열 date/facility는 경로에만 있음)
+
+    data의 측정값은 열로 펼치고, 그 밖의 data 필드는 attributes(JSON 문자열)에 보관합니다.
+    trace는 추적 대상 문서의 단계별 시각(JSON 문자열, 나머지는 null)입니다.
+    """
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("deviceId", pa.string()),
+            ("eventType", pa.string()),
+            ("timestamp", _UTC_TIMESTAMP),
+            ("region", pa.string()),
+        ]
+        + [(metric, pa.float64()) for metric in metrics]
+        + [
+            ("attributes", pa.string()),
+            ("source", pa.string()),
+            ("processedAt", _UTC_TIMESTAMP),
+            ("trace", pa.string()),
+        ]
+    )
+
+
+def partition_value(value: Any) -> str:
+    """경로에 쓸 수 있는 파티션 값 (비어 있으면 unknown)"""
+    if value is None or value == "":
+        return UNKNOWN_PARTITION
+    return _UNSAFE_PATH_CHARS.sub("_", str(value))
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def timestamp_array(values: Sequence[Any]) -> pa.Array:
+    """ISO 8601 문자열 목록을 UTC timestamp 배열로 변환 (오프셋 없는 값은 UTC로 간주)
+
+    모두 같은 형식이면 Arrow 캐스트로 한 번에 변환하고, 섞여 있으면 값마다 해석합니다.
+    해석할 수 없는 값은 null입니다.
+    """
+    strings = pa.array([value if isinstance(value, str) else None for value in values], pa.string())
+    for target in (pa.timestamp("us"), _UTC_TIMESTAMP):
+        try:
+            return strings.cast(target).cast(_UTC_TIMESTAMP)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return pa.array([_parse_timestamp(value) for value in values], pa.timestamp("us")).cast(_UTC_TIMESTAMP)
+
+
+def documents_to_batch(
+    documents: Sequence[Dict[str, Any]],
+    metrics: Sequence[str] = DEFAULT_METRICS
+) -> Tuple[pa.RecordBatch, pa.Array, pa.Array]:
+    """문서를 아카이브 RecordBatch와 파티션 열(date, facility)로 변환
+
+    Returns:
+        (RecordBatch, date 문자열 배열, facility 배열)
+    """
+    columns: Dict[str, List[Any]] = {name: [] for name in ("id", "deviceId", "eventType", "timestamp", "region")}
+    values: Dict[str, List[Any]] = {metric: [] for metric in metrics}
+    attributes, sources, processed, traces, facilities = [], [], [], [], []
+    metric_set = set(metrics)
+    encode = JSON_CODEC.dumps
+
+    for document in documents:
+        columns["id"].append(document.get("id"))
+        columns["deviceId"].append(document.get("deviceId"))
+        columns["eventType"].append(document.get("eventType"))
+        columns["timestamp"].append(document.get("timestamp") or document.get("processedAt"))
+        location = document.get("location")
+        if not isinstance(location, dict):
+            location = {}
+        columns["region"].append(location.get("region"))
+        facilities.append(partition_value(location.get("facility")))
+
+        data = document.get("data")
+        if not isinstance(data, dict):
+            data = {}
+        for metric in metrics:
+            value = data.get(metric)
+            values[metric].append(value if isinstance(value, (int, float)) and not isinstance(value, bool) else None)
+        extra = {key: value for key, value in data.items() if key not in metric_set}
+        attributes.append(encode(extra) if extra else None)
+        sources.append(document.get("source"))
+        processed.append(document.get("processedAt"))
+        trace = document.get("trace")
+        traces.append(encode(trace) if trace else None)
+
+    timestamps = timestamp_array(columns["timestamp"])
+    dates = pc.fill_null(pc.strftime(timestamps, format="%Y-%m-%d"), UNKNOWN_PARTITION)
+
+    schema = archive_schema(metrics)
+    arrays = [
+        pa.array(columns["id"], pa.string()),
+        pa.array(columns["deviceId"], pa.string()),
+        pa.array(columns["eventType"], pa.string()),
+        timestamps,
+        pa.array(columns["region"], pa.string()),
+    ]
+    arrays += [pa.array(values[metric], pa.float64()) for metric in metrics]
+    arrays += [
+        pa.array(attributes, pa.string()),
+        pa.array(sources, pa.string()),
+        timestamp_array(processed),
+        pa.array(traces, pa.string()),
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema), dates, pa.array(facilities, pa.string())
+
+
+@dataclass
+class _OpenFile:
+    """파티션별로 열려 있는 Parquet 파일"""
+    temp_path: str
+    final_path: str
+    stream: Any
+    writer: pq.ParquetWriter
+    opened_at: float
+    rows: int = 0
+
+
+@dataclass
+class ArchiveStats:
+    """아카이브 누적 통계"""
+    documents: int = 0
+    rows_written: int = 0
+    row_groups: int = 0
+    files_closed: int = 0
+    bytes_closed: int = 0
+    size_rolls: int = 0
+    time_rolls: int = 0
+
+
+def _filesystem(root: str) -> Tuple[pafs.FileSystem, str]:
+    """경로 또는 URI를 (파일시스템, 루트 경로)로 변환"""
+    if "://" in root:
+        return pafs.FileSystem.from_uri(root)
+    return pafs.LocalFileSystem(), os.path.abspath(root)
+
+
+class ArchiveWriter:
+    """문서를 날짜/시설 파티션 Parquet 파일로 기록하는 아카이브 작성기 (스레드 안전)
+
+    사용 예:
+        writer = ArchiveWriter("/home/data/archive").start()  # 시간 기준 롤링 스레드 시작
+        writer.add(documents)   # 버퍼링, 필요하면 기록/롤링
+        writer.close()          # 롤링 스레드 종료, 버퍼 기록 후 열린 파일을 모두 닫음
+    """
+
+    def __init__(
+        self,
+        root: str,
+        metrics: Sequence[str] = DEFAULT_METRICS,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        max_file_age: float = DEFAULT_MAX_FILE_AGE,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        compression: str = "zstd",
+        filesystem: Optional[pafs.FileSystem] = None,
+        clock=time.monotonic
+    ):
+        """
+        Args:
+            root: 아카이브 루트 (로컬 경로 또는 pyarrow 파일시스템 URI)
+            metrics: 열로 펼칠 data 측정값
+            max_file_bytes: 파일 크기가 이 값을 넘으면 닫고 새 파일 시작
+            max_file_age: 파일을 연 지 이 시간(초)이 지나면 닫음 (버퍼도 이 주기로 기록)
+            batch_rows: 버퍼가 이 건수에 도달하면 기록 (기록 단위 = row group)
+            compression: Parquet 압축 코덱
+            filesystem: pyarrow 파일시스템 (None이면 root에서 결정)
+        """
+        if filesystem is None:
+            self.filesystem, self.root = _filesystem(root)
+        else:
+            self.filesystem, self.root = filesystem, root
+        self.metrics = tuple(metrics)
+        self.schema = archive_schema(self.metrics)
+        self.max_file_bytes = max_file_bytes
+        self.max_file_age = max_file_age
+        self.batch_rows = batch_rows
+        self.compression = compression
+        self.stats = ArchiveStats()
+        self._clock = clock
+        self._writer_id = uuid.uuid4().hex[:12]
+        self._sequence = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_started: Optional[float] = None
+        self._files: Dict[Tuple[str, str], _OpenFile] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, interval: Optional[float] = None) -> "ArchiveWriter":
+        """roll_expired()를 주기적으로 호출하는 롤링 스레드 시작 (새 문서가 없어도 파일이 닫히도록)
+
+        Args:
+            interval: 확인 간격 (초, None이면 max_file_age / 4, 최소 1초)
+        """
+        if self._thread is None:
+            interval = max(self.max_file_age / 4, 1.0) if interval is None else interval
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="archive-roller", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.roll_expired()
+            except Exception as e:
+                logger.error("Archive roll failed: %s", e, exc_info=True)
+
+    def add(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """문서 버퍼링 (batch_rows 도달 시 기록, 오래된 파일은 롤링)
+
+        Returns:
+            추가한 문서 수
+        """
+        with self._lock:
+            before = len(self._buffer)
+            self._buffer.extend(documents)
+            added = len(self._buffer) - before
+            if added and self._buffer_started is None:
+                self._buffer_started = self._clock()
+            self.stats.documents += added
+            if len(self._buffer) >= self.batch_rows:
+                self._write_buffer()
+            self.roll_expired()
+            return added
+
+    def roll_expired(self) -> int:
+        """max_file_age가 지난 버퍼와 파일을 기록하고 닫음
+
+        Returns:
+            닫은 파일 수
+        """
+        with self._lock:
+            now = self._clock()
+            if self._buffer_started is not None and now - self._buffer_started >= self.max_file_age:
+                self._write_buffer()
+            expired = [key for key, open_file in self._files.items() if now - open_file.opened_at >= self.max_file_age]
+            for key in expired:
+                self._close_file(key)
+            self.stats.time_rolls += len(expired)
+            return len(expired)
+
+    def flush(self) -> None:
+        """버퍼를 열린 파일에 기록 (파일은 닫지 않으므로 리더에는 아직 보이지 않음)"""
+        with self._lock:
+            self._write_buffer()
+
+    def roll(self) -> List[str]:
+        """버퍼를 기록하고 열린 파일을 모두 닫음 (리더에 보이게 됨)
+
+        Returns:
+            닫은 파일 경로 목록
+        """
+        with self._lock:
+            self._write_buffer()
+            paths = [open_file.final_path for open_file in self._files.values()]
+            for key in list(self._files):
+                self._close_file(key)
+            return paths
+
+    def close(self) -> None:
+        """롤링 스레드를 멈추고 버퍼 기록 후 열린 파일을 모두 닫음"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.roll()
+
+    @property
+    def open_files(self) -> int:
+        return len(self._files)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def _write_buffer(self) -> None:
+        if not self._buffer:
+            return
+        documents, self._buffer, self._buffer_started = self._buffer, [], None
+        batch, dates, facilities = documents_to_batch(documents, self.metrics)
+
+        # 파티션별 연속 구간으로 정렬 (파티션 안에서는 deviceId, timestamp 순)
+        table = pa.Table.from_batches([batch]).append_column("__date", dates).append_column("__facility", facilities)
+        order = pc.sort_indices(table, sort_keys=[
+            ("__date", "ascending"), ("__facility", "ascending"),
+            ("deviceId", "ascending"), ("timestamp", "ascending"),
+        ])
+        table = table.take(order)
+        keys = pc.binary_join_element_wise(table.column("__date"), table.column("__facility"), "/")
+        table = table.drop_columns(["__date", "__facility"])
+
+        # 정렬된 키가 바뀌는 위치마다 잘라서 파티션 파일에 기록
+        # (한 행이면 비교할 쌍이 없음 - 빈 배열 비교는 pyarrow 26에서 비정상 종료)
+        bounds = [0, len(keys)]
+        if len(keys) > 1:
+            changes = pc.not_equal(keys.slice(1), keys.slice(0, len(keys) - 1))
+            bounds[1:1] = [index + 1 for index in pc.indices_nonzero(changes).to_pylist()]
+        for start, end in zip(bounds, bounds[1:]):
+            date_value, facility = keys[start].as_py().split("/", 1)
+            self._write_partition((date_value, facility), table.slice(start, end - start))
+
+    def _write_partition(self, key: Tuple[str, str], table: pa.Table) -> None:
+        open_file = self._files.get(key) or self._open_file(key)
+        open_file.writer.write_table(table, row_group_size=table.num_rows)
+        open_file.rows += table.num_rows
+        self.stats.rows_written += table.num_rows
+        self.stats.row_groups += 1
+        if open_file.stream.tell() >= self.max_file_bytes:
+            self._close_file(key)
+            self.stats.size_rolls += 1
+
+    def _open_file(self, key: Tuple[str, str]) -> _OpenFile:
+        directory = f"{self.root}/date={key[0]}/facility={key[1]}"
+        self.filesystem.create_dir(directory, recursive=True)
+        self._sequence += 1
+        name = f"part-{self._writer_id}-{self._sequence:06d}.parquet"
+        temp_path = f"{directory}/.{name}.inprogress"
+        stream = self.filesystem.open_output_stream(temp_path)
+        writer = pq.ParquetWriter(stream, self.schema, compression=self.compression)
+        open_file = _OpenFile(temp_path, f"{directory}/{name}", stream, writer, self._clock())
+        self._files[key] = open_file
+        return open_file
+
+    def _close_file(self, key: Tuple[str, str]) -> None:
+        open_file = self._files.pop(key)
+        open_file.writer.close()
+        size = open_file.stream.tell()
+        open_file.stream.close()
+        self.filesystem.move(open_file.temp_path, open_file.final_path)
+        self.stats.files_closed += 1
+        self.stats.bytes_closed += size
+
+
+def _date_string(value: Union[str, date, datetime, None]) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+class ArchiveReader:
+    """아카이브 조회 - date/facility 조건으로 파티션 디렉터리를 먼저 걸러냄
+
+    사용 예:
+        reader = ArchiveReader("/home/data/archive")
+        table = reader.scan(start_date="2024-01-01", end_date="2024-01-07",
+                            facilities=["facility-0"], columns=["deviceId", "temperature"])
+    """
+
+    def __init__(self, root: str, filesystem: Optional[pafs.FileSystem] = None):
+        if filesystem is None:
+            self.filesystem, self.root = _filesystem(root)
+        else:
+            self.filesystem, self.root = filesystem, root
+
+    def dataset(self) -> ds.Dataset:
+        """hive 파티션(date=, facility=) Parquet 데이터셋 (쓰는 중인 '.' 파일 제외)"""
+        return ds.dataset(self.root, format="parquet", partitioning=PARTITIONING, filesystem=self.filesystem)
+
+    @staticmethod
+    def partition_filter(
+        start_date: Union[str, date, datetime, None] = None,
+        end_date: Union[str, date, datetime, None] = None,
+        facilities: Optional[Sequence[str]] = None
+    ) -> Optional[ds.Expression]:
+        """파티션 열 조건식 (날짜는 양끝 포함)"""
+        conditions = []
+        start, end = _date_string(start_date), _date_string(end_date)
+        if start is not None:
+            conditions.append(ds.field("date") >= start)
+        if end is not None:
+            conditions.append(ds.field("date") <= end)
+        if facilities is not None:
+            conditions.append(ds.field("facility").isin([partition_value(f) for f in facilities]))
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def files(
+        self,
+        start_date: Union[str, date, datetime, None] = None,
+        end_date: Union[str, date, datetime, None] = None,
+        facilities: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """파티션 조건에 해당하는 파일 목록 (프루닝 결과 확인용)"""
+        expression = self.partition_filter(start_date, end_date, facilities)
+        dataset = self.dataset()
+        fragments = dataset.get_fragments(filter=expression) if expression is not None else dataset.get_fragments()
+        return sorted(fragment.path for fragment in fragments)
+
+    def partitions(self) -> List[Tuple[str, str]]:
+        """(date, facility) 파티션 목록"""
+        keys = set()
+        for fragment in self.dataset().get_fragments():
+            values = ds.get_partition_keys(fragment.partition_expression)
+            keys.add((values.get("date"), values.get("facility")))
+        return sorted(keys)
+
+    def scan(
+        self,
+        start_date: Union[str, date, datetime, None] = None,
+        end_date: Union[str, date, datetime, None] = None,
+        facilities: Optional[Sequence[str]] = None,
+        device_ids: Optional[Sequence[str]] = None,
+        columns: Optional[Sequence[str]] = None,
+        filter: Optional[ds.Expression] = None
+    ) -> pa.Table:
+        """조건에 맞는 행을 Arrow Table로 읽음
+
+        Args:
+            start_date, end_date: 날짜 범위 (YYYY-MM-DD 또는 date, 양끝 포함) - 파티션 프루닝
+            facilities: 시설 목록 - 파티션 프루닝
+            device_ids: 디바이스 목록 - row group 통계로 프루닝
+            columns: 읽을 열 (None이면 전체, date/facility 포함 가능)
+            filter: 추가 조건식 (예: ds.field("temperature") > 40)
+        """
+        expression = self.partition_filter(start_date, end_date, facilities)
+        for condition in (
+            ds.field("deviceId").isin(list(device_ids)) if device_ids is not None else None,
+            filter,
+        ):
+            if condition is not None:
+                expression = condition if expression is None else expression & condition
+        return self.dataset().to_table(columns=list(columns) if columns is not None else None, filter=expression)
+
+
+def archive_enabled() -> bool:
+    """ARCHIVE_PATH가 설정되어 있으면 True"""
+    return bool(os.getenv(ARCHIVE_PATH_SETTING, "").strip())
+
+
+def create_archive_writer() -> ArchiveWriter:
+    """앱 설정으로 아카이브 작성기 생성 후 롤링 스레드 시작 (워커 종료 시 열린 파일을 닫도록 등록)"""
+    max_file_mb = float_setting(ARCHIVE_MAX_FILE_MB_SETTING, DEFAULT_MAX_FILE_BYTES / (1024 * 1024))
+    writer = ArchiveWriter(
+        os.getenv(ARCHIVE_PATH_SETTING).strip(),
+        max_file_bytes=int(max_file_mb * 1024 * 1024),
+        max_file_age=float_setting(ARCHIVE_ROLL_SECONDS_SETTING, DEFAULT_MAX_FILE_AGE),
+        compression=os.getenv(ARCHIVE_COMPRESSION_SETTING, "zstd").strip().lower(),
+    )
+    atexit.register(writer.close)
+    return writer.start()
@@ -0,0 +1,234 @@
+"""
+배치 단위 구조화 로깅 - 핫 패스 핸들러용
+
+이벤트마다 로그를 남기면 포맷팅 비용이 배치 처리 시간의 상당 부분을 차지하고,
+Application Insights 샘플링(host.json maxTelemetryItemsPerSecond)에 걸려 대부분 버려집니다.
+
+- 배치마다 구조화된 요약 레코드 1건 (건수, 파티션/시퀀스 범위, 단계별 시간)
+- 이벤트별 상세 로그는 샘플링 비율(EVENT_LOG_SAMPLE_RATE)만큼만 기록
+  (샘플러는 작업 이름별로 호출 간에 공유하므로 작은 배치가 많아도 실제 비율이 설정값을 유지)
+- 모든 메시지는 % 인자 방식의 지연 포맷팅 (비활성 레벨은 포맷팅 비용 없음)
+- metrics(MetricsCollector)를 주면 emit() 시 카운터와 단계별 시간을 배치당 한 번 집계 메트릭에 반영
+"""
+import time
+import random
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from .codecs import JSON_CODEC
+from .metrics import MetricsCollector
+from .settings import rate_setting
+
+SAMPLE_RATE_SETTING = "EVENT_LOG_SAMPLE_RATE"
+DEFAULT_SAMPLE_RATE = 0.01
+
+
+def get_sample_rate(default: float = DEFAULT_SAMPLE_RATE) -> float:
+    """앱 설정(EVENT_LOG_SAMPLE_RATE)에서 상세 로그 샘플링 비율 조회 (0.0 ~ 1.0)"""
+    return rate_setting(SAMPLE_RATE_SETTING, default)
+
+
+class Lazy:
+    """로그 인자를 실제로 출력할 때만 계산
+
+    예: logger.debug("payload %s", Lazy(lambda: JSON_CODEC.dumps(doc)))
+    """
+
+    __slots__ = ("_func",)
+
+    def __init__(self, func: Callable[[], Any]):
+        self._func = func
+
+    def __str__(self) -> str:
+        return str(self._func())
+
+
+class LazyJson:
+    """출력 시점에 JSON으로 직렬화되는 로그 인자"""
+
+    __slots__ = ("_obj",)
+
+    def __init__(self, obj: Any):
+        self._obj = obj
+
+    def __str__(self) -> str:
+        return JSON_CODEC.dumps(self._obj)
+
+
+class EventSampler:
+    """고정 간격 샘플러 - rate가 0.01이면 100건마다 1건
+
+    난수 대신 카운터를 사용하여 호출 비용이 작습니다. phase=0이면 첫 호출이 샘플링되고,
+    random_phase=True면 시작 위치를 간격 안에서 무작위로 정합니다 (여러 프로세스가 모두 첫 건을 기록하지 않도록).
+    카운터는 itertools.count라 여러 스레드가 공유해도 건너뛰거나 중복되지 않습니다.
+    """
+
+    __slots__ = ("_stride", "_counter")
+
+    def __init__(self, rate: float, phase: int = 0, random_phase: bool = False):
+        self._stride = 0 if rate <= 0 else max(int(round(1.0 / min(rate, 1.0))), 1)
+        if random_phase and self._stride:
+            phase = random.randrange(self._stride)
+        self._counter = itertools.count(phase)
+
+    def __call__(self) -> bool:
+        if not self._stride:
+            return False
+        return next(self._counter) % self._stride == 0
+
+
+_SAMPLERS: Dict[Tuple[str, float], EventSampler] = {}
+_SAMPLERS_LOCK = threading.Lock()
+
+
+def shared_sampler(operation: str, rate: float) -> EventSampler:
+    """작업 이름/비율별로 프로세스에서 공유하는 샘플러 (시작 위치는 무작위)
+
+    배치마다 새 샘플러를 만들면 첫 호출이 항상 샘플링되어 실제 비율이 max(rate, 1 / 배치 크기)가 됩니다.
+    """
+    key = (operation, rate)
+    sampler = _SAMPLERS.get(key)
+    if sampler is None:
+        with _SAMPLERS_LOCK:
+            sampler = _SAMPLERS.setdefault(key, EventSampler(rate, random_phase=True))
+    return sampler
+
+
+class BatchLogger:
+    """배치 처리 1회분의 요약 로그와 샘플링된 상세 로그
+
+    사용 예:
+        batch = BatchLogger(logger, "eventhub_trigger_processor")
+        with batch.stage("decode"):
+            ...
+        batch.record_event(partition=..., sequence_number=...)
+        batch.detail("Processed event %s", event_id)
+        batch.emit()
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        operation: str,
+        sample_rate: Optional[float] = None,
+        detail_level: int = logging.INFO,
+        metrics: Optional[MetricsCollector] = None
+    ):
+        """
+        Args:
+            logger: 출력 대상 로거
+            operation: 요약 레코드의 작업 이름 (보통 함수 이름)
+            sample_rate: 상세 로그 샘플링 비율 (None이면 EVENT_LOG_SAMPLE_RATE 설정)
+            detail_level: 상세 로그 레벨
+            metrics: 배치 요약을 반영할 메트릭 수집기 (function 레이블은 operation)
+        """
+        self.logger = logger
+        self.operation = operation
+        self.metrics = metrics
+        self.detail_level = detail_level
+        rate = get_sample_rate() if sample_rate is None else sample_rate
+        # 레벨이 꺼져 있으면 샘플러 호출 자체를 생략
+        self._detail_enabled = rate > 0 and logger.isEnabledFor(detail_level)
+        self._sampler = shared_sampler(operation, rate)
+        self._started = time.perf_counter()
+        self.counts: Dict[str, int] = {}
+        self.timings_ms: Dict[str, float] = {}
+        self.partitions: Dict[str, int] = {}
+        self.min_sequence: Optional[int] = None
+        self.max_sequence: Optional[int] = None
+        self.extra: Dict[str, Any] = {}
+
+    def count(self, name: str, value: int = 1) -> None:
+        """카운터 증가 (received, processed, failed 등)"""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def record_event(self, partition: Optional[Any] = None, sequence_number: Optional[int] = None) -> None:
+        """이벤트의 파티션과 시퀀스 번호를 요약 범위에 반영"""
+        if partition is not None:
+            key = str(partition)
+            self.partitions[key] = self.partitions.get(key, 0) + 1
+        if sequence_number is not None:
+            if self.min_sequence is None or sequence_number < self.min_sequence:
+                self.min_sequence = sequence_number
+            if self.max_sequence is None or sequence_number > self.max_sequence:
+                self.max_sequence = sequence_number
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """단계 소요 시간 누적 (같은 이름은 합산)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.timings_ms[name] = self.timings_ms.get(name, 0.0) + elapsed
+
+    def detail(self, msg: str, *args: Any) -> None:
+        """샘플링된 이벤트별 상세 로그 (인자는 기록될 때만 포맷팅)"""
+        if self._detail_enabled and self._sampler():
+            self.logger.log(self.detail_level, msg, *args)
+
+    def summary(self) -> Dict[str, Any]:
+        """요약 레코드 내용"""
+        record: Dict[str, Any] = {
+            "operation": self.operation,
+            "counts": dict(self.counts),
+            "durationMs": round((time.perf_counter() - self._started) * 1000, 3),
+            "stagesMs": {name: round(value, 3) for name, value in self.timings_ms.items()},
+        }
+        if self.partitions:
+            record["partitions"] = dict(self.partitions)
+        if self.min_sequence is not None:
+            record["sequenceRange"] = [self.min_sequence, self.max_sequence]
+        record.update(self.extra)
+        return record
+
+    def publish(self) -> None:
+        """카운터와 단계별/전체 소요 시간을 메트릭 수집기에 반영 (파티션이 하나면 partition 레이블 포함)
+
+        카운터는 batches와 각 counts 이름, 히스토그램은 batch_duration_ms와 stage_<단계>_ms입니다.
+        """
+        if self.metrics is None:
+            return
+        latencies = {f"stage_{name}_ms": value for name, value in self.timings_ms.items()}
+        latencies["batch_duration_ms"] = (time.perf_counter() - self._started) * 1000
+        self.metrics.update(
+            {"batches": 1, **self.counts},
+            latencies,
+            function=self.operation,
+            partition=next(iter(self.partitions)) if len(self.partitions) == 1 else "",
+        )
+
+    def emit(self, level: int = logging.INFO) -> None:
+        """메트릭 반영 후 요약 레코드 1건 기록
+
+        custom_dimensions는 Application Insights(Azure Monitor) 핸들러가 사용자 지정 속성으로 전송합니다.
+        """
+        self.publish()
+        if not self.logger.isEnabledFor(level):
+            return
+        record = self.summary()
+        self.logger.log(
+            level,
+            "%s batch summary %s",
+            self.operation,
+            LazyJson(record),
+            extra={"custom_dimensions": _flatten(record)},
+        )
+
+
+def _flatten(record: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """중첩 딕셔너리를 "counts.processed" 형태의 단일 수준 속성으로 변환"""
+    flat: Dict[str, Any] = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            flat[name] = JSON_CODEC.dumps(value)
+        else:
+            flat[name] = value
+    return flat
@@ -0,0 +1,274 @@
+"""
+이벤트 코덱 - 직렬화 포맷 추상화
+Producer, Function App, 유틸리티가 공유하는 인코딩/디코딩 계층
+
+코덱은 EventData의 contentType 속성으로 선택됩니다.
+- application/json: orjson (설치된 경우) 또는 표준 json
+- application/msgpack: MessagePack (msgpack 설치 필요)
+- application/vnd.telemetry.v1+binary: 텔레메트리 스키마 기반 고정 바이너리
+"""
+import json
+import struct
+import logging
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 선택적 의존성
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 선택적 의존성
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# EventData 애플리케이션 속성 이름 (Functions 트리거 메타데이터로 전달됨)
+CONTENT_TYPE_PROPERTY = "contentType"
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+TELEMETRY_BINARY_CONTENT_TYPE = "application/vnd.telemetry.v1+binary"
+
+
+class CodecError(ValueError):
+    """인코딩/디코딩 실패"""
+
+
+class EventCodec:
+    """코덱 기본 인터페이스"""
+
+    content_type: str = ""
+
+    def encode(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(EventCodec):
+    """JSON 코덱 - orjson이 있으면 사용, 없으면 표준 json으로 대체"""
+
+    content_type = JSON_CONTENT_TYPE
+
+    def __init__(self, use_orjson: bool = True):
+        self.use_orjson = use_orjson and orjson is not None
+
+    def encode(self, obj: Any) -> bytes:
+        try:
+            if self.use_orjson:
+                return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+            return json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            raise CodecError(f"JSON encoding failed: {e}") from e
+
+    def decode(self, data: bytes) -> Any:
+        try:
+            if self.use_orjson:
+                return orjson.loads(data)
+            return json.loads(data)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CodecError(f"JSON decoding failed: {e}") from e
+
+    def dumps(self, obj: Any) -> str:
+        """문자열이 필요한 호출자용 (예: HttpResponse 본문)"""
+        return self.encode(obj).decode("utf-8")
+
+
+class MsgPackCodec(EventCodec):
+    """MessagePack 코덱"""
+
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("msgpack is not installed (pip install msgpack)")
+
+    def encode(self, obj: Any) -> bytes:
+        try:
+            return msgpack.packb(obj, use_bin_type=True, default=str)
+        except (TypeError, ValueError) as e:
+            raise CodecError(f"MessagePack encoding failed: {e}") from e
+
+    def decode(self, data: bytes) -> Any:
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except (ValueError, msgpack.exceptions.UnpackException) as e:
+            raise CodecError(f"MessagePack decoding failed: {e}") from e
+
+
+class TelemetryBinaryCodec(EventCodec):
+    """텔레메트리 이벤트 전용 스키마 기반 바이너리 코덱
+
+    EventProducer.create_sample_event()와 같은 형태의 이벤트만 인코딩합니다.
+    키 이름을 싣지 않고, 수치 3개는 float64로, 문자열은 길이(uint16) + UTF-8로 기록합니다.
+
+    레이아웃:
+        version(B) flags(B) temperature(d) humidity(d) pressure(d)
+        id, deviceId, timestamp, eventType, region, facility (각각 H + bytes)
+
+    flags의 하위 3비트는 측정값 존재 여부, 상위 3비트는 정수 여부입니다.
+    버전 2부터 길이 0xFFFF는 "필드 없음"이며, 디코딩 결과에서 해당 키를 뺍니다
+    (빈 문자열과 구분되므로 id가 없는 이벤트는 문서 생성기의 evt-<시퀀스> 기본값을 받음).
+    버전 1 메시지는 그대로 디코딩합니다 (없는 필드가 빈 문자열로 복원됨).
+    """
+
+    content_type = TELEMETRY_BINARY_CONTENT_TYPE
+
+    VERSION = 2
+    SUPPORTED_VERSIONS = (1, 2)
+    ABSENT = 0xFFFF
+    METRICS = ("temperature", "humidity", "pressure")
+    STRING_FIELDS = ("id", "deviceId", "timestamp", "eventType")
+    LOCATION_FIELDS = ("region", "facility")
+    TOP_LEVEL_KEYS = frozenset(STRING_FIELDS + ("data", "location"))
+
+    _header = struct.Struct("<BBddd")
+    _length = struct.Struct("<H")
+
+    def encode(self, obj: Any) -> bytes:
+        if not isinstance(obj, dict) or not self.TOP_LEVEL_KEYS.issuperset(obj):
+            raise CodecError("Event does not match the telemetry schema")
+
+        data = obj.get("data") or {}
+        location = obj.get("location") or {}
+        if not set(self.METRICS).issuperset(data) or not set(self.LOCATION_FIELDS).issuperset(location):
+            raise CodecError("Event does not match the telemetry schema")
+
+        flags = 0
+        values = []
+        for bit, name in enumerate(self.METRICS):
+            value = data.get(name)
+            if value is None:
+                values.append(0.0)
+                continue
+            flags |= 1 << bit
+            if isinstance(value, int) and not isinstance(value, bool):
+                flags |= 1 << (bit + 3)
+            values.append(float(value))
+
+        parts = [self._header.pack(self.VERSION, flags, *values)]
+        for value in (
+            *(obj.get(name) for name in self.STRING_FIELDS),
+            *(location.get(name) for name in self.LOCATION_FIELDS),
+        ):
+            if value is None:
+                parts.append(self._length.pack(self.ABSENT))
+                continue
+            encoded = str(value).encode("utf-8")
+            if len(encoded) >= self.ABSENT:
+                raise CodecError("String field too long for telemetry schema")
+            parts.append(self._length.pack(len(encoded)))
+            parts.append(encoded)
+        return b"".join(parts)
+
+    def decode(self, data: bytes) -> Any:
+        try:
+            version, flags, *values = self._header.unpack_from(data, 0)
+            if version not in self.SUPPORTED_VERSIONS:
+                raise CodecError(f"Unsupported telemetry schema version: {version}")
+
+            offset = self._header.size
+            strings: List[Optional[str]] = []
+            for _ in range(len(self.STRING_FIELDS) + len(self.LOCATION_FIELDS)):
+                (length,) = self._length.unpack_from(data, offset)
+                offset += self._length.size
+                if length == self.ABSENT and version >= 2:
+                    strings.append(None)
+                    continue
+                if offset + length > len(data):
+                    raise struct.error("string field exceeds message length")
+                strings.append(bytes(data[offset:offset + length]).decode("utf-8"))
+                offset += length
+        except (struct.error, UnicodeDecodeError) as e:
+            raise CodecError(f"Telemetry binary decoding failed: {e}") from e
+
+        metrics = {}
+        for bit, name in enumerate(self.METRICS):
+            if flags & (1 << bit):
+                value = values[bit]
+                metrics[name] = int(value) if flags & (1 << (bit + 3)) else value
+
+        event: Dict[str, Any] = {
+            name: value for name, value in zip(self.STRING_FIELDS, strings) if value is not None
+        }
+        event["data"] = metrics
+        event["location"] = {
+            name: value for name, value in zip(self.LOCATION_FIELDS, strings[len(self.STRING_FIELDS):])
+            if value is not None
+        }
+        return event
+
+
+JSON_CODEC = JsonCodec()
+
+_CODECS: Dict[str, EventCodec] = {
+    JSON_CONTENT_TYPE: JSON_CODEC,
+    TELEMETRY_BINARY_CONTENT_TYPE: TelemetryBinaryCodec(),
+}
+if msgpack is not None:
+    _CODECS[MSGPACK_CONTENT_TYPE] = MsgPackCodec()
+
+
+def register_codec(codec: EventCodec) -> None:
+    """코덱 등록 (같은 content type은 덮어씀)"""
+    _CODECS[codec.content_type] = codec
+
+
+def get_codec(content_type: Optional[str] = None) -> EventCodec:
+    """content type에 해당하는 코덱 반환
+
+    Args:
+        content_type: MIME 타입 (None 또는 빈 값이면 JSON)
+
+    Returns:
+        EventCodec 인스턴스
+    """
+    if not content_type:
+        return JSON_CODEC
+    # "application/json; charset=utf-8" 형태 허용
+    codec = _CODECS.get(content_type.split(";", 1)[0].strip().lower())
+    if codec is None:
+        raise CodecError(f"No codec registered for content type: {content_type}")
+    return codec
+
+
+def available_codecs() -> List[str]:
+    """등록된 content type 목록"""
+    return list(_CODECS)
+
+
+def get_event_properties(events: List[Any]) -> List[Dict[str, Any]]:
+    """Functions EventHubEvent 목록의 애플리케이션 속성 추출
+
+    cardinality="many"에서는 모든 이벤트가 같은 트리거 메타데이터를 공유하며
+    이벤트별 속성은 PropertiesArray에 순서대로 들어 있습니다.
+
+    Returns:
+        이벤트별 속성 딕셔너리 리스트 (없으면 빈 딕셔너리)
+    """
+    if not events:
+        return []
+
+    metadata = events[0].metadata or {}
+    properties_array = metadata.get("PropertiesArray")
+    if properties_array is not None and len(properties_array) == len(events):
+        return [props or {} for props in properties_array]
+
+    return [(event.metadata or {}).get("Properties") or {} for event in events]
+
+
+def decode_event_body(body: bytes, properties: Optional[Dict[str, Any]] = None) -> Any:
+    """이벤트 속성의 contentType에 맞는 코덱으로 본문 디코딩
+
+    Args:
+        body: 이벤트 본문
+        properties: 이벤트 애플리케이션 속성
+
+    Returns:
+        디코딩된 객체
+    """
+    content_type = (properties or {}).get(CONTENT_TYPE_PROPERTY)
+    return get_codec(content_type).decode(body)
@@ -0,0 +1,129 @@
+"""
+이벤트 압축 - 여러 이벤트를 하나의 압축된 EventData 본문으로 패킹
+Producer에서 패킹하고 Event Hub 트리거에서 투명하게 풀어냅니다.
+
+패킹 포맷 (압축 전):
+    [uint32 길이 + 코덱 인코딩된 이벤트] 반복
+
+EventData 속성:
+    contentType: 개별 이벤트 코덱 (codecs.CONTENT_TYPE_PROPERTY)
+    contentEncoding: 압축 방식 (gzip, zlib, zstd)
+    eventCount: 패킹된 이벤트 수
+"""
+import gzip
+import struct
+import zlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from .codecs import CodecError, EventCodec, decode_event_body, get_codec, CONTENT_TYPE_PROPERTY
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 선택적 의존성
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CONTENT_ENCODING_PROPERTY = "contentEncoding"
+EVENT_COUNT_PROPERTY = "eventCount"
+
+_frame_length = struct.Struct("<I")
+
+_DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error)
+if zstandard is not None:
+    _DECOMPRESSION_ERRORS += (zstandard.ZstdError,)
+
+
+def available_encodings() -> List[str]:
+    """사용 가능한 압축 방식 목록"""
+    encodings = ["gzip", "zlib"]
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """지정한 방식으로 압축
+
+    Args:
+        data: 원본 바이트
+        encoding: gzip, zlib, zstd 중 하나
+        level: 압축 레벨 (None이면 방식별 기본값)
+    """
+    if encoding == "zlib":
+        return zlib.compress(data, 6 if level is None else level)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise CodecError("zstandard is not installed (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    raise CodecError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """지정한 방식으로 압축 해제"""
+    try:
+        if encoding == "zlib":
+            return zlib.decompress(data)
+        if encoding == "gzip":
+            return gzip.decompress(data)
+        if encoding == "zstd":
+            if zstandard is None:
+                raise CodecError("zstandard is not installed (pip install zstandard)")
+            return zstandard.ZstdDecompressor().decompress(data)
+    except _DECOMPRESSION_ERRORS as e:
+        raise CodecError(f"Decompression failed ({encoding}): {e}") from e
+    raise CodecError(f"Unsupported content encoding: {encoding}")
+
+
+def pack_events(
+    events: List[Dict[str, Any]],
+    codec: EventCodec,
+    encoding: str,
+    level: Optional[int] = None
+) -> bytes:
+    """이벤트 목록을 길이 프레임으로 이어 붙인 뒤 압축
+
+    Returns:
+        압축된 본문
+    """
+    frames = []
+    for event in events:
+        encoded = codec.encode(event)
+        frames.append(_frame_length.pack(len(encoded)))
+        frames.append(encoded)
+    return compress(b"".join(frames), encoding, level)
+
+
+def unpack_events(body: bytes, codec: EventCodec, encoding: str) -> List[Any]:
+    """pack_events()로 만든 본문을 이벤트 목록으로 복원"""
+    raw = memoryview(decompress(body, encoding))
+    events = []
+    offset = 0
+    while offset < len(raw):
+        if offset + _frame_length.size > len(raw):
+            raise CodecError("Truncated packed event frame")
+        (length,) = _frame_length.unpack_from(raw, offset)
+        offset += _frame_length.size
+        if offset + length > len(raw):
+            raise CodecError("Truncated packed event frame")
+        events.append(codec.decode(raw[offset:offset + length].tobytes()))
+        offset += length
+    return events
+
+
+def decode_events(body: bytes, properties: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """EventData 본문을 이벤트 목록으로 디코딩
+
+    contentEncoding 속성이 있으면 압축 해제 후 패킹된 이벤트를 모두 반환하고,
+    없으면 단일 이벤트를 담은 리스트를 반환합니다.
+    """
+    properties = properties or {}
+    encoding = properties.get(CONTENT_ENCODING_PROPERTY)
+    if not encoding:
+        return [decode_event_body(body, properties)]
+
+    codec = get_codec(properties.get(CONTENT_TYPE_PROPERTY))
+    return unpack_events(body, codec, encoding)
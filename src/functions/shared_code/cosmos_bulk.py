@@ -0,0 +1,498 @@
+"""
+Cosmos DB 직접 벌크 쓰기 - RU 기반 동시성 조절과 429 처리
+
+cosmos_db_output 바인딩은 동시성, 배치 크기, 429 재시도를 제어할 수 없으므로
+azure.cosmos.aio 컨테이너에 직접 upsert합니다.
+
+- 문서를 파티션 키별로 묶어 트랜잭션 배치(최대 100건) 단위로 upsert
+- 동시에 진행 중인 요청 수를 AIMD로 조절 (429면 절반, 성공이 이어지면 1씩 증가)
+- 429 응답의 x-ms-retry-after-ms 동안 모든 요청을 멈춤
+- 관측된 RU/s가 목표를 넘으면 동시성 감소
+- 실패한 배치는 실패한 문서만 분리해서 재시도 (원인이 불명확하면 절반씩 분할)
+
+앱 설정:
+    COSMOS_WRITE_MODE                  binding(기본값) | bulk
+    COSMOS_BULK_MAX_CONCURRENCY        최대 동시 요청 수 (기본값 16)
+    COSMOS_BULK_TARGET_RU_PER_SECOND   목표 RU/s (기본값 없음 - 429로만 조절)
+    COSMOS_DB_PARTITION_KEY_PATH       파티션 키 경로 (기본값 /deviceId)
+"""
+import os
+import time
+import asyncio
+import threading
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from azure.cosmos.exceptions import CosmosBatchOperationError, CosmosHttpResponseError
+
+from .settings import int_setting
+
+logger = logging.getLogger(__name__)
+
+WRITE_MODE_SETTING = "COSMOS_WRITE_MODE"
+MAX_CONCURRENCY_SETTING = "COSMOS_BULK_MAX_CONCURRENCY"
+TARGET_RU_SETTING = "COSMOS_BULK_TARGET_RU_PER_SECOND"
+PARTITION_KEY_PATH_SETTING = "COSMOS_DB_PARTITION_KEY_PATH"
+
+DEFAULT_MAX_CONCURRENCY = 16
+# 트랜잭션 배치 최대 작업 수
+MAX_BATCH_OPERATIONS = 100
+
+RETRY_AFTER_HEADER = "x-ms-retry-after-ms"
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+
+THROTTLED = 429
+# 같은 요청을 다시 보내면 성공할 수 있는 상태 코드
+TRANSIENT_STATUS = (408, 449, 500, 503)
+
+# 트랜잭션 배치 오류(CosmosBatchOperationError)는 CosmosHttpResponseError의 하위 클래스가 아님
+COSMOS_ERRORS = (CosmosHttpResponseError, CosmosBatchOperationError)
+
+# (문서 ID, 상태 코드, 메시지)
+WriteFailure = Tuple[Any, int, str]
+
+
+@dataclass
+class BulkWriteResult:
+    """벌크 쓰기 결과"""
+    documents: int = 0
+    written: int = 0
+    failed: List[WriteFailure] = field(default_factory=list)
+    request_charge: float = 0.0
+    batches: int = 0
+    throttled: int = 0
+    throttle_wait_ms: float = 0.0
+    retries: int = 0
+    splits: int = 0
+    concurrency: int = 0
+    elapsed_ms: float = 0.0
+
+
+class AdaptiveConcurrency:
+    """관측된 429와 RU 과금으로 한도를 조절하는 비동기 동시성 제한기"""
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = DEFAULT_MAX_CONCURRENCY,
+        target_ru_per_second: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            initial: 시작 한도
+            minimum: 최소 한도
+            maximum: 최대 한도
+            target_ru_per_second: 최근 1초 RU가 이 값을 넘으면 한도 감소 (None이면 429로만 조절)
+            clock: 단조 시계 (초)
+        """
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.target_ru_per_second = target_ru_per_second
+        self.in_flight = 0
+        self.peak = 0
+        self._clock = clock
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._successes = 0
+        self._charges: deque = deque()
+        self._window_ru = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @asynccontextmanager
+    async def slot(self):
+        """요청 하나가 진행되는 동안 한도 슬롯 점유 (retry-after 대기 중이면 대기 후 진입)"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        condition = self._condition
+        while True:
+            delay = self._paused_until - self._clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            async with condition:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    self.peak = max(self.peak, self.in_flight)
+                    break
+                await condition.wait()
+        try:
+            yield
+        finally:
+            async with condition:
+                self.in_flight -= 1
+                condition.notify()
+
+    def on_success(self, request_charge: float) -> None:
+        """성공 응답의 RU 기록 - 목표 초과면 감소, 아니면 한도만큼 성공할 때마다 1 증가"""
+        now = self._clock()
+        charges = self._charges
+        charges.append((now, request_charge))
+        self._window_ru += request_charge
+        while charges and charges[0][0] <= now - 1.0:
+            self._window_ru -= charges.popleft()[1]
+
+        if self.target_ru_per_second is not None and self._window_ru > self.target_ru_per_second:
+            self._decrease(now, 0.75)
+            return
+        if now < self._last_decrease:
+            # 감소 직후(429 이전에 보낸 요청의 응답)에는 늘리지 않음
+            return
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self._successes = 0
+            self._grow(1)
+
+    def on_throttle(self, retry_after_ms: float) -> None:
+        """429 - retry-after 동안 전체 일시 정지, 한도 절반 (같은 정지 구간 안에서는 한 번만)"""
+        now = self._clock()
+        self._decrease(now, 0.5)
+        # 감소 대기 구간 안의 429라도 누적된 성공은 버림 (429가 이어지는 동안 한도가 늘지 않도록)
+        self._successes = 0
+        self._paused_until = max(self._paused_until, now + retry_after_ms / 1000.0)
+
+    def _decrease(self, now: float, factor: float) -> None:
+        # 동시에 실패한 요청들이 한도를 연속으로 깎지 않도록 직전 정지 구간 이후에만 감소
+        if now < max(self._last_decrease, self._paused_until):
+            return
+        self._last_decrease = now + 0.1
+        self._successes = 0
+        self.limit = max(self.minimum, int(self.limit * factor))
+
+    def _grow(self, step: int) -> None:
+        self.limit = min(self.maximum, self.limit + step)
+        if self._condition is not None:
+            # 늘어난 슬롯만큼 대기 중인 요청 깨우기 (잠금 없이 호출되므로 다음 이벤트 루프 턴에 수행)
+            asyncio.ensure_future(self._notify(step))
+
+    async def _notify(self, count: int) -> None:
+        async with self._condition:
+            self._condition.notify(count)
+
+    @property
+    def window_ru(self) -> float:
+        """최근 1초 동안 과금된 RU"""
+        return self._window_ru
+
+
+class CosmosBulkWriter:
+    """azure.cosmos.aio 컨테이너에 문서를 벌크 upsert
+
+    container는 upsert_item()과 execute_item_batch()를 제공하는 비동기 컨테이너
+    (azure.cosmos.aio.ContainerProxy 또는 에뮬레이터의 LocalAsyncCosmosContainer)입니다.
+    """
+
+    def __init__(
+        self,
+        container: Any,
+        partition_key_path: str = "/deviceId",
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        target_ru_per_second: Optional[float] = None,
+        batch_size: int = MAX_BATCH_OPERATIONS,
+        max_retries: int = 9,
+        transactional: bool = True
+    ):
+        """
+        Args:
+            container: 비동기 Cosmos 컨테이너
+            partition_key_path: 파티션 키 경로 (예: /deviceId)
+            max_concurrency: 최대 동시 요청 수
+            min_concurrency: 최소 동시 요청 수
+            initial_concurrency: 시작 동시 요청 수 (None이면 max_concurrency의 절반)
+            target_ru_per_second: 목표 RU/s (None이면 429로만 조절)
+            batch_size: 트랜잭션 배치당 문서 수 (최대 100)
+            max_retries: 문서/배치당 429 및 일시 오류 재시도 횟수
+            transactional: False면 배치 없이 문서별 upsert
+        """
+        if not 1 <= batch_size <= MAX_BATCH_OPERATIONS:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_OPERATIONS}")
+        self.container = container
+        self.partition_key_path = partition_key_path
+        self._key_parts = partition_key_path.strip("/").split("/")
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.transactional = transactional
+        self.limiter = AdaptiveConcurrency(
+            initial=initial_concurrency or max(max_concurrency // 2, 1),
+            minimum=min_concurrency,
+            maximum=max_concurrency,
+            target_ru_per_second=target_ru_per_second,
+        )
+
+    def partition_key_of(self, document: Dict[str, Any]) -> Any:
+        value: Any = document
+        for part in self._key_parts:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+        return value
+
+    async def write(self, documents: Sequence[Dict[str, Any]]) -> BulkWriteResult:
+        """문서를 파티션 키별 배치로 나눠 동시에 upsert
+
+        한 문서의 실패는 다른 문서의 쓰기를 막지 않으며 result.failed에 기록됩니다.
+
+        Returns:
+            BulkWriteResult (이번 호출분 통계, concurrency는 호출 종료 시점의 한도)
+        """
+        start = time.perf_counter()
+        result = BulkWriteResult(documents=len(documents))
+
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for document in documents:
+            groups.setdefault(self.partition_key_of(document), []).append(document)
+
+        size = self.batch_size if self.transactional else 1
+        await asyncio.gather(*(
+            self._write_documents(partition_key, docs[i:i + size], result)
+            for partition_key, docs in groups.items()
+            for i in range(0, len(docs), size)
+        ))
+
+        result.concurrency = self.limiter.limit
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    async def _write_documents(self, partition_key: Any, documents: List[Dict[str, Any]], result: BulkWriteResult):
+        if len(documents) == 1:
+            await self._upsert_one(documents[0], result)
+        else:
+            await self._write_batch(partition_key, documents, result)
+
+    async def _write_batch(self, partition_key: Any, documents: List[Dict[str, Any]], result: BulkWriteResult):
+        operations = [("upsert", (document,)) for document in documents]
+        attempt = 0
+        while True:
+            charge = _ChargeHook()
+            try:
+                async with self.limiter.slot():
+                    result.batches += 1
+                    await self.container.execute_item_batch(
+                        operations, partition_key=partition_key, response_hook=charge
+                    )
+            except COSMOS_ERRORS as e:
+                result.request_charge += _request_charge(e.headers)
+                if await self._should_retry(e, attempt, result):
+                    attempt += 1
+                    continue
+
+                failing = e.error_index if isinstance(e, CosmosBatchOperationError) else None
+                if failing is not None and 0 <= failing < len(documents):
+                    # 원인 문서만 단독으로 재시도하고 나머지(424 의존 실패)는 배치로 다시 전송
+                    result.splits += 1
+                    rest = documents[:failing] + documents[failing + 1:]
+                    await asyncio.gather(
+                        self._upsert_one(documents[failing], result),
+                        self._write_documents(partition_key, rest, result) if rest else _done(),
+                    )
+                else:
+                    # 원인을 알 수 없는 실패(요청 크기 초과 등)는 절반씩 나눠 재시도
+                    result.splits += 1
+                    middle = len(documents) // 2
+                    await asyncio.gather(
+                        self._write_documents(partition_key, documents[:middle], result),
+                        self._write_documents(partition_key, documents[middle:], result),
+                    )
+                return
+
+            result.written += len(documents)
+            result.request_charge += charge.value
+            self.limiter.on_success(charge.value)
+            return
+
+    async def _upsert_one(self, document: Dict[str, Any], result: BulkWriteResult):
+        attempt = 0
+        while True:
+            charge = _ChargeHook()
+            try:
+                async with self.limiter.slot():
+                    await self.container.upsert_item(document, response_hook=charge)
+            except COSMOS_ERRORS as e:
+                result.request_charge += _request_charge(e.headers)
+                if await self._should_retry(e, attempt, result):
+                    attempt += 1
+                    continue
+                result.failed.append((document.get("id"), e.status_code or 0, _message(e)))
+                return
+
+            result.written += 1
+            result.request_charge += charge.value
+            self.limiter.on_success(charge.value)
+            return
+
+    async def _should_retry(self, error: Exception, attempt: int, result: BulkWriteResult) -> bool:
+        """429/일시 오류면 대기 후 True (재시도 한도 초과 또는 영구 오류면 False)"""
+        status = error.status_code
+        if status != THROTTLED and status not in TRANSIENT_STATUS:
+            return False
+        if attempt >= self.max_retries:
+            return False
+
+        result.retries += 1
+        if status == THROTTLED:
+            retry_after_ms = _retry_after_ms(error.headers)
+            result.throttled += 1
+            result.throttle_wait_ms += retry_after_ms
+            # 대기는 limiter의 일시 정지 구간에서 모든 요청이 함께 수행
+            self.limiter.on_throttle(retry_after_ms)
+        else:
+            await asyncio.sleep(min(0.1 * (2 ** attempt), 5.0))
+        return True
+
+
+class _ChargeHook:
+    """response_hook으로 요청별 RU를 받음 (동시 요청 간 헤더 공유 없이)"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self, headers: Any, _result: Any = None) -> None:
+        self.value = _request_charge(headers)
+
+
+async def _done() -> None:
+    return None
+
+
+def _request_charge(headers: Any) -> float:
+    try:
+        return float((headers or {}).get(REQUEST_CHARGE_HEADER) or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _retry_after_ms(headers: Any) -> float:
+    try:
+        return float((headers or {}).get(RETRY_AFTER_HEADER) or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _message(error: Exception) -> str:
+    return str(getattr(error, "http_error_message", None) or error).splitlines()[0]
+
+
+class BackgroundBulkWriter:
+    """동기 Function 핸들러에서 쓰는 CosmosBulkWriter
+
+    전용 스레드의 이벤트 루프에서 클라이언트와 writer를 한 번 만들고
+    호출마다 재사용합니다 (호출마다 연결을 새로 열지 않음).
+    """
+
+    def __init__(
+        self,
+        open_container: Callable[[], Awaitable[Tuple[Any, Callable[[], Awaitable[None]]]]],
+        **writer_options: Any
+    ):
+        """
+        Args:
+            open_container: 이벤트 루프 안에서 (비동기 컨테이너, 종료 코루틴 함수)를 만드는 코루틴 함수
+            writer_options: CosmosBulkWriter 인자
+        """
+        self._open_container = open_container
+        self._writer_options = writer_options
+        self._writer: Optional[CosmosBulkWriter] = None
+        self._close_container: Optional[Callable[[], Awaitable[None]]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(
+        cls,
+        container_name: Optional[str] = None,
+        partition_key_path: Optional[str] = None
+    ) -> "BackgroundBulkWriter":
+        """Function 앱 설정으로 생성
+
+        CosmosDBConnection(연결 문자열) 또는 CosmosDBConnection__accountEndpoint(Managed Identity)와
+        COSMOS_DB_DATABASE_NAME, COSMOS_DB_CONTAINER_NAME을 사용합니다.
+
+        Args:
+            container_name: 컨테이너 이름 (None이면 COSMOS_DB_CONTAINER_NAME)
+            partition_key_path: 파티션 키 경로 (None이면 COSMOS_DB_PARTITION_KEY_PATH)
+        """
+        database = os.getenv("COSMOS_DB_DATABASE_NAME", "serverless_db")
+        container_name = container_name or os.getenv("COSMOS_DB_CONTAINER_NAME", "events")
+        connection_string = os.getenv("CosmosDBConnection")
+        endpoint = os.getenv("CosmosDBConnection__accountEndpoint")
+
+        async def open_container():
+            from azure.cosmos.aio import CosmosClient
+
+            # SDK 내부 429 재시도는 짧게 한 번만 - 대기와 동시성 조절은 writer가 담당
+            options = {"retry_throttle_total": 1, "retry_throttle_backoff_max": 1}
+            credential = None
+            if connection_string:
+                client = CosmosClient.from_connection_string(connection_string, **options)
+            else:
+                from azure.identity.aio import DefaultAzureCredential
+
+                credential = DefaultAzureCredential()
+                client = CosmosClient(endpoint, credential=credential, **options)
+
+            async def close():
+                await client.close()
+                if credential is not None:
+                    await credential.close()
+
+            return client.get_database_client(database).get_container_client(container_name), close
+
+        target = os.getenv(TARGET_RU_SETTING)
+        return cls(
+            open_container,
+            partition_key_path=partition_key_path or os.getenv(PARTITION_KEY_PATH_SETTING, "/deviceId"),
+            max_concurrency=int_setting(MAX_CONCURRENCY_SETTING, DEFAULT_MAX_CONCURRENCY),
+            target_ru_per_second=float(target) if target else None,
+        )
+
+    def write(self, documents: Sequence[Dict[str, Any]], timeout: Optional[float] = None) -> BulkWriteResult:
+        """문서를 벌크 upsert하고 완료될 때까지 대기"""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._write(documents), loop).result(timeout)
+
+    async def _write(self, documents: Sequence[Dict[str, Any]]) -> BulkWriteResult:
+        if self._writer is None:
+            container, self._close_container = await self._open_container()
+            self._writer = CosmosBulkWriter(container, **self._writer_options)
+        return await self._writer.write(documents)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="cosmos-bulk-writer", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def close(self) -> None:
+        """클라이언트 종료 후 이벤트 루프 정지"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._close_container is not None:
+            asyncio.run_coroutine_threadsafe(self._close_container(), loop).result()
+            self._close_container = None
+        self._writer = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+
+def cosmos_write_mode() -> str:
+    """Cosmos 쓰기 경로: binding 또는 bulk"""
+    mode = os.getenv(WRITE_MODE_SETTING, "binding").strip().lower()
+    return mode if mode in ("binding", "bulk") else "binding"
+
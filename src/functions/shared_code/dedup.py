@@ -0,0 +1,275 @@
+"""
+멱등성 캐시 - Cosmos 출력 바인딩 전에 중복 이벤트 제거
+
+host.json 재시도(exponentialBackoff 3회)와 Event Hub의 at-least-once 전달 때문에
+같은 id가 여러 번 쓰여 RU가 중복 과금됩니다. 프로세스 내 캐시로 최근 처리한 키를 기억하고
+다시 들어온 이벤트를 출력 바인딩 전에 걸러냅니다.
+Event Hub 트리거에만 적용합니다. HTTP 트리거는 출력 바인딩 실패를 함수 안에서 알 수 없어
+캐시를 쓰지 않고 id 기준 upsert의 멱등성에 의존합니다.
+
+구성:
+    BloomFilter  처음 보는 키를 빠르게 판별하는 사전 필터 (2세대 회전으로 크기 고정)
+    LRU + TTL    중복 판정의 기준 (최대 항목 수와 마지막으로 본 뒤의 만료 시간으로 메모리 제한)
+
+Bloom 필터의 "있을 수도 있음"만으로는 버리지 않고 LRU에서 확인하므로
+오탐(false positive)으로 이벤트가 유실되지 않습니다.
+
+지표는 MetricsCollector로 내보냅니다.
+    counter_deltas()  조회/중복/제거/만료/Bloom 오탐 증가분 → dedup_* 카운터 (적중률 = dedup_duplicates / dedup_lookups)
+    gauges()          항목 수, 누적 적중률, Bloom 메모리 → /metrics와 Application Insights 게이지
+
+앱 설정:
+    DEDUP_ENABLED      true(기본값) | false
+    DEDUP_KEY          id(기본값, 문서 id) | sequence(파티션 + 시퀀스 번호, 디코딩 전 제거)
+    DEDUP_TTL_SECONDS  기본값 600
+    DEDUP_MAX_ENTRIES  기본값 200000
+"""
+import os
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from .settings import bool_setting, float_setting, int_setting
+
+DEDUP_ENABLED_SETTING = "DEDUP_ENABLED"
+DEDUP_KEY_SETTING = "DEDUP_KEY"
+DEDUP_TTL_SETTING = "DEDUP_TTL_SECONDS"
+DEDUP_MAX_ENTRIES_SETTING = "DEDUP_MAX_ENTRIES"
+
+DEFAULT_TTL_SECONDS = 600.0
+DEFAULT_MAX_ENTRIES = 200_000
+
+T = TypeVar("T")
+
+
+class BloomFilter:
+    """고정 크기 Bloom 필터 (이중 해싱)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Args:
+            capacity: 목표 오탐률을 유지할 최대 항목 수
+            error_rate: 목표 오탐률
+        """
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return ((h1 + i * h2) % size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+class DedupCache:
+    """LRU + TTL + Bloom 필터 중복 판정 캐시 (스레드 안전)
+
+    조회할 때마다(중복 포함) 키의 만료 시각을 ttl_seconds 뒤로 늘리고 LRU 맨 뒤로 옮기며
+    현재 Bloom 세대에 다시 추가합니다. 따라서 TTL은 마지막으로 본 시각 기준입니다.
+    Bloom 필터는 capacity(= max_entries)만큼 추가되면 이전 세대로 밀려나고,
+    두 세대 중 하나라도 "있을 수도 있음"이면 LRU에서 확인합니다.
+    두 세대 밖으로 밀려난 항목은 LRU에서도 제거해 Bloom 음성 판정을 항상 믿을 수 있게 합니다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        error_rate: float = 0.01,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.error_rate = error_rate
+        self._clock = clock
+        # 키 → (만료 시각, 기록된 Bloom 세대 번호), 마지막 사용 순
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._bloom = BloomFilter(max_entries, error_rate)
+        self._previous_bloom: Optional[BloomFilter] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "duplicates": 0,
+            "bloom_negatives": 0,
+            "bloom_false_positives": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+        # counter_deltas()가 마지막으로 넘긴 누적값
+        self._published = dict(self._stats)
+
+    def check_and_add(self, key: str) -> bool:
+        """키를 기록하고, 이미 TTL 안에 본 키이면 True(중복)"""
+        with self._lock:
+            return self._check_and_add(key, self._clock())
+
+    def filter(self, items: Iterable[T], key: Callable[[T], str]) -> Tuple[List[T], int]:
+        """중복을 제거한 항목 목록 반환 (배치 내 중복도 제거, 입력 순서 유지)
+
+        Returns:
+            (새 항목 목록, 제거된 중복 수)
+        """
+        kept: List[T] = []
+        duplicates = 0
+        with self._lock:
+            now = self._clock()
+            for item in items:
+                if self._check_and_add(key(item), now):
+                    duplicates += 1
+                else:
+                    kept.append(item)
+        return kept, duplicates
+
+    def add_many(self, keys: Iterable[str]) -> None:
+        """판정 없이 키만 기록 (재시도 호출 등 필터링을 건너뛰는 경우)"""
+        with self._lock:
+            now = self._clock()
+            for key in keys:
+                self._check_and_add(key, now)
+
+    def _check_and_add(self, key: str, now: float) -> bool:
+        stats = self._stats
+        stats["lookups"] += 1
+        entries = self._entries
+
+        maybe_seen = key in self._bloom or (
+            self._previous_bloom is not None and key in self._previous_bloom
+        )
+        duplicate = False
+        if maybe_seen:
+            entry = entries.get(key)
+            if entry is not None and entry[0] > now:
+                stats["duplicates"] += 1
+                duplicate = True
+            elif entry is None:
+                stats["bloom_false_positives"] += 1
+        else:
+            stats["bloom_negatives"] += 1
+
+        # 중복이어도 다시 기록: 만료 시각을 늘리고 맨 뒤로 옮기며 현재 Bloom 세대에도 추가
+        # (순서 = 마지막 사용 순 = 만료 순 = 세대 순이 유지되어 _evict가 앞에서부터만 확인하면 됨)
+        self._bloom_add(key)
+        entries[key] = (now + self.ttl_seconds, self._generation)
+        entries.move_to_end(key)
+        self._evict(now)
+        return duplicate
+
+    def _bloom_add(self, key: str) -> None:
+        if self._bloom.count >= self._bloom.capacity:
+            # 세대 회전: 현재 세대를 이전 세대로 보내고 새로 시작 (LRU 항목은 이전 세대에 남아 있음)
+            self._previous_bloom = self._bloom
+            self._bloom = BloomFilter(self.max_entries, self.error_rate)
+            self._generation += 1
+        self._bloom.add(key)
+
+    def _evict(self, now: float) -> None:
+        entries = self._entries
+        # 앞쪽(가장 오래 사용되지 않은 항목)부터 만료 항목과 두 Bloom 세대 밖으로 밀려난 항목 제거
+        # (Bloom에 없는 항목을 남겨 두면 처음 보는 키로 판정되어 중복이 기록됨)
+        oldest_generation = self._generation - 1
+        while entries:
+            expires, generation = next(iter(entries.values()))
+            if expires > now and generation >= oldest_generation:
+                break
+            entries.popitem(last=False)
+            if expires > now:
+                self._stats["evictions"] += 1
+            else:
+                self._stats["expirations"] += 1
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """누적 지표 (hit_rate = 중복 / 조회)"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["hit_rate"] = stats["duplicates"] / stats["lookups"] if stats["lookups"] else 0.0
+            stats["bloom_bytes"] = self._bloom.memory_bytes + (
+                self._previous_bloom.memory_bytes if self._previous_bloom else 0
+            )
+        return stats
+
+    def counter_deltas(self) -> Dict[str, int]:
+        """직전 호출 이후 누적 지표 증가분 (0은 제외)
+
+        동시 호출이 각자 가져가도 합계가 누적값과 같으므로 MetricsCollector 카운터로 그대로 더할 수 있습니다.
+        """
+        with self._lock:
+            deltas = {name: value - self._published[name] for name, value in self._stats.items()}
+            self._published = dict(self._stats)
+        return {name: value for name, value in deltas.items() if value}
+
+    def gauges(self) -> Dict[str, float]:
+        """현재 상태 게이지 (항목 수, 누적 적중률, Bloom 필터 메모리)"""
+        stats = self.stats()
+        return {"entries": stats["entries"], "hit_rate": stats["hit_rate"], "bloom_bytes": stats["bloom_bytes"]}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bloom = BloomFilter(self.max_entries, self.error_rate)
+            self._previous_bloom = None
+            self._generation = 0
+
+
+def dedup_enabled() -> bool:
+    return bool_setting(DEDUP_ENABLED_SETTING)
+
+
+def dedup_key_mode() -> str:
+    """중복 판정 키: id 또는 sequence"""
+    mode = os.getenv(DEDUP_KEY_SETTING, "id").strip().lower()
+    return mode if mode in ("id", "sequence") else "id"
+
+
+def create_dedup_cache() -> DedupCache:
+    """앱 설정(DEDUP_TTL_SECONDS, DEDUP_MAX_ENTRIES)으로 캐시 생성"""
+    return DedupCache(
+        max_entries=int_setting(DEDUP_MAX_ENTRIES_SETTING, DEFAULT_MAX_ENTRIES),
+        ttl_seconds=float_setting(DEDUP_TTL_SETTING, DEFAULT_TTL_SECONDS),
+    )
+
+
+def document_key(document: Dict[str, Any]) -> str:
+    """문서 id 기반 키"""
+    return str(document.get("id"))
+
+
+def sequence_key(partition_id: Any, sequence_number: Any) -> str:
+    """파티션 + 시퀀스 번호 기반 키"""
+    return f"{partition_id}:{sequence_number}"
+
+
+def is_retry(context: Any) -> bool:
+    """Function 재시도 호출 여부 (context.retry_context.retry_count > 0)
+
+    실패한 호출의 재시도에서는 이전 시도가 기록한 키가 실제로 저장되지 않았을 수 있으므로
+    호출자는 필터링을 건너뛰어야 합니다 (Cosmos upsert는 같은 id를 덮어쓰므로 안전).
+    """
+    retry_context = getattr(context, "retry_context", None)
+    return bool(retry_context is not None and getattr(retry_context, "retry_count", 0))
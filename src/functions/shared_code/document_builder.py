@@ -0,0 +1,237 @@
+"""
+스키마 기반 Cosmos 문서 빌더 - 모든 수집 경로(HTTP, Event Hub)가 공유
+
+필드 매핑(소스 경로, 기본값, 대상 경로) 목록을 한 번 컴파일하여
+.get() 체인 대신 단일 딕셔너리 리터럴을 반환하는 프로젝션 함수를 생성합니다.
+처리 시각 등 배치 공통 값은 배치마다 한 번만 계산하여 모든 문서에 공유합니다.
+
+소스 경로 규칙:
+    "data.temperature"  이벤트 페이로드 (점으로 중첩 경로 구분)
+    "$meta.offset"      이벤트별 메타데이터 (Event Hub 시퀀스 번호 등)
+    "$batch.processedAt" 배치 공통 값
+    ("timestamp", "$batch.processedAt")  앞에서부터 처음 존재하는 값 사용
+"""
+import copy
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+META_PREFIX = "$meta."
+BATCH_PREFIX = "$batch."
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class FieldMapping:
+    """문서 필드 하나의 매핑
+
+    Attributes:
+        target: 문서 내 대상 경로 (예: "eventHub.sequenceNumber")
+        source: 소스 경로 또는 대체 경로 튜플 (None이면 default를 상수로 사용)
+        default: 모든 소스가 없을 때의 값 (dict/list는 문서마다 복사)
+    """
+    target: str
+    source: Union[str, Tuple[str, ...], None] = None
+    default: Any = None
+
+
+def processing_timestamp() -> str:
+    """배치 처리 시각 (기존 processedAt과 같은 naive UTC ISO 형식)"""
+    return datetime.utcnow().isoformat()
+
+
+def _lookup(obj: Any, keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        if not isinstance(obj, dict) or key not in obj:
+            return _MISSING
+        obj = obj[key]
+    return obj
+
+
+class DocumentBuilder:
+    """필드 매핑을 컴파일한 문서 프로젝션
+
+    사용 예:
+        builder = DocumentBuilder(EVENTHUB_DOCUMENT_FIELDS)
+        documents = builder.build_batch(payloads, metas)
+    """
+
+    def __init__(self, fields: Sequence[FieldMapping]):
+        self.fields = list(fields)
+        self.source, self._project = self._compile(self.fields)
+
+    def build(
+        self,
+        payload: Dict[str, Any],
+        meta: Optional[Dict[str, Any]] = None,
+        batch: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """문서 1건 생성"""
+        if batch is None:
+            batch = {"processedAt": processing_timestamp()}
+        return self._project(payload, meta or {}, batch)
+
+    def build_batch(
+        self,
+        payloads: Sequence[Dict[str, Any]],
+        metas: Optional[Sequence[Dict[str, Any]]] = None,
+        batch: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """배치 전체 문서 생성
+
+        Args:
+            payloads: 이벤트 페이로드 (dict) 목록
+            metas: 페이로드별 메타데이터 목록 (None이면 빈 메타데이터)
+            batch: 배치 공통 값 (None이면 processedAt만 현재 시각으로 채움)
+
+        Returns:
+            문서 딕셔너리 리스트
+        """
+        if batch is None:
+            batch = {"processedAt": processing_timestamp()}
+        project = self._project
+        if metas is None:
+            empty: Dict[str, Any] = {}
+            return [project(payload, empty, batch) for payload in payloads]
+        return [project(payload, meta, batch) for payload, meta in zip(payloads, metas)]
+
+    @staticmethod
+    def _compile(fields: Sequence[FieldMapping]):
+        """매핑을 딕셔너리 리터럴을 반환하는 함수 소스로 변환 후 컴파일"""
+        constants: Dict[str, Any] = {"_lookup": _lookup, "_MISSING": _MISSING, "_copy": copy.deepcopy}
+        tree: Dict[str, Any] = {}
+        prelude: List[str] = []
+
+        for index, field in enumerate(fields):
+            expression = DocumentBuilder._field_expression(index, field, constants, prelude)
+            node = tree
+            *parents, leaf = field.target.split(".")
+            for part in parents:
+                node = node.setdefault(part, {})
+                if not isinstance(node, dict):
+                    raise ValueError(f"Conflicting target path: {field.target}")
+            if leaf in node:
+                raise ValueError(f"Duplicate target path: {field.target}")
+            node[leaf] = expression
+
+        lines = ["def _project(p, m, b):"]
+        lines.extend(f"    {line}" for line in prelude)
+        lines.append(f"    return {DocumentBuilder._literal(tree)}")
+        source = "\n".join(lines)
+        namespace = dict(constants)
+        exec(compile(source, "<document_builder>", "exec"), namespace)
+        return source, namespace["_project"]
+
+    @staticmethod
+    def _field_expression(index: int, field: FieldMapping, constants: Dict[str, Any], prelude: List[str]) -> str:
+        default = field.default
+        # 새 객체를 만드는 기본값은 소스가 없을 때만 평가되도록 조건식 사용
+        allocates = isinstance(default, (dict, list, set))
+        if isinstance(default, (dict, list)) and not default:
+            default_expr = "{}" if isinstance(default, dict) else "[]"
+        elif allocates:
+            constants[f"_d{index}"] = default
+            default_expr = f"_copy(_d{index})"
+        else:
+            constants[f"_d{index}"] = default
+            default_expr = f"_d{index}"
+
+        if field.source is None:
+            return default_expr
+
+        sources = (field.source,) if isinstance(field.source, str) else tuple(field.source)
+        expression = default_expr
+        # 뒤쪽 대체 경로부터 감싸서 앞쪽 경로가 우선하도록 조건식 구성
+        for position, source in reversed(list(enumerate(sources))):
+            if source.startswith(META_PREFIX):
+                obj, path = "m", source[len(META_PREFIX):]
+            elif source.startswith(BATCH_PREFIX):
+                obj, path = "b", source[len(BATCH_PREFIX):]
+            else:
+                obj, path = "p", source
+            keys = tuple(path.split("."))
+            if len(keys) == 1:
+                key = repr(keys[0])
+                if allocates:
+                    expression = f"({obj}[{key}] if {key} in {obj} else {expression})"
+                else:
+                    expression = f"{obj}.get({key}, {expression})"
+            else:
+                name = f"_v{index}_{position}"
+                constants[f"_k{index}_{position}"] = keys
+                prelude.append(f"{name} = _lookup({obj}, _k{index}_{position})")
+                expression = f"({name} if {name} is not _MISSING else {expression})"
+        return expression
+
+    @staticmethod
+    def _literal(tree: Dict[str, Any]) -> str:
+        items = []
+        for key, value in tree.items():
+            rendered = DocumentBuilder._literal(value) if isinstance(value, dict) else value
+            items.append(f"{key!r}: {rendered}")
+        return "{" + ", ".join(items) + "}"
+
+
+# ============================================================
+# 수집 경로별 문서 스키마
+# ============================================================
+
+EVENTHUB_DOCUMENT_FIELDS = [
+    FieldMapping("id", ("id", "$meta.defaultId")),
+    FieldMapping("deviceId", "deviceId", "unknown"),
+    FieldMapping("eventType", "eventType", "telemetry"),
+    FieldMapping("timestamp", "timestamp"),
+    FieldMapping("data", "data", {}),
+    FieldMapping("location", "location", {}),
+    # Event Hub 메타데이터
+    FieldMapping("eventHub.partitionKey", "$meta.partitionKey"),
+    FieldMapping("eventHub.sequenceNumber", "$meta.sequenceNumber"),
+    FieldMapping("eventHub.enqueuedTime", "$meta.enqueuedTime"),
+    FieldMapping("eventHub.offset", "$meta.offset"),
+    FieldMapping("processedAt", "$batch.processedAt"),
+    FieldMapping("source", default="eventhub-trigger"),
+    FieldMapping("status", default="processed"),
+]
+
+HTTP_DOCUMENT_FIELDS = [
+    FieldMapping("id", "id"),
+    FieldMapping("deviceId", "deviceId"),
+    FieldMapping("eventType", "eventType", "unknown"),
+    FieldMapping("timestamp", ("timestamp", "$batch.processedAt")),
+    FieldMapping("data", "data", {}),
+    FieldMapping("location", "location", {}),
+    FieldMapping("processedAt", "$batch.processedAt"),
+    FieldMapping("source", default="http-trigger"),
+    FieldMapping("status", default="processed"),
+]
+
+EVENTHUB_DOCUMENT_BUILDER = DocumentBuilder(EVENTHUB_DOCUMENT_FIELDS)
+HTTP_DOCUMENT_BUILDER = DocumentBuilder(HTTP_DOCUMENT_FIELDS)
+
+
+def eventhub_metadata(event: Any, time_cache: Optional[Dict[Any, str]] = None) -> Dict[str, Any]:
+    """EventHubEvent에서 문서의 eventHub 필드와 기본 ID에 쓰이는 메타데이터 추출
+
+    Args:
+        event: EventHubEvent
+        time_cache: 배치 내에서 공유할 enqueued time → ISO 문자열 캐시
+            (같은 전송 배치의 이벤트는 enqueued time이 같으므로 isoformat() 반복을 줄임)
+    """
+    enqueued_time = event.enqueued_time
+    if enqueued_time is None:
+        enqueued = None
+    elif time_cache is None:
+        enqueued = enqueued_time.isoformat()
+    else:
+        enqueued = time_cache.get(enqueued_time)
+        if enqueued is None:
+            enqueued = time_cache[enqueued_time] = enqueued_time.isoformat()
+    sequence_number = event.sequence_number
+    return {
+        "partitionKey": event.partition_key,
+        "sequenceNumber": sequence_number,
+        "enqueuedTime": enqueued,
+        "offset": event.offset,
+        "defaultId": f"evt-{sequence_number}",
+    }
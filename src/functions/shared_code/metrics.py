@@ -0,0 +1,471 @@
+"""
+메트릭 수집 - 로그 버킷 지연 히스토그램과 스레드별 샤드 카운터
+
+평균 지연은 꼬리(p99)를 가리기 때문에 지연은 HDR 방식의 고정 크기 히스토그램에 기록합니다.
+
+히스토그램 (LatencyHistogram):
+    값을 마이크로초 정수로 바꿔 2^significant_bits 미만은 1us 단위로, 그 이상은 2의 거듭제곱 구간마다
+    2^(significant_bits-1)개 버킷으로 나눕니다. 버킷 폭이 값의 1/2^(significant_bits-1) 이하이므로
+    기본값 7비트에서 백분위수 상대 오차는 1% 미만이고, max_value_ms(기본 1시간)까지 버킷 약 1,700개
+    (리스트 하나)로 메모리가 고정됩니다. max_value_ms를 넘는 값은 마지막 버킷에 쌓이고 max_ms는 정확히 유지됩니다.
+
+수집기 (MetricsCollector):
+    카운터와 히스토그램을 (이름, function, partition) 키로 나눠 보관합니다.
+    스레드마다 자기 샤드에만 기록하므로(샤드 락은 그 스레드와 읽기 쪽만 잡음) 스레드 풀에서도 경합이 없고,
+    snapshot()이 모든 샤드를 합쳐 MetricsSnapshot을 만듭니다. 종료된 스레드의 샤드는 읽을 때 보관 샤드로 합쳐집니다.
+    snapshot.diff(이전 snapshot)으로 구간 증가분(카운터 차이, 버킷별 차이)을 얻습니다.
+
+예:
+    metrics = MetricsCollector()
+    metrics.increment("events_processed", len(events), function="eventhub", partition=partition_id)
+    metrics.record_latencies(latencies_ms, function="eventhub", partition=partition_id)
+    metrics.snapshot().histogram("latency_ms", function="eventhub").percentiles()
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 기본 백분위수 (p99가 알림 기준)
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+# 기본 카운터 (get_summary()에 항상 포함)
+DEFAULT_COUNTERS = ("events_sent", "events_received", "events_processed", "events_failed")
+
+# 기본 지연 메트릭 이름
+LATENCY_METRIC = "latency_ms"
+
+# (메트릭 이름, function, partition) - 레이블이 없으면 빈 문자열
+MetricKey = Tuple[str, str, str]
+
+
+def percentile_label(q: float) -> str:
+    """백분위수 표기 (99.9 -> "p99_9")"""
+    return "p" + f"{q:g}".replace(".", "_")
+
+
+class LatencyHistogram:
+    """고정 메모리 로그 버킷 지연 히스토그램 (밀리초 단위 입력, 스레드 안전하지 않음)"""
+
+    def __init__(self, significant_bits: int = 7, max_value_ms: float = 3_600_000.0):
+        """
+        Args:
+            significant_bits: 버킷 정밀도 비트 수 (상대 오차 약 1/2^significant_bits)
+            max_value_ms: 구분해서 기록할 최대 지연 (넘는 값은 마지막 버킷)
+        """
+        if not 2 <= significant_bits <= 16:
+            raise ValueError("significant_bits must be between 2 and 16")
+        self.significant_bits = significant_bits
+        self.max_value_ms = max_value_ms
+        self._sub = 1 << significant_bits
+        self._half = self._sub >> 1
+        self.counts: List[int] = [0] * (self._index(max(int(max_value_ms * 1000), 1)) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self._min_ms = math.inf
+        self._max_ms = 0.0
+
+    def _index(self, units: int) -> int:
+        if units < self._sub:
+            return units
+        shift = units.bit_length() - self.significant_bits
+        return self._sub + (shift - 1) * self._half + (units >> shift) - self._half
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        """버킷의 (하한, 상한) 마이크로초"""
+        if index < self._sub:
+            return index, index
+        offset = index - self._sub
+        shift = offset // self._half + 1
+        mantissa = offset % self._half + self._half
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    @property
+    def min_ms(self) -> float:
+        return self._min_ms if self.count else 0.0
+
+    @property
+    def max_ms(self) -> float:
+        return self._max_ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def record(self, latency_ms: float, count: int = 1):
+        """지연 1건(또는 같은 값 count건) 기록 - 음수는 0, NaN은 무시"""
+        if latency_ms != latency_ms or count <= 0:
+            return
+        if latency_ms < 0:
+            latency_ms = 0.0
+        index = self._index(int(latency_ms * 1000))
+        if index >= len(self.counts):
+            index = len(self.counts) - 1
+        self.counts[index] += count
+        self.count += count
+        self.total_ms += latency_ms * count
+        if latency_ms < self._min_ms:
+            self._min_ms = latency_ms
+        if latency_ms > self._max_ms:
+            self._max_ms = latency_ms
+
+    def record_many(self, latencies_ms: Iterable[float]):
+        """여러 지연 기록"""
+        for latency_ms in latencies_ms:
+            self.record(latency_ms)
+
+    def _value_ms(self, index: int) -> float:
+        low, high = self._bounds(index)
+        value = (low + high) / 2000.0
+        return min(max(value, self.min_ms), self._max_ms)
+
+    def percentiles(self, qs: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[float, float]:
+        """백분위수 (버킷 대표값, 밀리초) - 비어 있으면 모두 0.0
+
+        Args:
+            qs: 0~100 사이 백분위수 목록
+
+        Returns:
+            {백분위수: 지연 ms}
+        """
+        if not self.count:
+            return {q: 0.0 for q in qs}
+        targets = sorted((max(1, math.ceil(q / 100.0 * self.count)), q) for q in qs)
+        result: Dict[float, float] = {}
+        position = 0
+        cumulative = 0
+        for index, bucket in enumerate(self.counts):
+            if not bucket:
+                continue
+            cumulative += bucket
+            while position < len(targets) and targets[position][0] <= cumulative:
+                result[targets[position][1]] = self._value_ms(index)
+                position += 1
+            if position == len(targets):
+                break
+        for _, q in targets[position:]:
+            result[q] = self._max_ms
+        return result
+
+    def percentile(self, q: float) -> float:
+        """백분위수 하나 (밀리초)"""
+        return self.percentiles((q,))[q]
+
+    def count_at_or_below(self, value_ms: float) -> int:
+        """value_ms 이하로 기록된 건수 (버킷 해상도)"""
+        if value_ms < 0:
+            return 0
+        index = self._index(int(value_ms * 1000))
+        return sum(self.counts[:index + 1])
+
+    def _check_compatible(self, other: "LatencyHistogram"):
+        if other.significant_bits != self.significant_bits or len(other.counts) != len(self.counts):
+            raise ValueError("Histograms have different bucket layouts")
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """다른 히스토그램을 더함 (self 반환)"""
+        self._check_compatible(other)
+        if not other.count:
+            return self
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self._min_ms = min(self._min_ms, other._min_ms)
+        self._max_ms = max(self._max_ms, other._max_ms)
+        return self
+
+    def copy(self) -> "LatencyHistogram":
+        """같은 버킷 구성의 빈 히스토그램에 self를 합친 복사본"""
+        return LatencyHistogram(self.significant_bits, self.max_value_ms).merge(self)
+
+    def subtract(self, earlier: "LatencyHistogram") -> "LatencyHistogram":
+        """earlier 이후 증가분 히스토그램 (min/max는 남은 버킷 범위로 계산)
+
+        Args:
+            earlier: 같은 히스토그램의 이전 복사본
+
+        Returns:
+            새 LatencyHistogram
+        """
+        self._check_compatible(earlier)
+        result = LatencyHistogram(self.significant_bits, self.max_value_ms)
+        result.counts = [max(a - b, 0) for a, b in zip(self.counts, earlier.counts)]
+        result.count = sum(result.counts)
+        result.total_ms = max(self.total_ms - earlier.total_ms, 0.0)
+        occupied = [index for index, bucket in enumerate(result.counts) if bucket]
+        if occupied:
+            result._min_ms = max(self._bounds(occupied[0])[0] / 1000.0, self.min_ms)
+            result._max_ms = min(self._bounds(occupied[-1])[1] / 1000.0, self._max_ms)
+        return result
+
+    def summary(self, qs: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+        """건수/합계/평균/최소/최대와 백분위수 딕셔너리"""
+        result: Dict[str, Any] = {
+            "count": self.count,
+            "sum_ms": self.total_ms,
+            "mean_ms": self.mean_ms,
+            "min_ms": self.min_ms,
+            "max_ms": self._max_ms,
+        }
+        for q, value in self.percentiles(qs).items():
+            result[f"{percentile_label(q)}_ms"] = value
+        return result
+
+
+class _Shard:
+    """스레드 하나의 카운터/히스토그램 (쓰기는 소유 스레드만, 락은 읽기와의 충돌 방지용)"""
+
+    __slots__ = ("lock", "thread", "counters", "histograms")
+
+    def __init__(self, thread: Optional[threading.Thread]):
+        self.lock = threading.Lock()
+        self.thread = thread
+        self.counters: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, LatencyHistogram] = {}
+
+    def absorb(self, counters: Dict[MetricKey, float], histograms: Dict[MetricKey, LatencyHistogram]):
+        """카운터/히스토그램을 이 샤드에 더함 (호출자가 lock 보유)"""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, histogram in histograms.items():
+            if key in self.histograms:
+                self.histograms[key].merge(histogram)
+            else:
+                self.histograms[key] = histogram.copy()
+
+
+def _matches(key: MetricKey, name: str, function: Optional[str], partition: Optional[str]) -> bool:
+    return (
+        key[0] == name
+        and (function is None or key[1] == function)
+        and (partition is None or key[2] == str(partition))
+    )
+
+
+@dataclass
+class MetricsSnapshot:
+    """특정 시점의 전체 메트릭 (샤드 병합 결과)"""
+    counters: Dict[MetricKey, float] = field(default_factory=dict)
+    histograms: Dict[MetricKey, LatencyHistogram] = field(default_factory=dict)
+    taken_at: float = 0.0
+
+    def counter(self, name: str, function: Optional[str] = None, partition: Optional[str] = None) -> float:
+        """카운터 합계 (function/partition이 None이면 해당 레이블 전체 합)"""
+        return sum(value for key, value in self.counters.items() if _matches(key, name, function, partition))
+
+    def histogram(
+        self,
+        name: str = LATENCY_METRIC,
+        function: Optional[str] = None,
+        partition: Optional[str] = None,
+    ) -> LatencyHistogram:
+        """히스토그램 병합 (function/partition이 None이면 해당 레이블 전체 병합, 없으면 빈 히스토그램)"""
+        merged: Optional[LatencyHistogram] = None
+        for key, histogram in self.histograms.items():
+            if _matches(key, name, function, partition):
+                merged = histogram.copy() if merged is None else merged.merge(histogram)
+        return merged if merged is not None else LatencyHistogram()
+
+    def totals(self) -> Dict[str, float]:
+        """이름별 카운터 합계"""
+        totals: Dict[str, float] = {}
+        for (name, _, _), value in self.counters.items():
+            totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def diff(self, earlier: "MetricsSnapshot") -> "MetricsSnapshot":
+        """earlier 이후 구간 증가분
+
+        Args:
+            earlier: 같은 수집기의 이전 snapshot
+
+        Returns:
+            카운터 차이와 버킷별 차이를 담은 MetricsSnapshot (taken_at은 self 기준)
+        """
+        counters = {key: value - earlier.counters.get(key, 0) for key, value in self.counters.items()}
+        histograms = {
+            key: histogram.subtract(earlier.histograms[key]) if key in earlier.histograms else histogram.copy()
+            for key, histogram in self.histograms.items()
+        }
+        return MetricsSnapshot(counters, histograms, self.taken_at)
+
+    def to_dict(self, qs: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+        """로그/JSON 출력용 딕셔너리"""
+        return {
+            "takenAt": self.taken_at,
+            "counters": [
+                {"name": name, "function": function, "partition": partition, "value": value}
+                for (name, function, partition), value in sorted(self.counters.items())
+            ],
+            "histograms": [
+                {"name": name, "function": function, "partition": partition, **histogram.summary(qs)}
+                for (name, function, partition), histogram in sorted(self.histograms.items())
+            ],
+        }
+
+
+class MetricsCollector:
+    """스레드 안전 메트릭 수집기 (스레드별 샤드, 읽을 때 병합)"""
+
+    def __init__(self, significant_bits: int = 7, max_value_ms: float = 3_600_000.0):
+        """
+        Args:
+            significant_bits: 지연 히스토그램 정밀도 비트 수
+            max_value_ms: 지연 히스토그램 최대값
+        """
+        self.significant_bits = significant_bits
+        self.max_value_ms = max_value_ms
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        # 종료된 스레드의 샤드를 합쳐 두는 곳
+        self._retired = _Shard(None)
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _Shard(threading.current_thread())
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    @staticmethod
+    def _key(name: str, function: str, partition: Any) -> MetricKey:
+        return name, function or "", "" if partition is None else str(partition)
+
+    def increment(self, metric_name: str, value: float = 1.0, function: str = "", partition: Any = ""):
+        """카운터 증가
+
+        Args:
+            metric_name: 카운터 이름
+            value: 증가량
+            function: 함수 레이블 (예: "eventhub", "changefeed")
+            partition: 파티션 레이블
+        """
+        shard = self._shard()
+        key = self._key(metric_name, function, partition)
+        with shard.lock:
+            shard.counters[key] = shard.counters.get(key, 0) + value
+
+    def _histogram(self, shard: _Shard, key: MetricKey) -> LatencyHistogram:
+        histogram = shard.histograms.get(key)
+        if histogram is None:
+            histogram = shard.histograms[key] = LatencyHistogram(self.significant_bits, self.max_value_ms)
+        return histogram
+
+    def record_latency(
+        self, latency_ms: float, function: str = "", partition: Any = "", metric: str = LATENCY_METRIC
+    ):
+        """지연 1건 기록
+
+        Args:
+            latency_ms: 지연 (밀리초)
+            function: 함수 레이블
+            partition: 파티션 레이블
+            metric: 히스토그램 이름
+        """
+        shard = self._shard()
+        key = self._key(metric, function, partition)
+        with shard.lock:
+            self._histogram(shard, key).record(latency_ms)
+
+    def record_latencies(
+        self, latencies_ms: Iterable[float], function: str = "", partition: Any = "", metric: str = LATENCY_METRIC
+    ):
+        """배치의 지연 여러 건을 락 한 번으로 기록"""
+        shard = self._shard()
+        key = self._key(metric, function, partition)
+        with shard.lock:
+            self._histogram(shard, key).record_many(latencies_ms)
+
+    def update(
+        self,
+        counters: Optional[Dict[str, float]] = None,
+        latencies_ms: Optional[Dict[str, float]] = None,
+        function: str = "",
+        partition: Any = "",
+    ):
+        """배치 요약(카운터 여러 개, 지연 여러 개)을 락 한 번으로 기록
+
+        Args:
+            counters: {카운터 이름: 증가량}
+            latencies_ms: {히스토그램 이름: 지연 ms} - 이름마다 1건씩 기록
+            function: 함수 레이블
+            partition: 파티션 레이블
+        """
+        shard = self._shard()
+        with shard.lock:
+            for name, value in (counters or {}).items():
+                key = self._key(name, function, partition)
+                shard.counters[key] = shard.counters.get(key, 0) + value
+            for name, latency_ms in (latencies_ms or {}).items():
+                self._histogram(shard, self._key(name, function, partition)).record(latency_ms)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """모든 샤드를 병합한 현재 메트릭"""
+        result = _Shard(None)
+        with self._shards_lock:
+            live = []
+            for shard in self._shards:
+                with shard.lock:
+                    if shard.thread is not None and not shard.thread.is_alive():
+                        with self._retired.lock:
+                            self._retired.absorb(shard.counters, shard.histograms)
+                        continue
+                    result.absorb(shard.counters, shard.histograms)
+                live.append(shard)
+            self._shards = live
+            with self._retired.lock:
+                result.absorb(self._retired.counters, self._retired.histograms)
+        return MetricsSnapshot(result.counters, result.histograms, time.time())
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """이름별 합계 (기본 카운터와 total_latency_ms 포함)"""
+        snapshot = self.snapshot()
+        totals = {name: 0 for name in DEFAULT_COUNTERS}
+        totals.update(snapshot.totals())
+        totals["total_latency_ms"] = snapshot.histogram(LATENCY_METRIC).total_ms
+        return totals
+
+    def get_average_latency(self) -> float:
+        """평균 레이턴시 계산 (총 지연 / events_processed)"""
+        totals = self.metrics
+        if totals["events_processed"] == 0:
+            return 0.0
+        return totals["total_latency_ms"] / totals["events_processed"]
+
+    def get_percentiles(
+        self, qs: Sequence[float] = DEFAULT_PERCENTILES, function: Optional[str] = None, partition: Optional[str] = None
+    ) -> Dict[float, float]:
+        """지연 백분위수 (function/partition이 None이면 전체)"""
+        return self.snapshot().histogram(LATENCY_METRIC, function, partition).percentiles(qs)
+
+    def get_summary(self) -> Dict[str, Any]:
+        """메트릭 요약 반환 (카운터 합계, 평균/백분위수 지연, 성공률)"""
+        snapshot = self.snapshot()
+        totals = {name: 0 for name in DEFAULT_COUNTERS}
+        totals.update(snapshot.totals())
+        latency = snapshot.histogram(LATENCY_METRIC)
+        totals["total_latency_ms"] = latency.total_ms
+        summary = {
+            **totals,
+            "average_latency_ms": (
+                latency.total_ms / totals["events_processed"] if totals["events_processed"] else 0.0
+            ),
+            "success_rate": (totals["events_processed"] / max(totals["events_received"], 1)) * 100,
+        }
+        for q, value in latency.percentiles().items():
+            summary[f"latency_{percentile_label(q)}_ms"] = value
+        return summary
+
+    def reset(self):
+        """메트릭 초기화"""
+        with self._shards_lock:
+            for shard in [*self._shards, self._retired]:
+                with shard.lock:
+                    shard.counters.clear()
+                    shard.histograms.clear()
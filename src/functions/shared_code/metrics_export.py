@@ -0,0 +1,332 @@
+"""
+집계 메트릭 내보내기 - Prometheus 텍스트 형식과 Application Insights 주기 전송
+
+host.json의 maxTelemetryItemsPerSecond(20) 샘플링 때문에 로그/이벤트 단위 텔레메트리로는 처리량을 알 수 없습니다.
+MetricsCollector에 배치 단위로 쌓은 카운터와 지연 히스토그램을
+
+- prometheus_text(): /metrics HTTP 라우트 응답 (text/plain; version=0.0.4)
+    카운터는 <prefix>_<이름>_total, 히스토그램은 <prefix>_<이름>_bucket/_sum/_count와
+    백분위수 게이지 <prefix>_<이름>_quantile{quantile="0.99"}로 출력합니다.
+    카운터로 나타낼 수 없는 현재 상태(예: 중복 캐시 항목 수)는 gauges로 받아 <prefix>_<이름> 게이지로 출력합니다.
+    값은 요청을 받은 워커 프로세스 기준입니다 (인스턴스가 여러 개면 instance 레이블로 구분).
+- AppInsightsMetricsFlusher: METRICS_FLUSH_INTERVAL_SECONDS마다 직전 전송 이후 증가분(snapshot diff)을
+    MetricData 항목으로 묶어 Application Insights 수집 엔드포인트(/v2.1/track)에 직접 전송합니다.
+    gauges 콜백이 있으면 전송할 때마다 현재 값을 함께 보냅니다.
+    호스트 로깅 파이프라인을 거치지 않으므로 샘플링 대상이 아니며, 간격당 (메트릭 x 레이블) 수만큼만 항목이 생깁니다.
+    전송에 실패하면 기준 snapshot을 유지하므로 다음 전송에 누락분이 합쳐집니다.
+
+앱 설정:
+    METRICS_ENABLED                        true(기본값) | false
+    METRICS_FLUSH_INTERVAL_SECONDS         Application Insights 전송 간격 (기본값 60, 0이면 전송 안 함)
+    APPLICATIONINSIGHTS_CONNECTION_STRING  플랫폼이 설정 (없으면 전송 안 함, /metrics만 제공)
+"""
+import atexit
+import logging
+import os
+import re
+import socket
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .codecs import JSON_CODEC
+from .metrics import DEFAULT_PERCENTILES, MetricsCollector, MetricsSnapshot, percentile_label
+from .settings import bool_setting, float_setting
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED_SETTING = "METRICS_ENABLED"
+FLUSH_INTERVAL_SETTING = "METRICS_FLUSH_INTERVAL_SECONDS"
+CONNECTION_STRING_SETTING = "APPLICATIONINSIGHTS_CONNECTION_STRING"
+
+DEFAULT_FLUSH_INTERVAL = 60.0
+DEFAULT_PREFIX = "serverless"
+DEFAULT_INGESTION_ENDPOINT = "https://dc.services.visualstudio.com"
+
+# Prometheus 히스토그램 버킷 상한 (ms)
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _metric_name(prefix: str, name: str) -> str:
+    name = _INVALID_NAME.sub("_", f"{prefix}_{name}" if prefix else name)
+    return f"_{name}" if name[0].isdigit() else name
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    pairs = [f'{key}="{_escape(str(value))}"' for key, value in labels.items() if value != ""]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def prometheus_text(
+    snapshot: MetricsSnapshot,
+    prefix: str = DEFAULT_PREFIX,
+    buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    labels: Optional[Dict[str, str]] = None,
+    gauges: Optional[Dict[str, float]] = None,
+) -> str:
+    """Prometheus 텍스트 노출 형식으로 변환
+
+    Args:
+        snapshot: MetricsCollector.snapshot() 결과
+        prefix: 메트릭 이름 접두사
+        buckets_ms: 히스토그램 버킷 상한 (ms, 오름차순)
+        percentiles: 백분위수 게이지로 출력할 백분위수
+        labels: 모든 시계열에 붙일 공통 레이블 (예: instance)
+        gauges: 현재 값을 그대로 출력할 게이지 {이름: 값}
+
+    Returns:
+        노출 형식 문자열
+    """
+    common = dict(labels or {})
+    lines: List[str] = []
+
+    families: Dict[str, List[Any]] = {}
+    for key, value in sorted(snapshot.counters.items()):
+        families.setdefault(key[0], []).append((key, value))
+    for name, series in families.items():
+        metric = _metric_name(prefix, name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        for (_, function, partition), value in series:
+            lines.append(f"{metric}{_labels({**common, 'function': function, 'partition': partition})} {_number(value)}")
+
+    families = {}
+    for key, histogram in sorted(snapshot.histograms.items()):
+        families.setdefault(key[0], []).append((key, histogram))
+    for name, series in families.items():
+        metric = _metric_name(prefix, name)
+        lines.append(f"# TYPE {metric} histogram")
+        for (_, function, partition), histogram in series:
+            series_labels = {**common, "function": function, "partition": partition}
+            for bound in buckets_ms:
+                bucket_labels = _labels({**series_labels, "le": _number(bound)})
+                lines.append(f"{metric}_bucket{bucket_labels} {histogram.count_at_or_below(bound)}")
+            lines.append(f"{metric}_bucket{_labels({**series_labels, 'le': '+Inf'})} {histogram.count}")
+            lines.append(f"{metric}_sum{_labels(series_labels)} {_number(histogram.total_ms)}")
+            lines.append(f"{metric}_count{_labels(series_labels)} {histogram.count}")
+        lines.append(f"# TYPE {metric}_quantile gauge")
+        for (_, function, partition), histogram in series:
+            series_labels = {**common, "function": function, "partition": partition}
+            for q, value in histogram.percentiles(percentiles).items():
+                quantile_labels = _labels({**series_labels, "quantile": _number(q / 100.0)})
+                lines.append(f"{metric}_quantile{quantile_labels} {_number(value)}")
+
+    for name, value in sorted((gauges or {}).items()):
+        metric = _metric_name(prefix, name)
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric}{_labels(common)} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def parse_connection_string(connection_string: str) -> Dict[str, str]:
+    """Application Insights 연결 문자열 파싱 (키는 소문자)"""
+    parts = {}
+    for item in connection_string.split(";"):
+        key, _, value = item.partition("=")
+        if key.strip():
+            parts[key.strip().lower()] = value.strip()
+    return parts
+
+
+def instance_name() -> str:
+    """인스턴스 식별자 (WEBSITE_INSTANCE_ID 앞 12자, 로컬은 호스트 이름)"""
+    return os.getenv("WEBSITE_INSTANCE_ID", "")[:12] or socket.gethostname()
+
+
+class AppInsightsMetricsFlusher:
+    """집계 메트릭을 주기적으로 Application Insights에 전송하는 백그라운드 스레드
+
+    사용 예:
+        flusher = AppInsightsMetricsFlusher(collector, connection_string, interval=60)
+        flusher.start()
+        ...
+        flusher.close()  # 남은 증가분 전송
+    """
+
+    def __init__(
+        self,
+        collector: MetricsCollector,
+        connection_string: str,
+        interval: float = DEFAULT_FLUSH_INTERVAL,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+        timeout: float = 10.0,
+        gauges: Optional[Callable[[], Dict[str, float]]] = None,
+    ):
+        """
+        Args:
+            collector: 전송할 메트릭 수집기
+            connection_string: Application Insights 연결 문자열 (InstrumentationKey, IngestionEndpoint)
+            interval: 전송 간격 (초)
+            percentiles: 히스토그램마다 함께 보낼 백분위수
+            timeout: 요청 타임아웃 (초)
+            gauges: 전송할 때마다 호출해 현재 값을 함께 보낼 게이지 {이름: 값} 콜백
+        """
+        settings = parse_connection_string(connection_string)
+        self.instrumentation_key = settings.get("instrumentationkey", "")
+        if not self.instrumentation_key:
+            raise ValueError("Connection string has no InstrumentationKey")
+        endpoint = settings.get("ingestionendpoint") or DEFAULT_INGESTION_ENDPOINT
+        self.url = endpoint.rstrip("/") + "/v2.1/track"
+        self.collector = collector
+        self.interval = interval
+        self.percentiles = tuple(percentiles)
+        self.timeout = timeout
+        self.gauges = gauges
+        self.tags = {
+            "ai.cloud.role": os.getenv("WEBSITE_SITE_NAME", "azure-functions-app"),
+            "ai.cloud.roleInstance": instance_name(),
+        }
+        self.flushes = 0
+        self.items_sent = 0
+        self.failures = 0
+        self._baseline = collector.snapshot()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def envelopes(
+        self, delta: MetricsSnapshot, gauges: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """구간 증가분을 MetricData 항목 목록으로 변환 (변화 없는 메트릭은 제외)
+
+        카운터는 증가량 1개 값, 히스토그램은 합계/건수/최소/최대 집계값과 백분위수별 값,
+        게이지는 현재 값 1개로 보냅니다.
+        """
+        time_text = datetime.fromtimestamp(delta.taken_at, timezone.utc).isoformat().replace("+00:00", "Z")
+        envelopes = []
+
+        def envelope(metrics: List[Dict[str, Any]], function: str, partition: str) -> Dict[str, Any]:
+            properties = {"function": function}
+            if partition:
+                properties["partition"] = partition
+            return {
+                "name": "Microsoft.ApplicationInsights.Metric",
+                "time": time_text,
+                "iKey": self.instrumentation_key,
+                "tags": self.tags,
+                "data": {
+                    "baseType": "MetricData",
+                    "baseData": {"ver": 2, "metrics": metrics, "properties": properties},
+                },
+            }
+
+        for (name, function, partition), value in sorted(delta.counters.items()):
+            if value:
+                envelopes.append(envelope([{"name": name, "kind": 0, "value": value}], function, partition))
+
+        for (name, function, partition), histogram in sorted(delta.histograms.items()):
+            if not histogram.count:
+                continue
+            envelopes.append(envelope([{
+                "name": name,
+                "kind": 1,
+                "value": histogram.total_ms,
+                "count": histogram.count,
+                "min": histogram.min_ms,
+                "max": histogram.max_ms,
+            }], function, partition))
+            for q, value in histogram.percentiles(self.percentiles).items():
+                envelopes.append(envelope(
+                    [{"name": f"{name}_{percentile_label(q)}", "kind": 0, "value": value}], function, partition
+                ))
+
+        for name, value in sorted((gauges or {}).items()):
+            envelopes.append(envelope([{"name": name, "kind": 0, "value": value}], "", ""))
+        return envelopes
+
+    def _post(self, envelopes: List[Dict[str, Any]]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=JSON_CODEC.dumps(envelopes).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def flush(self) -> int:
+        """직전 전송 이후 증가분 전송
+
+        Returns:
+            전송한 항목 수 (실패하면 0, 기준 snapshot은 그대로 유지)
+        """
+        with self._flush_lock:
+            current = self.collector.snapshot()
+            envelopes = self.envelopes(current.diff(self._baseline), self.gauges() if self.gauges else None)
+            if envelopes:
+                try:
+                    self._post(envelopes)
+                except (urllib.error.URLError, OSError) as e:
+                    self.failures += 1
+                    logger.warning("Failed to send %d metric items to Application Insights: %s", len(envelopes), e)
+                    return 0
+            self._baseline = current
+            self.flushes += 1
+            self.items_sent += len(envelopes)
+            return len(envelopes)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Metrics flush failed: %s", e, exc_info=True)
+
+    def start(self) -> "AppInsightsMetricsFlusher":
+        """전송 스레드 시작"""
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="metrics-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """전송 스레드를 멈추고 남은 증가분 전송"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.timeout)
+            self._thread = None
+        self.flush()
+
+
+def metrics_enabled() -> bool:
+    return bool_setting(METRICS_ENABLED_SETTING)
+
+
+def create_metrics_flusher(
+    collector: MetricsCollector,
+    gauges: Optional[Callable[[], Dict[str, float]]] = None,
+) -> Optional[AppInsightsMetricsFlusher]:
+    """앱 설정으로 전송기 생성 후 시작 (연결 문자열이 없거나 간격이 0이면 None, 워커 종료 시 마지막 전송)
+
+    Args:
+        collector: 전송할 메트릭 수집기
+        gauges: 전송할 때마다 함께 보낼 게이지 콜백
+    """
+    connection_string = os.getenv(CONNECTION_STRING_SETTING, "").strip()
+    interval = float_setting(FLUSH_INTERVAL_SETTING, DEFAULT_FLUSH_INTERVAL)
+    if not connection_string or interval <= 0:
+        return None
+    try:
+        flusher = AppInsightsMetricsFlusher(collector, connection_string, interval=interval, gauges=gauges)
+    except ValueError as e:
+        logger.warning("Metrics flusher disabled: %s", e)
+        return None
+    atexit.register(flusher.close)
+    return flusher.start()
@@ -0,0 +1,214 @@
+"""
+대용량 Event Hub 배치의 병렬 디코딩/문서 변환
+
+배치가 임계값 이상이면 이벤트를 파티션 키(보통 deviceId) 기준 그룹으로 나눠
+스레드 또는 프로세스 풀에서 처리하고, 원래 이벤트 순서대로 결과를 병합합니다.
+작은 배치는 풀 오버헤드가 이득보다 크므로 직렬 경로로 처리합니다.
+
+앱 설정:
+    EVENT_PARALLEL_MODE       serial(기본값) | thread | process
+    EVENT_PARALLEL_THRESHOLD  병렬 처리를 시작하는 이벤트 수 (기본값 5000)
+    EVENT_PARALLEL_WORKERS    풀 크기 (기본값 min(4, CPU 수))
+
+thread 모드는 GIL을 해제하는 압축 해제(zlib/zstd)가 많은 배치에 유리하고,
+process 모드는 순수 Python 디코딩/변환이 지배적인 대형 배치에 유리합니다.
+"""
+import os
+import atexit
+import threading
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .codecs import CodecError
+from .compression import decode_events
+from .document_builder import EVENTHUB_DOCUMENT_BUILDER, HTTP_DOCUMENT_BUILDER, DocumentBuilder
+from .settings import int_setting
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_MODE_SETTING = "EVENT_PARALLEL_MODE"
+PARALLEL_THRESHOLD_SETTING = "EVENT_PARALLEL_THRESHOLD"
+PARALLEL_WORKERS_SETTING = "EVENT_PARALLEL_WORKERS"
+
+MODES = ("serial", "thread", "process")
+DEFAULT_THRESHOLD = 5000
+
+# 프로세스 풀 워커에서는 컴파일된 빌더를 넘길 수 없으므로 이름으로 조회
+_BUILDERS: Dict[str, DocumentBuilder] = {
+    "eventhub": EVENTHUB_DOCUMENT_BUILDER,
+    "http": HTTP_DOCUMENT_BUILDER,
+}
+
+# (본문, 애플리케이션 속성, 메타데이터)
+EventRecord = Tuple[bytes, Dict[str, Any], Dict[str, Any]]
+# (시퀀스 번호, 오류 종류, 메시지)
+EventError = Tuple[Any, str, str]
+
+
+@dataclass
+class BatchResult:
+    """배치 처리 결과"""
+    documents: List[Dict[str, Any]] = field(default_factory=list)
+    errors: List[EventError] = field(default_factory=list)
+    mode: str = "serial"
+    groups: int = 1
+
+
+def decode_and_build(
+    records: Sequence[EventRecord],
+    batch_values: Dict[str, Any],
+    schema: str = "eventhub"
+) -> Tuple[List[Dict[str, Any]], List[int], List[EventError]]:
+    """이벤트 레코드를 디코딩하고 문서로 변환 (직렬 경로이자 풀 작업 단위)
+
+    Returns:
+        (문서 목록, 레코드별 문서 수, 오류 목록) - 실패한 레코드의 문서 수는 0
+    """
+    builder = _BUILDERS[schema]
+    errors: List[EventError] = []
+    payloads: List[Dict[str, Any]] = []
+    metas: List[Dict[str, Any]] = []
+    counts: List[int] = []
+
+    for body, properties, meta in records:
+        try:
+            decoded = decode_events(body, properties)
+            for event_data in decoded:
+                if not isinstance(event_data, dict):
+                    raise ValueError(f"Event payload must be an object, got {type(event_data).__name__}")
+        except CodecError as e:
+            errors.append((meta.get("sequenceNumber"), "decode_errors", str(e)))
+            counts.append(0)
+            continue
+        except Exception as e:
+            errors.append((meta.get("sequenceNumber"), "failed", str(e)))
+            counts.append(0)
+            continue
+
+        if len(decoded) > 1:
+            # 패킹된 이벤트는 기본 ID에 인덱스 추가
+            default_id = meta["defaultId"]
+            metas.extend(dict(meta, defaultId=f"{default_id}-{index}") for index in range(len(decoded)))
+        else:
+            metas.extend([meta] * len(decoded))
+        payloads.extend(decoded)
+        counts.append(len(decoded))
+
+    return builder.build_batch(payloads, metas, batch_values), counts, errors
+
+
+def _process_group(
+    records: List[EventRecord],
+    indices: List[int],
+    batch_values: Dict[str, Any],
+    schema: str
+) -> Tuple[List[int], List[Dict[str, Any]], List[int], List[EventError]]:
+    return (indices, *decode_and_build(records, batch_values, schema))
+
+
+def group_records(records: Sequence[EventRecord], group_count: int) -> List[List[int]]:
+    """레코드 인덱스를 파티션 키별로 묶은 뒤 group_count개 그룹으로 균형 배분
+
+    같은 파티션 키(디바이스)의 레코드는 항상 같은 그룹에 원래 순서대로 들어갑니다.
+    파티션 키가 없으면 연속 구간으로 나눕니다. 배분은 입력만으로 결정되어 재현 가능합니다.
+    """
+    by_key: Dict[Any, List[int]] = {}
+    for index, (_, _, meta) in enumerate(records):
+        by_key.setdefault(meta.get("partitionKey"), []).append(index)
+
+    if len(by_key) == 1 and None in by_key:
+        size = -(-len(records) // group_count)
+        return [list(range(start, min(start + size, len(records)))) for start in range(0, len(records), size)]
+
+    # 큰 키부터 가장 작은 그룹에 배정 (동률은 키 등장 순서)
+    groups: List[List[int]] = [[] for _ in range(min(group_count, len(by_key)))]
+    for indices in sorted(by_key.values(), key=len, reverse=True):
+        smallest = min(range(len(groups)), key=lambda g: len(groups[g]))
+        groups[smallest].extend(indices)
+    for group in groups:
+        group.sort()
+    return [group for group in groups if group]
+
+
+class BatchProcessor:
+    """직렬/병렬 실행 모드를 선택하는 배치 디코딩/변환기
+
+    풀은 인스턴스 수명 동안 재사용합니다 (Function 호출마다 생성하지 않음).
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        threshold: Optional[int] = None,
+        workers: Optional[int] = None,
+        schema: str = "eventhub"
+    ):
+        """
+        Args:
+            mode: serial, thread, process (None이면 EVENT_PARALLEL_MODE)
+            threshold: 병렬 처리를 시작하는 이벤트 수 (None이면 EVENT_PARALLEL_THRESHOLD)
+            workers: 풀 크기 (None이면 EVENT_PARALLEL_WORKERS 또는 min(4, CPU 수))
+            schema: 문서 스키마 이름 (eventhub, http)
+        """
+        mode = (mode or os.getenv(PARALLEL_MODE_SETTING) or "serial").lower()
+        if mode not in MODES:
+            logger.warning(f"Unknown {PARALLEL_MODE_SETTING}={mode}, falling back to serial")
+            mode = "serial"
+        self.mode = mode
+        self.threshold = threshold if threshold is not None else int_setting(
+            PARALLEL_THRESHOLD_SETTING, DEFAULT_THRESHOLD
+        )
+        self.workers = workers or int_setting(PARALLEL_WORKERS_SETTING, min(4, os.cpu_count() or 1))
+        self.schema = schema
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def process(self, records: Sequence[EventRecord], batch_values: Dict[str, Any]) -> BatchResult:
+        """레코드 배치를 문서로 변환 (결과 순서는 항상 레코드 순서와 같음)"""
+        groups = None
+        if self.mode != "serial" and self.workers > 1 and len(records) >= self.threshold:
+            groups = group_records(records, self.workers)
+        if not groups or len(groups) < 2:
+            documents, _, errors = decode_and_build(records, batch_values, self.schema)
+            return BatchResult(documents, errors)
+
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_process_group, [records[i] for i in group], group, batch_values, self.schema)
+            for group in groups
+        ]
+
+        # 레코드 인덱스 위치에 결과를 배치한 뒤 순서대로 평탄화 (직렬 경로와 동일한 출력)
+        slots: List[List[Dict[str, Any]]] = [[] for _ in records]
+        errors: List[EventError] = []
+        for future in futures:
+            indices, documents, counts, group_errors = future.result()
+            offset = 0
+            for index, count in zip(indices, counts):
+                slots[index] = documents[offset:offset + count]
+                offset += count
+            errors.extend(group_errors)
+        errors.sort(key=lambda error: (error[0] is None, error[0] if error[0] is not None else 0))
+        return BatchResult([doc for docs in slots for doc in docs], errors, self.mode, len(groups))
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="event-batch"
+                    )
+                atexit.register(self.close)
+            return self._executor
+
+    def close(self) -> None:
+        """풀 종료"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
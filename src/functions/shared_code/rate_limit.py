@@ -0,0 +1,83 @@
+"""
+토큰 버킷 속도 제한 - 스레드(Producer 부하 생성기)와 asyncio(알림 전송) 공용
+
+acquire()는 토큰을 먼저 예약(부족하면 음수 잔량으로 빚을 짐)한 뒤 락 밖에서 기다리므로
+대기자들이 요청 순서대로 rate에 맞춰 토큰을 받습니다. 락은 계산 구간에만 잡으므로
+이벤트 루프 안에서 acquire_async()를 호출해도 루프를 막지 않습니다.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """토큰 버킷 속도 제한기 (스레드 안전)
+
+    초당 rate개의 토큰이 채워지고 최대 capacity개까지 누적됩니다.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate: 초당 토큰 보충량 (0 이하이면 제한 없음)
+            capacity: 버킷 최대 크기 (None이면 rate, 즉 1초 분량)
+            clock: 단조 시계 (테스트용)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """토큰을 즉시 가져올 수 있으면 차감 후 True"""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """토큰을 예약하고 기다려야 할 시간 반환 (capacity보다 큰 요청도 허용)
+
+        Returns:
+            대기 시간 (초, 바로 쓸 수 있으면 0)
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= tokens
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """토큰을 가져올 때까지 대기
+
+        Returns:
+            대기한 시간 (초)
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """acquire()의 asyncio 버전 (이벤트 루프를 막지 않고 대기)
+
+        Returns:
+            대기한 시간 (초)
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
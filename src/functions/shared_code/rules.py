@@ -0,0 +1,329 @@
+"""
+벡터화 임계값 규칙 엔진 - Change Feed 배치 단위 평가
+
+설정으로 선언한 규칙(측정값, 연산자, 임계값, 디바이스/시설별 재정의, 히스테리시스)을
+한 번 컴파일하고, 배치마다 문서를 NumPy 열로 바꿔 모든 규칙을 한 번에 평가합니다.
+문서 수 x 규칙 수만큼 Python 루프를 돌지 않습니다.
+
+평가 방식:
+    같은 (측정값, 방향) 규칙을 한 그룹으로 묶어 (규칙 수 x 문서 수) 임계값 행렬과 비교합니다.
+    "<" 규칙은 값과 임계값의 부호를 바꿔 ">" 규칙과 같은 방식으로 처리합니다.
+    임계값 우선순위: 디바이스 재정의 > 시설 재정의 > 기본 임계값
+
+히스테리시스:
+    규칙은 (규칙, 디바이스)별로 활성/비활성 상태를 가집니다. 값이 임계값을 넘으면 활성이 되고,
+    임계값 - hysteresis 이하로 내려가야 다시 비활성이 됩니다 ("<" 규칙은 반대 방향).
+    알림은 비활성 → 활성으로 바뀌는 순간에만 발생하므로 임계값 부근에서 알림이 반복되지 않습니다.
+    배치 안의 순서는 디바이스별 전방 채우기(forward fill)로 벡터화합니다.
+    함수 호출이 모듈 수준 엔진 하나를 공유하므로 상태를 읽고 쓰는 평가는 락으로 직렬화합니다.
+
+앱 설정:
+    ALERT_RULES       규칙 JSON 배열 (없으면 ALERT_RULES_FILE, 둘 다 없으면 DEFAULT_RULES)
+    ALERT_RULES_FILE  규칙 JSON 파일 경로
+
+규칙 JSON 예:
+    [{"name": "high-temperature", "metric": "temperature", "operator": ">", "threshold": 40,
+      "hysteresis": 2, "severity": "warning",
+      "overrides": {"device": {"device-001": 45}, "facility": {"facility-2": 42}}}]
+"""
+import os
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ALERT_RULES_SETTING = "ALERT_RULES"
+ALERT_RULES_FILE_SETTING = "ALERT_RULES_FILE"
+
+OPERATORS = (">", ">=", "<", "<=")
+
+# 기존 하드코딩 규칙 (temperature > 40)
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"name": "high-temperature", "metric": "temperature", "operator": ">", "threshold": 40},
+]
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """임계값 규칙 하나"""
+    name: str
+    metric: str
+    operator: str
+    threshold: float
+    hysteresis: float = 0.0
+    severity: str = "warning"
+    device_overrides: Dict[str, float] = field(default_factory=dict, hash=False, compare=False)
+    facility_overrides: Dict[str, float] = field(default_factory=dict, hash=False, compare=False)
+
+    def __post_init__(self):
+        if self.operator not in OPERATORS:
+            raise ValueError(f"Rule {self.name}: unsupported operator {self.operator!r} (use one of {OPERATORS})")
+        if self.hysteresis < 0:
+            raise ValueError(f"Rule {self.name}: hysteresis must be >= 0")
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "AlertRule":
+        overrides = config.get("overrides") or {}
+        return cls(
+            name=str(config["name"]),
+            metric=str(config["metric"]),
+            operator=str(config.get("operator", ">")),
+            threshold=float(config["threshold"]),
+            hysteresis=float(config.get("hysteresis", 0.0)),
+            severity=str(config.get("severity", "warning")),
+            device_overrides={str(k): float(v) for k, v in (overrides.get("device") or {}).items()},
+            facility_overrides={str(k): float(v) for k, v in (overrides.get("facility") or {}).items()},
+        )
+
+
+@dataclass
+class RuleEvaluation:
+    """배치 평가 결과"""
+    # 비활성 → 활성으로 바뀐 (규칙, 문서) - 문서 순서
+    alerts: List[Dict[str, Any]] = field(default_factory=list)
+    # 규칙별 조건을 만족한 문서 수 (상태 전환과 무관)
+    exceeded: Dict[str, int] = field(default_factory=dict)
+    documents: int = 0
+
+
+@dataclass
+class TelemetryColumns:
+    """문서 배치의 열 표현"""
+    values: Dict[str, np.ndarray]
+    devices: List[Any]
+    device_codes: np.ndarray
+    facilities: List[Any]
+    facility_codes: np.ndarray
+    documents: Sequence[Dict[str, Any]]
+
+    @classmethod
+    def from_documents(cls, documents: Sequence[Dict[str, Any]], metrics: Sequence[str]) -> "TelemetryColumns":
+        """문서를 측정값 열(float, 없으면 NaN)과 디바이스/시설 코드 열로 변환"""
+        nan = float("nan")
+        device_index: Dict[Any, int] = {}
+        facility_index: Dict[Any, int] = {}
+        device_codes = []
+        facility_codes = []
+        rows = []
+        for document in documents:
+            device_codes.append(device_index.setdefault(document.get("deviceId"), len(device_index)))
+            location = document.get("location")
+            facility = location.get("facility") if isinstance(location, dict) else None
+            facility_codes.append(facility_index.setdefault(facility, len(facility_index)))
+            data = document.get("data")
+            if not isinstance(data, dict):
+                data = {}
+            row = []
+            for metric in metrics:
+                value = data.get(metric)
+                row.append(value if isinstance(value, (int, float)) and not isinstance(value, bool) else nan)
+            rows.append(row)
+
+        matrix = np.array(rows, dtype=np.float64).reshape(len(documents), len(metrics))
+        return cls(
+            values={metric: matrix[:, i] for i, metric in enumerate(metrics)},
+            devices=list(device_index),
+            device_codes=np.array(device_codes, dtype=np.intp),
+            facilities=list(facility_index),
+            facility_codes=np.array(facility_codes, dtype=np.intp),
+            documents=documents,
+        )
+
+
+class _RuleGroup:
+    """같은 측정값/방향 규칙 묶음 (임계값 행렬 계산 단위)"""
+
+    def __init__(self, metric: str, sign: float, strict: bool, rules: List[AlertRule]):
+        self.metric = metric
+        self.sign = sign
+        self.strict = strict
+        self.rules = rules
+        count = len(rules)
+        self.base = np.array([rule.threshold for rule in rules], dtype=np.float64) * sign
+        self.hysteresis = np.array([rule.hysteresis for rule in rules], dtype=np.float64)
+        self.device_rows = self._override_rows([rule.device_overrides for rule in rules], count)
+        self.facility_rows = self._override_rows([rule.facility_overrides for rule in rules], count)
+        self._empty_row = np.full(count, np.nan)
+        self._inactive = np.zeros(count, dtype=bool)
+        # 디바이스 → 규칙별 활성 상태 (활성 규칙이 하나라도 있는 디바이스만 보관)
+        self.active: Dict[Any, np.ndarray] = {}
+
+    def _override_rows(self, overrides: List[Dict[str, float]], count: int) -> Dict[str, np.ndarray]:
+        rows: Dict[str, np.ndarray] = {}
+        for index, mapping in enumerate(overrides):
+            for key, threshold in mapping.items():
+                row = rows.setdefault(key, np.full(count, np.nan))
+                row[index] = threshold * self.sign
+        return rows
+
+    def thresholds(self, columns: TelemetryColumns) -> np.ndarray:
+        """(규칙 수 x 문서 수) 임계값 행렬 (재정의가 없으면 (규칙 수 x 1) 브로드캐스트)"""
+        thresholds = self.base[:, None]
+        for rows, keys, codes in (
+            (self.facility_rows, columns.facilities, columns.facility_codes),
+            (self.device_rows, columns.devices, columns.device_codes),
+        ):
+            if not rows:
+                continue
+            table = np.stack([rows.get(str(key), self._empty_row) for key in keys], axis=1)
+            overrides = table[:, codes]
+            thresholds = np.where(np.isnan(overrides), thresholds, overrides)
+        return thresholds
+
+    def evaluate(self, columns: TelemetryColumns) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns:
+            (조건 만족 행렬, 알림 행렬, 임계값 행렬) - 조건/알림은 (규칙 수 x 문서 수) bool, 문서는 원래 순서
+        """
+        values = columns.values[self.metric] * self.sign
+        thresholds = self.thresholds(columns)
+        release = thresholds - self.hysteresis[:, None]
+        if self.strict:
+            on = values > thresholds
+            off = values <= release
+        else:
+            on = values >= thresholds
+            off = values < release
+        # NaN(측정값 없음)은 on/off 모두 False라 상태를 바꾸지 않음
+        signal = on.astype(np.int8) - off.astype(np.int8)
+
+        # 디바이스별 연속 구간으로 정렬 (디바이스 안의 순서는 유지)
+        order = np.argsort(columns.device_codes, kind="stable")
+        codes = columns.device_codes[order]
+        signal = signal[:, order]
+        size = len(order)
+        positions = np.arange(size)
+        starts = np.ones(size, dtype=bool)
+        starts[1:] = codes[1:] != codes[:-1]
+        segment_start = np.maximum.accumulate(np.where(starts, positions, 0))
+
+        # 배치 시작 전 상태 (규칙 수 x 고유 디바이스 수)
+        previous = np.stack(
+            [self.active.get(device, self._inactive) for device in columns.devices], axis=1
+        )[:, codes]
+
+        # 각 위치에서 마지막으로 on/off가 결정된 위치 (같은 디바이스 구간 안에서만)
+        last = np.maximum.accumulate(np.where(signal != 0, positions, -1), axis=1)
+        decided = last >= segment_start
+        last_signal = np.take_along_axis(signal, np.maximum(last, 0), axis=1)
+        state = np.where(decided, last_signal > 0, previous)
+
+        before = np.empty_like(state)
+        before[:, 0] = previous[:, 0]
+        before[:, 1:] = state[:, :-1]
+        before[:, starts] = previous[:, starts]
+        alerts = state & ~before
+
+        # 디바이스별 마지막 상태 저장
+        ends = np.ones(size, dtype=bool)
+        ends[:-1] = starts[1:]
+        for position in np.flatnonzero(ends):
+            device = columns.devices[codes[position]]
+            final = state[:, position]
+            if final.any():
+                self.active[device] = final.copy()
+            else:
+                self.active.pop(device, None)
+
+        inverse = np.empty_like(order)
+        inverse[order] = positions
+        return on, alerts[:, inverse], thresholds
+
+
+class RuleEngine:
+    """규칙 목록을 컴파일해 배치 단위로 평가 (스레드 안전)"""
+
+    def __init__(self, rules: Sequence[AlertRule]):
+        names = [rule.name for rule in rules]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate rule names: {sorted(duplicates)}")
+        self.rules = list(rules)
+        self.metrics = sorted({rule.metric for rule in rules})
+
+        grouped: Dict[Tuple[str, float, bool], List[AlertRule]] = {}
+        for rule in rules:
+            sign = 1.0 if rule.operator.startswith(">") else -1.0
+            strict = not rule.operator.endswith("=")
+            grouped.setdefault((rule.metric, sign, strict), []).append(rule)
+        self._groups = [_RuleGroup(metric, sign, strict, group) for (metric, sign, strict), group in grouped.items()]
+        # (규칙, 디바이스)별 활성 상태 보호
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Sequence[Dict[str, Any]]) -> "RuleEngine":
+        return cls([AlertRule.from_dict(item) for item in config])
+
+    def evaluate(self, documents: Sequence[Dict[str, Any]]) -> RuleEvaluation:
+        """문서 배치에 모든 규칙 적용
+
+        Returns:
+            RuleEvaluation (alerts는 상태가 활성으로 바뀐 경우만)
+        """
+        result = RuleEvaluation(documents=len(documents))
+        if not documents or not self._groups:
+            return result
+        columns = TelemetryColumns.from_documents(documents, self.metrics)
+
+        found: List[Tuple[int, int, Dict[str, Any]]] = []
+        with self._lock:
+            evaluated = [group.evaluate(columns) for group in self._groups]
+        for group_index, (group, (on, alerts, thresholds)) in enumerate(zip(self._groups, evaluated)):
+            counts = on.sum(axis=1)
+            for rule, count in zip(group.rules, counts.tolist()):
+                result.exceeded[rule.name] = count
+            rule_indices, document_indices = np.nonzero(alerts)
+            if not len(rule_indices):
+                continue
+            values = columns.values[group.metric]
+            full = np.broadcast_to(thresholds, alerts.shape)
+            for r, d in zip(rule_indices.tolist(), document_indices.tolist()):
+                rule = group.rules[r]
+                document = documents[d]
+                location = document.get("location")
+                found.append((d, group_index, {
+                    "rule": rule.name,
+                    "severity": rule.severity,
+                    "metric": rule.metric,
+                    "operator": rule.operator,
+                    "value": float(values[d]),
+                    "threshold": float(full[r, d] * group.sign),
+                    "id": document.get("id"),
+                    "deviceId": document.get("deviceId"),
+                    "facility": location.get("facility") if isinstance(location, dict) else None,
+                    "timestamp": document.get("timestamp"),
+                }))
+        found.sort(key=lambda item: (item[0], item[1]))
+        result.alerts = [alert for _, _, alert in found]
+        return result
+
+    def active_count(self) -> int:
+        """활성 상태인 (규칙, 디바이스) 수"""
+        with self._lock:
+            return int(sum(int(state.sum()) for group in self._groups for state in group.active.values()))
+
+
+def load_rules() -> List[Dict[str, Any]]:
+    """ALERT_RULES(JSON) 또는 ALERT_RULES_FILE에서 규칙 설정 로드 (없으면 DEFAULT_RULES)"""
+    inline = os.getenv(ALERT_RULES_SETTING)
+    if inline:
+        return json.loads(inline)
+    path = os.getenv(ALERT_RULES_FILE_SETTING)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return DEFAULT_RULES
+
+
+def create_rule_engine() -> RuleEngine:
+    """앱 설정의 규칙으로 엔진 생성 (설정이 잘못되면 DEFAULT_RULES 사용)"""
+    try:
+        return RuleEngine.from_config(load_rules())
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.error(f"Invalid alert rules, falling back to defaults: {e}")
+        return RuleEngine.from_config(DEFAULT_RULES)
@@ -0,0 +1,44 @@
+"""
+앱 설정(환경 변수) 조회 헬퍼
+
+값이 없거나 형식이 잘못되면 기본값을 사용합니다 (설정 오류로 함수 호스트가 시작되지 않는 일을 막음).
+"""
+import os
+
+# 기능 플래그를 끄는 값 (대소문자 무시, 그 외 값은 켜짐)
+FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def bool_setting(name: str, default: bool = True) -> bool:
+    """on/off 설정 (없으면 default, 0/false/no/off이면 False)"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in FALSE_VALUES
+
+
+def int_setting(name: str, default: int) -> int:
+    """정수 설정 (없거나 정수가 아니면 default)"""
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def float_setting(name: str, default: float) -> float:
+    """실수 설정 (없거나 숫자가 아니면 default)"""
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def rate_setting(name: str, default: float) -> float:
+    """0.0 ~ 1.0 비율 설정 (범위를 벗어나면 잘라냄, 없거나 숫자가 아니면 default)"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return min(max(float(value), 0.0), 1.0)
+    except ValueError:
+        return default
@@ -0,0 +1,11 @@
+"""
+Function App 공유 코드 테스트 설정
+배포 시와 같이 src/functions를 루트로 import (shared_code.*)
+"""
+import os
+import sys
+
+FUNCTIONS_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if FUNCTIONS_ROOT not in sys.path:
+    sys.path.insert(0, FUNCTIONS_ROOT)
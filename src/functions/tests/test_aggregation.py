@@ -0,0 +1,246 @@
+"""
+WindowedAggregator 테스트 - 윈도우 닫힘, 허용 지연, pane/시리즈 제거, 종료 시 flush, 동시 호출
+"""
+import threading
+
+import pytest
+
+from shared_code.aggregation import WindowedAggregator, WindowSpec, flush_on_exit, parse_windows
+
+
+def telemetry(device, ts, temperature=20.0, facility="facility-0"):
+    return {
+        "deviceId": device,
+        "location": {"facility": facility},
+        "_ts": ts,
+        "data": {"temperature": temperature},
+    }
+
+
+def make_aggregator(windows, lateness=0.0):
+    return WindowedAggregator(
+        windows,
+        metrics=("temperature",),
+        allowed_lateness=lateness,
+        dimensions=(("device", ("deviceId",)),),
+        instance_id="test",
+    )
+
+
+def test_parse_windows():
+    assert parse_windows("tumbling:60, sliding:300/60") == [WindowSpec(60, 60), WindowSpec(300, 60)]
+    with pytest.raises(ValueError):
+        parse_windows("sliding:100/30")
+    with pytest.raises(ValueError):
+        parse_windows("session:60")
+
+
+def test_tumbling_window_closes_when_watermark_passes_end():
+    aggregator = make_aggregator([WindowSpec(60, 60)], lateness=10)
+    for ts, value in ((0, 10.0), (30, 30.0), (59, 20.0)):
+        assert aggregator.add(telemetry("d1", ts, value))
+
+    # 워터마크 = 65 - 10 = 55 < 60 이므로 아직 열림
+    aggregator.add(telemetry("d1", 65, 99.0))
+    assert aggregator.advance() == []
+
+    aggregator.add(telemetry("d1", 70, 99.0))
+    documents = aggregator.advance()
+    assert len(documents) == 1
+    document = documents[0]
+    assert document["window"] == "tumbling-60s"
+    assert document["windowStart"] == "1970-01-01T00:00:00+00:00"
+    assert document["windowEnd"] == "1970-01-01T00:01:00+00:00"
+    assert document["count"] == 3
+    assert document["metrics"]["temperature"] == {"count": 3, "min": 10.0, "max": 30.0, "mean": 20.0, "last": 20.0}
+    assert document["id"] == "device:d1|tumbling-60s|1970-01-01T00:00:00+00:00|test"
+
+    # 한 번 닫힌 윈도우는 다시 내보내지 않음
+    assert aggregator.advance() == []
+
+
+def test_event_for_closed_window_is_late():
+    aggregator = make_aggregator([WindowSpec(60, 60)], lateness=0)
+    aggregator.add(telemetry("d1", 10))
+    aggregator.add(telemetry("d1", 61))
+    assert len(aggregator.advance()) == 1
+
+    assert not aggregator.add(telemetry("d1", 30))
+    assert aggregator.stats["late"] == 1
+
+    # 아직 열린 윈도우에 속하면 받아들임
+    assert aggregator.add(telemetry("d1", 90))
+    # 워터마크는 전체 공통이므로 처음 보는 디바이스라도 닫힌 구간의 이벤트는 late
+    assert not aggregator.add(telemetry("d2", 30))
+    assert aggregator.stats["late"] == 2
+
+
+def test_flushed_window_is_not_emitted_again():
+    aggregator = make_aggregator([WindowSpec(60, 60)], lateness=30)
+    aggregator.add(telemetry("d1", 10))
+    assert len(aggregator.flush()) == 1
+    # 워터마크는 그대로지만 이미 내보낸 윈도우이므로 late
+    assert not aggregator.add(telemetry("d1", 20))
+    assert aggregator.flush() == []
+
+
+def test_earlier_pane_reschedules_series():
+    aggregator = make_aggregator([WindowSpec(60, 60)], lateness=100)
+    aggregator.add(telemetry("d1", 130))
+    aggregator.add(telemetry("d1", 70))
+    aggregator.add(telemetry("d1", 200))
+    aggregator.add(telemetry("d1", 310))
+    documents = aggregator.advance()
+    assert [d["windowStart"][11:19] for d in documents] == ["00:01:00", "00:02:00"]
+    assert aggregator.open_windows() == 2
+
+
+def test_within_allowed_lateness_is_accepted():
+    aggregator = make_aggregator([WindowSpec(60, 60)], lateness=30)
+    aggregator.add(telemetry("d1", 80))
+    assert aggregator.advance() == []
+    # 워터마크(50)가 윈도우 [0, 60)의 끝을 넘지 않았으므로 늦게 온 이벤트도 누적
+    assert aggregator.add(telemetry("d1", 40, temperature=5.0))
+    aggregator.add(telemetry("d1", 95))
+    (document,) = aggregator.advance()
+    assert document["metrics"]["temperature"]["min"] == 5.0
+
+
+def test_sliding_window_merges_panes_and_evicts_old_ones():
+    aggregator = make_aggregator([WindowSpec(120, 60)])
+    aggregator.add(telemetry("d1", 10, 1.0))
+    aggregator.add(telemetry("d1", 70, 3.0))
+    assert aggregator.open_windows() == 2
+
+    aggregator.add(telemetry("d1", 130, 5.0))
+    documents = aggregator.advance()
+    # [-60, 60)과 [0, 120)이 닫힘
+    assert [(d["windowStart"][11:19], d["count"]) for d in documents] == [("23:59:00", 1), ("00:00:00", 2)]
+    assert documents[1]["metrics"]["temperature"]["mean"] == 2.0
+    # 첫 pane은 다음 윈도우 [60, 180)에 포함되지 않으므로 제거
+    assert aggregator.open_windows() == 2
+
+    remaining = aggregator.flush()
+    assert [(d["windowStart"][11:19], d["count"]) for d in remaining] == [("00:01:00", 2), ("00:02:00", 1)]
+    assert aggregator.open_windows() == 0
+
+
+def test_gap_skips_empty_windows():
+    aggregator = make_aggregator([WindowSpec(60, 60)])
+    aggregator.add(telemetry("d1", 10))
+    aggregator.add(telemetry("d1", 610))
+    aggregator.add(telemetry("d1", 700))
+    documents = aggregator.advance()
+    assert [d["windowStart"][11:19] for d in documents] == ["00:00:00", "00:10:00"]
+
+
+def test_documents_without_time_or_metrics_are_skipped():
+    aggregator = make_aggregator([WindowSpec(60, 60)])
+    assert not aggregator.add({"deviceId": "d1", "data": {"temperature": 1.0}})
+    assert not aggregator.add({"deviceId": "d1", "_ts": 1, "data": {"humidity": 1.0}})
+    assert not aggregator.add({"deviceId": "d1", "_ts": 1, "data": {"temperature": True}})
+    assert aggregator.stats["skipped"] == 3
+
+
+def test_iso_timestamp_takes_precedence_over_ts():
+    aggregator = make_aggregator([WindowSpec(60, 60)])
+    document = telemetry("d1", 10_000)
+    document["timestamp"] = "1970-01-01T00:00:30"
+    aggregator.add(document)
+    (result,) = aggregator.flush()
+    assert result["windowStart"] == "1970-01-01T00:00:00+00:00"
+
+
+def test_concurrent_add_and_advance():
+    aggregator = make_aggregator([WindowSpec(60, 60), WindowSpec(300, 60)], lateness=5)
+    errors = []
+    emitted = []
+    per_thread = 5000
+
+    def worker(offset):
+        try:
+            for n in range(per_thread):
+                aggregator.add(telemetry(f"d{n % 50}", n + offset))
+                if n % 25 == 0:
+                    emitted.extend(aggregator.advance())
+        except Exception as e:  # pragma: no cover - 실패 시 내용 확인용
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i * 7,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stats = aggregator.stats
+    assert stats["events"] + stats["late"] + stats["skipped"] == 4 * per_thread
+    emitted.extend(aggregator.flush())
+    assert stats["windows_emitted"] == len(emitted)
+    # 같은 윈도우가 두 번 내보내지지 않음
+    ids = [document["id"] for document in emitted]
+    assert len(ids) == len(set(ids))
+
+
+def test_add_many_counts_accepted_documents():
+    aggregator = make_aggregator([WindowSpec(60, 60)])
+    documents = [telemetry("d1", 10), {"deviceId": "d1", "data": {}}, telemetry({"bad": "key"}, 20), telemetry("d2", 30)]
+    assert aggregator.add_many(documents) == 2
+    assert aggregator.stats["skipped"] == 1
+
+
+def test_idle_series_are_evicted_after_allowed_lateness():
+    aggregator = make_aggregator([WindowSpec(60, 60)], lateness=30)
+    aggregator.add_many([telemetry(f"d{i}", 10) for i in range(100)])
+    aggregator.add(telemetry("active", 95))
+    assert len(aggregator.advance()) == 100
+    # 닫은 지 허용 지연(30초)이 지나지 않았으므로 아직 유지
+    assert aggregator.series_count() == 101
+
+    aggregator.add(telemetry("active", 125))
+    aggregator.advance()
+    assert aggregator.series_count() == 1
+    assert aggregator.stats["series_evicted"] == 100
+
+    # 제거 후에도 닫힌 구간의 이벤트는 워터마크 기준으로 late
+    assert not aggregator.add(telemetry("d1", 50))
+    # 새 윈도우의 이벤트는 시리즈를 다시 만들어 누적
+    assert aggregator.add(telemetry("d1", 130))
+    assert aggregator.series_count() == 2
+
+
+def test_reopened_series_is_not_evicted():
+    aggregator = make_aggregator([WindowSpec(60, 60)], lateness=0)
+    aggregator.add(telemetry("d1", 10))
+    aggregator.add(telemetry("d2", 65))
+    aggregator.advance()
+    aggregator.add(telemetry("d1", 70))
+    aggregator.add(telemetry("d2", 200))
+    documents = aggregator.advance()
+    assert sorted(d["key"] for d in documents) == ["d1", "d2"]
+    aggregator.add(telemetry("d1", 250))
+    assert aggregator.series_count() == 2
+    assert aggregator.open_windows() == 2
+
+
+def test_flush_on_exit_writes_open_windows(monkeypatch):
+    registered = []
+    monkeypatch.setattr("shared_code.aggregation.atexit.register", registered.append)
+    aggregator = make_aggregator([WindowSpec(60, 60)], lateness=30)
+    aggregator.add(telemetry("d1", 10))
+    written = []
+    flush_on_exit(aggregator, written.extend)
+
+    (flush,) = registered
+    flush()
+    assert [d["windowStart"][11:19] for d in written] == ["00:00:00"]
+    assert aggregator.open_windows() == 0
+
+    # 저장 실패는 종료를 막지 않음
+    aggregator.add(telemetry("d1", 70))
+
+    def fail(documents):
+        raise RuntimeError("cosmos unavailable")
+
+    flush_on_exit(aggregator, fail)
+    registered[-1]()
@@ -0,0 +1,207 @@
+"""
+AnomalyDetector 테스트 - Welford/EWMA 통계, z-score/CUSUM 탐지, 스냅샷 저장/복원, 동시 호출
+"""
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from shared_code.anomaly import AnomalyDetector, PeriodicSnapshot, create_anomaly_detector
+
+
+def telemetry(device, temperature, **data):
+    return {"id": f"{device}-{temperature}", "deviceId": device, "data": {"temperature": temperature, **data}}
+
+
+def detector(**kwargs):
+    kwargs.setdefault("metrics", ("temperature",))
+    kwargs.setdefault("min_samples", 10)
+    return AnomalyDetector(**kwargs)
+
+
+def test_welford_matches_numpy_mean_and_sample_std():
+    values = np.random.default_rng(1).normal(20.0, 2.0, 500)
+    anomaly = detector(z_threshold=100.0)
+    anomaly.observe([telemetry("d1", float(v)) for v in values])
+    stats = anomaly.device_stats("d1")["temperature"]
+    assert stats["count"] == 500
+    assert stats["mean"] == pytest.approx(values.mean())
+    assert stats["std"] == pytest.approx(values.std(ddof=1))
+
+
+def test_batch_and_one_by_one_observation_agree():
+    rng = np.random.default_rng(2)
+    documents = [telemetry(f"d{i % 3}", float(rng.normal(20, 1))) for i in range(300)]
+    batched = detector()
+    batched.observe(documents)
+    sequential = detector()
+    for document in documents:
+        sequential.observe([document])
+    for device in ("d0", "d1", "d2"):
+        expected = sequential.device_stats(device)["temperature"]
+        assert batched.device_stats(device)["temperature"] == pytest.approx(expected)
+
+
+def test_zscore_outlier_is_flagged_and_clipped_into_baseline():
+    anomaly = detector()
+    values = [20.0 + 0.1 * (i % 5) for i in range(50)]
+    anomaly.observe([telemetry("d1", v) for v in values])
+    before = anomaly.device_stats("d1")["temperature"]
+
+    (found,) = anomaly.observe([telemetry("d1", 80.0)])
+    assert found["detector"] == "zscore"
+    assert found["deviceId"] == "d1"
+    assert found["zScore"] > 4
+    # 이상값은 평균 + 4·표준편차로 잘라서 반영하므로 기준이 크게 흔들리지 않음
+    after = anomaly.device_stats("d1")["temperature"]
+    assert after["count"] == before["count"] + 1
+    bound = before["mean"] + 4 * before["std"]
+    assert after["mean"] == pytest.approx(before["mean"] + (bound - before["mean"]) / 51)
+
+
+@pytest.mark.parametrize("method", ["welford", "ewma"])
+def test_level_shift_is_absorbed_into_baseline(method):
+    rng = np.random.default_rng(6)
+    anomaly = detector(method=method, min_samples=30)
+    values = np.concatenate([rng.normal(20.0, 1.0, 200), rng.normal(30.0, 1.0, 1000)])
+    found = anomaly.observe([telemetry("d1", float(v)) for v in values])
+    # 이동 직후에는 탐지하지만 기준이 새 수준을 따라가므로 알림이 계속되지 않음
+    assert found
+    assert len(found) < 100
+    assert not anomaly.observe([telemetry("d1", float(v)) for v in rng.normal(30.0, 1.0, 200)])
+    stats = anomaly.device_stats("d1")["temperature"]
+    assert stats["count"] == 1400
+    assert stats["mean"] > 27
+
+
+def test_no_detection_before_min_samples():
+    anomaly = detector(min_samples=30)
+    documents = [telemetry("d1", 20.0 + 0.01 * i) for i in range(20)] + [telemetry("d1", 500.0)]
+    assert anomaly.observe(documents) == []
+
+
+def test_cusum_detects_small_sustained_shift_and_resets():
+    rng = np.random.default_rng(3)
+    anomaly = detector(z_threshold=10.0, cusum_k=0.5, cusum_h=5.0)
+    anomaly.observe([telemetry("d1", float(v)) for v in rng.normal(20.0, 1.0, 200)])
+
+    # 1.5 표준편차 이동은 z-score 임계값 아래지만 누적되면 CUSUM이 탐지
+    shifted = anomaly.observe([telemetry("d1", float(v)) for v in rng.normal(21.5, 0.2, 20)])
+    assert shifted
+    assert {found["detector"] for found in shifted} == {"cusum"}
+    # 탐지 후 0으로 재설정되므로 매 관측마다 탐지하지 않음
+    assert len(shifted) < 10
+
+
+def test_ewma_tracks_level_change():
+    rng = np.random.default_rng(5)
+    values = np.concatenate([rng.normal(10.0, 1.0, 100), rng.normal(13.0, 1.0, 100)])
+    ewma = detector(method="ewma", alpha=0.2, z_threshold=10.0)
+    welford = detector(z_threshold=10.0)
+    for anomaly in (ewma, welford):
+        anomaly.observe([telemetry("d1", float(v)) for v in values])
+    # EWMA는 최근 수준을 따라가고 Welford는 전체 평균에 머묾
+    assert ewma.device_stats("d1")["temperature"]["mean"] == pytest.approx(13.0, abs=0.6)
+    assert welford.device_stats("d1")["temperature"]["mean"] == pytest.approx(11.5, abs=0.3)
+
+
+def test_missing_metric_is_skipped_per_column():
+    anomaly = detector(metrics=("temperature", "humidity"))
+    anomaly.observe([telemetry("d1", 20.0), {"deviceId": "d1", "data": {"humidity": 40.0}}])
+    stats = anomaly.device_stats("d1")
+    assert stats["temperature"]["count"] == 1
+    assert stats["humidity"]["count"] == 1
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        AnomalyDetector(method="median")
+    with pytest.raises(ValueError):
+        AnomalyDetector(method="ewma", alpha=0)
+
+
+def test_snapshot_round_trip_continues_detection():
+    rng = np.random.default_rng(4)
+    documents = [telemetry(f"d{i % 50}", float(rng.normal(20, 1))) for i in range(5000)]
+    original = detector(initial_capacity=4)
+    original.observe(documents[:4000])
+
+    restored = detector()
+    restored.restore(original.snapshot())
+    assert restored.device_count == 50
+    assert restored.device_stats("d7") == original.device_stats("d7")
+
+    # 복원 후 같은 입력에 같은 결과
+    assert restored.observe(documents[4000:]) == original.observe(documents[4000:])
+    assert restored.device_stats("d7") == original.device_stats("d7")
+
+
+def test_restore_rejects_mismatched_configuration():
+    data = detector().snapshot()
+    with pytest.raises(ValueError):
+        detector(method="ewma").restore(data)
+    with pytest.raises(ValueError):
+        detector(metrics=("temperature", "humidity")).restore(data)
+
+
+def test_periodic_snapshot_saves_and_reloads(tmp_path):
+    path = str(tmp_path / "state" / "anomaly.npz")
+    anomaly = detector()
+    anomaly.observe([telemetry("d1", 20.0)])
+    snapshot = PeriodicSnapshot(anomaly, path, interval_seconds=3600)
+    assert not snapshot.maybe_save()
+    assert snapshot.maybe_save(force=True)
+
+    reloaded = detector()
+    assert reloaded.load(path)
+    assert reloaded.device_stats("d1") == anomaly.device_stats("d1")
+    assert not detector().load(str(tmp_path / "missing.npz"))
+
+
+def test_state_path_is_per_instance(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANOMALY_STATE_PATH", str(tmp_path / "state-{instance}.npz"))
+    monkeypatch.setenv("WEBSITE_INSTANCE_ID", "0123456789abcdef0123")
+    _, snapshot = create_anomaly_detector()
+    assert snapshot.path == str(tmp_path / "state-0123456789abcdef.npz")
+
+    monkeypatch.setenv("ANOMALY_STATE_PATH", "")
+    assert create_anomaly_detector()[1] is None
+
+
+def test_concurrent_observe_while_growing():
+    anomaly = detector(initial_capacity=1)
+    errors = []
+    batches = 200
+    # 스레드 전환을 자주 일으켜 경합 구간을 드러냄
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    def worker(index):
+        rng = np.random.default_rng(index)
+        try:
+            for n in range(batches):
+                # 매 배치 새 디바이스가 추가되어 상태 배열이 계속 커짐
+                anomaly.observe([
+                    telemetry(f"t{index}-d{n * 10 + k}", float(rng.normal(20, 1))) for k in range(10)
+                ] + [telemetry(f"t{index}-shared", 20.0)])
+                if n % 10 == 0:
+                    anomaly.snapshot()
+        except Exception as e:  # pragma: no cover - 실패 시 내용 확인용
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(previous)
+
+    assert errors == []
+    assert anomaly.device_count == 4 * (batches * 10 + 1)
+    # 갱신이 유실되지 않음
+    assert anomaly.stats["observations"] == 4 * batches * 11
+    for index in range(4):
+        assert anomaly.device_stats(f"t{index}-shared")["temperature"]["count"] == batches
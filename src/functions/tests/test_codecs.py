@@ -0,0 +1,160 @@
+"""
+코덱/압축 테스트 - 코덱별 왕복, 텔레메트리 바이너리의 없는 필드, 압축 방식별 패킹 왕복, 손상된 입력
+"""
+import struct
+
+import pytest
+
+from shared_code import codecs
+from shared_code.codecs import (
+    CodecError,
+    JsonCodec,
+    TelemetryBinaryCodec,
+    available_codecs,
+    decode_event_body,
+    get_codec,
+)
+from shared_code.compression import (
+    available_encodings,
+    compress,
+    decode_events,
+    decompress,
+    pack_events,
+    unpack_events,
+)
+
+
+def sample_event(n: int = 0) -> dict:
+    return {
+        "id": f"evt-{n}",
+        "deviceId": f"device-{n % 10:03d}",
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "eventType": "telemetry",
+        "data": {"temperature": 21.5 + n, "humidity": 40 + n, "pressure": 1013.25},
+        "location": {"region": "koreacentral", "facility": "factory-1"},
+    }
+
+
+@pytest.mark.parametrize("content_type", available_codecs())
+def test_codec_round_trip(content_type):
+    codec = get_codec(content_type)
+    event = sample_event(3)
+    assert codec.decode(codec.encode(event)) == event
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_codec_with_and_without_orjson(use_orjson):
+    codec = JsonCodec(use_orjson=use_orjson)
+    event = {"id": "한글", "nested": {"values": [1, 2.5, None]}}
+    assert codec.decode(codec.encode(event)) == event
+    assert codec.dumps(event).startswith("{")
+    with pytest.raises(CodecError):
+        codec.decode(b"{not json")
+
+
+def test_get_codec_content_type_parsing():
+    assert get_codec(None) is codecs.JSON_CODEC
+    assert get_codec("Application/JSON; charset=utf-8") is codecs.JSON_CODEC
+    with pytest.raises(CodecError):
+        get_codec("text/plain")
+
+
+@pytest.mark.parametrize("missing", ["id", "deviceId", "timestamp", "eventType"])
+def test_telemetry_binary_omits_missing_string_fields(missing):
+    codec = TelemetryBinaryCodec()
+    event = sample_event()
+    del event[missing]
+    decoded = codec.decode(codec.encode(event))
+    # 없는 필드는 빈 문자열이 아니라 키가 빠진 채로 복원
+    assert missing not in decoded
+    assert decoded == event
+
+
+def test_telemetry_binary_missing_metrics_and_location():
+    codec = TelemetryBinaryCodec()
+    event = {"id": "", "data": {"humidity": 55}, "location": {"facility": "factory-2"}}
+    decoded = codec.decode(codec.encode(event))
+    # 빈 문자열은 없는 필드와 구분
+    assert decoded["id"] == ""
+    assert decoded["data"] == {"humidity": 55}
+    assert isinstance(decoded["data"]["humidity"], int)
+    assert decoded["location"] == {"facility": "factory-2"}
+
+    assert codec.decode(codec.encode({})) == {"data": {}, "location": {}}
+
+
+def test_telemetry_binary_decodes_version_1_messages():
+    codec = TelemetryBinaryCodec()
+    header = codec._header.pack(1, 0b001, 20.0, 0.0, 0.0)
+    strings = [b"evt-1", b"", b"", b"", b"", b""]
+    body = header + b"".join(struct.pack("<H", len(s)) + s for s in strings)
+    decoded = codec.decode(body)
+    assert decoded["id"] == "evt-1"
+    assert decoded["deviceId"] == ""
+    assert decoded["data"] == {"temperature": 20.0}
+
+
+def test_telemetry_binary_rejects_bad_input():
+    codec = TelemetryBinaryCodec()
+    with pytest.raises(CodecError):
+        codec.encode({"id": "x", "extra": 1})
+    with pytest.raises(CodecError):
+        codec.encode({"data": {"voltage": 1.0}})
+    with pytest.raises(CodecError):
+        codec.encode({"id": "x" * 0xFFFF})
+
+    body = codec.encode(sample_event())
+    with pytest.raises(CodecError):
+        codec.decode(body[:-3])
+    with pytest.raises(CodecError):
+        codec.decode(bytes([9]) + body[1:])
+
+
+def test_decode_event_body_uses_content_type_property():
+    codec = get_codec(codecs.TELEMETRY_BINARY_CONTENT_TYPE)
+    event = sample_event()
+    body = codec.encode(event)
+    assert decode_event_body(body, {codecs.CONTENT_TYPE_PROPERTY: codec.content_type}) == event
+    assert decode_event_body(b'{"a": 1}') == {"a": 1}
+
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_compress_round_trip(encoding):
+    data = b"telemetry " * 1000
+    compressed = compress(data, encoding)
+    assert len(compressed) < len(data)
+    assert decompress(compressed, encoding) == data
+    assert decompress(compress(data, encoding, level=1), encoding) == data
+    with pytest.raises(CodecError):
+        decompress(b"not compressed", encoding)
+
+
+@pytest.mark.parametrize("encoding", available_encodings())
+@pytest.mark.parametrize("content_type", available_codecs())
+def test_pack_and_decode_events_round_trip(encoding, content_type):
+    codec = get_codec(content_type)
+    events = [sample_event(n) for n in range(50)]
+    del events[7]["id"]
+    body = pack_events(events, codec, encoding)
+    properties = {codecs.CONTENT_TYPE_PROPERTY: content_type, "contentEncoding": encoding}
+    assert decode_events(body, properties) == events
+    assert unpack_events(pack_events([], codec, encoding), codec, encoding) == []
+
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_truncated_packed_frame_is_rejected(encoding):
+    codec = get_codec()
+    raw = decompress(pack_events([sample_event()], codec, encoding), encoding)
+    with pytest.raises(CodecError):
+        unpack_events(compress(raw[:-1], encoding), codec, encoding)
+    with pytest.raises(CodecError):
+        unpack_events(compress(raw + b"\x01", encoding), codec, encoding)
+
+
+def test_unsupported_encoding_and_single_event_body():
+    with pytest.raises(CodecError):
+        compress(b"data", "brotli")
+    with pytest.raises(CodecError):
+        decompress(b"data", "brotli")
+    # contentEncoding이 없으면 단일 이벤트
+    assert decode_events(b'{"id": "a"}', {}) == [{"id": "a"}]
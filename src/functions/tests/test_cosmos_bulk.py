@@ -0,0 +1,234 @@
+"""
+CosmosBulkWriter 테스트 - AIMD 동시성 조절, 429 재시도, error_index 분할 재시도, BackgroundBulkWriter
+"""
+import asyncio
+from collections import Counter
+
+import pytest
+from azure.cosmos.exceptions import CosmosBatchOperationError, CosmosHttpResponseError
+
+from shared_code.cosmos_bulk import (
+    REQUEST_CHARGE_HEADER,
+    RETRY_AFTER_HEADER,
+    AdaptiveConcurrency,
+    BackgroundBulkWriter,
+    CosmosBulkWriter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def throttled(retry_after_ms: float = 1.0) -> CosmosHttpResponseError:
+    error = CosmosHttpResponseError(status_code=429, message="Request rate is large")
+    error.headers = {RETRY_AFTER_HEADER: str(retry_after_ms), REQUEST_CHARGE_HEADER: "0.5"}
+    return error
+
+
+class FakeContainer:
+    """RU 한도를 흉내 내는 비동기 컨테이너
+
+    처리 중인 요청이 capacity개면 새 요청은 429, "bad" 문서는 영구 오류(400)입니다.
+    트랜잭션 배치는 하나라도 실패하면 아무것도 쓰지 않습니다.
+    """
+
+    def __init__(self, capacity: int = 1000, throttle_first: int = 0, max_batch: int = 100):
+        self.capacity = capacity
+        self.throttle_first = throttle_first
+        self.max_batch = max_batch
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self.writes: Counter = Counter()
+
+    async def _request(self):
+        self.calls += 1
+        # 이미 capacity만큼 처리 중이면 새 요청은 429
+        if self.calls <= self.throttle_first or self.in_flight >= self.capacity:
+            await asyncio.sleep(0)
+            raise throttled()
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+        finally:
+            self.in_flight -= 1
+
+    async def upsert_item(self, document, response_hook=None):
+        await self._request()
+        if document.get("bad"):
+            raise CosmosHttpResponseError(status_code=400, message="Invalid document")
+        self.writes[document["id"]] += 1
+        response_hook({REQUEST_CHARGE_HEADER: "5.0"}, document)
+        return document
+
+    async def execute_item_batch(self, batch_operations, partition_key=None, response_hook=None):
+        await self._request()
+        documents = [args[0] for _, args in batch_operations]
+        assert len({document["deviceId"] for document in documents}) == 1
+        assert partition_key == documents[0]["deviceId"]
+        if len(documents) > self.max_batch:
+            raise CosmosHttpResponseError(status_code=413, message="Request size is too large")
+        for index, document in enumerate(documents):
+            if document.get("bad"):
+                raise CosmosBatchOperationError(
+                    error_index=index, headers={REQUEST_CHARGE_HEADER: "1.0"}, status_code=400,
+                    message="Invalid document"
+                )
+        self.writes.update(document["id"] for document in documents)
+        response_hook({REQUEST_CHARGE_HEADER: str(5.0 * len(documents))}, documents)
+        return documents
+
+
+def make_documents(count: int, devices: int = 4, bad=()):
+    return [
+        {"id": f"evt-{n}", "deviceId": f"device-{n % devices}", **({"bad": True} if n in bad else {})}
+        for n in range(count)
+    ]
+
+
+def test_throttle_halves_limit_once_per_pause_and_successes_grow_it():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrency(initial=8, maximum=16, clock=clock)
+    limiter.on_throttle(100)
+    assert limiter.limit == 4
+    # 같은 정지 구간 안의 429는 다시 줄이지 않음
+    limiter.on_throttle(100)
+    assert limiter.limit == 4
+
+    clock.now = 0.2
+    limiter.on_throttle(100)
+    assert limiter.limit == 2
+
+    clock.now = 1.0
+    for _ in range(2):
+        limiter.on_success(1.0)
+    assert limiter.limit == 3
+    for _ in range(3):
+        limiter.on_success(1.0)
+    assert limiter.limit == 4
+
+
+def test_limit_stays_within_bounds_and_target_ru_reduces_it():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrency(initial=4, minimum=2, maximum=4, target_ru_per_second=100.0, clock=clock)
+    for step in range(10):
+        clock.now = step
+        limiter.on_throttle(0)
+    assert limiter.limit == 2
+
+    limiter = AdaptiveConcurrency(initial=4, maximum=4, target_ru_per_second=100.0, clock=clock)
+    limiter.on_success(60.0)
+    assert limiter.limit == 4
+    limiter.on_success(60.0)
+    assert limiter.limit == 3
+    assert limiter.window_ru == 120.0
+    # 1초가 지나면 창에서 빠짐
+    clock.now += 1.5
+    limiter.on_success(1.0)
+    assert limiter.window_ru == 1.0
+
+
+def test_concurrency_backs_off_under_throttling_without_losing_documents():
+    container = FakeContainer(capacity=2)
+    # 한도가 capacity 근처에서 오르내리는 동안 같은 문서가 여러 번 429를 받을 수 있으므로 재시도 여유를 둠
+    writer = CosmosBulkWriter(
+        container, max_concurrency=16, initial_concurrency=8, max_retries=100, transactional=False
+    )
+    documents = make_documents(200)
+
+    result = asyncio.run(writer.write(documents))
+
+    assert result.throttled > 0
+    # 한도가 줄지 않으면 문서당 여러 번 429를 받음
+    assert result.throttled < len(documents)
+    assert result.failed == []
+    assert result.written == len(documents)
+    # 모든 문서가 정확히 한 번씩 쓰임
+    assert container.writes == Counter(document["id"] for document in documents)
+    assert result.concurrency <= 4
+    assert result.request_charge >= 5.0 * len(documents)
+
+
+def test_throttled_batches_are_retried_without_duplicates():
+    container = FakeContainer(throttle_first=3)
+    writer = CosmosBulkWriter(container, max_concurrency=4)
+    documents = make_documents(120)
+
+    result = asyncio.run(writer.write(documents))
+
+    assert result.throttled == 3
+    assert result.retries == 3
+    assert result.written == len(documents)
+    assert container.writes == Counter(document["id"] for document in documents)
+    assert result.throttle_wait_ms == 3.0
+
+
+def test_batch_error_index_splits_out_only_failing_documents():
+    container = FakeContainer()
+    writer = CosmosBulkWriter(container, batch_size=50)
+    bad = {3, 17, 42}
+    documents = make_documents(100, devices=1, bad=bad)
+
+    result = asyncio.run(writer.write(documents))
+
+    assert sorted(failure[0] for failure in result.failed) == sorted(f"evt-{n}" for n in bad)
+    assert all(failure[1] == 400 for failure in result.failed)
+    assert result.written == len(documents) - len(bad)
+    assert result.written + len(result.failed) == result.documents
+    assert container.writes == Counter(
+        document["id"] for document in documents if not document.get("bad")
+    )
+    assert result.splits >= len(bad)
+
+
+def test_unknown_batch_failure_is_split_in_halves():
+    container = FakeContainer(max_batch=10)
+    writer = CosmosBulkWriter(container)
+    documents = make_documents(60, devices=2)
+
+    result = asyncio.run(writer.write(documents))
+
+    assert result.failed == []
+    assert result.splits > 0
+    assert container.writes == Counter(document["id"] for document in documents)
+
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        CosmosBulkWriter(FakeContainer(), batch_size=101)
+
+
+def test_background_writer_reuses_container_and_closes_it():
+    containers = []
+    closed = []
+
+    async def open_container():
+        container = FakeContainer(throttle_first=1)
+        containers.append(container)
+
+        async def close():
+            closed.append(container)
+
+        return container, close
+
+    writer = BackgroundBulkWriter(open_container, max_concurrency=4)
+    first = writer.write(make_documents(30), timeout=10)
+    second = writer.write(make_documents(30, bad={5}), timeout=10)
+    writer.close()
+
+    assert len(containers) == 1
+    assert closed == containers
+    assert first.written == 30 and first.throttled == 1
+    assert second.written == 29 and [failure[0] for failure in second.failed] == ["evt-5"]
+    assert containers[0].writes["evt-5"] == 1
+    assert sum(containers[0].writes.values()) == 59
+    # 닫은 뒤에는 새 컨테이너로 다시 열림
+    writer.write(make_documents(1), timeout=10)
+    writer.close()
+    assert len(containers) == 2
@@ -0,0 +1,182 @@
+"""
+DedupCache 테스트 - TTL 만료, LRU 제거, Bloom 세대 회전, 배치 필터, 동시 호출
+"""
+import threading
+from types import SimpleNamespace
+
+from shared_code.dedup import BloomFilter, DedupCache, document_key, is_retry, sequence_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_duplicate_within_ttl_and_expiry_after():
+    clock = FakeClock()
+    cache = DedupCache(max_entries=100, ttl_seconds=10, clock=clock)
+    assert not cache.check_and_add("a")
+    clock.now = 9.9
+    assert cache.check_and_add("a")
+    # 만료는 마지막으로 본 시각 기준
+    clock.now = 19.5
+    assert cache.check_and_add("a")
+    clock.now = 30.0
+    assert not cache.check_and_add("a")
+    assert cache.stats()["duplicates"] == 2
+
+
+def test_expired_entry_behind_live_entry_is_evicted():
+    clock = FakeClock()
+    cache = DedupCache(max_entries=100, ttl_seconds=10, clock=clock)
+    cache.add_many(["a", "b"])
+    clock.now = 5
+    # a를 다시 보면 만료가 늘어나 b 뒤로 이동
+    assert cache.check_and_add("a")
+    clock.now = 12
+    cache.check_and_add("c")
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 2
+    assert not cache.check_and_add("b")
+
+
+def test_expired_entries_are_dropped():
+    clock = FakeClock()
+    cache = DedupCache(max_entries=100, ttl_seconds=10, clock=clock)
+    cache.add_many(f"k{i}" for i in range(20))
+    clock.now = 11
+    cache.check_and_add("new")
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["expirations"] == 20
+
+
+def test_lru_eviction_keeps_recently_used_keys():
+    cache = DedupCache(max_entries=3, ttl_seconds=1000, clock=FakeClock())
+    cache.add_many(["a", "b", "c"])
+    # a를 최근 사용으로 갱신한 뒤 d를 넣으면 b가 밀려남
+    assert cache.check_and_add("a")
+    cache.check_and_add("d")
+    assert cache.stats()["evictions"] == 1
+    assert cache.check_and_add("a")
+    assert cache.check_and_add("d")
+    assert not cache.check_and_add("b")
+
+
+def test_bloom_rotation_keeps_detecting_recent_keys():
+    cache = DedupCache(max_entries=50, ttl_seconds=1000, clock=FakeClock())
+    first = cache._bloom
+    keys = [f"k{i}" for i in range(50)]
+    cache.add_many(keys)
+    assert cache._previous_bloom is None
+
+    # 용량을 채운 뒤 다음 추가에서 세대 회전
+    cache.check_and_add("k50")
+    assert cache._previous_bloom is first
+    assert cache._bloom is not first
+    # LRU에 남은 키는 이전 세대 필터로 계속 중복 판정
+    assert all(cache.check_and_add(key) for key in keys[1:])
+    assert cache.check_and_add("k50")
+
+    cache.add_many(f"m{i}" for i in range(100))
+    # 두 번 회전하면 첫 세대는 버려짐
+    assert cache._previous_bloom is not first
+    assert cache.stats()["entries"] == 50
+
+
+def test_hot_key_survives_bloom_rotations():
+    cache = DedupCache(max_entries=10, ttl_seconds=1000, clock=FakeClock())
+    cache.check_and_add("hot")
+    for i in range(100):
+        cache.check_and_add(f"new-{i}")
+        assert cache.check_and_add("hot"), f"hot key missed on iteration {i}"
+
+
+def test_entries_outside_bloom_generations_are_evicted():
+    cache = DedupCache(max_entries=10, ttl_seconds=1000, clock=FakeClock())
+    cache.add_many(["cold", "hot"])
+    # hot만 반복해서 보면 Bloom 세대가 두 번 회전하므로 cold는 LRU에서도 제거
+    for _ in range(25):
+        cache.check_and_add("hot")
+    assert cache.stats()["entries"] == 1
+    assert not cache.check_and_add("cold")
+
+
+def test_filter_removes_in_batch_duplicates_in_order():
+    cache = DedupCache(max_entries=100, ttl_seconds=60, clock=FakeClock())
+    cache.check_and_add("b")
+    documents = [{"id": key, "n": n} for n, key in enumerate(["a", "b", "c", "a", "d", "c"])]
+    kept, duplicates = cache.filter(documents, key=document_key)
+    assert [document["n"] for document in kept] == [0, 2, 4]
+    assert duplicates == 3
+    stats = cache.stats()
+    assert stats["lookups"] == 7
+    assert stats["hit_rate"] == 3 / 7
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    keys = [f"device-{i}" for i in range(10_000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_key_helpers_and_retry_detection():
+    assert document_key({"id": 12}) == "12"
+    assert sequence_key("3", 42) == "3:42"
+    assert not is_retry(SimpleNamespace())
+    assert not is_retry(SimpleNamespace(retry_context=SimpleNamespace(retry_count=0)))
+    assert is_retry(SimpleNamespace(retry_context=SimpleNamespace(retry_count=1)))
+
+
+def test_clear_forgets_keys():
+    cache = DedupCache(max_entries=10, ttl_seconds=60, clock=FakeClock())
+    cache.check_and_add("a")
+    cache.clear()
+    assert not cache.check_and_add("a")
+
+
+def test_concurrent_check_and_add_reports_each_key_once():
+    cache = DedupCache(max_entries=100_000, ttl_seconds=600)
+    keys = [f"k{i}" for i in range(5000)]
+    first_seen = []
+    errors = []
+
+    def worker():
+        try:
+            first_seen.extend(key for key in keys if not cache.check_and_add(key))
+        except Exception as e:  # pragma: no cover - 실패 시 내용 확인용
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # 키마다 정확히 한 스레드만 새 키로 판정
+    assert sorted(first_seen) == sorted(keys)
+    assert cache.stats()["duplicates"] == 3 * len(keys)
+
+
+def test_counter_deltas_and_gauges_for_metrics():
+    cache = DedupCache(max_entries=100, ttl_seconds=60, clock=FakeClock())
+    cache.filter(["a", "a", "b"], key=str)
+    assert cache.counter_deltas() == {"lookups": 3, "duplicates": 1, "bloom_negatives": 2}
+    # 이미 넘긴 증가분은 다시 넘기지 않음
+    assert cache.counter_deltas() == {}
+    cache.check_and_add("a")
+    assert cache.counter_deltas() == {"lookups": 1, "duplicates": 1}
+
+    gauges = cache.gauges()
+    assert gauges["entries"] == 2
+    assert gauges["hit_rate"] == 2 / 4
+    assert gauges["bloom_bytes"] > 0
@@ -0,0 +1,190 @@
+"""
+LatencyHistogram / MetricsCollector 테스트 - 백분위수 정확도, 병합/차이, 스레드별 샤드
+"""
+import threading
+
+import numpy as np
+import pytest
+
+from shared_code.metrics import LatencyHistogram, MetricsCollector, MetricsSnapshot
+from shared_code.metrics_export import AppInsightsMetricsFlusher, prometheus_text
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.count == 0
+    assert histogram.percentiles((50, 99)) == {50: 0.0, 99: 0.0}
+    assert histogram.min_ms == 0.0
+    assert histogram.mean_ms == 0.0
+
+
+@pytest.mark.parametrize("q", [50.0, 90.0, 99.0, 99.9])
+def test_percentiles_within_one_percent_of_exact(q):
+    latencies = np.random.default_rng(7).lognormal(2.0, 1.2, 100_000)
+    histogram = LatencyHistogram()
+    histogram.record_many(latencies.tolist())
+    exact = float(np.percentile(latencies, q, method="inverted_cdf"))
+    assert histogram.percentile(q) == pytest.approx(exact, rel=0.01)
+
+
+def test_single_value_and_extremes():
+    histogram = LatencyHistogram()
+    histogram.record(12.5, count=3)
+    assert histogram.count == 3
+    assert histogram.percentiles((0.1, 50, 100)) == {0.1: 12.5, 50: 12.5, 100: 12.5}
+    assert histogram.total_ms == pytest.approx(37.5)
+
+
+def test_negative_nan_and_overflow_values():
+    histogram = LatencyHistogram(max_value_ms=1000.0)
+    histogram.record(-5.0)
+    histogram.record(float("nan"))
+    histogram.record(10_000.0)
+    assert histogram.count == 2
+    assert histogram.min_ms == 0.0
+    assert histogram.max_ms == 10_000.0
+    # 범위를 넘는 값은 마지막 버킷에 쌓이고 max_ms만 정확히 유지
+    assert 1000.0 <= histogram.percentile(100) <= 10_000.0
+
+
+def test_count_at_or_below():
+    histogram = LatencyHistogram()
+    histogram.record_many([1.0, 2.0, 3.0, 100.0, 1000.0])
+    assert histogram.count_at_or_below(-1) == 0
+    assert histogram.count_at_or_below(3.0) == 3
+    assert histogram.count_at_or_below(500.0) == 4
+    assert histogram.count_at_or_below(10_000.0) == 5
+
+
+def test_merge_equals_recording_everything():
+    rng = np.random.default_rng(8)
+    first, second = rng.exponential(20, 5000).tolist(), rng.exponential(200, 5000).tolist()
+    merged = LatencyHistogram()
+    merged.record_many(first)
+    other = LatencyHistogram()
+    other.record_many(second)
+    merged.merge(other)
+
+    combined = LatencyHistogram()
+    combined.record_many(first + second)
+    assert merged.counts == combined.counts
+    assert merged.percentiles() == combined.percentiles()
+
+    with pytest.raises(ValueError):
+        merged.merge(LatencyHistogram(significant_bits=5))
+
+
+def test_subtract_gives_interval_histogram():
+    histogram = LatencyHistogram()
+    histogram.record_many([1.0] * 100)
+    earlier = histogram.copy()
+    histogram.record_many([50.0] * 10)
+
+    delta = histogram.subtract(earlier)
+    assert delta.count == 10
+    assert delta.total_ms == pytest.approx(500.0)
+    assert delta.percentile(50) == pytest.approx(50.0, rel=0.01)
+    assert delta.min_ms == pytest.approx(50.0, rel=0.01)
+    # 원본은 그대로
+    assert histogram.count == 110
+
+
+def test_collector_labels_and_snapshot_queries():
+    collector = MetricsCollector()
+    collector.increment("events_processed", 10, function="eventhub", partition=0)
+    collector.increment("events_processed", 5, function="eventhub", partition=1)
+    collector.increment("events_processed", 2, function="changefeed")
+    collector.record_latencies([5.0, 15.0], function="eventhub", partition=0)
+    collector.update({"batches": 1}, {"batch_duration_ms": 40.0}, function="eventhub", partition=1)
+
+    snapshot = collector.snapshot()
+    assert snapshot.counter("events_processed") == 17
+    assert snapshot.counter("events_processed", function="eventhub") == 15
+    assert snapshot.counter("events_processed", partition="1") == 5
+    assert snapshot.totals()["batches"] == 1
+    assert snapshot.histogram(function="eventhub").count == 2
+    assert snapshot.histogram("batch_duration_ms").percentile(50) == pytest.approx(40.0, rel=0.01)
+    assert snapshot.histogram("missing").count == 0
+    assert collector.get_average_latency() == pytest.approx(20.0 / 17)
+
+
+def test_snapshot_diff():
+    collector = MetricsCollector()
+    collector.increment("events_processed", 3)
+    collector.record_latency(10.0)
+    earlier = collector.snapshot()
+
+    collector.increment("events_processed", 4)
+    collector.increment("events_failed", 1)
+    collector.record_latencies([100.0, 200.0])
+    delta = collector.snapshot().diff(earlier)
+
+    assert isinstance(delta, MetricsSnapshot)
+    assert delta.counter("events_processed") == 4
+    assert delta.counter("events_failed") == 1
+    latency = delta.histogram()
+    assert latency.count == 2
+    assert latency.total_ms == pytest.approx(300.0)
+
+
+def test_summary_and_reset():
+    collector = MetricsCollector()
+    collector.increment("events_received", 4)
+    collector.increment("events_processed", 3)
+    collector.record_latencies([10.0, 20.0, 30.0])
+    summary = collector.get_summary()
+    assert summary["success_rate"] == pytest.approx(75.0)
+    assert summary["average_latency_ms"] == pytest.approx(20.0)
+    assert summary["latency_p50_ms"] == pytest.approx(20.0, rel=0.01)
+
+    collector.reset()
+    assert collector.metrics["events_processed"] == 0
+    assert collector.snapshot().histogram().count == 0
+
+
+def test_concurrent_recording_and_finished_threads_are_kept():
+    collector = MetricsCollector()
+    per_thread = 20_000
+    errors = []
+
+    def worker(index):
+        try:
+            for n in range(per_thread):
+                collector.increment("events_processed", function="eventhub", partition=index)
+                collector.record_latency(float(n % 100), function="eventhub", partition=index)
+        except Exception as e:  # pragma: no cover - 실패 시 내용 확인용
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    # 기록 중에도 snapshot 가능
+    while any(thread.is_alive() for thread in threads):
+        collector.snapshot()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # 종료된 스레드의 샤드는 합쳐져 유지됨
+    for _ in range(2):
+        snapshot = collector.snapshot()
+        assert snapshot.counter("events_processed") == 4 * per_thread
+        assert snapshot.histogram().count == 4 * per_thread
+        assert snapshot.counter("events_processed", partition="2") == per_thread
+
+
+def test_gauges_are_exported_with_counters():
+    collector = MetricsCollector()
+    collector.increment("dedup_lookups", 3, function="eventhub")
+    text = prometheus_text(collector.snapshot(), labels={"instance": "i0"}, gauges={"dedup_hit_rate": 0.25})
+    assert 'serverless_dedup_lookups_total{instance="i0",function="eventhub"} 3' in text
+    assert "# TYPE serverless_dedup_hit_rate gauge" in text
+    assert 'serverless_dedup_hit_rate{instance="i0"} 0.25' in text
+
+    flusher = AppInsightsMetricsFlusher(
+        collector, "InstrumentationKey=key", interval=0, gauges=lambda: {"dedup_entries": 7}
+    )
+    envelopes = flusher.envelopes(collector.snapshot(), flusher.gauges())
+    sent = [envelope["data"]["baseData"]["metrics"][0] for envelope in envelopes]
+    assert {"name": "dedup_entries", "kind": 0, "value": 7} in sent
+    assert {"name": "dedup_lookups", "kind": 0, "value": 3} in sent
@@ -0,0 +1,113 @@
+"""
+TokenBucket / 알림 전송 테스트 - 예약 순서, asyncio 대기, 재시도 없는 실패, 동시 제출 통계
+"""
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+from shared_code.alert_dispatch import AlertDispatcher, AlertGroup, BackgroundAlertDispatcher
+from shared_code.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_reservations_queue_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # 이후 요청은 앞선 예약 뒤로 0.1초씩 밀림
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+    assert not bucket.try_acquire()
+
+    clock.now = 0.5
+    # 빚(2개)을 갚고 capacity(2개)까지만 채워짐
+    assert bucket.try_acquire(2)
+    assert not bucket.try_acquire()
+
+
+def test_unlimited_rate_never_waits():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.reserve() == 0.0 for _ in range(1000))
+    assert bucket.try_acquire(10**6)
+
+
+def test_acquire_async_spaces_out_concurrent_waiters():
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    async def main():
+        return await asyncio.gather(*(bucket.acquire_async() for _ in range(5)))
+
+    waits = asyncio.run(main())
+    assert waits[0] == 0.0
+    assert sorted(waits) == waits
+    assert waits[-1] == pytest.approx(4 / 50, abs=0.01)
+
+
+def make_group():
+    return AlertGroup(
+        level="critical", fingerprint="f", device_id="d1", message="temperature 41 > 40",
+        first_seen=0.0, last_seen=0.0, deadline=0.0, count=3,
+    )
+
+
+def test_send_without_retries_reports_failure():
+    requests = []
+
+    async def handler(request):
+        requests.append(await request.json())
+        return web.Response(status=503)
+
+    async def main():
+        app = web.Application()
+        app.router.add_post("/hook", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        dispatcher = AlertDispatcher(f"http://127.0.0.1:{port}/hook", rate_per_second=0, max_retries=-1)
+        try:
+            return await dispatcher.send([make_group()]), dispatcher.stats
+        finally:
+            await dispatcher.close()
+            await runner.cleanup()
+
+    sent, stats = asyncio.run(main())
+    assert sent == 0
+    assert len(requests) == 1
+    assert requests[0]["count"] == 3
+    assert stats.failed == 1
+    assert stats.retries == 0
+
+
+def test_concurrent_submit_counts_every_alert():
+    dispatcher = BackgroundAlertDispatcher("http://127.0.0.1:9/unused", window_seconds=3600, rate_per_second=0)
+    per_thread = 2000
+
+    def worker(index):
+        for n in range(per_thread):
+            dispatcher.submit([{"level": "critical", "deviceId": f"t{index}-d{n % 10}", "message": f"value {n}"}])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert dispatcher.stats.alerts == 4 * per_thread
+        # 지문이 같은 메시지는 디바이스별 한 그룹
+        assert dispatcher.stats.groups == 4 * 10
+    finally:
+        # 열린 그룹은 버리고 루프만 정리
+        dispatcher.coalescer.pop_all()
+        dispatcher.close(timeout=5)
@@ -0,0 +1,140 @@
+"""
+RuleEngine 테스트 - 히스테리시스 상태 전환, 디바이스별 전방 채우기, 재정의, 동시 호출
+"""
+import threading
+
+import pytest
+
+from shared_code.rules import AlertRule, RuleEngine
+
+
+def telemetry(device, temperature=None, facility="facility-0", **data):
+    if temperature is not None:
+        data["temperature"] = temperature
+    return {"id": f"{device}-{temperature}", "deviceId": device, "location": {"facility": facility}, "data": data}
+
+
+def engine(**rule):
+    config = {"name": "high-temperature", "metric": "temperature", "operator": ">", "threshold": 40}
+    config.update(rule)
+    return RuleEngine.from_config([config])
+
+
+def alert_values(evaluation):
+    return [(alert["deviceId"], alert["value"]) for alert in evaluation.alerts]
+
+
+def test_alert_only_on_transition_to_active():
+    rules = engine(hysteresis=2)
+    evaluation = rules.evaluate([telemetry("d1", v) for v in (41, 42, 39, 38.5, 41, 37, 41)])
+    # 39, 38.5는 해제 기준(38) 위라 활성 유지, 37에서 해제 후 41에서 다시 알림
+    assert alert_values(evaluation) == [("d1", 41.0), ("d1", 41.0)]
+    assert evaluation.exceeded == {"high-temperature": 4}
+    assert rules.active_count() == 1
+
+
+def test_state_carries_across_batches():
+    rules = engine(hysteresis=2)
+    assert alert_values(rules.evaluate([telemetry("d1", 45)])) == [("d1", 45.0)]
+    assert rules.evaluate([telemetry("d1", 39)]).alerts == []
+    assert rules.evaluate([telemetry("d1", 44)]).alerts == []
+    assert rules.evaluate([telemetry("d1", 30)]).alerts == []
+    assert rules.active_count() == 0
+    assert alert_values(rules.evaluate([telemetry("d1", 44)])) == [("d1", 44.0)]
+
+
+def test_forward_fill_is_per_device_and_keeps_document_order():
+    rules = engine(hysteresis=5)
+    documents = [
+        telemetry("d1", 41),
+        telemetry("d2", 20),
+        telemetry("d2", 50),
+        telemetry("d1", 38),
+        telemetry("d2", 36),
+        telemetry("d1", 34),
+        telemetry("d2", 41),
+        telemetry("d1", 41),
+    ]
+    evaluation = rules.evaluate(documents)
+    # d2는 36에서 해제 기준(35) 위라 계속 활성, d1은 34에서 해제 후 다시 알림
+    assert alert_values(evaluation) == [("d1", 41.0), ("d2", 50.0), ("d1", 41.0)]
+    assert [alert["id"] for alert in evaluation.alerts] == ["d1-41", "d2-50", "d1-41"]
+
+
+def test_missing_metric_does_not_change_state():
+    rules = engine(hysteresis=1)
+    evaluation = rules.evaluate([
+        telemetry("d1", 41),
+        telemetry("d1", humidity=50.0),
+        telemetry("d1", 42),
+    ])
+    assert alert_values(evaluation) == [("d1", 41.0)]
+
+
+def test_less_than_rule_and_inclusive_operator():
+    rules = RuleEngine.from_config([
+        {"name": "low-pressure", "metric": "pressure", "operator": "<", "threshold": 990, "hysteresis": 5},
+        {"name": "freezing", "metric": "temperature", "operator": "<=", "threshold": 0},
+    ])
+    evaluation = rules.evaluate([
+        {"deviceId": "d1", "data": {"pressure": 989, "temperature": 0}},
+        {"deviceId": "d1", "data": {"pressure": 993, "temperature": 1}},
+        {"deviceId": "d1", "data": {"pressure": 996, "temperature": -1}},
+        {"deviceId": "d1", "data": {"pressure": 985, "temperature": -2}},
+    ])
+    assert [(alert["rule"], alert["value"]) for alert in evaluation.alerts] == [
+        ("low-pressure", 989.0),
+        ("freezing", 0.0),
+        ("freezing", -1.0),
+        ("low-pressure", 985.0),
+    ]
+
+
+def test_device_override_beats_facility_override():
+    rules = engine(overrides={"device": {"d1": 50}, "facility": {"facility-2": 30}})
+    evaluation = rules.evaluate([
+        telemetry("d1", 45, facility="facility-2"),
+        telemetry("d2", 35, facility="facility-2"),
+        telemetry("d3", 35),
+    ])
+    assert alert_values(evaluation) == [("d2", 35.0)]
+    assert evaluation.alerts[0]["threshold"] == 30.0
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        AlertRule(name="x", metric="temperature", operator="!=", threshold=1)
+    with pytest.raises(ValueError):
+        AlertRule(name="x", metric="temperature", operator=">", threshold=1, hysteresis=-1)
+    with pytest.raises(ValueError):
+        RuleEngine.from_config([
+            {"name": "x", "metric": "temperature", "threshold": 1},
+            {"name": "x", "metric": "humidity", "threshold": 1},
+        ])
+
+
+def test_concurrent_evaluation_keeps_one_alert_per_transition():
+    rules = engine(hysteresis=2)
+    errors = []
+    alerts = []
+    rounds = 200
+
+    def worker(index):
+        devices = [f"t{index}-d{n}" for n in range(20)]
+        try:
+            for r in range(rounds):
+                value = 45 if r % 2 == 0 else 30
+                alerts.extend(rules.evaluate([telemetry(device, value) for device in devices]).alerts)
+        except Exception as e:  # pragma: no cover - 실패 시 내용 확인용
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # 디바이스마다 활성화가 rounds / 2번
+    assert len(alerts) == 4 * 20 * rounds // 2
+    assert rules.active_count() == 0
@@ -0,0 +1,46 @@
+"""
+앱 설정 헬퍼 테스트 - 기본값, 잘못된 값, 플래그 해석
+"""
+import pytest
+
+from shared_code.settings import bool_setting, float_setting, int_setting, rate_setting
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, True), ("true", True), ("1", True), ("anything", True),
+    ("false", False), (" OFF ", False), ("0", False), ("no", False),
+])
+def test_bool_setting(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("TEST_FLAG", raising=False)
+    else:
+        monkeypatch.setenv("TEST_FLAG", value)
+    assert bool_setting("TEST_FLAG") is expected
+
+
+def test_bool_setting_default_off(monkeypatch):
+    monkeypatch.delenv("TEST_FLAG", raising=False)
+    assert bool_setting("TEST_FLAG", default=False) is False
+
+
+def test_numeric_settings_fall_back_on_missing_or_invalid(monkeypatch):
+    monkeypatch.delenv("TEST_NUMBER", raising=False)
+    assert int_setting("TEST_NUMBER", 7) == 7
+    assert float_setting("TEST_NUMBER", 0.5) == 0.5
+
+    monkeypatch.setenv("TEST_NUMBER", "12")
+    assert int_setting("TEST_NUMBER", 7) == 12
+    assert float_setting("TEST_NUMBER", 0.5) == 12.0
+
+    monkeypatch.setenv("TEST_NUMBER", "twelve")
+    assert int_setting("TEST_NUMBER", 7) == 7
+    assert float_setting("TEST_NUMBER", 0.5) == 0.5
+
+
+@pytest.mark.parametrize("value, expected", [(None, 0.01), ("", 0.01), ("0.2", 0.2), ("5", 1.0), ("-1", 0.0), ("x", 0.01)])
+def test_rate_setting_is_clamped(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("TEST_RATE", raising=False)
+    else:
+        monkeypatch.setenv("TEST_RATE", value)
+    assert rate_setting("TEST_RATE", 0.01) == expected
@@ -1,4 +1,6 @@
 """Event producer module"""
-from .event_producer import EventProducer
+from .event_producer import EventProducer, StreamSendResult
+from .async_producer import AsyncEventProducer, SendReport
+from .buffered_producer import BufferedEventProducer
 
-__all__ = ["EventProducer"]
+__all__ = ["EventProducer", "StreamSendResult", "AsyncEventProducer", "SendReport", "BufferedEventProducer"]
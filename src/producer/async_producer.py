@@ -0,0 +1,172 @@
+"""
+Async Event Hub Producer - 파티션별 동시 전송
+azure.eventhub.aio 기반으로 여러 파티션의 배치를 동시에 채우고 전송
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from azure.eventhub.aio import EventHubProducerClient
+from azure.eventhub.exceptions import EventHubError
+import logging
+
+from ..functions.shared_code.codecs import EventCodec
+from ..functions.shared_code.tracing import TraceStamper
+from .event_producer import to_event_data
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SendReport:
+    """비동기 전송 결과 요약"""
+    total_events: int = 0
+    total_batches: int = 0
+    per_partition: Dict[str, int] = field(default_factory=dict)
+    # 빈 배치에도 들어가지 않아 전송하지 못한 이벤트 수
+    failed_events: int = 0
+
+
+class AsyncEventProducer:
+    """여러 파티션으로 동시에 이벤트를 전송하는 비동기 Producer
+
+    네트워크 지연이 병목인 환경에서 파티션마다 배치를 독립적으로 채우고,
+    동시에 진행 중인 send_batch 호출 수를 max_concurrency로 제한합니다.
+    파티션 내부의 배치는 순서대로 전송되므로 파티션별 순서는 보장됩니다.
+    """
+
+    def __init__(
+        self,
+        producer_client: EventHubProducerClient,
+        max_concurrency: int = 4,
+        codec: Optional[EventCodec] = None,
+        trace_sample_rate: Optional[float] = None
+    ):
+        """
+        Args:
+            producer_client: azure.eventhub.aio.EventHubProducerClient 인스턴스
+            max_concurrency: 동시에 진행 가능한 최대 전송 수
+            codec: 이벤트 본문 코덱 (None이면 JSON)
+            trace_sample_rate: 추적 속성을 붙일 메시지 비율 (None이면 TRACE_SAMPLE_RATE 설정)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+
+        self.producer = producer_client
+        self.max_concurrency = max_concurrency
+        self.codec = codec
+        self.tracer = TraceStamper(trace_sample_rate)
+
+    async def send_events_async(
+        self,
+        events: List[Dict[str, Any]],
+        partition_ids: Optional[List[str]] = None,
+        max_concurrency: Optional[int] = None
+    ) -> SendReport:
+        """이벤트를 파티션에 라운드로빈으로 분배하여 동시에 전송
+
+        Args:
+            events: 전송할 이벤트 리스트
+            partition_ids: 대상 파티션 ID 목록 (없으면 Event Hub에서 조회)
+            max_concurrency: 이번 호출에만 적용할 동시 전송 상한
+
+        Returns:
+            전체/파티션별 전송 건수를 담은 SendReport
+        """
+        report = SendReport()
+        if not events:
+            logger.warning("No events to send")
+            return report
+
+        if partition_ids is None:
+            partition_ids = await self.producer.get_partition_ids()
+        if not partition_ids:
+            raise ValueError("No partitions available")
+
+        # 파티션별로 이벤트 분배 (입력 순서는 파티션 내부에서 유지)
+        assignments: Dict[str, List[Dict[str, Any]]] = {pid: [] for pid in partition_ids}
+        for index, event in enumerate(events):
+            assignments[partition_ids[index % len(partition_ids)]].append(event)
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        try:
+            results = await asyncio.gather(*(
+                self._send_partition(pid, partition_events, semaphore)
+                for pid, partition_events in assignments.items()
+                if partition_events
+            ))
+        except EventHubError as e:
+            logger.error(f"Failed to send events: {e}")
+            raise
+
+        for pid, sent, batches, failed in results:
+            report.per_partition[pid] = sent
+            report.total_events += sent
+            report.total_batches += batches
+            report.failed_events += failed
+
+        logger.info(
+            f"Successfully sent {report.total_events} events in {report.total_batches} batches "
+            f"across {len(report.per_partition)} partitions"
+        )
+        if report.failed_events:
+            logger.error(f"{report.failed_events} events exceeded the Event Hub batch size limit and were not sent")
+        return report
+
+    async def _send_partition(
+        self,
+        partition_id: str,
+        events: List[Dict[str, Any]],
+        semaphore: asyncio.Semaphore
+    ) -> tuple[str, int, int, int]:
+        """단일 파티션의 이벤트를 배치 단위로 순차 전송
+
+        빈 배치에도 들어가지 않는 이벤트(최대 배치 크기 초과)는 건너뛰고 실패로 셉니다.
+
+        Returns:
+            (파티션 ID, 전송된 이벤트 수, 전송된 배치 수, 실패한 이벤트 수)
+        """
+        sent_count = 0
+        batch_count = 0
+        failed_count = 0
+
+        batch = await self.producer.create_batch(partition_id=partition_id)
+        for event in events:
+            event_data = to_event_data(event, self.codec)
+            self.tracer(event_data)
+            try:
+                batch.add(event_data)
+                continue
+            except ValueError:
+                pass
+
+            if len(batch) > 0:
+                # 배치가 꽉 찬 경우 먼저 전송
+                async with semaphore:
+                    await self.producer.send_batch(batch)
+                sent_count += len(batch)
+                batch_count += 1
+
+                batch = await self.producer.create_batch(partition_id=partition_id)
+                try:
+                    batch.add(event_data)
+                    continue
+                except ValueError:
+                    pass
+
+            failed_count += 1
+            logger.warning(f"Partition {partition_id}: event exceeds the max batch size, event skipped")
+
+        if len(batch) > 0:
+            async with semaphore:
+                await self.producer.send_batch(batch)
+            sent_count += len(batch)
+            batch_count += 1
+
+        logger.debug(f"Partition {partition_id}: sent {sent_count} events in {batch_count} batches")
+        return partition_id, sent_count, batch_count, failed_count
+
+    async def close(self):
+        """Producer 연결 종료"""
+        await self.producer.close()
+        logger.info("Async EventHub Producer connection closed")
@@ -0,0 +1,265 @@
+"""
+Buffered Event Producer - linger 기반 백그라운드 배치 전송
+여러 호출 지점에서 들어오는 이벤트를 버퍼에 모아 크기/시간 조건으로 전송 (Kafka linger.ms 방식)
+"""
+import queue
+import threading
+import time
+from typing import List, Dict, Any, Optional
+from azure.eventhub import EventData
+import logging
+
+from .event_producer import EventProducer, to_event_data
+
+logger = logging.getLogger(__name__)
+
+# Event Hub 배치 기본 최대 크기 (Standard tier)
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+
+_STOP = object()
+
+
+class _FlushRequest:
+    """백그라운드 스레드에 즉시 전송을 요청하는 마커"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class BufferedEventProducer:
+    """EventProducer 위에서 동작하는 버퍼링 Producer
+
+    send()는 이벤트를 제한된 크기의 큐에 넣고 즉시 반환합니다.
+    백그라운드 스레드가 큐를 비우면서 누적 크기가 max_batch_bytes에 도달하거나
+    첫 이벤트 이후 linger_ms가 지나면 배치를 전송합니다.
+    버퍼가 꽉 차면 on_full 정책에 따라 대기("block")하거나 거절("reject")합니다.
+    max_batch_bytes보다 큰 이벤트는 한 배치에도 들어갈 수 없으므로 send()에서 거절합니다.
+    """
+
+    def __init__(
+        self,
+        event_producer: EventProducer,
+        max_buffer_events: int = 10000,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        linger_ms: float = 50.0,
+        on_full: str = "block",
+        block_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            event_producer: 실제 전송에 사용할 EventProducer
+            max_buffer_events: 버퍼에 보관할 최대 이벤트 수
+            max_batch_bytes: 한 번에 전송할 최대 배치 크기 (바이트)
+            linger_ms: 첫 이벤트 이후 배치를 채우기 위해 기다리는 최대 시간 (밀리초)
+            on_full: 버퍼가 꽉 찼을 때 정책 ("block" 또는 "reject")
+            block_timeout: "block" 정책에서 최대 대기 시간 (초, None이면 무제한)
+        """
+        if on_full not in ("block", "reject"):
+            raise ValueError("on_full must be 'block' or 'reject'")
+
+        self.event_producer = event_producer
+        self.max_batch_bytes = max_batch_bytes
+        self.linger_seconds = linger_ms / 1000.0
+        self.on_full = on_full
+        self.block_timeout = block_timeout
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_buffer_events)
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "events_buffered": 0,
+            "events_sent": 0,
+            "events_failed": 0,
+            "events_rejected": 0,
+            "batches_sent": 0,
+        }
+
+        self._worker = threading.Thread(
+            target=self._run, name="buffered-event-producer", daemon=True
+        )
+        self._worker.start()
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """이벤트를 버퍼에 추가
+
+        Args:
+            event: 전송할 이벤트
+
+        Returns:
+            버퍼에 추가되었는지 여부 (reject 정책에서 버퍼가 꽉 차면 False)
+        """
+        self._check_running()
+
+        event_data = to_event_data(event, self.event_producer.codec)
+        size = sum(len(part) for part in event_data.body)
+        if size > self.max_batch_bytes:
+            self._increment("events_rejected")
+            logger.warning(f"Event of {size} bytes exceeds max batch size {self.max_batch_bytes}, event rejected")
+            return False
+
+        self.event_producer.tracer(event_data)
+        try:
+            if self.on_full == "block":
+                self._queue.put(event_data, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event_data)
+        except queue.Full:
+            self._increment("events_rejected")
+            logger.warning("Event buffer full, event rejected")
+            return False
+
+        self._increment("events_buffered")
+        return True
+
+    def send_many(self, events: List[Dict[str, Any]]) -> int:
+        """여러 이벤트를 버퍼에 추가
+
+        Returns:
+            버퍼에 추가된 이벤트 수
+        """
+        return sum(1 for event in events if self.send(event))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """버퍼에 쌓인 이벤트를 모두 전송할 때까지 대기
+
+        Args:
+            timeout: 최대 대기 시간 (초)
+
+        Returns:
+            제한 시간 안에 전송이 끝났는지 여부 (대기 중 백그라운드 스레드가 종료되면 False)
+        """
+        self._check_running()
+        request = _FlushRequest()
+        self._queue.put(request)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not request.done.wait(0.1 if deadline is None else min(max(deadline - time.monotonic(), 0), 0.1)):
+            if not self._worker.is_alive():
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def close(self, close_producer: bool = True):
+        """버퍼를 비우고 백그라운드 스레드 종료
+
+        Args:
+            close_producer: 내부 EventProducer 연결도 함께 종료할지 여부
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join()
+
+        if close_producer:
+            self.event_producer.close()
+        logger.info(
+            f"Buffered producer closed: sent={self.stats['events_sent']}, "
+            f"failed={self.stats['events_failed']}, batches={self.stats['batches_sent']}"
+        )
+
+    def _check_running(self):
+        """닫혔거나 백그라운드 스레드가 없으면 큐에 넣지 않고 즉시 실패 (아무도 읽지 않는 큐에서 대기 방지)"""
+        if self._closed:
+            raise RuntimeError("BufferedEventProducer is closed")
+        if not self._worker.is_alive():
+            raise RuntimeError("BufferedEventProducer background thread is not running")
+
+    def _run(self):
+        """백그라운드 전송 루프"""
+        pending: List[EventData] = []
+        pending_bytes = 0
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None:
+                # linger 시간 경과
+                self._send(pending)
+                pending, pending_bytes, deadline = [], 0, None
+                continue
+
+            if item is _STOP or isinstance(item, _FlushRequest):
+                self._send(pending)
+                pending, pending_bytes, deadline = [], 0, None
+                if item is _STOP:
+                    return
+                item.done.set()
+                continue
+
+            pending.append(item)
+            pending_bytes += sum(len(part) for part in item.body)
+            if deadline is None:
+                deadline = time.monotonic() + self.linger_seconds
+
+            if pending_bytes >= self.max_batch_bytes:
+                self._send(pending)
+                pending, pending_bytes, deadline = [], 0, None
+
+    def _send(self, event_datas: List[EventData]):
+        """누적된 이벤트를 Event Hub 배치로 전송
+
+        실패는 배치 단위로 events_failed에 기록하고 계속 진행합니다 (어떤 예외도 백그라운드 스레드를 종료시키지 않음).
+        """
+        if not event_datas:
+            return
+
+        producer = self.event_producer.producer
+        handled = 0
+        try:
+            batch = producer.create_batch()
+            for event_data in event_datas:
+                if _try_add(batch, event_data):
+                    continue
+                if len(batch):
+                    # 배치가 꽉 찬 경우 먼저 전송
+                    handled += self._send_batch(batch)
+                    batch = producer.create_batch()
+                    if _try_add(batch, event_data):
+                        continue
+                # 빈 배치에도 들어가지 않는 이벤트 (속성 포함 크기가 허브 한도 초과)
+                handled += 1
+                self._increment("events_failed")
+                logger.error("Dropping buffered event larger than the Event Hub batch size limit")
+            handled += self._send_batch(batch)
+        except Exception as e:
+            failed = len(event_datas) - handled
+            self._increment("events_failed", failed)
+            logger.error(f"Failed to send {failed} buffered events: {e}")
+
+    def _send_batch(self, batch) -> int:
+        """배치 하나 전송 (실패는 기록만 함)
+
+        Returns:
+            처리한 이벤트 수 (성공/실패 포함)
+        """
+        count = len(batch)
+        if not count:
+            return 0
+        try:
+            self.event_producer.producer.send_batch(batch)
+        except Exception as e:
+            self._increment("events_failed", count)
+            logger.error(f"Failed to send batch of {count} buffered events: {e}")
+            return count
+        self._increment("events_sent", count)
+        self._increment("batches_sent")
+        return count
+
+    def _increment(self, name: str, value: int = 1):
+        with self._stats_lock:
+            self.stats[name] += value
+
+
+def _try_add(batch, event_data: EventData) -> bool:
+    """배치에 이벤트 추가 (배치 크기 초과면 False)"""
+    try:
+        batch.add(event_data)
+        return True
+    except ValueError:
+        return False
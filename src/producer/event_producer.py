@@ -2,26 +2,119 @@
 Event Hub Producer - 이벤트 생성 및 전송
 Azure Event Hub를 사용한 IoT 텔레메트리 데이터 전송
 """
-import json
 import uuid
+import zlib
 from datetime import datetime
-from typing import List, Dict, Any
+from dataclasses import dataclass
+from itertools import islice
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple, Union
 from azure.eventhub import EventData, EventHubProducerClient
 from azure.eventhub.exceptions import EventHubError
 import logging
 
+from ..functions.shared_code.codecs import CONTENT_TYPE_PROPERTY, JSON_CODEC, EventCodec
+from ..functions.shared_code.compression import (
+    CONTENT_ENCODING_PROPERTY,
+    EVENT_COUNT_PROPERTY,
+    pack_events,
+)
+from ..functions.shared_code.tracing import TraceStamper
+
 logger = logging.getLogger(__name__)
 
+# EventDataBatch.add()가 계산하는 AMQP 인코딩 오버헤드의 보수적 추정치 (바이트)
+EVENT_SIZE_OVERHEAD = 64
+
+KeyExtractor = Union[str, Callable[[Dict[str, Any]], Any]]
+
+
+@dataclass
+class StreamSendResult:
+    """스트리밍 전송 누적 결과"""
+    events_sent: int = 0
+    bytes_sent: int = 0
+    batches_sent: int = 0
+
+
+def to_event_data(event: Dict[str, Any], codec: Optional[EventCodec] = None) -> EventData:
+    """이벤트 딕셔너리를 EventData로 변환 (동기/비동기 Producer 공용)
+    
+    Args:
+        event: 전송할 이벤트
+        codec: 본문 직렬화 코덱 (None이면 JSON)
+    
+    Returns:
+        커스텀 속성이 설정된 EventData
+    """
+    codec = codec or JSON_CODEC
+    event_data = EventData(codec.encode(event))
+    event_data.content_type = codec.content_type
+    
+    # 커스텀 속성 추가 (contentType은 Function 트리거에서 코덱 선택에 사용)
+    event_data.properties = {
+        "eventType": event.get("eventType", "unknown"),
+        "deviceId": event.get("deviceId", "unknown"),
+        CONTENT_TYPE_PROPERTY: codec.content_type
+    }
+    return event_data
+
+
+def to_packed_event_data(
+    events: List[Dict[str, Any]],
+    codec: Optional[EventCodec] = None,
+    encoding: str = "zlib",
+    level: Optional[int] = None
+) -> EventData:
+    """여러 이벤트를 압축된 단일 EventData로 패킹
+    
+    Args:
+        events: 패킹할 이벤트 리스트
+        codec: 개별 이벤트 직렬화 코덱 (None이면 JSON)
+        encoding: 압축 방식 (gzip, zlib, zstd)
+        level: 압축 레벨
+    
+    Returns:
+        contentEncoding/eventCount 속성이 설정된 EventData
+    """
+    codec = codec or JSON_CODEC
+    event_data = EventData(pack_events(events, codec, encoding, level))
+    event_data.content_type = codec.content_type
+    event_data.properties = {
+        "eventType": events[0].get("eventType", "unknown") if events else "unknown",
+        CONTENT_TYPE_PROPERTY: codec.content_type,
+        CONTENT_ENCODING_PROPERTY: encoding,
+        EVENT_COUNT_PROPERTY: len(events)
+    }
+    return event_data
+
 
 class EventProducer:
     """Event Hub로 이벤트를 전송하는 Producer"""
     
-    def __init__(self, producer_client: EventHubProducerClient):
+    def __init__(
+        self,
+        producer_client: EventHubProducerClient,
+        codec: Optional[EventCodec] = None,
+        compression: Optional[str] = None,
+        events_per_message: int = 256,
+        trace_sample_rate: Optional[float] = None
+    ):
         """
         Args:
             producer_client: EventHubProducerClient 인스턴스
+            codec: 이벤트 본문 코덱 (None이면 JSON, shared_code.codecs.get_codec 참고)
+            compression: 배치 압축 방식 (gzip, zlib, zstd). 지정하면 send_stream()과
+                send_events_sync()가 events_per_message개씩 묶어 압축된 EventData 하나로 전송
+            events_per_message: 압축 시 EventData 하나에 패킹할 최대 이벤트 수
+            trace_sample_rate: traceId/traceSentAt 속성을 붙일 메시지 비율
+                (None이면 TRACE_SAMPLE_RATE 설정, shared_code.tracing 참고)
         """
         self.producer = producer_client
+        self.codec = codec or JSON_CODEC
+        self.compression = compression
+        self.events_per_message = events_per_message
+        self.tracer = TraceStamper(trace_sample_rate)
+        self._partition_ids: Optional[List[str]] = None
     
     def create_sample_event(self, device_id: str = None) -> Dict[str, Any]:
         """샘플 이벤트 데이터 생성 (IoT 텔레메트리 시뮬레이션)
@@ -35,28 +128,63 @@ class EventProducer:
         if device_id is None:
             device_id = str(uuid.uuid4())
         
+        # hash()는 프로세스마다 솔트가 달라지므로 실행 간에 안정적인 crc32 사용
+        device_hash = zlib.crc32(device_id.encode("utf-8"))
+        
         return {
             "id": str(uuid.uuid4()),
             "deviceId": device_id,
             "timestamp": datetime.utcnow().isoformat(),
             "eventType": "telemetry",
             "data": {
-                "temperature": 20 + (hash(device_id) % 30),  # 20-50°C
-                "humidity": 40 + (hash(device_id) % 40),     # 40-80%
-                "pressure": 1000 + (hash(device_id) % 50),   # 1000-1050 hPa
+                "temperature": 20 + (device_hash % 30),  # 20-50°C
+                "humidity": 40 + (device_hash % 40),     # 40-80%
+                "pressure": 1000 + (device_hash % 50),   # 1000-1050 hPa
             },
             "location": {
                 "region": "koreacentral",
-                "facility": f"facility-{hash(device_id) % 5}"
+                "facility": f"facility-{device_hash % 5}"
             }
         }
     
-    def send_events_sync(self, events: List[Dict[str, Any]], partition_key: str = None) -> int:
+    def create_sample_events(
+        self,
+        n: int,
+        devices: Union[int, List[str]] = 100,
+        seed: int = 0,
+        as_bytes: bool = False,
+        **kwargs: Any
+    ) -> Union[List[Dict[str, Any]], List[bytes]]:
+        """시드 기반 합성 이벤트 대량 생성 (NumPy 벡터화, synthetic 모듈 참고)
+        
+        Args:
+            n: 생성할 이벤트 수
+            devices: 디바이스 수 또는 디바이스 ID 목록
+            seed: 난수 시드 (같은 시드면 같은 결과)
+            as_bytes: True면 Producer 코덱으로 미리 직렬화한 바이트 반환
+            **kwargs: SyntheticTelemetryGenerator 추가 인자 (드리프트/스파이크 설정 등)
+        
+        Returns:
+            이벤트 딕셔너리 리스트 또는 직렬화된 바이트 리스트
+        """
+        # NumPy는 대량 생성에만 필요하므로 지연 import
+        from .synthetic import create_sample_events
+        
+        return create_sample_events(n, devices, seed, as_bytes=as_bytes, codec=self.codec, **kwargs)
+    
+    def send_events_sync(
+        self,
+        events: List[Dict[str, Any]],
+        partition_key: str = None,
+        key_extractor: Optional[KeyExtractor] = None
+    ) -> int:
         """동기적으로 이벤트 배치 전송
         
         Args:
             events: 전송할 이벤트 리스트
             partition_key: 파티션 키 (선택사항)
+            key_extractor: 이벤트별 그룹 키 (필드명 또는 함수, 예: "deviceId").
+                지정하면 partition_key 대신 키 단위로 파티션을 고정하여 배치를 구성
         
         Returns:
             전송된 이벤트 수
@@ -65,47 +193,183 @@ class EventProducer:
             logger.warning("No events to send")
             return 0
         
+        if key_extractor is not None:
+            return self._send_grouped(events, key_extractor)
+        
+        return self.send_stream(events, partition_key).events_sent
+    
+    def send_stream(
+        self,
+        events: Iterable[Dict[str, Any]],
+        partition_key: str = None,
+        log_every_batches: int = 100
+    ) -> "StreamSendResult":
+        """이터레이터/제너레이터에서 이벤트를 지연 로딩하며 전송
+        
+        이벤트를 하나씩 꺼내 직렬화하고 배치에 채우며, 배치가 꽉 차면 즉시 전송합니다.
+        메모리에는 항상 배치 하나 분량만 유지되므로 이벤트 수와 무관하게 사용량이 일정합니다.
+        
+        Args:
+            events: 이벤트 이터러블 (리스트, 제너레이터, 파일 리더 등)
+            partition_key: 파티션 키 (선택사항)
+            log_every_batches: 진행 상황 로그 간격 (배치 수, 0이면 생략)
+        
+        Returns:
+            누적 이벤트 수, 바이트 수, 배치 수를 담은 StreamSendResult
+        """
+        result = StreamSendResult()
+        batch_events = 0
+        
         try:
-            # 배치 생성
-            event_data_batch = self.producer.create_batch(
-                partition_key=partition_key if partition_key else None
-            )
+            event_data_batch = self.producer.create_batch(partition_key=partition_key)
             
-            # 이벤트 추가
-            sent_count = 0
-            for event in events:
-                event_json = json.dumps(event)
-                event_data = EventData(event_json)
-                
-                # 커스텀 속성 추가
-                event_data.properties = {
-                    "eventType": event.get("eventType", "unknown"),
-                    "deviceId": event.get("deviceId", "unknown")
-                }
-                
+            for event_data, event_count in self._iter_messages(events):
                 try:
                     event_data_batch.add(event_data)
-                    sent_count += 1
+                    batch_events += event_count
                 except ValueError:
                     # 배치가 꽉 찬 경우 먼저 전송
-                    logger.info(f"Batch full, sending {sent_count} events...")
-                    self.producer.send_batch(event_data_batch)
+                    self._flush_stream_batch(event_data_batch, batch_events, result)
+                    if log_every_batches and result.batches_sent % log_every_batches == 0:
+                        logger.info(
+                            f"Streaming progress: {result.events_sent} events, "
+                            f"{result.bytes_sent} bytes, {result.batches_sent} batches"
+                        )
                     
                     # 새 배치 생성 후 현재 이벤트 추가
                     event_data_batch = self.producer.create_batch(partition_key=partition_key)
                     event_data_batch.add(event_data)
-                    sent_count = 1
+                    batch_events = event_count
             
             # 남은 이벤트 전송
-            if sent_count > 0:
-                self.producer.send_batch(event_data_batch)
-                logger.info(f"Successfully sent {sent_count} events to Event Hub")
+            if len(event_data_batch) > 0:
+                self._flush_stream_batch(event_data_batch, batch_events, result)
             
-            return sent_count
+        except EventHubError as e:
+            logger.error(f"Failed to send events after {result.events_sent} sent: {e}")
+            raise
+        
+        if result.events_sent == 0:
+            logger.warning("No events to send")
+        else:
+            logger.info(
+                f"Successfully sent {result.events_sent} events to Event Hub "
+                f"({result.bytes_sent} bytes, {result.batches_sent} batches)"
+            )
+        return result
+    
+    def _iter_messages(self, events: Iterable[Dict[str, Any]]) -> Iterator[Tuple[EventData, int]]:
+        """이벤트를 전송 단위 EventData로 변환 (압축 시 여러 이벤트를 하나로 패킹)
+        
+        Yields:
+            (EventData, 포함된 이벤트 수)
+        """
+        if not self.compression:
+            for event in events:
+                event_data = to_event_data(event, self.codec)
+                self.tracer(event_data)
+                yield event_data, 1
+            return
+        
+        iterator = iter(events)
+        while True:
+            chunk = list(islice(iterator, self.events_per_message))
+            if not chunk:
+                return
+            event_data = to_packed_event_data(chunk, self.codec, self.compression)
+            self.tracer(event_data)
+            yield event_data, len(chunk)
+    
+    def _flush_stream_batch(self, event_data_batch, event_count: int, result: "StreamSendResult"):
+        """배치를 전송하고 누적 통계 갱신"""
+        self.producer.send_batch(event_data_batch)
+        result.events_sent += event_count
+        result.bytes_sent += event_data_batch.size_in_bytes
+        result.batches_sent += 1
+    
+    def _send_grouped(self, events: List[Dict[str, Any]], key_extractor: KeyExtractor) -> int:
+        """키별로 이벤트를 묶어 파티션 단위 배치로 패킹 후 전송
+        
+        같은 키는 항상 같은 파티션으로 전송되므로 키(디바이스) 단위 순서가 유지되고,
+        같은 파티션에 매핑된 여러 키의 이벤트가 하나의 배치를 함께 채웁니다.
+        배치 여유 공간은 이벤트 크기 추정치로 판단하여 add()의 ValueError에 의존하지 않습니다.
+        
+        Args:
+            events: 전송할 이벤트 리스트
+            key_extractor: 필드명 또는 이벤트에서 키를 꺼내는 함수
+        
+        Returns:
+            전송된 이벤트 수
+        """
+        extract = (
+            (lambda event: event.get(key_extractor))
+            if isinstance(key_extractor, str) else key_extractor
+        )
+        partition_ids = self._get_partition_ids()
+        
+        # 파티션별 대기열 (입력 순서 유지)
+        pending: Dict[str, List[EventData]] = {}
+        for event in events:
+            key = str(extract(event))
+            partition_id = partition_ids[zlib.crc32(key.encode("utf-8")) % len(partition_ids)]
+            event_data = to_event_data(event, self.codec)
+            self.tracer(event_data)
+            pending.setdefault(partition_id, []).append(event_data)
+        
+        total_sent = 0
+        batch_count = 0
+        tail_batches = []
+        
+        try:
+            for partition_id, event_datas in pending.items():
+                batch = self.producer.create_batch(partition_id=partition_id)
+                for event_data in event_datas:
+                    if len(batch) and not self._fits(batch, event_data):
+                        # 꽉 찬 배치는 즉시 전송
+                        self.producer.send_batch(batch)
+                        total_sent += len(batch)
+                        batch_count += 1
+                        batch = self.producer.create_batch(partition_id=partition_id)
+                    try:
+                        batch.add(event_data)
+                    except ValueError:
+                        # 추정치보다 실제 크기가 큰 경우에만 발생
+                        self.producer.send_batch(batch)
+                        total_sent += len(batch)
+                        batch_count += 1
+                        batch = self.producer.create_batch(partition_id=partition_id)
+                        batch.add(event_data)
+                tail_batches.append(batch)
             
+            # 덜 찬 마지막 배치들은 큰 것부터 전송
+            for batch in sorted(tail_batches, key=lambda b: b.size_in_bytes, reverse=True):
+                self.producer.send_batch(batch)
+                total_sent += len(batch)
+                batch_count += 1
+        
         except EventHubError as e:
             logger.error(f"Failed to send events: {e}")
             raise
+        
+        logger.info(
+            f"Successfully sent {total_sent} events in {batch_count} batches "
+            f"across {len(pending)} partitions"
+        )
+        return total_sent
+    
+    def _get_partition_ids(self) -> List[str]:
+        """파티션 ID 목록 (최초 1회 조회 후 캐시)"""
+        if self._partition_ids is None:
+            self._partition_ids = list(self.producer.get_partition_ids())
+        return self._partition_ids
+    
+    @staticmethod
+    def _fits(batch, event_data: EventData) -> bool:
+        """추정 크기 기준으로 배치에 이벤트가 들어갈 수 있는지 확인"""
+        estimated = sum(len(part) for part in event_data.body) + EVENT_SIZE_OVERHEAD
+        for name, value in (event_data.properties or {}).items():
+            estimated += len(str(name)) + len(str(value))
+        return batch.size_in_bytes + estimated <= batch.max_size_in_bytes
     
     def send_single_event(self, event: Dict[str, Any], partition_key: str = None) -> bool:
         """단일 이벤트 전송
@@ -0,0 +1,286 @@
+"""
+부하 생성기 - 다중 프로세스 Event Hub 전송 및 처리량 리포트
+
+EventProducer를 워커 프로세스마다 하나씩 만들고, 토큰 버킷으로 목표 전송률을 맞추며
+주기적으로 처리량, 전송 지연 백분위수, 오류 수를 출력합니다.
+--target local을 사용하면 Event Hub 없이 로컬 싱크로 전송하여 오프라인으로 측정할 수 있습니다.
+--target emulator는 워커마다 로컬 Event Hub 에뮬레이터(src.emulator)에 실제로 기록합니다.
+
+실행 예:
+    python -m src.producer.loadgen --workers 4 --rate 20000 --duration 60 --devices 1000
+    python -m src.producer.loadgen --target local --rate 0 --duration 10 --profile json-zstd
+    python -m src.producer.loadgen --target emulator --partitions 8 --rate 0 --duration 10
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from azure.eventhub import EventDataBatch
+
+from ..functions.shared_code.codecs import (
+    JSON_CONTENT_TYPE,
+    MSGPACK_CONTENT_TYPE,
+    TELEMETRY_BINARY_CONTENT_TYPE,
+    get_codec,
+)
+from ..utils.helpers import TokenBucket
+from .event_producer import EventProducer
+from .synthetic import SyntheticTelemetryGenerator
+
+# 페이로드 프로필: 이름 → (content type, 압축 방식)
+PAYLOAD_PROFILES: Dict[str, Tuple[str, Optional[str]]] = {
+    "json": (JSON_CONTENT_TYPE, None),
+    "msgpack": (MSGPACK_CONTENT_TYPE, None),
+    "binary": (TELEMETRY_BINARY_CONTENT_TYPE, None),
+    "json-zlib": (JSON_CONTENT_TYPE, "zlib"),
+    "json-zstd": (JSON_CONTENT_TYPE, "zstd"),
+    "binary-zstd": (TELEMETRY_BINARY_CONTENT_TYPE, "zstd"),
+}
+
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+
+
+class LocalSinkProducerClient:
+    """EventHubProducerClient 대체용 로컬 싱크
+
+    실제 EventDataBatch로 크기 계산은 그대로 수행하고, 전송은 카운트만 증가시킵니다.
+    send_latency_ms로 네트워크 지연을 흉내낼 수 있습니다.
+    """
+
+    def __init__(self, send_latency_ms: float = 0.0, max_size_in_bytes: int = DEFAULT_MAX_BATCH_BYTES):
+        self.send_latency = send_latency_ms / 1000.0
+        self.max_size_in_bytes = max_size_in_bytes
+        self.events_received = 0
+        self.bytes_received = 0
+
+    def create_batch(self, partition_id: Optional[str] = None, partition_key: Optional[str] = None, **kwargs):
+        return EventDataBatch(
+            max_size_in_bytes=self.max_size_in_bytes,
+            partition_id=partition_id,
+            partition_key=partition_key
+        )
+
+    def send_batch(self, batch, **kwargs):
+        if self.send_latency:
+            time.sleep(self.send_latency)
+        self.events_received += len(batch)
+        self.bytes_received += batch.size_in_bytes
+
+    def get_partition_ids(self) -> List[str]:
+        return ["0"]
+
+    def close(self):
+        pass
+
+
+def create_producer_client(
+    target: str,
+    local_latency_ms: float = 0.0,
+    partitions: int = 4,
+    storage_dir: Optional[str] = None
+):
+    """대상에 맞는 Producer 클라이언트 생성
+
+    Args:
+        target: "eventhub" (환경변수 EVENTHUB_NAMESPACE/EVENTHUB_NAME 사용), "local" 또는 "emulator"
+        local_latency_ms: 로컬 싱크 전송 지연 (밀리초)
+        partitions: emulator 대상의 파티션 수
+        storage_dir: emulator 대상의 파티션 로그 디렉터리 (None이면 메모리)
+    """
+    if target == "local":
+        return LocalSinkProducerClient(send_latency_ms=local_latency_ms)
+    if target == "emulator":
+        from ..emulator import LocalEventHub, LocalProducerClient
+        return LocalProducerClient(LocalEventHub(partition_count=partitions, storage_dir=storage_dir))
+
+    from azure.eventhub import EventHubProducerClient
+    from azure.identity import DefaultAzureCredential
+
+    namespace = os.getenv("EVENTHUB_NAMESPACE")
+    if not namespace:
+        raise ValueError("EVENTHUB_NAMESPACE not set")
+    return EventHubProducerClient(
+        fully_qualified_namespace=namespace,
+        eventhub_name=os.getenv("EVENTHUB_NAME", "telemetry_events"),
+        credential=DefaultAzureCredential()
+    )
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """정렬된 값 목록의 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _worker(worker_id: int, options: Dict[str, Any], results: "mp.Queue"):
+    """워커 프로세스: 목표 전송률에 맞춰 이벤트를 생성/전송하고 주기적으로 통계 보고"""
+    content_type, compression = PAYLOAD_PROFILES[options["profile"]]
+    storage_dir = options.get("storage_dir")
+    client = create_producer_client(
+        options["target"],
+        options["local_latency_ms"],
+        options.get("partitions", 4),
+        os.path.join(storage_dir, f"worker-{worker_id}") if storage_dir else None
+    )
+    producer = EventProducer(client, codec=get_codec(content_type), compression=compression)
+
+    # 워커마다 디바이스 구간과 시드를 나눠 중복 없는 재현 가능한 이벤트 생성
+    devices = [
+        f"device-{i:05d}"
+        for i in range(worker_id, options["devices"], options["workers"])
+    ] or [f"device-{worker_id:05d}"]
+    generator = SyntheticTelemetryGenerator(devices=devices, seed=options["seed"] + worker_id)
+
+    worker_rate = options["rate"] / options["workers"] if options["rate"] > 0 else 0
+    bucket = TokenBucket(worker_rate, capacity=max(worker_rate, options["batch_size"]))
+    batch_size = options["batch_size"]
+
+    deadline = time.monotonic() + options["duration"]
+    next_report = time.monotonic() + options["report_interval"]
+    sent = errors = 0
+    latencies: List[float] = []
+
+    try:
+        while time.monotonic() < deadline:
+            bucket.acquire(batch_size)
+            events = generator.events(batch_size)
+
+            start = time.perf_counter()
+            try:
+                sent += producer.send_events_sync(events)
+            except Exception:
+                errors += len(events)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            now = time.monotonic()
+            if now >= next_report:
+                results.put({"worker": worker_id, "sent": sent, "errors": errors, "latencies": latencies})
+                sent = errors = 0
+                latencies = []
+                next_report = now + options["report_interval"]
+    finally:
+        results.put({"worker": worker_id, "sent": sent, "errors": errors, "latencies": latencies, "done": True})
+        producer.close()
+
+
+def _summarize(label: str, elapsed: float, sent: int, errors: int, latencies: List[float]) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    summary = {
+        "label": label,
+        "elapsed_s": elapsed,
+        "events_sent": sent,
+        "errors": errors,
+        "events_per_s": sent / elapsed if elapsed > 0 else 0.0,
+        "sends": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else 0.0,
+    }
+    print(
+        f"[{label}] {summary['events_per_s']:,.0f} events/s "
+        f"(sent={sent:,}, errors={errors:,}, sends={len(latencies):,}) "
+        f"latency p50={summary['p50_ms']:.2f}ms p90={summary['p90_ms']:.2f}ms "
+        f"p99={summary['p99_ms']:.2f}ms max={summary['max_ms']:.2f}ms",
+        flush=True
+    )
+    return summary
+
+
+def run_load(options: Dict[str, Any]) -> Dict[str, Any]:
+    """워커 프로세스를 실행하고 구간별/최종 처리량 리포트 출력
+
+    Returns:
+        최종 요약 딕셔너리
+    """
+    results: "mp.Queue" = mp.Queue()
+    workers = [
+        mp.Process(target=_worker, args=(i, options, results), daemon=True)
+        for i in range(options["workers"])
+    ]
+    started = time.monotonic()
+    for process in workers:
+        process.start()
+
+    total_sent = total_errors = 0
+    all_latencies: List[float] = []
+    interval_sent = interval_errors = 0
+    interval_latencies: List[float] = []
+    interval_start = started
+    finished = 0
+
+    while finished < len(workers):
+        try:
+            message = results.get(timeout=options["report_interval"])
+        except queue.Empty:
+            if not any(p.is_alive() for p in workers):
+                break
+            continue
+
+        interval_sent += message["sent"]
+        interval_errors += message["errors"]
+        interval_latencies.extend(message["latencies"])
+        finished += 1 if message.get("done") else 0
+
+        now = time.monotonic()
+        interval = now - interval_start
+        last = finished == len(workers)
+        if interval >= options["report_interval"] or last:
+            # 종료 직전의 짧은 잔여 구간은 처리량이 왜곡되므로 최종 합계에만 반영
+            if interval >= options["report_interval"] / 2:
+                _summarize(
+                    f"{now - started:6.1f}s", interval,
+                    interval_sent, interval_errors, interval_latencies
+                )
+            total_sent += interval_sent
+            total_errors += interval_errors
+            all_latencies.extend(interval_latencies)
+            interval_sent = interval_errors = 0
+            interval_latencies = []
+            interval_start = now
+
+    for process in workers:
+        process.join()
+
+    return _summarize("total", time.monotonic() - started, total_sent, total_errors, all_latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event Hub load generator")
+    parser.add_argument("--workers", type=int, default=max(os.cpu_count() or 1, 1), help="워커 프로세스 수")
+    parser.add_argument("--rate", type=float, default=1000, help="전체 목표 전송률 (events/s, 0이면 무제한)")
+    parser.add_argument("--duration", type=float, default=30, help="실행 시간 (초)")
+    parser.add_argument("--devices", type=int, default=1000, help="시뮬레이션 디바이스 수")
+    parser.add_argument("--profile", choices=sorted(PAYLOAD_PROFILES), default="json", help="페이로드 프로필")
+    parser.add_argument("--batch-size", type=int, default=500, help="send 호출당 이벤트 수")
+    parser.add_argument("--report-interval", type=float, default=5, help="리포트 간격 (초)")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    parser.add_argument("--target", choices=["eventhub", "local", "emulator"], default="eventhub", help="전송 대상")
+    parser.add_argument("--local-latency-ms", type=float, default=0.0, help="local 대상의 전송 지연 (밀리초)")
+    parser.add_argument("--partitions", type=int, default=4, help="emulator 대상의 파티션 수")
+    parser.add_argument("--storage-dir", default=None, help="emulator 대상의 파티션 로그 디렉터리 (기본값: 메모리)")
+    args = parser.parse_args()
+
+    # 배치마다 남는 Producer INFO 로그가 측정을 방해하지 않도록 경고 이상만 출력
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.target == "eventhub":
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    options = vars(args)
+    print(
+        f"Load test: workers={args.workers}, rate={args.rate or 'unlimited'}, "
+        f"duration={args.duration}s, devices={args.devices}, profile={args.profile}, target={args.target}"
+    )
+    run_load(options)
+
+
+if __name__ == "__main__":
+    main()
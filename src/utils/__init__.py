@@ -7,7 +7,10 @@ from .helpers import (
     validate_event_data,
     calculate_latency_ms,
     retry_with_backoff,
-    MetricsCollector
+    TokenBucket,
+    LatencyHistogram,
+    MetricsCollector,
+    MetricsSnapshot
 )
 
 __all__ = [
@@ -18,5 +21,8 @@ __all__ = [
     "validate_event_data",
     "calculate_latency_ms",
     "retry_with_backoff",
-    "MetricsCollector"
+    "TokenBucket",
+    "LatencyHistogram",
+    "MetricsCollector",
+    "MetricsSnapshot"
 ]
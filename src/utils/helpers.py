@@ -1,11 +1,19 @@
 """
 유틸리티 함수 모음
 """
-import json
 import logging
+import time
 from typing import Any, Dict, Optional
 from datetime import datetime, timedelta
 
+from ..functions.shared_code.codecs import JSON_CODEC, CodecError
+# 지연 히스토그램/스레드별 샤드 수집기는 Function App과 공유
+from ..functions.shared_code.metrics import LatencyHistogram, MetricsCollector, MetricsSnapshot  # noqa: F401
+# 토큰 버킷은 알림 전송(shared_code.alert_dispatch)과 같은 구현을 사용
+from ..functions.shared_code.rate_limit import TokenBucket  # noqa: F401
+# 단계별 지연 추적과 같은 시각 해석(시간대 없으면 UTC)을 사용
+from ..functions.shared_code.tracing import calculate_latency_ms  # noqa: F401
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,8 +61,8 @@ def safe_json_loads(json_str: str, default: Any = None) -> Any:
         파싱된 객체 또는 기본값
     """
     try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
+        return JSON_CODEC.decode(json_str)
+    except CodecError as e:
         logger.error(f"JSON parsing failed: {e}")
         return default
 
@@ -70,8 +78,8 @@ def safe_json_dumps(obj: Any, default: str = "{}") -> str:
         JSON 문자열
     """
     try:
-        return json.dumps(obj, ensure_ascii=False, default=str)
-    except (TypeError, ValueError) as e:
+        return JSON_CODEC.dumps(obj)
+    except CodecError as e:
         logger.error(f"JSON serialization failed: {e}")
         return default
 
@@ -104,26 +112,6 @@ def validate_event_data(event: Dict[str, Any]) -> tuple[bool, Optional[str]]:
     return True, None
 
 
-def calculate_latency_ms(start_time: str, end_time: Optional[str] = None) -> float:
-    """레이턴시 계산 (밀리초)
-    
-    Args:
-        start_time: 시작 시간 (ISO 8601)
-        end_time: 종료 시간 (ISO 8601, None이면 현재 시간)
-    
-    Returns:
-        레이턴시 (밀리초)
-    """
-    start = parse_timestamp(start_time)
-    end = parse_timestamp(end_time) if end_time else datetime.utcnow()
-    
-    if start is None or end is None:
-        return 0.0
-    
-    delta = end - start
-    return delta.total_seconds() * 1000
-
-
 def retry_with_backoff(func, max_retries: int = 3, initial_delay: float = 1.0):
     """지수 백오프 재시도 데코레이터
     
@@ -159,46 +147,3 @@ def retry_with_backoff(func, max_retries: int = 3, initial_delay: float = 1.0):
     
     return wrapper
 
-
-class MetricsCollector:
-    """간단한 메트릭 수집기"""
-    
-    def __init__(self):
-        self.metrics = {
-            "events_sent": 0,
-            "events_received": 0,
-            "events_processed": 0,
-            "events_failed": 0,
-            "total_latency_ms": 0.0,
-        }
-    
-    def increment(self, metric_name: str, value: float = 1.0):
-        """메트릭 증가"""
-        if metric_name in self.metrics:
-            self.metrics[metric_name] += value
-    
-    def record_latency(self, latency_ms: float):
-        """레이턴시 기록"""
-        self.metrics["total_latency_ms"] += latency_ms
-    
-    def get_average_latency(self) -> float:
-        """평균 레이턴시 계산"""
-        if self.metrics["events_processed"] == 0:
-            return 0.0
-        return self.metrics["total_latency_ms"] / self.metrics["events_processed"]
-    
-    def get_summary(self) -> Dict[str, Any]:
-        """메트릭 요약 반환"""
-        return {
-            **self.metrics,
-            "average_latency_ms": self.get_average_latency(),
-            "success_rate": (
-                self.metrics["events_processed"] / 
-                max(self.metrics["events_received"], 1)
-            ) * 100
-        }
-    
-    def reset(self):
-        """메트릭 초기화"""
-        for key in self.metrics:
-            self.metrics[key] = 0 if isinstance(self.metrics[key], int) else 0.0
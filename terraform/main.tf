@@ -138,6 +138,10 @@ module "cosmosdb" {
           partition_key_path = "/deviceId"
           throughput         = null
         }
+        aggregates = {
+          partition_key_path = "/partitionKey" # "device:<deviceId>" | "facility:<facility>"
+          throughput         = null
+        }
         leases = {
           partition_key_path = "/id"
           throughput         = null # For Cosmos DB Change Feed leases
@@ -188,6 +192,48 @@ module "function_app" {
     COSMOS_DB_DATABASE_NAME               = "serverless_db"
     COSMOS_DB_CONTAINER_NAME              = "events"
 
+    # Logging - 이벤트별 상세 로그 샘플링 비율 (배치 요약은 항상 기록)
+    EVENT_LOG_SAMPLE_RATE = "0.01"
+
+    # 대용량 배치 병렬 디코딩/변환 (serial | thread | process, 임계값 미만은 직렬)
+    EVENT_PARALLEL_MODE      = "serial"
+    EVENT_PARALLEL_THRESHOLD = "5000"
+
+    # 중복 이벤트 제거 (id | sequence, 워커 프로세스 내 LRU + TTL 캐시)
+    DEDUP_ENABLED     = "true"
+    DEDUP_KEY         = "id"
+    DEDUP_TTL_SECONDS = "600"
+
+    # Cosmos 쓰기 경로 (binding | bulk - bulk는 azure.cosmos.aio로 직접 upsert)
+    COSMOS_WRITE_MODE           = "binding"
+    COSMOS_BULK_MAX_CONCURRENCY = "16"
+
+    # Change Feed 윈도우 집계 (tumbling:초, sliding:크기/간격) - aggregates 컨테이너에 저장
+    AGGREGATION_WINDOWS                  = "tumbling:60,sliding:300/60"
+    AGGREGATION_ALLOWED_LATENESS_SECONDS = "30"
+
+    # 디바이스별 이상 탐지 (welford | ewma)
+    # 상태 스냅샷은 기본 비활성화 - /home은 모든 인스턴스가 공유하므로 켤 때는 경로에 {instance}를 넣어 인스턴스별로 저장
+    # 예: ANOMALY_STATE_PATH = "/home/data/anomaly-state-{instance}.npz"
+    ANOMALY_METHOD      = "welford"
+    ANOMALY_Z_THRESHOLD = "4.0"
+    ANOMALY_STATE_PATH  = ""
+
+    # 알림 웹훅 전송 (비어 있으면 비활성화) - (level, 메시지 지문, deviceId)별 윈도우 병합 후 초당 전송 수 제한
+    ALERT_WEBHOOK_URL              = ""
+    ALERT_COALESCE_WINDOW_SECONDS  = "30"
+    ALERT_DISPATCH_RATE_PER_SECOND = "5"
+
+    # 분석용 Parquet 아카이브 (date/facility 파티션, 크기/시간 기준 파일 롤링) - 기본 비활성화
+    # /home은 모든 인스턴스가 공유하는 콘텐츠 공유이므로 필요할 때만 경로 지정 (예: "/home/data/archive")
+    ARCHIVE_PATH         = ""
+    ARCHIVE_MAX_FILE_MB  = "64"
+    ARCHIVE_ROLL_SECONDS = "300"
+
+    # 배치 단위 집계 메트릭 - GET /metrics(Prometheus) 노출, Application Insights에는 간격마다 증가분만 전송 (샘플링 대상 아님)
+    METRICS_ENABLED                = "true"
+    METRICS_FLUSH_INTERVAL_SECONDS = "60"
+
     # Storage Settings (이미 Managed Identity 사용 중)
     # AzureWebJobsStorage는 function_app 모듈에서 자동 설정됨
   }
@@ -107,7 +107,9 @@ data "archive_file" "function_code" {
     "venv",
     ".python_packages",
     "local.settings.json",
-    ".funcignore"
+    ".funcignore",
+    "tests",
+    ".pytest_cache"
   ]
 }
 